@@ -27,7 +27,6 @@ import warnings
 warnings.simplefilter("ignore", DeprecationWarning)
 warnings.simplefilter("ignore", FutureWarning)
 import pandas as pd
-from PKDevTools.classes.ColorText import colorText
 from PKDevTools.classes.PKDateUtilities import PKDateUtilities
 from PKDevTools.classes.log import default_logger
 from pkscreener.classes import Utility
@@ -120,17 +119,10 @@ def backtest(
         backTestedData = pd.DataFrame(columns=columns)
     backTestedStock["Stock"] = stock
     backTestedStock["Date"] = saveDict["Date"]
-    backTestedStock["Consol."] = screenedDict["Consol."]
-    backTestedStock["Breakout"] = screenedDict["Breakout"]
-    backTestedStock["MA-Signal"] = screenedDict["MA-Signal"]
-    backTestedStock["Volume"] = screenedDict["Volume"]
-    backTestedStock["LTP"] = screenedDict["LTP"]
-    backTestedStock["52Wk-H"] = screenedDict["52Wk-H"]
-    backTestedStock["52Wk-L"] = screenedDict["52Wk-L"]
-    backTestedStock["RSI"] = screenedDict["RSI"]
-    backTestedStock["Trend"] = screenedDict["Trend"]
-    backTestedStock["Pattern"] = screenedDict["Pattern"]
-    backTestedStock["CCI"] = screenedDict["CCI"]
+    # The saved (plain) values go into the backtest results. They get
+    # coloured only when the results are shown.
+    for col in ["Consol.", "Breakout", "MA-Signal", "Volume", "LTP", "52Wk-H", "52Wk-L", "RSI", "Trend", "Pattern", "CCI"]:
+        backTestedStock[col] = saveDict[col]
     for prd in calcPeriods:
         try:
             backTestedStock[f"{abs(prd)}-Pd"] = ""
@@ -138,13 +130,7 @@ def backtest(
             backTestedStock[f"Growth{prd}"] = ""
             rolling_pct = data["Close"].pct_change(periods=prd) * 100
             pct_change = rolling_pct.iloc[prd]
-            if not sellSignal:
-                colored_pct = colorText.GREEN if pct_change >= 0 else colorText.FAIL
-            else:
-                colored_pct = colorText.FAIL if pct_change >= 0 else colorText.GREEN
-            backTestedStock[f"{abs(prd)}-Pd"] = (
-                colored_pct + "%.2f%%" % pct_change + colorText.END
-            )
+            backTestedStock[f"{abs(prd)}-Pd"] = round(float(pct_change), 2)
         except Exception:# pragma: no cover
             pass
         # Let's capture the portfolio data, if available
@@ -167,10 +153,11 @@ def backtest(
         pass
     return backTestedData
 
-# Prepares a backtest summary based on the color codes of individual days or stocks
+# Prepares a backtest summary based on the changes over individual days or stocks
+# (gains for buy signals, losses for sell signals being the right predictions).
 # Based on that it calculates an overall success rate of a given strategy for which
 # this backtest is run.
-def backtestSummary(df):
+def backtestSummary(df, sellSignal=False):
     summary = {}
     overall = {}
     summaryList = []
@@ -191,18 +178,10 @@ def backtestSummary(df):
         summary["Stock"] = stock_name
         for col in df_group.keys():
             if str(col).endswith("-Pd"):
-                col_positives = (
-                    df_group[col]
-                    .astype(str)
-                    .str.count(colorText.GREEN.replace("[", "\["))
-                    .sum()
-                )
-                col_negatives = (
-                    df_group[col]
-                    .astype(str)
-                    .str.count(colorText.FAIL.replace("[", "\["))
-                    .sum()
-                )
+                changes = pd.to_numeric(df_group[col], errors="coerce").dropna()
+                rightPredictions = (changes >= 0) != sellSignal
+                col_positives = rightPredictions.sum()
+                col_negatives = (~rightPredictions).sum()
                 group_positives += col_positives
                 group_negatives += col_negatives
                 overall[col] = [
@@ -23,9 +23,12 @@
 
 """
 
-from PKDevTools.classes.ColorText import colorText
+import numpy as np
+import pandas as pd
 
+from pkscreener.classes import Pktalib
 from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.PKResultRecord import PKResultRecord, PKSignal
 # from PKDevTools.classes.log import measure_time
 
 class CandlePatterns:
@@ -52,291 +55,195 @@ class CandlePatterns:
         "Gravestone Doji",
     ]
 
-    def __init__(self):
-        pass
+    # Number of most recent candles that the patterns are looked for in
+    patternCandles = 4
+    # The pktalib pattern functions in the order of priority along with the
+    # (signal, screen text, saved text) for a bullish and a bearish signal
+    patternTable = [
+        ("CDLDOJI", (PKSignal.NONE, "Doji", "Doji"), (PKSignal.NONE, "Doji", "Doji")),
+        ("CDLMORNINGSTAR", (PKSignal.BULLISH, "Morning Star", "Morning Star"), (PKSignal.BULLISH, "Morning Star", "Morning Star")),
+        ("CDLMORNINGDOJISTAR", (PKSignal.BULLISH, "Morning Doji Star", "Morning Doji Star"), (PKSignal.BULLISH, "Morning Doji Star", "Morning Doji Star")),
+        ("CDLEVENINGSTAR", (PKSignal.BEARISH, "Evening Star", "Evening Star"), (PKSignal.BEARISH, "Evening Star", "Evening Star")),
+        ("CDLEVENINGDOJISTAR", (PKSignal.BEARISH, "Evening Doji Star", "Evening Doji Star"), (PKSignal.BEARISH, "Evening Doji Star", "Evening Doji Star")),
+        ("CDLLADDERBOTTOM", (PKSignal.BULLISH, "Bullish Ladder Bottom", "Bullish Ladder Bottom"), (PKSignal.BEARISH, "Bearish Ladder Bottom", "Bearish Ladder Bottom")),
+        ("CDL3LINESTRIKE", (PKSignal.BULLISH, "3 Line Strike", "3 Line Strike"), (PKSignal.BEARISH, "3 Line Strike", "3 Line Strike")),
+        ("CDL3BLACKCROWS", (PKSignal.BEARISH, "3 Black Crows", "3 Black Crows"), (PKSignal.BEARISH, "3 Black Crows", "3 Black Crows")),
+        ("CDL3INSIDE", (PKSignal.BULLISH, "3 Inside Up", "3 Outside Up"), (PKSignal.BEARISH, "3 Inside Down", "3 Inside Down")),
+        ("CDL3OUTSIDE", (PKSignal.BULLISH, "3 Outside Up", "3 Outside Up"), (PKSignal.BEARISH, "3 Outside Down", "3 Outside Down")),
+        ("CDL3WHITESOLDIERS", (PKSignal.BULLISH, "3 White Soldiers", "3 White Soldiers"), (PKSignal.BULLISH, "3 White Soldiers", "3 White Soldiers")),
+        ("CDLHARAMI", (PKSignal.BULLISH, "Bullish Harami", "Bullish Harami"), (PKSignal.BEARISH, "Bearish Harami", "Bearish Harami")),
+        ("CDLHARAMICROSS", (PKSignal.BULLISH, "Bullish Harami Cross", "Bullish Harami Cross"), (PKSignal.BEARISH, "Bearish Harami Cross", "Bearish Harami Cross")),
+        ("CDLMARUBOZU", (PKSignal.BULLISH, "Bullish Marubozu", "Bullish Marubozu"), (PKSignal.BEARISH, "Bearish Marubozu", "Bearish Marubozu")),
+        ("CDLHANGINGMAN", (PKSignal.BEARISH, "Hanging Man", "Hanging Man"), (PKSignal.BEARISH, "Hanging Man", "Hanging Man")),
+        ("CDLHAMMER", (PKSignal.BULLISH, "Hammer", "Hammer"), (PKSignal.BULLISH, "Hammer", "Hammer")),
+        ("CDLINVERTEDHAMMER", (PKSignal.BULLISH, "Inverted Hammer", "Inverted Hammer"), (PKSignal.BULLISH, "Inverted Hammer", "Inverted Hammer")),
+        ("CDLSHOOTINGSTAR", (PKSignal.BEARISH, "Shooting Star", "Shooting Star"), (PKSignal.BEARISH, "Shooting Star", "Shooting Star")),
+        ("CDLDRAGONFLYDOJI", (PKSignal.BULLISH, "Dragonfly Doji", "Dragonfly Doji"), (PKSignal.BULLISH, "Dragonfly Doji", "Dragonfly Doji")),
+        ("CDLGRAVESTONEDOJI", (PKSignal.BEARISH, "Gravestone Doji", "Gravestone Doji"), (PKSignal.BEARISH, "Gravestone Doji", "Gravestone Doji")),
+        ("CDLENGULFING", (PKSignal.BULLISH, "Bullish Engulfing", "Bullish Engulfing"), (PKSignal.BEARISH, "Bearish Engulfing", "Bearish Engulfing")),
+    ]
 
-    def findCurrentSavedValue(self, screenDict, saveDict, key):
-        existingScreen = screenDict.get(key)
-        existingSave = saveDict.get(key)
-        existingScreen = f"{existingScreen}, " if (existingScreen is not None and len(existingScreen) > 0) else ""
-        existingSave = f"{existingSave}, " if (existingSave is not None and len(existingSave) > 0) else ""
-        return existingScreen, existingSave
+    def __init__(self):
+        # Pattern values of the candle windows of the whole universe, computed
+        # in one go by precomputePatterns(), keyed by the window contents.
+        self.precomputedHits = {}
+
+    def windowKey(self, window):
+        # window: the chronological OHLC values of the last few candles
+        return np.ascontiguousarray(window, dtype=np.float64).tobytes()
+
+    def candleWindow(self, stockData):
+        """
+        Returns the OHLC values (oldest first) of the last patternCandles
+        candles, the same ones that findPattern looks at after the data has
+        been pre-processed. stockData is a DataFrame or its to_dict("split")
+        form with the oldest date at the top.
+        """
+        if stockData is None:
+            return None
+        if isinstance(stockData, pd.DataFrame):
+            columns = list(stockData.columns)
+            rows = stockData.to_numpy()
+        else:
+            columns = list(stockData.get("columns", []))
+            rows = stockData.get("data", [])
+        try:
+            ohlc = [columns.index(column) for column in ["Open", "High", "Low", "Close"]]
+        except ValueError:
+            return None
+        window = []
+        for row in reversed(rows):
+            try:
+                values = np.array(row, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = pd.to_numeric(pd.Series(row), errors="coerce").to_numpy(dtype=np.float64)
+            values[np.isinf(values)] = np.nan
+            if np.isnan(values).all():
+                # preprocessData drops these rows
+                continue
+            window.append(values[ohlc])
+            if len(window) == self.patternCandles:
+                break
+        if len(window) == 0:
+            return None
+        return np.array(window[::-1], dtype=np.float64)
+
+    def patternValues(self, data):
+        # Evaluates each pattern in the order of priority for one stock.
+        # data has the oldest candle at the top.
+        values = {}
+        for funcName, _, _ in CandlePatterns.patternTable:
+            check = getattr(pktalib, funcName)(
+                data["Open"], data["High"], data["Low"], data["Close"]
+            )
+            values[funcName] = 0 if check is None else check.tail(1).item()
+        return values
+
+    def patternHitMatrix(self, stockDict):
+        """
+        Evaluates all the candle patterns for the last patternCandles candles
+        of every stock in stockDict in one vectorised sweep. Returns a
+        (symbol x pattern) DataFrame of the signed pattern values with the
+        columns in the same order of priority as findPattern uses.
+        """
+        return self._patternHitMatrix(self.candleWindows(stockDict))
+
+    def candleWindows(self, stockDict):
+        windows = {}
+        for symbol, stockData in stockDict.items():
+            window = self.candleWindow(stockData)
+            if window is not None:
+                windows[symbol] = window
+        return windows
+
+    def canBatchPatterns(self):
+        # Only TA-Lib can find a pattern for all the stocks in one call. With
+        # pandas_ta the patterns still run one stock at a time.
+        talib = getattr(Pktalib, "talib", None)
+        return talib is not None and talib.__name__ == "talib"
+
+    def _patternHitMatrix(self, windows):
+        columns = [funcName for funcName, _, _ in CandlePatterns.patternTable]
+        talib = getattr(Pktalib, "talib", None)
+        canBatch = self.canBatchPatterns()
+        batchSymbols = []
+        otherSymbols = []
+        for symbol, window in windows.items():
+            if canBatch and window.shape[0] == self.patternCandles and not np.isnan(window).any():
+                batchSymbols.append(symbol)
+            else:
+                otherSymbols.append(symbol)
+        hits = np.zeros((len(batchSymbols), len(columns)), dtype=np.int64)
+        if len(batchSymbols) > 0:
+            from talib import abstract
+            # Lay the windows of all stocks end to end so that each pattern
+            # takes a single TA-Lib call. The value on the last candle of a
+            # window only depends on that window if the pattern does not need
+            # more candles than the window has. Otherwise, just like for a
+            # single stock, the pattern cannot be found.
+            stacked = np.stack([windows[symbol] for symbol in batchSymbols]).reshape(-1, 4)
+            opens, highs, lows, closes = [np.ascontiguousarray(stacked[:, i]) for i in range(4)]
+            lastCandles = slice(self.patternCandles - 1, None, self.patternCandles)
+            for columnIndex, funcName in enumerate(columns):
+                if abstract.Function(funcName).lookback > self.patternCandles - 1:
+                    continue
+                hits[:, columnIndex] = getattr(talib, funcName)(opens, highs, lows, closes)[lastCandles]
+        matrix = pd.DataFrame(hits, index=batchSymbols, columns=columns)
+        if len(otherSymbols) > 0:
+            others = []
+            for symbol in otherSymbols:
+                window = pd.DataFrame(windows[symbol], columns=["Open", "High", "Low", "Close"])
+                try:
+                    others.append(self.patternValues(window))
+                except Exception:  # pragma: no cover
+                    others.append({funcName: 0 for funcName in columns})
+            matrix = pd.concat([matrix, pd.DataFrame(others, index=otherSymbols, columns=columns)])
+        return matrix.astype(np.int64)
+
+    def precomputePatterns(self, stockDict):
+        """
+        Computes the pattern hit matrix for the whole universe and keeps the
+        values around so that findPattern can look them up instead of running
+        all the patterns for each stock. Returns the hit matrix.
+        """
+        windows = self.candleWindows(stockDict)
+        matrix = self._patternHitMatrix(windows)
+        self.precomputedHits = {}
+        for symbol, values in zip(matrix.index, matrix.to_dict("records")):
+            self.precomputedHits[self.windowKey(windows[symbol])] = values
+        return matrix
+
+    def precomputedValues(self, data):
+        # data: the candles (oldest first) that findPattern looks at
+        if len(self.precomputedHits) == 0:
+            return None
+        try:
+            window = data[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)
+        except Exception:  # pragma: no cover
+            return None
+        return self.precomputedHits.get(self.windowKey(window))
 
     #@measure_time
     # Find candle-stick patterns
     # Arrange if statements with max priority from top to bottom
-    def findPattern(self, data, dict, saveDict):
-        data = data.head(4)
+    def findPattern(self, data, dict, saveDict, hits=None):
+        data = data.head(self.patternCandles)
         data = data[::-1]
         hasCandleStickPattern = False
         if "Pattern" not in saveDict.keys():
-            saveDict["Pattern"] = ""
-            dict["Pattern"] = ""
+            PKResultRecord.setField(dict, saveDict, "Pattern", "")
         # Only 'doji' and 'inside' is internally implemented by pandas_ta.
         # Otherwise, for the rest of the candle patterns, they also need
         # TA-Lib.
-        check = pktalib.CDLDOJI(data["Open"], data["High"], data["Low"], data["Close"])
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + f"Doji" + colorText.END 
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMORNINGSTAR(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Morning Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Morning Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMORNINGDOJISTAR(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Morning Doji Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Morning Doji Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLEVENINGSTAR(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Evening Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Evening Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLEVENINGDOJISTAR(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Evening Doji Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Evening Doji Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLLADDERBOTTOM(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"Bullish Ladder Bottom" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Ladder Bottom"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"Bearish Ladder Bottom" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Ladder Bottom"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3LINESTRIKE(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Line Strike" + colorText.END 
-                )
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Line Strike" + colorText.END 
-                )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Line Strike"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3BLACKCROWS(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"3 Black Crows" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Black Crows"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3INSIDE(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Inside Up" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Up"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Inside Down" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Inside Down"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3OUTSIDE(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"3 Outside Up" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Up"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"3 Outside Down" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 Outside Down"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDL3WHITESOLDIERS(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"3 White Soldiers" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"3 White Soldiers"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHARAMI(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN + f"Bullish Harami" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Harami"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL + f"Bearish Harami" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Harami"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHARAMICROSS(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Harami Cross" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Harami Cross"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL
-                    + f"Bearish Harami Cross" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Harami Cross"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLMARUBOZU(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Marubozu" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Marubozu"
-            else:
-                dict["Pattern"] = (
-                    colorText.FAIL + f"Bearish Marubozu" + colorText.END 
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Marubozu"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHANGINGMAN(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Hanging Man" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Hanging Man"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLHAMMER(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Hammer" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Hammer"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLINVERTEDHAMMER(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Inverted Hammer" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Inverted Hammer"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLSHOOTINGSTAR(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Shooting Star" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Shooting Star"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLDRAGONFLYDOJI(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.GREEN + f"Dragonfly Doji" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Dragonfly Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLGRAVESTONEDOJI(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                colorText.FAIL + f"Gravestone Doji" + colorText.END 
-            )
-            saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Gravestone Doji"
-            hasCandleStickPattern = True
-
-        check = pktalib.CDLENGULFING(
-            data["Open"], data["High"], data["Low"], data["Close"]
-        )
-        if check is not None and check.tail(1).item() != 0:
-            if check.tail(1).item() > 0:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.GREEN
-                    + f"Bullish Engulfing" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bullish Engulfing"
-            else:
-                dict["Pattern"] = (self.findCurrentSavedValue(dict,saveDict,"Pattern")[0] + 
-                    colorText.FAIL
-                    + f"Bearish Engulfing" 
-                    + colorText.END
-                )
-                saveDict["Pattern"] = self.findCurrentSavedValue(dict,saveDict,"Pattern")[1] +  f"Bearish Engulfing"
-            hasCandleStickPattern = True
-        if hasCandleStickPattern:
-            return True
-        return False
+        if hits is None:
+            hits = self.precomputedValues(data)
+        if hits is None:
+            hits = self.patternValues(data)
+        for funcName, bullish, bearish in CandlePatterns.patternTable:
+            value = hits[funcName]
+            if value == 0:
+                continue
+            signal, screenText, saveText = bullish if value > 0 else bearish
+            PKResultRecord.appendField(dict, saveDict, "Pattern", saveText, parts=[(screenText, signal)])
+            hasCandleStickPattern = True
+        return hasCandleStickPattern
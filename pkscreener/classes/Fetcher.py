@@ -223,6 +223,39 @@ class screenerStockDataFetcher(nseStockDataFetcher):
         )
         return nifty_buy, banknifty_buy, nifty_sell, banknifty_sell
 
+    # Fetch the intraday candles of all the symbols with one request. When start
+    # is given, only the candles from that time onwards are fetched.
+    def fetchFiveEmaBars(self, interval, symbols=None, start=None, proxyServer=None):
+        symbols = ["^NSEI", "^NSEBANK"] if symbols is None else list(symbols)
+        if start is None:
+            data = yf.download(
+                tickers=symbols,
+                period="5d",
+                interval=interval,
+                proxy=proxyServer,
+                progress=False,
+                group_by="ticker",
+                timeout=self.configManager.longTimeout,
+            )
+        else:
+            data = yf.download(
+                tickers=symbols,
+                start=start,
+                interval=interval,
+                proxy=proxyServer,
+                progress=False,
+                group_by="ticker",
+                timeout=self.configManager.longTimeout,
+            )
+        bars = {}
+        for symbol in symbols:
+            try:
+                bars[symbol] = data[symbol].dropna(how="all") if len(symbols) > 1 else data
+            except KeyError as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+                bars[symbol] = None
+        return bars
+
     # Load stockCodes from the watchlist.xlsx
     def fetchWatchlist(self):
         createTemplate = False
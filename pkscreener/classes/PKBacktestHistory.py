@@ -0,0 +1,97 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+
+class PKBacktestHistory:
+    """
+    The candles of one stock for the backtests that screen the stock at
+    every backtest date in a single pass. The candles get pre-processed
+    once for the whole history. Since all the indicators only look back,
+    the data as it was on each of the backtest dates is then a slice of
+    it instead of another round of pre-processing.
+    """
+    def __init__(self, stock, data=None):
+        self.stock = stock
+        self.data = None
+        self.preprocessed = {}
+        self.ltpChecks = {}
+        self.candlesKept = None
+        if data is not None:
+            self.load(data)
+
+    def load(self, data):
+        self.data = data
+        self.preprocessed = {}
+        self.ltpChecks = {}
+        # preprocessData drops the candles without any values
+        hasValues = np.isfinite(data.select_dtypes(include=[np.number]).to_numpy(dtype=float)).any(axis=1)
+        hasValues |= data.select_dtypes(exclude=[np.number]).notna().any(axis=1).to_numpy()
+        self.candlesKept = np.cumsum(hasValues)
+
+    def owns(self, data):
+        return data is not None and data is self.data
+
+    def candlesUpTo(self, backtestDuration):
+        # Number of pre-processed candles in data.head(len(data) - backtestDuration)
+        numCandles = len(self.data) - backtestDuration
+        return int(self.candlesKept[numCandles - 1]) if numCandles > 0 else 0
+
+    def cleanedData(self, screener, backtestDuration, daysToLookback):
+        """
+        Returns the same (fullData, processedData) as
+        screener.preprocessData(data.head(len(data) - backtestDuration), daysToLookback)
+        """
+        fullData = self.preprocessed.get(daysToLookback)
+        if fullData is None:
+            fullData = screener.preprocessData(self.data, daysToLookback=daysToLookback)[0]
+            self.preprocessed[daysToLookback] = fullData
+        # The most recent candles come first. Each date gets its own copy so
+        # that nothing the validators do can leak into the other dates.
+        fullData = fullData.iloc[len(fullData) - self.candlesUpTo(backtestDuration):].copy()
+        return fullData, fullData.head(daysToLookback)
+
+    def ltpWithinRange(self, screener, backtestDuration, daysToLookback, minLTP, maxLTP, minChange=0):
+        """
+        Tells, for the data as it was on the given backtest date, whether
+        screener.validateLTP would find the LTP (and the change) within the
+        given range. Evaluated for all the dates at once.
+        """
+        key = (daysToLookback, minLTP, maxLTP, minChange)
+        ltpValid = self.ltpChecks.get(key)
+        if ltpValid is None:
+            self.cleanedData(screener, 0, daysToLookback)
+            close = self.preprocessed[daysToLookback]["Close"].to_numpy(dtype=float)[::-1]
+            close = np.where(np.isfinite(close), close, 0)
+            ltp = np.round(close, 2)
+            ltpValid = (ltp >= minLTP) & (ltp <= maxLTP)
+            if minChange != 0:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    pctChange = np.concatenate([[np.nan], (close[1:] / close[:-1] - 1) * 100])
+                pctChange[np.isinf(pctChange)] = 0
+                # Same rounding as the %Chng that validateLTP compares
+                ltpValid &= np.array([float("%.1f" % pct) >= minChange for pct in pctChange], dtype=bool)
+            self.ltpChecks[key] = ltpValid
+        numCandles = self.candlesUpTo(backtestDuration)
+        return None if numCandles == 0 else bool(ltpValid[numCandles - 1])
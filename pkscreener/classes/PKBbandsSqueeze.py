@@ -0,0 +1,135 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+class PKBbandsSqueeze(SingletonMixin, metaclass=SingletonType):
+    """
+    TTM squeeze states for the whole universe at once. The Bollinger bands
+    and the Keltner's channel of the most recent candles of all the stocks
+    are computed over stacked High/Low/Close matrices, the same way (TA-Lib
+    definitions) that ScreeningStatistics.findBbandsSqueeze does for one
+    stock at a time.
+    """
+    SQUEEZE_ON = "Squeeze-On"
+    SQUEEZE_OFF = "Squeeze-Off"
+    FIRED_BUY = "Fired-Buy"
+    FIRED_SELL = "Fired-Sell"
+
+    def __init__(self, timePeriod=20, numCandles=30):
+        super(PKBbandsSqueeze, self).__init__()
+        self.timePeriod = timePeriod
+        self.numCandles = numCandles
+
+    def recentCandles(self, stockData):
+        """
+        Returns the High/Low/Close of the most recent numCandles candles
+        (oldest first) that the screener looks at after pre-processing,
+        along with the total number of candles and the last date. stockData
+        is a DataFrame or its to_dict("split") form.
+        """
+        if stockData is None:
+            return None
+        if isinstance(stockData, pd.DataFrame):
+            columns, rows, index = list(stockData.columns), stockData.to_numpy(), list(stockData.index)
+        else:
+            columns, rows, index = list(stockData.get("columns", [])), stockData.get("data", []), stockData.get("index", [])
+        if any(column not in columns for column in ["High", "Low", "Close"]) or len(rows) < self.timePeriod:
+            return None
+        try:
+            try:
+                values = np.array(rows, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = pd.DataFrame(list(rows), columns=columns).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+            if not all(date <= nextDate for date, nextDate in zip(index, index[1:])):
+                return None
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return None
+        values[np.isinf(values)] = np.nan
+        candles = np.flatnonzero(~np.isnan(values).all(axis=1))
+        if len(candles) < self.timePeriod:
+            return None
+        recent = values[candles[-self.numCandles:]][:, [columns.index("High"), columns.index("Low"), columns.index("Close")]]
+        # findBbandsSqueeze fills the missing values with 0
+        return np.nan_to_num(recent, nan=0.0, posinf=0.0, neginf=0.0), len(candles), index[candles[-1]]
+
+    def squeezeStates(self, candles):
+        """
+        Returns the states of the stocks from their stacked candles of shape
+        (stocks, numCandles, High/Low/Close), comparing the 3rd most recent
+        candle with the ones after it.
+        """
+        high, low, close = candles[:, :, 0], candles[:, :, 1], candles[:, :, 2]
+        numStocks, numCandles = close.shape
+        period = self.timePeriod
+        closes = sliding_window_view(close, period, axis=1)
+        sma = np.full(close.shape, np.nan)
+        stdDev = np.full(close.shape, np.nan)
+        sma[:, period - 1:] = closes.mean(axis=2)
+        stdDev[:, period - 1:] = closes.std(axis=2)
+        bbandsUpper, bbandsLower = sma + 2 * stdDev, sma - 2 * stdDev
+        # Wilder's average true range, starting from the mean of the first true ranges
+        trueRange = np.full(close.shape, np.nan)
+        trueRange[:, 1:] = np.maximum.reduce([high[:, 1:] - low[:, 1:], np.abs(high[:, 1:] - close[:, :-1]), np.abs(low[:, 1:] - close[:, :-1])])
+        atr = np.full(close.shape, np.nan)
+        if numCandles > period:
+            atr[:, period] = trueRange[:, 1:period + 1].mean(axis=1)
+            for candle in range(period + 1, numCandles):
+                atr[:, candle] = (atr[:, candle - 1] * (period - 1) + trueRange[:, candle]) / period
+        keltnerLower, keltnerUpper = sma - atr * 1.5, sma + atr * 1.5
+        with np.errstate(invalid="ignore"):
+            squeeze = (keltnerLower < bbandsLower) & (bbandsLower < bbandsUpper) & (bbandsUpper < keltnerUpper)
+        states = np.full(numStocks, self.SQUEEZE_OFF, dtype=object)
+        fired = squeeze[:, -3] & ~squeeze[:, -1]
+        buy = np.abs(bbandsUpper[:, -1] - close[:, -1]) < np.abs(bbandsLower[:, -1] - close[:, -1])
+        states[fired & buy] = self.FIRED_BUY
+        states[fired & ~buy] = self.FIRED_SELL
+        states[squeeze[:, -3] & squeeze[:, -2] & squeeze[:, -1]] = self.SQUEEZE_ON
+        return states
+
+    def precompute(self, stockDict):
+        """
+        Returns {stock: (state, numCandles, lastDate)} for all the stocks so
+        that the screener can look up the state of a stock whose candles are
+        still the same.
+        """
+        candlesByLength = {}
+        for stock, stockData in stockDict.items():
+            candles = self.recentCandles(stockData)
+            if candles is not None:
+                candlesByLength.setdefault(len(candles[0]), {})[stock] = candles
+        squeezes = {}
+        # Stocks with fewer candles than numCandles go in their own stacks
+        for stocks in candlesByLength.values():
+            states = self.squeezeStates(np.stack([candles for candles, _, _ in stocks.values()]))
+            for (stock, (_, numCandles, lastDate)), state in zip(stocks.items(), states):
+                squeezes[stock] = (state, numCandles, lastDate)
+        return squeezes
+
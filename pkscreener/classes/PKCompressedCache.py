@@ -0,0 +1,350 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import io
+import json
+import lzma
+import os
+import pickle
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"PKSCACHE"
+VERSION = 1
+# Raw size of each block that gets compressed on its own
+BLOCK_SIZE = 4 * 1024 * 1024
+
+class PKCompressedCache:
+    """
+    Compressed binary format for the stock data cache. The candles of each
+    symbol are kept as typed arrays (the index as int64 nanoseconds and one
+    int64 or float64 array per column) instead of python lists, and are
+    compressed in blocks with the fastest codec that is installed: zstd, lz4
+    or otherwise zlib from the standard library (lzma for the smallest files).
+    Anything that does not fit into arrays (MF/FII/FairValue etc.) is kept
+    as a pickle alongside.
+    """
+    codecIds = {"zlib": 1, "lzma": 2, "zstd": 3, "lz4": 4}
+
+    def availableCodecs():
+        codecs = []
+        if find_spec("zstandard") is not None:
+            codecs.append("zstd")
+        if find_spec("lz4") is not None:
+            codecs.append("lz4")
+        codecs.extend(["zlib", "lzma"])
+        return codecs
+
+    def defaultCodec():
+        return PKCompressedCache.availableCodecs()[0]
+
+    def compress(raw, codec):
+        if codec == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor(level=3).compress(raw)
+        if codec == "lz4":
+            import lz4.frame
+            return lz4.frame.compress(raw)
+        if codec == "lzma":
+            return lzma.compress(raw, preset=1)
+        return zlib.compress(raw, 1)
+
+    def decompress(data, codec):
+        if codec == "zstd":
+            import zstandard
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == "lz4":
+            import lz4.frame
+            return lz4.frame.decompress(data)
+        if codec == "lzma":
+            return lzma.decompress(data)
+        return zlib.decompress(data)
+
+    def isCompressed(filePath):
+        try:
+            with open(filePath, "rb") as f:
+                return f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return False
+
+    def symbolArrays(stockData):
+        # Returns (meta, [arrays]) for the symbol or None if its candles can't
+        # be kept as typed arrays.
+        index = stockData.get("index")
+        columns = stockData.get("columns")
+        data = stockData.get("data")
+        if index is None or columns is None or data is None or len(index) != len(data):
+            return None
+        tz = index[0].tz if len(index) > 0 and isinstance(index[0], pd.Timestamp) else None
+        try:
+            if not all(isinstance(timestamp, pd.Timestamp) and timestamp.tz == tz for timestamp in index):
+                return None
+            # Nanoseconds since epoch (UTC for tz aware timestamps)
+            timestamps = np.array([timestamp.value for timestamp in index], dtype=np.int64)
+            values = np.array(data, dtype=np.float64).reshape(len(data), len(columns))
+        except (TypeError, ValueError):
+            return None
+        dtypes = []
+        arrays = [np.diff(timestamps, prepend=0)]
+        for i in range(len(columns)):
+            column = values[:, i]
+            if len(data) > 0 and all(type(row[i]) is int for row in data):
+                dtypes.append("int64")
+                arrays.append(np.array([row[i] for row in data], dtype=np.int64))
+            else:
+                dtypes.append("float64")
+                # Grouping the n-th bytes of all the floats together compresses
+                # far better
+                arrays.append(np.ascontiguousarray(column).view(np.uint8).reshape(-1, 8).T.copy())
+        meta = {
+            "rows": len(index),
+            "columns": list(columns),
+            "dtypes": dtypes,
+            "tz": str(tz) if tz is not None else None,
+        }
+        return meta, arrays
+
+    def dumps(stockDict, codec=None):
+        f = io.BytesIO()
+        writer = PKCompressedCacheWriter(f, codec=codec)
+        for symbol, stockData in PKCompressedCache.symbolItems(stockDict):
+            writer.write(symbol, stockData)
+        writer.close()
+        return f.getvalue()
+
+    def symbolItems(stockDict):
+        # Fetches one symbol at a time. stockDict.items() on a Manager dict
+        # would first pull a copy of the whole store into this process.
+        for symbol in list(stockDict.keys()):
+            try:
+                yield symbol, stockDict[symbol]
+            except KeyError:
+                # Got removed in the meantime
+                continue
+
+    def loads(content):
+        if content[: len(MAGIC)] != MAGIC:
+            return pickle.loads(content)
+        version, codecId = struct.unpack_from("<BB", content, len(MAGIC))
+        if version != VERSION:
+            raise pickle.UnpicklingError(f"Unsupported stock cache version: {version}")
+        # Blocks right after the codec, followed by the header
+        headerLength = struct.unpack_from("<Q", content, len(content) - len(MAGIC) - 8)[0]
+        headerStart = len(content) - len(MAGIC) - 8 - headerLength
+        position = len(MAGIC) + 2
+        codec = {value: key for key, value in PKCompressedCache.codecIds.items()}[codecId]
+        header = json.loads(PKCompressedCache.decompress(content[headerStart : headerStart + headerLength], codec))
+        compressed = []
+        for length in header["blocks"]:
+            compressed.append(content[position : position + length])
+            position += length
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            blocks = list(executor.map(lambda data: PKCompressedCache.decompress(data, codec), compressed))
+        others = pickle.loads(blocks[-1])
+        extras = others["extras"]
+        indices = []
+        for meta in header["symbols"]:
+            indices.append(np.cumsum(np.frombuffer(blocks[meta["block"]], dtype=np.int64, count=meta["rows"], offset=meta["offset"])))
+        # Most symbols share the same dates. Creating each Timestamp only once
+        # is what makes loading faster than unpickling.
+        stamps = {}
+        for tz in set(meta["tz"] for meta in header["symbols"]):
+            values = [index for index, meta in zip(indices, header["symbols"]) if meta["tz"] == tz]
+            uniqueValues = np.unique(np.concatenate(values)) if len(values) > 0 else np.array([], dtype=np.int64)
+            datetimeIndex = pd.DatetimeIndex(uniqueValues.view("datetime64[ns]"))
+            if tz is not None:
+                datetimeIndex = datetimeIndex.tz_localize("UTC").tz_convert(tz)
+            stamps[tz] = (uniqueValues, list(datetimeIndex))
+        stockDict = {}
+        for meta, index in zip(header["symbols"], indices):
+            rows = meta["rows"]
+            block = blocks[meta["block"]]
+            offset = meta["offset"] + rows * 8
+            data = np.empty((rows, len(meta["dtypes"])), dtype=object)
+            for i, dtype in enumerate(meta["dtypes"]):
+                if dtype == "int64":
+                    data[:, i] = np.frombuffer(block, dtype=np.int64, count=rows, offset=offset).tolist()
+                else:
+                    shuffled = np.frombuffer(block, dtype=np.uint8, count=rows * 8, offset=offset).reshape(8, rows)
+                    data[:, i] = shuffled.T.copy().view(np.float64).reshape(rows).tolist()
+                offset += rows * 8
+            uniqueValues, timestamps = stamps[meta["tz"]]
+            stockData = {
+                "index": list(map(timestamps.__getitem__, np.searchsorted(uniqueValues, index).tolist())),
+                "columns": meta["columns"],
+                "data": data.tolist(),
+            }
+            stockData.update(extras.get(meta["name"], {}))
+            stockDict[meta["name"]] = stockData
+        stockDict.update(others["pickled"])
+        return stockDict
+
+    def save(stockDict, filePath, codec=None):
+        """
+        Writes the symbols one at a time straight from stockDict (which may
+        be a Manager dict) into a temporary file that replaces filePath only
+        once it's complete.
+        """
+        def writeSymbols(f):
+            writer = PKCompressedCacheWriter(f, codec=codec)
+            try:
+                for symbol, stockData in PKCompressedCache.symbolItems(stockDict):
+                    writer.write(symbol, stockData)
+            except BaseException:
+                writer.abort()
+                raise
+            writer.close()
+        PKCompressedCache.atomicWrite(filePath, writeSymbols)
+
+    def savePickle(stockDict, filePath):
+        """
+        Same as pickle.dump(stockDict.copy()), except that the symbols get
+        fetched and written one at a time. The pickler's memo would otherwise
+        keep every symbol alive till the end, so it gets cleared after each
+        one. That's only safe with the explicit memo indices of protocol 3.
+        """
+        def writeSymbols(f):
+            pickler = pickle.Pickler(f, protocol=3)
+            pickler.dump(PKStreamedDict(stockDict, onNextSymbol=pickler.clear_memo))
+        PKCompressedCache.atomicWrite(filePath, writeSymbols)
+
+    def atomicWrite(filePath, writeContent):
+        tmpFilePath = f"{filePath}.tmp"
+        try:
+            with open(tmpFilePath, "wb") as f:
+                writeContent(f)
+            os.replace(tmpFilePath, filePath)
+        finally:
+            if os.path.exists(tmpFilePath):
+                os.remove(tmpFilePath)
+
+    def load(filePath):
+        # Reads both, the compressed format and the plain pickles
+        with open(filePath, "rb") as f:
+            content = f.read()
+        return PKCompressedCache.loads(content)
+
+class PKStreamedDict:
+    # Gets pickled as a plain dict whose items are fetched from the store only
+    # as the pickler gets to them.
+    def __init__(self, stockDict, onNextSymbol=None):
+        self.stockDict = stockDict
+        self.onNextSymbol = onNextSymbol
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (), None, None, self.symbolItems())
+
+    def symbolItems(self):
+        for symbol, stockData in PKCompressedCache.symbolItems(self.stockDict):
+            if self.onNextSymbol is not None:
+                self.onNextSymbol()
+            yield symbol, stockData
+
+class PKCompressedCacheWriter:
+    """
+    Writes the compressed cache one symbol at a time. Each block gets
+    compressed in the background and written out as soon as it fills up, so
+    that only a few blocks worth of candles are held in memory. The header
+    goes at the end of the file, once all the symbols are known.
+    """
+    def __init__(self, f, codec=None, maxPendingBlocks=4):
+        self.f = f
+        self.codec = codec if codec is not None else PKCompressedCache.defaultCodec()
+        self.maxPendingBlocks = maxPendingBlocks
+        self.symbols = []
+        self.pickled = {}
+        self.extras = {}
+        self.block = []
+        self.blockSize = 0
+        self.blockCount = 0
+        self.blockLengths = []
+        self.pending = deque()
+        self.executor = ThreadPoolExecutor(max_workers=maxPendingBlocks)
+        self.f.write(MAGIC + struct.pack("<BB", VERSION, PKCompressedCache.codecIds[self.codec]))
+
+    def write(self, symbol, stockData):
+        if isinstance(stockData, pd.DataFrame):
+            stockData = stockData.to_dict("split")
+        typed = PKCompressedCache.symbolArrays(stockData) if isinstance(stockData, dict) else None
+        if typed is None:
+            self.pickled[symbol] = stockData
+            return
+        meta, arrays = typed
+        extra = {key: value for key, value in stockData.items() if key not in ["index", "columns", "data"]}
+        if len(extra) > 0:
+            self.extras[symbol] = extra
+        meta["name"] = symbol
+        meta["block"] = self.blockCount
+        meta["offset"] = self.blockSize
+        self.symbols.append(meta)
+        for array in arrays:
+            raw = array.tobytes()
+            self.block.append(raw)
+            self.blockSize += len(raw)
+        if self.blockSize >= BLOCK_SIZE:
+            self.flushBlock()
+
+    def flushBlock(self):
+        if len(self.block) == 0:
+            return
+        self.compressBlock(b"".join(self.block))
+        self.block = []
+        self.blockSize = 0
+
+    def compressBlock(self, raw):
+        self.pending.append(self.executor.submit(PKCompressedCache.compress, raw, self.codec))
+        self.blockCount += 1
+        while len(self.pending) > self.maxPendingBlocks:
+            self.writeBlock()
+
+    def writeBlock(self):
+        compressed = self.pending.popleft().result()
+        self.f.write(compressed)
+        self.blockLengths.append(len(compressed))
+
+    def abort(self):
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        try:
+            self.flushBlock()
+            self.compressBlock(pickle.dumps({"pickled": self.pickled, "extras": self.extras}, protocol=pickle.HIGHEST_PROTOCOL))
+            while len(self.pending) > 0:
+                self.writeBlock()
+        finally:
+            self.executor.shutdown()
+        header = json.dumps({
+            "symbols": self.symbols,
+            "blocks": self.blockLengths,
+        }).encode("utf-8")
+        header = PKCompressedCache.compress(header, self.codec)
+        self.f.write(header)
+        self.f.write(struct.pack("<Q", len(header)) + MAGIC)
@@ -25,39 +25,38 @@
 """
 
 import json
-from pkscreener.classes.PKTask import PKTask
+import sys
+from rich.console import Console
+from rich.progress import Progress, BarColumn, TimeRemainingColumn, TimeElapsedColumn
 from PKDevTools.classes.SuppressOutput import SuppressOutput
-from pkscreener.classes.PKScheduler import PKScheduler
 from PKDevTools.classes.log import default_logger
+from pkscreener.classes.PKSymbolMetadata import PKSymbolMetadata
 
 class PKDataService():
-    def getSymbolsAndSectorInfo(self,configManager,stockCodes=[]):
-        from PKNSETools.PKCompanyGeneral import download, initialize
-        stockDictList = []
-        tasksList = []
-        for symbol in stockCodes:
-            fn_args = (symbol)
-            task = PKTask(f"DataDownload-{symbol}",long_running_fn=download,long_running_fn_args=fn_args)
-            task.userData = symbol
-            tasksList.append(task)
-        
-        processedStocks = []
-        if len(tasksList) > 0:
-            # Suppress any multiprocessing errors/warnings
-            with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                initialize() # Let's get the cookies set-up right
-                PKScheduler.scheduleTasks(tasksList=tasksList,
-                                        label=f"Downloading latest symbol/sector info. (Total={len(stockCodes)} records in {len(tasksList)} batches){'Be Patient!' if len(stockCodes)> 2000 else ''}",
-                                        timeout=(5+2.5*configManager.longTimeout*4), # 5 seconds additional time for getting multiprocessing ready
-                                        minAcceptableCompletionPercentage=100,
-                                        submitTaskAsArgs=True,
-                                        showProgressBars=True)
-            for task in tasksList:
-                if task.result is not None:
-                    taskResult = json.loads(task.result)
-                    if taskResult is not None and isinstance(taskResult,dict) and "info" in taskResult.keys():
-                        stockDictList.append(taskResult.get("info"))
-                        processedStocks.append(task.userData)
+    def getSymbolsAndSectorInfo(self,configManager,stockCodes=[],symbolMetadata=None):
+        # Only the symbols missing from (or stale in) the local metadata database get downloaded
+        symbolMetadata = symbolMetadata if symbolMetadata is not None else PKSymbolMetadata()
+        stockCodes = list(dict.fromkeys(stockCodes))
+        pendingCodes = symbolMetadata.staleSymbols(stockCodes)
+        if len(pendingCodes) > 0:
+            from PKNSETools.PKCompanyGeneral import initialize
+            # The progress stays on the console while the downloads are kept quiet
+            with Progress(
+                    "[progress.description]{task.description}",
+                    BarColumn(),
+                    "[progress.percentage]{task.percentage:>3.0f}%",
+                    TimeRemainingColumn(),
+                    TimeElapsedColumn(),
+                    console=Console(file=sys.stdout)
+                ) as progress:
+                progressTask = progress.add_task(f"[green]Downloading latest symbol/sector info. (Total={len(pendingCodes)} records){' Be Patient!' if len(pendingCodes) > 2000 else ''}", total=len(pendingCodes))
+                # Suppress any errors/warnings of the downloads
+                with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
+                    initialize() # Let's get the cookies set-up right
+                    symbolMetadata.refresh(pendingCodes, force=True, progress=lambda completed, total: progress.update(progressTask, completed=completed))
+        rows = symbolMetadata.query("symbol", stockCodes, columns=["symbol", "info"])
+        stockDictList = [json.loads(row["info"]) for row in rows]
+        processedStocks = [row["symbol"] for row in rows]
         leftOutStocks = list(set(stockCodes)-set(processedStocks))
-        default_logger().debug(f"Attempted fresh download of {len(stockCodes)} stocks and downloaded {len(processedStocks)} stocks. {len(leftOutStocks)} stocks remaining.")
+        default_logger().debug(f"Found the sector/industry info of {len(processedStocks)} of {len(stockCodes)} stocks. {len(leftOutStocks)} stocks remaining.")
         return stockDictList, leftOutStocks
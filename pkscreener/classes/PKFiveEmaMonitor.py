@@ -0,0 +1,183 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+
+class PKFiveEmaSeries:
+    """
+    Intraday candles of one index at one interval along with the 5-EMA and
+    the signals found so far. New candles are merged in as they arrive, the
+    EMA is carried forward recursively from the last unchanged candle and
+    only the changed candles are looked at for new signals.
+    """
+    def __init__(self, label, symbol, interval, emaPeriod=5):
+        self.label = label
+        self.symbol = symbol
+        self.interval = interval
+        self.emaPeriod = emaPeriod
+        self.isSell = "sell" in label
+        self.bars = None
+        self.ema = np.array([], dtype=np.float64)
+        # (position, SL) of each candle that confirmed the alert candle before it
+        self.signals = []
+
+    @property
+    def lastTimestamp(self):
+        if self.bars is None or len(self.bars) == 0:
+            return None
+        return self.bars.index[-1]
+
+    def update(self, newBars):
+        """
+        Merges the newly fetched candles. The last candle we already have may
+        still have been forming, so any candle at or after the first new one
+        gets replaced. Returns the position of the first changed candle.
+        """
+        if newBars is None or len(newBars) == 0:
+            return len(self.bars) if self.bars is not None else 0
+        newBars = newBars[["High", "Low", "Close"]].dropna()
+        if len(newBars) == 0:
+            return len(self.bars) if self.bars is not None else 0
+        if self.bars is None or len(self.bars) == 0:
+            kept = newBars.iloc[0:0]
+        else:
+            kept = self.bars[self.bars.index < newBars.index[0]]
+        self.bars = pd.concat([kept, newBars]) if len(kept) > 0 else newBars.copy()
+        firstChanged = len(kept)
+        self.updateEma(firstChanged)
+        self.findSignals(firstChanged)
+        return firstChanged
+
+    def updateEma(self, fromPosition):
+        # Same as TA-Lib: seeded with the SMA of the first emaPeriod closes
+        closes = self.bars["Close"].to_numpy(dtype=np.float64)
+        ema = np.full(len(closes), np.nan)
+        ema[:fromPosition] = self.ema[:fromPosition]
+        start = fromPosition
+        if start < self.emaPeriod:
+            ema[: self.emaPeriod - 1] = np.nan
+            if len(closes) < self.emaPeriod:
+                start = len(closes)
+            else:
+                ema[self.emaPeriod - 1] = closes[: self.emaPeriod].mean()
+                start = self.emaPeriod
+        alpha = 2 / (self.emaPeriod + 1)
+        for i in range(start, len(closes)):
+            ema[i] = alpha * closes[i] + (1 - alpha) * ema[i - 1]
+        self.ema = ema
+
+    def findSignals(self, fromPosition):
+        # Only the candles from fromPosition onwards could have changed
+        self.signals = [signal for signal in self.signals if signal[0] < fromPosition]
+        start = max(fromPosition, 1)
+        if start >= len(self.bars):
+            return
+        high = self.bars["High"].to_numpy(dtype=np.float64)[start - 1 :].round(2)
+        low = self.bars["Low"].to_numpy(dtype=np.float64)[start - 1 :].round(2)
+        close = self.bars["Close"].to_numpy(dtype=np.float64)[start - 1 :].round(2)
+        ema = self.ema[start - 1 :].round(2)
+        for i in range(1, len(close)):
+            if self.isSell:
+                # Alert candle fully above the EMA, then a close below the EMA
+                alert = low[i - 1] > ema[i - 1] and low[i - 1] - ema[i - 1] > 0.5
+                if alert and close[i] < ema[i]:
+                    self.signals.append((start - 1 + i, high[i - 1]))
+            else:
+                # Alert candle fully below the EMA, then a close above the EMA
+                alert = high[i - 1] < ema[i - 1] and ema[i - 1] - high[i - 1] > 0.5
+                if alert and close[i] > ema[i]:
+                    self.signals.append((start - 1 + i, low[i - 1]))
+
+    def latestSignal(self, riskReward=3):
+        columns = ["High", "Low", "Close", "5EMA", "SL", "Target"]
+        if len(self.signals) == 0:
+            return pd.DataFrame(columns=columns)
+        position, sl = self.signals[-1]
+        bar = self.bars.iloc[position]
+        close = round(bar["Close"], 2)
+        return pd.DataFrame(
+            [[round(bar["High"], 2), round(bar["Low"], 2), close, round(self.ema[position], 2), sl, close - ((sl - close) * riskReward)]],
+            index=[self.bars.index[position]],
+            columns=columns,
+        )
+
+class PKFiveEmaMonitor:
+    """
+    Live 5-EMA engine for the index monitor. It keeps the 5m (sell) and
+    15m (buy) candles of NIFTY and BANKNIFTY in memory. On each refresh it
+    only fetches the candles since the last one we have, at the finest
+    interval (5m) and for both indices with one request. The 15m candles
+    are resampled from those.
+    """
+    seriesConfig = [
+        ("nifty_buy", "^NSEI", "15m"),
+        ("banknifty_buy", "^NSEBANK", "15m"),
+        ("nifty_sell", "^NSEI", "5m"),
+        ("banknifty_sell", "^NSEBANK", "5m"),
+    ]
+
+    def __init__(self, fetcher, emaPeriod=5):
+        self.fetcher = fetcher
+        self.series = {
+            label: PKFiveEmaSeries(label, symbol, interval, emaPeriod=emaPeriod)
+            for label, symbol, interval in PKFiveEmaMonitor.seriesConfig
+        }
+        self.symbols = list(dict.fromkeys(symbol for _, symbol, _ in PKFiveEmaMonitor.seriesConfig))
+        self.baseInterval = min((interval for _, _, interval in PKFiveEmaMonitor.seriesConfig), key=PKIntradayStore.intervalTimedelta)
+        self.store = PKIntradayStore()
+
+    def fetchNewBars(self, proxyServer=None):
+        timestamps = [self.store.lastTimestamp(symbol) for symbol in self.symbols]
+        start = None if None in timestamps else min(timestamps)
+        return self.fetcher.fetchFiveEmaBars(
+            self.baseInterval,
+            symbols=self.symbols,
+            start=start,
+            proxyServer=proxyServer,
+        )
+
+    def refresh(self, riskReward=3, proxyServer=None):
+        """
+        Fetches and merges the new candles and returns the latest signal
+        (a DataFrame with at most one row) for each of the series.
+        """
+        try:
+            bars = self.fetchNewBars(proxyServer)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            bars = {}
+        for symbol in self.symbols:
+            self.store.update(symbol, bars.get(symbol), interval=self.baseInterval)
+        for series in self.series.values():
+            bars = self.store.view(series.symbol, series.interval)
+            if bars is None:
+                continue
+            # The last candle we have may still have been forming
+            series.update(bars if series.lastTimestamp is None else bars.iloc[bars.index.searchsorted(series.lastTimestamp):])
+        return {label: series.latestSignal(riskReward) for label, series in self.series.items()}
@@ -0,0 +1,234 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+class PKIntradayStore:
+    """
+    Multi-resolution store of the intraday candles. The candles of each
+    symbol are kept at the finest interval that was fetched and the higher
+    timeframes (5m, 15m, 30m, 60m, 1d etc.) are views resampled from them
+    the same way the screener resamples. When new candles come in, only the
+    last bin of each view (which may still have been forming) and the bins
+    after it get resampled again. A change of interval then does not need
+    another download or a full re-resample.
+    """
+    ohlcAggregation = {
+        "Open": "first",
+        "High": "max",
+        "Low": "min",
+        "Close": "last",
+        "Adj Close": "last",
+        "Volume": "sum",
+    }
+
+    def __init__(self, maxSymbols=3000, maxAgeSeconds=60, maxAgeSecondsAfterHours=900):
+        self.maxSymbols = maxSymbols
+        # How old the candles may be to be served, during and after the trading hours
+        self.maxAgeSeconds = maxAgeSeconds
+        self.maxAgeSecondsAfterHours = maxAgeSecondsAfterHours
+        self.candles = OrderedDict()
+        self.intervals = {}
+        self.updatedAt = {}
+        self.views = {}
+        self.lock = threading.RLock()
+
+    def intervalTimedelta(interval):
+        """
+        Returns the pd.Timedelta for intervals like 1m, 5m, 60m, 1h or 1d
+        and None for the ones that don't have a fixed length (wk, mo).
+        """
+        interval = str(interval).strip().lower()
+        units = {"m": "min", "h": "h", "d": "D"}
+        for suffix in ["min", "m", "h", "d"]:
+            if interval.endswith(suffix) and interval[: -len(suffix)].isdigit():
+                return pd.Timedelta(int(interval[: -len(suffix)]), unit=units[suffix[0]])
+        return None
+
+    def inferInterval(data):
+        # The smallest gap between the candles, like 1m or 5m
+        if len(data) < 2:
+            return None
+        gaps = data.index[1:] - data.index[:-1]
+        gap = gaps[gaps > pd.Timedelta(0)].min()
+        if pd.isna(gap) or gap < pd.Timedelta(1, unit="min"):
+            return None
+        return f"{int(gap / pd.Timedelta(1, unit='D'))}d" if gap % pd.Timedelta(1, unit="D") == pd.Timedelta(0) else f"{int(gap / pd.Timedelta(1, unit='min'))}m"
+
+    def resampleRule(interval):
+        # Intraday candles start at 09:15, same as StockScreener resamples them
+        timedelta = PKIntradayStore.intervalTimedelta(interval)
+        if timedelta >= pd.Timedelta(1, unit="D"):
+            return timedelta, pd.Timedelta(0)
+        return timedelta, pd.Timedelta(15, unit="min")
+
+    def resample(data, interval, origin=None):
+        rule, offset = PKIntradayStore.resampleRule(interval)
+        aggregation = {column: how for column, how in PKIntradayStore.ohlcAggregation.items() if column in data.columns}
+        if len(data) == 0:
+            return data[list(aggregation.keys())]
+        origin = (data.index[0].normalize() if origin is None else origin) + offset
+        resampled = PKIntradayStore.aggregate(data, aggregation, rule, origin)
+        if resampled is None:
+            resampled = data.resample(rule, origin=origin - offset, offset=offset).agg(aggregation)
+        # Resampling introduces empty bins for the non-market hours
+        return resampled[resampled["High"] > 0]
+
+    def aggregate(data, aggregation, rule, origin):
+        """
+        Same as data.resample(rule, origin=origin).agg(aggregation) for the
+        sorted candles without any missing values, but without the empty bins
+        and without the (fixed) cost of resample, which is what resampling
+        just a few new candles mostly is. Returns None for any other data.
+        """
+        if not isinstance(data.index, pd.DatetimeIndex) or not data.index.is_monotonic_increasing:
+            return None
+        values = [data[column].to_numpy() for column in aggregation.keys()]
+        if any(value.dtype.kind not in "if" or (value.dtype.kind == "f" and np.isnan(value).any()) for value in values):
+            return None
+        bins = (data.index.asi8 - origin.value) // rule.value
+        starts = np.flatnonzero(np.concatenate([[True], bins[1:] != bins[:-1]]))
+        ends = np.concatenate([starts[1:], [len(bins)]]) - 1
+        reducers = {"first": lambda value: value[starts],
+                    "last": lambda value: value[ends],
+                    "max": lambda value: np.maximum.reduceat(value, starts),
+                    "min": lambda value: np.minimum.reduceat(value, starts),
+                    "sum": lambda value: np.add.reduceat(value, starts)}
+        index = pd.DatetimeIndex(pd.to_datetime(origin.value + bins[starts] * rule.value, utc=data.index.tz is not None), name=data.index.name)
+        if data.index.tz is not None:
+            index = index.tz_convert(data.index.tz)
+        return pd.DataFrame({column: reducers[how](value) for (column, how), value in zip(aggregation.items(), values)}, index=index)
+
+    def binStart(self, symbol, interval, timestamp):
+        rule, offset = PKIntradayStore.resampleRule(interval)
+        origin = self.candles[symbol].index[0].normalize() + offset
+        return origin + ((timestamp - origin) // rule) * rule
+
+    def isFinerThan(self, symbol, interval):
+        baseInterval = self.intervals.get(symbol)
+        if baseInterval is None:
+            return False
+        base, requested = PKIntradayStore.intervalTimedelta(baseInterval), PKIntradayStore.intervalTimedelta(interval)
+        return base is not None and requested is not None and requested >= base and requested % base == pd.Timedelta(0)
+
+    def canServe(self, symbol, interval, maxAgeSeconds=None):
+        """
+        Tells if the interval can be resampled from the candles we have for
+        the symbol, and optionally if those were updated within maxAgeSeconds.
+        """
+        with self.lock:
+            if symbol not in self.candles or not self.isFinerThan(symbol, interval):
+                return False
+            return maxAgeSeconds is None or (time.time() - self.updatedAt.get(symbol, 0)) <= maxAgeSeconds
+
+    def maxAge(self, isTradingTime):
+        return self.maxAgeSeconds if isTradingTime else self.maxAgeSecondsAfterHours
+
+    def lastTimestamp(self, symbol):
+        candles = self.candles.get(symbol)
+        return None if candles is None or len(candles) == 0 else candles.index[-1]
+
+    def update(self, symbol, newCandles, interval="1m"):
+        """
+        Merges the newly fetched candles of the symbol. The candles at or after
+        the first new one get replaced since the last one we had may still
+        have been forming. Candles at another interval replace everything.
+        """
+        if newCandles is None or len(newCandles) == 0:
+            return
+        if not (newCandles.index.is_monotonic_increasing and newCandles.index.is_unique):
+            newCandles = newCandles[~newCandles.index.duplicated(keep="last")].sort_index()
+        with self.lock:
+            candles = self.candles.get(symbol)
+            if candles is None or len(candles) == 0 or self.intervals.get(symbol) != interval:
+                self.candles[symbol] = newCandles.copy()
+                self.views = {key: view for key, view in self.views.items() if key[0] != symbol}
+            else:
+                kept = candles.iloc[: candles.index.searchsorted(newCandles.index[0])]
+                self.candles[symbol] = pd.concat([kept, newCandles]) if len(kept) > 0 else newCandles.copy()
+                firstChanged = newCandles.index[0]
+                for key, view in self.views.items():
+                    if key[0] == symbol:
+                        view["changedFrom"] = firstChanged if view["changedFrom"] is None else min(view["changedFrom"], firstChanged)
+            self.intervals[symbol] = interval
+            self.updatedAt[symbol] = time.time()
+            self.candles.move_to_end(symbol)
+            while len(self.candles) > self.maxSymbols:
+                self.remove(next(iter(self.candles)))
+
+    def remove(self, symbol):
+        with self.lock:
+            self.candles.pop(symbol, None)
+            self.intervals.pop(symbol, None)
+            self.updatedAt.pop(symbol, None)
+            self.views = {key: view for key, view in self.views.items() if key[0] != symbol}
+
+    def view(self, symbol, interval):
+        """
+        Returns the candles of the symbol resampled to the interval (or None).
+        The returned frame is shared, callers that change it need a copy.
+        """
+        with self.lock:
+            candles = self.candles.get(symbol)
+            if candles is None:
+                return None
+            key = (symbol, interval)
+            view = self.views.get(key)
+            if view is None:
+                view = {"candles": PKIntradayStore.resample(candles, interval), "changedFrom": None}
+                self.views[key] = view
+            elif view["changedFrom"] is not None:
+                origin = candles.index[0].normalize()
+                binStart = self.binStart(symbol, interval, view["changedFrom"])
+                kept = view["candles"].iloc[: view["candles"].index.searchsorted(binStart)]
+                resampled = PKIntradayStore.resample(candles.iloc[candles.index.searchsorted(binStart) :], interval, origin=origin)
+                view["candles"] = pd.concat([kept, resampled]) if len(kept) > 0 else resampled
+                view["changedFrom"] = None
+            return view["candles"]
+
+    def resampled(self, symbol, data, interval):
+        """
+        Returns data (the symbol's candles at the finest interval, as the
+        screener has them) resampled to the interval. When data only adds
+        candles to the ones we got earlier for the symbol, just those get
+        resampled.
+        """
+        with self.lock:
+            candles = self.candles.get(symbol)
+            numCandles = 0 if candles is None else len(candles)
+            extends = numCandles > 1 and len(data) >= numCandles and \
+                data.index[0] == candles.index[0] and data.index[numCandles - 1] == candles.index[-1] and \
+                data.index[numCandles - 2] == candles.index[-2] and \
+                data.iloc[numCandles - 2].equals(candles.iloc[-2])
+            if extends:
+                self.update(symbol, data.iloc[numCandles - 1 :], interval=self.intervals.get(symbol))
+            else:
+                self.remove(symbol)
+                self.update(symbol, data, interval=PKIntradayStore.inferInterval(data))
+            return self.view(symbol, interval).copy()
@@ -0,0 +1,129 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+from PKNSETools.PKIntraDay import Intra_Day
+
+class PKOrderInfo(SingletonMixin, metaclass=SingletonType):
+    """
+    Bid/ask (order book) and price band info of the stocks from NSE, as
+    Intra_Day.price_order_info gives them (along with the throttling of the
+    NSE requests that comes with it). The stocks are fetched concurrently in
+    batches over a bounded pool of threads and the responses are kept for a
+    few seconds (and for the rest of the scan they were fetched for), so that
+    the screeners look them up from memory instead of going to NSE for one
+    stock after another.
+    """
+    def __init__(self, maxConnections=8, batchSize=50, ttlSeconds=30):
+        super(PKOrderInfo, self).__init__()
+        self.maxConnections = maxConnections
+        self.batchSize = batchSize
+        self.ttlSeconds = ttlSeconds
+        self.cache = {}
+        # Whatever got fetched since the scan started stays fresh for that scan
+        self.scanStartedAt = None
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # The workers get a copy of what has been fetched so far
+        attributes, state = super(PKOrderInfo, self).__getstate__()
+        state = {key: value for key, value in state.items() if key not in ["attributes", "lock"]}
+        return attributes, state
+
+    def __setstate__(self, state):
+        super(PKOrderInfo, self).__setstate__(state)
+        self.lock = threading.Lock()
+
+    def beginScan(self):
+        self.scanStartedAt = time.time()
+
+    def clearCache(self):
+        with self.lock:
+            self.cache.clear()
+
+    def cachedOrderInfo(self, symbol):
+        with self.lock:
+            cached = self.cache.get(symbol)
+        if cached is None:
+            return None
+        if (time.time() - cached[0]) > self.ttlSeconds and (self.scanStartedAt is None or cached[0] < self.scanStartedAt):
+            return None
+        return cached[1]
+
+    def fetchOrderInfo(self, symbol):
+        """
+        Fetches the price and the order book of the symbol. Returns the
+        single row DataFrame or None unless both could be fetched.
+        """
+        try:
+            priceOrderInfo = Intra_Day(symbol).price_order_info()
+        except Exception as e:
+            default_logger().debug(e, exc_info=True)
+            return None
+        if priceOrderInfo is None or len(priceOrderInfo) == 0 or not PKOrderInfo.fetchedBoth(priceOrderInfo):
+            return None
+        return priceOrderInfo
+
+    def fetchedBoth(priceOrderInfo):
+        # price_order_info leaves the zeros in for the part (the price or the
+        # order book) that it could not fetch
+        info = priceOrderInfo.iloc[0]
+        return info.get("LTP", 0) != 0 and info.get("MktCap(Cr)", 0) != 0
+
+    def fetchAll(self, symbols):
+        """
+        Returns {symbol: DataFrame or None} for all the symbols. The ones not
+        in the cache get fetched, maxConnections at a time and batchSize of
+        them at once.
+        """
+        symbols = list(dict.fromkeys(str(symbol).upper() for symbol in symbols))
+        orderInfo = {symbol: self.cachedOrderInfo(symbol) for symbol in symbols}
+        pending = [symbol for symbol, info in orderInfo.items() if info is None]
+        if len(pending) == 0:
+            return orderInfo
+        with ThreadPoolExecutor(max_workers=max(1, min(self.maxConnections, len(pending)))) as executor:
+            for batchStart in range(0, len(pending), self.batchSize):
+                batch = pending[batchStart : batchStart + self.batchSize]
+                results = list(executor.map(self.fetchOrderInfo, batch))
+                fetchedAt = time.time()
+                with self.lock:
+                    for symbol, info in zip(batch, results):
+                        orderInfo[symbol] = info
+                        if info is not None:
+                            self.cache[symbol] = (fetchedAt, info)
+        return orderInfo
+
+    def orderInfo(self, symbol):
+        # Looked up from memory unless the symbol wasn't fetched in the last
+        # ttlSeconds or since the scan started
+        symbol = str(symbol).upper()
+        info = self.cachedOrderInfo(symbol)
+        if info is None:
+            info = self.fetchAll([symbol]).get(symbol)
+        return info
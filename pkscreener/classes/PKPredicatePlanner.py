@@ -0,0 +1,161 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+class PKPredicatePlanner(SingletonMixin, metaclass=SingletonType):
+    """
+    Decides the order in which the independent eligibility checks of a scan
+    get evaluated for each stock. Every check has a cost (seconds per stock)
+    and a rejection rate learnt from earlier scans of the same type, and the
+    checks that reject the most for the least time go first. Checks only get
+    reordered once each of them has been seen often enough, and never ahead
+    of the checks they depend on. The workers pick up the stats saved by
+    the later scans every refreshSeconds.
+    """
+    def __init__(self, statsFilePath=None, minSamples=20, maxSamples=10000, maxPendingObservations=10000, refreshSeconds=60):
+        super(PKPredicatePlanner, self).__init__()
+        self.statsFilePath = statsFilePath if statsFilePath is not None else os.path.join(Archiver.get_user_data_dir(), "screening_checks.json")
+        self.minSamples = minSamples
+        self.maxSamples = maxSamples
+        self.maxPendingObservations = maxPendingObservations
+        self.refreshSeconds = refreshSeconds
+        self.stats = None
+        self.statsFileStat = None
+        self.statsCheckedAt = 0
+        self.plans = {}
+        self.observations = []
+        self.lock = threading.Lock()
+
+    def statsFileStatNow(self):
+        try:
+            stat = os.stat(self.statsFilePath)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def loadStats(self):
+        with self.lock:
+            if self.stats is not None and time.time() - self.statsCheckedAt < self.refreshSeconds:
+                return self.stats
+            self.statsCheckedAt = time.time()
+            fileStat = self.statsFileStatNow()
+            if self.stats is None or fileStat != self.statsFileStat:
+                # First time around, or another scan saved newer stats since
+                self.stats = {}
+                self.statsFileStat = fileStat
+                self.plans = {}
+                try:
+                    if fileStat is not None:
+                        with open(self.statsFilePath, "r") as f:
+                            self.stats = json.load(f)
+                except Exception as e: # pragma: no cover
+                    default_logger().debug(e, exc_info=True)
+                    self.stats = {}
+            return self.stats
+
+    def saveStats(self):
+        with self.lock:
+            if self.stats is None:
+                return
+            content = json.dumps(self.stats).encode("utf-8")
+        try:
+            PKCompressedCache.atomicWrite(self.statsFilePath, lambda f: f.write(content))
+            with self.lock:
+                # These are the stats we already have
+                self.statsFileStat = self.statsFileStatNow()
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def rank(self, checkStats):
+        # Expected cost of getting to a rejection with this check
+        evaluations, rejections, seconds = checkStats
+        return (seconds / evaluations) / max(rejections / evaluations, 1e-6)
+
+    def plan(self, scanKey, checks, dependencies=None):
+        """
+        Returns the checks in the order they should be evaluated. Without
+        enough history for all of them, that's the order they were given in.
+        """
+        dependencies = {} if dependencies is None else dependencies
+        # Loading newer stats also throws away the plans made so far
+        scanStats = self.loadStats().get(scanKey, {})
+        planKey = (scanKey, tuple(checks), tuple(sorted((check, tuple(dependency)) for check, dependency in dependencies.items())))
+        order = self.plans.get(planKey)
+        if order is not None:
+            return order
+        if any(scanStats.get(check, [0])[0] < self.minSamples for check in checks):
+            order = list(checks)
+        else:
+            order = []
+            pending = list(checks)
+            while len(pending) > 0:
+                ready = [check for check in pending if all(dependency in order or dependency not in checks for dependency in dependencies.get(check, []))]
+                nextCheck = min(ready, key=lambda check: self.rank(scanStats[check]))
+                order.append(nextCheck)
+                pending.remove(nextCheck)
+        self.plans[planKey] = order
+        return order
+
+    @contextmanager
+    def measure(self, scanKey, check):
+        # A check rejects the stock by raising
+        startTime = time.perf_counter()
+        passed = False
+        try:
+            yield
+            passed = True
+        finally:
+            if len(self.observations) < self.maxPendingObservations:
+                self.observations.append((scanKey, check, time.perf_counter() - startTime, passed))
+
+    def popObservations(self):
+        observations = self.observations
+        self.observations = []
+        return observations
+
+    def mergeObservations(self, observations):
+        if len(observations) == 0:
+            return
+        stats = self.loadStats()
+        with self.lock:
+            for scanKey, check, seconds, passed in observations:
+                checkStats = stats.setdefault(scanKey, {}).setdefault(check, [0, 0, 0.0])
+                if checkStats[0] >= self.maxSamples:
+                    # Let the newer scans count for more
+                    checkStats[0], checkStats[1], checkStats[2] = checkStats[0] / 2, checkStats[1] / 2, checkStats[2] / 2
+                checkStats[0] += 1
+                checkStats[1] += 0 if passed else 1
+                checkStats[2] += seconds
+            self.plans = {}
@@ -0,0 +1,175 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.PKDateUtilities import PKDateUtilities
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+class PKRelativeStrength(SingletonMixin, metaclass=SingletonType):
+    """
+    Relative strength (average gain over average loss of the close) for the
+    whole universe at once, from the close prices of all stocks stacked into
+    one panel. Gives the same score as ScreeningStatistics.calc_relative_strength
+    does for one stock at a time. The score of the base index is cached for
+    the trading day.
+    """
+    def __init__(self, baselinesFilePath=None):
+        super(PKRelativeStrength, self).__init__()
+        self.baselinesFilePath = baselinesFilePath if baselinesFilePath is not None else os.path.join(Archiver.get_user_data_dir(), "index_strength.json")
+        self.baselines = None
+        self.ratings = None
+        self.lock = threading.Lock()
+
+    def closeValues(self, stockData):
+        """
+        Returns the dates (as int64 nanoseconds, oldest first) and the close
+        (Adj Close, if available) of the stock for the same candles that the
+        screener looks at after pre-processing, along with the number of
+        candles and the last date. stockData is a DataFrame or its
+        to_dict("split") form.
+        """
+        if stockData is None:
+            return None
+        if isinstance(stockData, pd.DataFrame):
+            columns, rows, index = list(stockData.columns), stockData.to_numpy(), list(stockData.index)
+        else:
+            columns, rows, index = list(stockData.get("columns", [])), stockData.get("data", []), stockData.get("index", [])
+        closeColumn = "Adj Close" if "Adj Close" in columns else "Close"
+        if closeColumn not in columns or len(rows) <= 1:
+            return None
+        try:
+            dates = np.array([date.value for date in index], dtype=np.int64)
+            try:
+                values = np.array(rows, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = pd.DataFrame(list(rows), columns=columns).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return None
+        values[np.isinf(values)] = np.nan
+        candles = ~np.isnan(values).all(axis=1)
+        dates, closes = dates[candles], values[candles, columns.index(closeColumn)]
+        if len(dates) <= 1 or len(np.unique(dates)) != len(dates):
+            return None
+        order = np.argsort(dates, kind="stable")
+        lastDate = [date for date, candle in zip(index, candles) if candle][order[-1]]
+        return dates[order], closes[order], len(dates), lastDate
+
+    def closePanel(self, stockDict):
+        """
+        Returns the closes of all the stocks as one DataFrame of dates (oldest
+        first) x stocks and {stock: (numCandles, lastDate)}.
+        """
+        closes = {}
+        for stock, stockData in stockDict.items():
+            values = self.closeValues(stockData)
+            if values is not None:
+                closes[stock] = values
+        if len(closes) == 0:
+            return pd.DataFrame(), {}
+        allDates = np.unique(np.concatenate([dates for dates, _, _, _ in closes.values()]))
+        panel = np.full((len(allDates), len(closes)), np.nan)
+        for column, (dates, values, _, _) in enumerate(closes.values()):
+            panel[np.searchsorted(allDates, dates), column] = values
+        details = {stock: (numCandles, lastDate) for stock, (_, _, numCandles, lastDate) in closes.items()}
+        return pd.DataFrame(panel, index=pd.DatetimeIndex(allDates), columns=list(closes.keys())), details
+
+    def strengths(self, panel):
+        closes = panel.to_numpy(dtype=np.float64)
+        # Compared with the previous close of the same stock, not the previous date
+        previousCloses = panel.ffill().shift(1).to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gains = np.where(closes >= previousCloses, closes, 0).sum(axis=0)
+            losses = np.where(closes <= previousCloses, closes, 0).sum(axis=0)
+            numCloses = np.maximum((~np.isnan(closes)).sum(axis=0), 1)
+            return pd.Series((gains / numCloses) / (losses / numCloses), index=panel.columns)
+
+    def percentileRatings(self, strengths):
+        # 0-100 for the weakest to the strongest stock of the universe
+        return (strengths.rank(pct=True) * 100).round(2)
+
+    def precompute(self, stockDict):
+        """
+        Returns {stock: (score, numCandles, lastDate)} for all the stocks so
+        that the screener can look up the score of a stock whose candles are
+        still the same. The percentile ratings are kept in self.ratings.
+        """
+        panel, details = self.closePanel(stockDict)
+        if panel.empty:
+            self.ratings = pd.Series(dtype=np.float64)
+            return {}
+        strengths = self.strengths(panel)
+        strengths = strengths[np.isfinite(strengths) & (strengths > 0)]
+        self.ratings = self.percentileRatings(strengths)
+        return {stock: (float(strength), details[stock][0], details[stock][1]) for stock, strength in strengths.items()}
+
+    def strength(self, stockData):
+        panel, _ = self.closePanel({"stock": stockData})
+        if panel.empty:
+            return -1
+        strength = self.strengths(panel).iloc[0]
+        return float(strength) if np.isfinite(strength) and strength > 0 else -1
+
+    def loadBaselines(self):
+        if self.baselines is None:
+            self.baselines = {}
+            try:
+                if os.path.exists(self.baselinesFilePath):
+                    with open(self.baselinesFilePath, "r") as f:
+                        self.baselines = json.load(f)
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+        return self.baselines
+
+    def indexStrength(self, indexKey, fetchIndexData):
+        """
+        Returns the score of the base index (indexKey names the index and its
+        candles), fetching its data with fetchIndexData once per trading day.
+        """
+        baselineKey = f"{indexKey}:{PKDateUtilities.tradingDate().strftime('%Y-%m-%d')}"
+        with self.lock:
+            baselines = self.loadBaselines()
+            strength = baselines.get(baselineKey)
+            if strength is not None:
+                return strength
+            strength = self.strength(fetchIndexData())
+            if strength > 0:
+                # Only the current trading day is of any use
+                self.baselines = {baselineKey: strength}
+                content = json.dumps(self.baselines).encode("utf-8")
+                try:
+                    PKCompressedCache.atomicWrite(self.baselinesFilePath, lambda f: f.write(content))
+                except Exception as e: # pragma: no cover
+                    default_logger().debug(e, exc_info=True)
+            return strength
@@ -0,0 +1,184 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+from enum import Enum
+
+from PKDevTools.classes.ColorText import colorText
+
+class PKSignal(Enum):
+    NONE = "none"
+    BULLISH = "bullish"
+    BEARISH = "bearish"
+    NEUTRAL = "neutral"
+    STRONG_BULLISH = "strongBullish"
+    STRONG_BEARISH = "strongBearish"
+    HIGHLIGHT = "highlight"
+
+class PKResultRecord(dict):
+    """
+    The typed result of screening one stock. The dictionary itself holds
+    the plain values (the ones that get saved) while the signal state of
+    each field says how it should look. A field made up of differently
+    signalled parts (like the patterns found for a stock) keeps those
+    parts as (text, signal) pairs. Nothing in here is coloured; that is
+    left to the PKResultPresenter at the time of printing.
+    """
+    def __init__(self, *args, **kwargs):
+        super(PKResultRecord, self).__init__(*args, **kwargs)
+        self.signals = {}
+        self.formats = {}
+        self.parts = {}
+        self.links = {}
+
+    def copy(self):
+        record = PKResultRecord(self)
+        record.signals = dict(self.signals)
+        record.formats = dict(self.formats)
+        record.parts = {field: list(parts) for field, parts in self.parts.items()}
+        record.links = dict(self.links)
+        return record
+
+    def set(self, field, value, signal=PKSignal.NONE, fmt=None, parts=None, link=None):
+        self[field] = value
+        self.signals[field] = signal
+        for attributes, attribute in [(self.formats, fmt), (self.parts, parts), (self.links, link)]:
+            if attribute is not None:
+                attributes[field] = attribute
+            else:
+                attributes.pop(field, None)
+
+    def signal(self, field):
+        return self.signals.get(field, PKSignal.NONE)
+
+    def partsOf(self, field):
+        if field in self.parts.keys():
+            return list(self.parts[field])
+        value = self.get(field)
+        if value is None or len(str(value)) == 0:
+            return []
+        return [(PKResultPresenter.text(value, self.formats.get(field)), self.signal(field))]
+
+    def append(self, field, value, signal=PKSignal.NONE, parts=None, separator=", "):
+        # Fields like Pattern, MA-Signal and Trend list all that was found,
+        # separated by commas.
+        existing = self.get(field)
+        existingParts = self.partsOf(field)
+        parts = parts if parts is not None else [(value, signal)]
+        if existing is not None and len(str(existing)) > 0:
+            value = f"{existing}{separator}{value}"
+            existingParts.append((separator, PKSignal.NONE))
+        self.set(field, value, parts=[part for part in existingParts + parts if len(part[0]) > 0])
+
+    def setField(screenDict, saveDict, field, value, signal=PKSignal.NONE, fmt=None, parts=None, link=None):
+        """
+        Sets a field of the result. The records get the typed value and get
+        styled only when presented. Callers that still pass plain
+        dictionaries get the styled value in the screenDict right away.
+        """
+        record = saveDict if isinstance(saveDict, PKResultRecord) else PKResultRecord()
+        record.set(field, value, signal=signal, fmt=fmt, parts=parts, link=link)
+        if record is not saveDict:
+            saveDict[field] = value
+        if screenDict is not record:
+            screenDict[field] = PKResultPresenter.presented(record, field)
+
+    def appendField(screenDict, saveDict, field, value, signal=PKSignal.NONE, parts=None, separator=", "):
+        if isinstance(saveDict, PKResultRecord):
+            saveDict.append(field, value, signal=signal, parts=parts, separator=separator)
+            if screenDict is not saveDict:
+                screenDict[field] = PKResultPresenter.presented(saveDict, field)
+            return
+        existingScreen = screenDict.get(field)
+        existingSave = saveDict.get(field)
+        record = PKResultRecord()
+        record.append(field, value, signal=signal, parts=parts)
+        screenDict[field] = (f"{existingScreen}{separator}" if (existingScreen is not None and len(existingScreen) > 0) else "") + PKResultPresenter.presented(record, field)
+        saveDict[field] = (f"{existingSave}{separator}" if (existingSave is not None and len(existingSave) > 0) else "") + value
+
+class PKResultPresenter:
+    """
+    Presentation layer for the PKResultRecord. Turns the typed values and
+    their signal states into the coloured text for the console, the images
+    and the telegram messages.
+    """
+    styles = {
+        PKSignal.NONE: "",
+        PKSignal.BULLISH: colorText.GREEN,
+        PKSignal.BEARISH: colorText.FAIL,
+        PKSignal.NEUTRAL: colorText.WARN,
+        PKSignal.STRONG_BULLISH: colorText.BOLD + colorText.GREEN,
+        PKSignal.STRONG_BEARISH: colorText.BOLD + colorText.FAIL,
+        PKSignal.HIGHLIGHT: colorText.WHITE,
+    }
+
+    def text(value, fmt=None):
+        return (fmt % value) if fmt is not None else str(value)
+
+    def styled(text, signal=PKSignal.NONE):
+        return f"{PKResultPresenter.styles[signal]}{text}{colorText.END}" if signal != PKSignal.NONE else text
+
+    def presented(record, field):
+        value = record.get(field)
+        if field in record.parts.keys():
+            return "".join(PKResultPresenter.styled(text, signal) for text, signal in record.parts[field])
+        signal = record.signal(field)
+        fmt = record.formats.get(field)
+        link = record.links.get(field)
+        if link is not None:
+            return PKResultPresenter.styled(f"\x1B]8;;{link}\x1B\\{PKResultPresenter.text(value, fmt)}\x1B]8;;\x1B\\", signal)
+        if signal == PKSignal.NONE and fmt is None:
+            # Numbers stay numbers for sorting the results
+            return value
+        return PKResultPresenter.styled(PKResultPresenter.text(value, fmt), signal)
+
+    def screenDict(record):
+        # Anything other than a record (older cached results etc.) is
+        # already what gets shown.
+        if not isinstance(record, PKResultRecord):
+            return record
+        return {field: PKResultPresenter.presented(record, field) for field in record.keys()}
+
+    def presentedResult(result):
+        # The screening result of a stock with its record presented for the screen
+        if result is None or len(result) == 0:
+            return result
+        return type(result)((PKResultPresenter.screenDict(result[0]),) + tuple(result[1:]))
+
+    def signedChange(change, sellSignal=False):
+        # Gains are the good outcome for buy signals and losses for sell signals
+        return PKSignal.BULLISH if ((change >= 0) != sellSignal) else PKSignal.BEARISH
+
+    def styledChanges(df, sellSignal=False):
+        """
+        Returns a copy of the backtest results with the period changes (in
+        the n-Pd columns) coloured by whether the prediction was right.
+        """
+        styledDf = df.copy()
+        for col in styledDf.columns:
+            if str(col).endswith("-Pd"):
+                styledDf[col] = styledDf[col].apply(
+                    lambda x: PKResultPresenter.styled("%.2f%%" % x, PKResultPresenter.signedChange(x, sellSignal))
+                    if isinstance(x, (int, float)) and x == x else x
+                )
+        return styledDf
@@ -0,0 +1,206 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import datetime
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from PKDevTools.classes.ColorText import colorText
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.OutputControls import OutputControls
+
+from pkscreener.classes.PKResultRecord import PKResultRecord, PKSignal
+from pkscreener.classes.PKUnmatchedResult import PKUnmatchedResult
+
+class PKResultsStream:
+    """
+    Streams the scan results as they arrive instead of waiting for the
+    whole universe to be scanned. Every match gets appended to a newline
+    delimited JSON log (one JSON object per line) and is pushed to the
+    subscribers (console, bot, monitor etc.) right away. The log starts
+    with a header record and ends with an end record so that readers can
+    tell a finished scan from one that is still running.
+    """
+    def __init__(self, filePath=None, options=None, subscribers=None):
+        self.filePath = filePath
+        self.options = options
+        self.subscribers = list(subscribers) if subscribers is not None else []
+        self.count = 0
+        self.startedAt = time.time()
+        self.lock = threading.Lock()
+        self.file = None
+        if filePath is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(filePath)), exist_ok=True)
+            self.file = open(filePath, "w", encoding="utf-8")
+            self._write({"type": "header", "options": options, "startedAt": self.startedAt})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def subscribe(self, subscriber):
+        # The subscriber gets called with each result record as it arrives
+        self.subscribers.append(subscriber)
+
+    def jsonValue(value):
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None or isinstance(value, (str, bool, int)):
+            return value
+        if isinstance(value, float):
+            return value if math.isfinite(value) else None
+        if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, (list, tuple)):
+            return [PKResultsStream.jsonValue(x) for x in value]
+        if isinstance(value, dict):
+            return {str(k): PKResultsStream.jsonValue(v) for k, v in value.items()}
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        return str(value)
+
+    def recordStyles(record):
+        # The signal states etc. of a result record, so that it can be
+        # presented again when read back from the results log
+        return {"signals": {field: signal.value for field, signal in record.signals.items() if signal != PKSignal.NONE},
+                "formats": dict(record.formats),
+                "parts": {field: [[text, signal.value] for text, signal in parts] for field, parts in record.parts.items()},
+                "links": dict(record.links)}
+
+    def styledRecord(values, styles=None):
+        record = PKResultRecord(values)
+        styles = styles if styles is not None else {}
+        record.signals = {field: PKSignal(signal) for field, signal in styles.get("signals", {}).items()}
+        record.formats = dict(styles.get("formats", {}))
+        record.parts = {field: [(text, PKSignal(signal)) for text, signal in parts] for field, parts in styles.get("parts", {}).items()}
+        record.links = dict(styles.get("links", {}))
+        return record
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Readers (tail -f, the bot etc.) should see the record right away
+        self.file.flush()
+
+    def append(self, screenDict, saveDict, stock=None):
+        """
+        Appends one matching stock. The saveDict values (without colour
+        styles) make up the typed record on disk while the subscribers
+        also get the styled screenDict values for display.
+        """
+        with self.lock:
+            self.count += 1
+            record = {"type": "result",
+                      "seq": self.count,
+                      "stock": stock if stock is not None else saveDict.get("Stock"),
+                      "elapsed": round(time.time() - self.startedAt, 3),
+                      "result": PKResultsStream.jsonValue(dict(saveDict))}
+            if isinstance(saveDict, PKResultRecord):
+                record["styles"] = PKResultsStream.recordStyles(saveDict)
+            if self.file is not None:
+                self._write(record)
+        for subscriber in self.subscribers:
+            try:
+                subscriber(dict(record, screen=screenDict))
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+        return record
+
+    def appendResult(self, result):
+        # Backtests also get the stocks that did not match
+        if result is None or isinstance(result, PKUnmatchedResult):
+            return None
+        return self.append(result[0], result[1], stock=result[3])
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self._write({"type": "end", "count": self.count, "elapsed": round(time.time() - self.startedAt, 3)})
+                self.file.close()
+                self.file = None
+
+    def records(filePath):
+        """
+        Yields the result records from a results log, one at a time, so
+        that even the huge backtest logs can be read with bounded memory.
+        A partially written last line (scan still running) is skipped.
+        """
+        with open(filePath, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    default_logger().debug(e, exc_info=True)
+                    continue
+                if record.get("type") == "result":
+                    yield record
+
+    def readResults(filePath):
+        return pd.DataFrame([record["result"] for record in PKResultsStream.records(filePath)])
+
+    def resultRecords(filePath):
+        # The results read back as records that can be presented for the screen
+        for record in PKResultsStream.records(filePath):
+            yield PKResultsStream.styledRecord(record["result"], record.get("styles"))
+
+    def consoleSubscriber(record):
+        screenDict = record.get("screen") or {}
+        ltp = screenDict.get("LTP", record["result"].get("LTP"))
+        change = screenDict.get("%Chng", record["result"].get("%Chng"))
+        OutputControls().printOutput(
+            colorText.GREEN
+            + f"[+] {record['seq']}. Found {record['stock']} (LTP: {ltp}{colorText.END}{colorText.GREEN}, %Chng: {change}{colorText.END}{colorText.GREEN}) after {record['elapsed']:.1f}s"
+            + colorText.END
+        )
+
+    def botSubscriber(sendMessage, user=None):
+        # Sends each match to the telegram user who asked for the scan
+        def subscriber(record):
+            result = record["result"]
+            sendMessage(message=f"{record['seq']}. {record['stock']} (LTP: {result.get('LTP')}, %Chng: {result.get('%Chng')})", user=user)
+        return subscriber
+
+    def monitorSubscriber(monitor, screenOptions, chosenMenu=""):
+        """
+        Fills the market monitor widget of the running scan with the matches
+        as they arrive instead of after the whole cycle. Only as many matches
+        as the widget can show are kept.
+        """
+        matches = []
+        def subscriber(record):
+            if len(matches) >= monitor.maxNumRowsInEachResult - 1:
+                return
+            matches.append(record.get("screen") or record["result"])
+            monitor.refresh(screen_df=pd.DataFrame(matches).set_index("Stock"), screenOptions=screenOptions,
+                            chosenMenu=chosenMenu, dbTimestamp=f"{record['elapsed']:.1f}s | Scanning")
+        return subscriber
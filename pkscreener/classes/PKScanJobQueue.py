@@ -0,0 +1,176 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.PKDateUtilities import PKDateUtilities
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+def warmUpScanWorker():
+    # Pay the import cost once per worker process instead of once per scan
+    try:
+        import pkscreener.globals
+    except Exception as e: # pragma: no cover
+        default_logger().debug(e, exc_info=True)
+
+def runScanJob(options):
+    """
+    Runs the scan for the given options (for example X:12:9:2.5) inside
+    the (already warmed up) worker process and returns the saved results.
+    """
+    from pkscreener.pkscreenercli import argParser
+    from pkscreener.globals import main, resetUserMenuChoiceOptions
+    args = argParser.parse_known_args(args=["-a", "Y", "-e", "-p", "-o", options])[0]
+    args.triggertimestamp = int(PKDateUtilities.currentDateTimestamp())
+    try:
+        _, saveResults = main(userArgs=args)
+    finally:
+        resetUserMenuChoiceOptions()
+    return saveResults
+
+class PKScanJob:
+    def __init__(self, jobKey=None, options=None):
+        self.jobKey = jobKey
+        self.options = options
+        self.subscribers = []
+        self.result = None
+        self.error = None
+        self.submittedAt = time.time()
+        self.completedAt = None
+        self.fromCache = False
+        self.finished = threading.Event()
+
+    @property
+    def isDone(self):
+        return self.finished.is_set()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+class PKScanJobQueue(SingletonMixin, metaclass=SingletonType):
+    """
+    Local job queue for the scans requested via the telegram bot. Jobs run on
+    a persistent pool of workers, identical concurrent requests (same options
+    on the same date) share one job, and completed results are cached so that
+    repeat requests get answered right away.
+    """
+    def __init__(self, maxWorkers=None, jobRunner=None, useProcesses=True, cacheTTLSeconds=900):
+        super(PKScanJobQueue, self).__init__()
+        self.maxWorkers = maxWorkers if maxWorkers is not None else max(1, min(2, multiprocessing.cpu_count() - 1))
+        self.jobRunner = jobRunner if jobRunner is not None else runScanJob
+        self.useProcesses = useProcesses
+        self.cacheTTLSeconds = cacheTTLSeconds
+        self.pendingJobs = {}
+        self.completedJobs = {}
+        self.lock = threading.RLock()
+        self.executor = None
+
+    def jobKey(self, options):
+        options = str(options).upper().replace(" ", "").replace("::", ":").replace("_", ":")
+        while options.endswith(":D") or options.endswith(":"):
+            options = options[:-2] if options.endswith(":D") else options[:-1]
+        return options, PKDateUtilities.currentDateTime().strftime("%Y-%m-%d")
+
+    def workerPool(self):
+        with self.lock:
+            if self.executor is None:
+                if self.useProcesses:
+                    self.executor = ProcessPoolExecutor(max_workers=self.maxWorkers, initializer=warmUpScanWorker)
+                else:
+                    self.executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="PKScanJob")
+            return self.executor
+
+    def cachedJob(self, jobKey):
+        job = self.completedJobs.get(jobKey)
+        if job is not None and (time.time() - job.completedAt) > self.cacheTTLSeconds:
+            del self.completedJobs[jobKey]
+            job = None
+        return job
+
+    def submit(self, options, user=None, callback=None):
+        """
+        Queues a scan for the given options. The callback(job, user) gets
+        called once the results are available. Returns the PKScanJob which
+        may be an already running one or a cached completed one.
+        """
+        jobKey = self.jobKey(options)
+        with self.lock:
+            job = self.cachedJob(jobKey)
+            if job is None:
+                job = self.pendingJobs.get(jobKey)
+                if job is None:
+                    job = PKScanJob(jobKey=jobKey, options=options)
+                    job.subscribers.append((user, callback))
+                    self.pendingJobs[jobKey] = job
+                    future = self.workerPool().submit(self.jobRunner, options)
+                    future.add_done_callback(lambda f, job=job: self._jobFinished(job, f))
+                else:
+                    # Same scan is already running for someone else.
+                    job.subscribers.append((user, callback))
+                return job
+        job.fromCache = True
+        self._notify(job, [(user, callback)])
+        return job
+
+    def _jobFinished(self, job, future):
+        try:
+            job.result = future.result()
+        except Exception as e:
+            default_logger().debug(e, exc_info=True)
+            job.error = e
+        job.completedAt = time.time()
+        with self.lock:
+            self.pendingJobs.pop(job.jobKey, None)
+            if job.error is None:
+                self.completedJobs[job.jobKey] = job
+            subscribers = list(job.subscribers)
+        self._notify(job, subscribers)
+        job.finished.set()
+
+    def _notify(self, job, subscribers):
+        for user, callback in subscribers:
+            if callback is None:
+                continue
+            try:
+                callback(job, user)
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+
+    def clearCache(self):
+        with self.lock:
+            self.completedJobs.clear()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,238 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+from pkscreener.classes import VERSION
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+MAGIC = b"PKSCANRS"
+
+class PKScanResultsCache(SingletonMixin, metaclass=SingletonType):
+    """
+    Local cache of the scan results of each backtest date. The results of a
+    date are kept under a key made from the scan (options, parameters and
+    the user arguments that change the results), the config, the version,
+    the strength of the base index, the (daily and intraday) candles of all
+    the stocks that got scanned for that date and the date itself. A
+    backtest (or growth of 10k/X-Ray run) that scans the same date again
+    with the same data then gets the results from the cache instead of
+    screening all the stocks again.
+    """
+    # The user arguments the screening results depend on
+    resultsUserArgs = ["usertag", "simulate", "systemlaunched", "monitor"]
+
+    def __init__(self, cacheDirPath=None, maxEntries=1000):
+        super(PKScanResultsCache, self).__init__()
+        self.cacheDirPath = cacheDirPath if cacheDirPath is not None else os.path.join(Archiver.get_user_data_dir(), "scan_results")
+        self.maxEntries = maxEntries
+        self.lock = threading.Lock()
+        self.resetScan()
+
+    def resetScan(self):
+        self.scanning = False
+        self.cachedEntries = {}
+        self.pendingDates = {}
+        self.receivedResults = {}
+        self.numExpected = 0
+        self.numReceived = 0
+
+    def configHash(self, configManager):
+        settings = {key: value for key, value in vars(configManager).items()
+                    if not key.startswith("_") and isinstance(value, (bool, int, float, str, list, tuple))}
+        return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def scanKey(self, item, options, configManager, indexStrength=None):
+        # Everything in the item that shapes the results, except for the
+        # stock, the number of stocks and the backtest date
+        parameters = item[:10] + item[13:17] + item[19:20]
+        userArgs = item[17] if len(item) > 17 else None
+        userArgsKey = json.dumps({name: getattr(userArgs, name, None) for name in PKScanResultsCache.resultsUserArgs}, sort_keys=True, default=str)
+        return f"{VERSION}|{options}|{repr(parameters)}|{userArgsKey}|{indexStrength}|{self.configHash(configManager)}"
+
+    def stockHash(self, stockData):
+        if stockData is None:
+            return None
+        if isinstance(stockData, pd.DataFrame):
+            columns, rows, index = list(stockData.columns), stockData.to_numpy(), list(stockData.index)
+        else:
+            columns, rows, index = list(stockData.get("columns", [])), stockData.get("data", []), stockData.get("index", [])
+        digest = hashlib.sha1(json.dumps([str(column) for column in columns]).encode("utf-8"))
+        digest.update(json.dumps([str(date) for date in index]).encode("utf-8"))
+        try:
+            digest.update(np.ascontiguousarray(np.array(rows, dtype=np.float64)).tobytes())
+        except (TypeError, ValueError):
+            digest.update(pickle.dumps(rows, protocol=4))
+        return digest.hexdigest()
+
+    def dateLabel(self, stockData, backtestDuration):
+        try:
+            index = list(stockData.index) if isinstance(stockData, pd.DataFrame) else stockData.get("index", [])
+            return str(index[-1 - backtestDuration])[:10] if len(index) > backtestDuration else "NA"
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            return "NA"
+
+    def resultsKey(self, scanKey, backtestDuration, stocks, stockHashes):
+        """
+        Returns the key for the results of the scan of the given stocks on
+        the given backtest date or None if the candles of any of the stocks
+        are not known, in which case the results can not be cached.
+        """
+        digest = hashlib.sha1(f"{scanKey}|{backtestDuration}".encode("utf-8"))
+        for stock in sorted(stocks):
+            stockHash = stockHashes.get(stock)
+            if stockHash is None:
+                return None
+            digest.update(f"|{stock}:{stockHash}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def filePath(self, resultsKey, dateLabel="NA"):
+        return os.path.join(self.cacheDirPath, f"{dateLabel}_{resultsKey}.pkscan")
+
+    def saveEntry(self, resultsKey, entry):
+        codec = PKCompressedCache.defaultCodec()
+        content = MAGIC + bytes([PKCompressedCache.codecIds[codec]]) + \
+            PKCompressedCache.compress(pickle.dumps(entry, protocol=4), codec)
+        os.makedirs(self.cacheDirPath, exist_ok=True)
+        PKCompressedCache.atomicWrite(self.filePath(resultsKey, entry.get("date", "NA")), lambda f: f.write(content))
+        self.pruneEntries()
+
+    def loadEntry(self, resultsKey):
+        filePaths = glob.glob(os.path.join(self.cacheDirPath, f"*_{resultsKey}.pkscan"))
+        if len(filePaths) == 0:
+            return None
+        try:
+            with open(filePaths[0], "rb") as f:
+                content = f.read()
+            if not content.startswith(MAGIC):
+                return None
+            codecs = {codecId: codec for codec, codecId in PKCompressedCache.codecIds.items()}
+            return pickle.loads(PKCompressedCache.decompress(content[len(MAGIC) + 1:], codecs[content[len(MAGIC)]]))
+        except Exception as e:
+            default_logger().debug(e, exc_info=True)
+            return None
+
+    def pruneEntries(self):
+        filePaths = glob.glob(os.path.join(self.cacheDirPath, "*.pkscan"))
+        if len(filePaths) <= self.maxEntries:
+            return
+        for filePath in sorted(filePaths, key=os.path.getmtime)[:len(filePaths) - self.maxEntries]:
+            try:
+                os.remove(filePath)
+            except OSError as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+
+    def beginScan(self, options, configManager, stockDict, items, intradayStockDict=None, indexStrength=None):
+        """
+        Looks up the results of each backtest date (item[18]) of the scan
+        items and returns the items of the dates that still need to be
+        screened. The results of the other dates are in cachedResults().
+        The intraday candles (intradayStockDict) and the strength of the base
+        index (for the RS ratings) go into the key as well.
+        """
+        with self.lock:
+            self.resetScan()
+            if len(items) == 0:
+                return items
+            scanKey = self.scanKey(items[0], options, configManager, indexStrength=indexStrength)
+            itemsForDates = {}
+            for item in items:
+                itemsForDates.setdefault(item[18], []).append(item)
+            stockHashes = {}
+            for stock in set(item[12] for item in items):
+                try:
+                    stockHash = self.stockHash(stockDict.get(stock)) if stockDict is not None else None
+                    if stockHash is not None and intradayStockDict is not None and stock in intradayStockDict.keys():
+                        stockHash = f"{stockHash}:{self.stockHash(intradayStockDict.get(stock))}"
+                    stockHashes[stock] = stockHash
+                except Exception as e: # pragma: no cover
+                    default_logger().debug(e, exc_info=True)
+            pendingItems = []
+            for backtestDuration, dateItems in itemsForDates.items():
+                stocks = [item[12] for item in dateItems]
+                resultsKey = self.resultsKey(scanKey, backtestDuration, stocks, stockHashes)
+                entry = self.loadEntry(resultsKey) if resultsKey is not None else None
+                if entry is not None and entry.get("numItems") == len(dateItems):
+                    self.cachedEntries[backtestDuration] = entry
+                    continue
+                dateLabel = self.dateLabel(stockDict.get(stocks[0]), backtestDuration) if resultsKey is not None else "NA"
+                self.pendingDates[backtestDuration] = (resultsKey, len(dateItems), dateLabel)
+                pendingItems.extend(dateItems)
+            self.numExpected = len(pendingItems)
+            self.scanning = True
+            return pendingItems
+
+    def cachedResults(self):
+        """
+        Returns the cached results (None for the stocks that did not match)
+        of the dates found in the cache, the oldest date first.
+        """
+        results = []
+        for backtestDuration in sorted(self.cachedEntries.keys(), reverse=True):
+            entry = self.cachedEntries[backtestDuration]
+            results.extend(entry["results"])
+            results.extend([None] * (entry["numItems"] - len(entry["results"])))
+        return results
+
+    def addResult(self, result):
+        if not self.scanning:
+            return
+        with self.lock:
+            self.numReceived += 1
+            if result is not None:
+                self.receivedResults.setdefault(result[4], []).append(result)
+
+    def endScan(self):
+        """
+        Saves the results of the dates that were screened, but only when all
+        of their results came in. Returns the number of dates saved.
+        """
+        with self.lock:
+            numSaved = 0
+            if self.scanning and self.numReceived == self.numExpected:
+                for backtestDuration, (resultsKey, numItems, dateLabel) in self.pendingDates.items():
+                    if resultsKey is None:
+                        continue
+                    try:
+                        self.saveEntry(resultsKey, {"date": dateLabel,
+                                                    "numItems": numItems,
+                                                    "results": self.receivedResults.get(backtestDuration, [])})
+                        numSaved += 1
+                    except Exception as e: # pragma: no cover
+                        default_logger().debug(e, exc_info=True)
+            self.resetScan()
+            return numSaved
@@ -43,10 +43,15 @@ from pkscreener.classes.StockScreener import StockScreener
 from pkscreener.classes.CandlePatterns import CandlePatterns
 from pkscreener.classes.ConfigManager import parser, tools
 from PKDevTools.classes.OutputControls import OutputControls
-from PKNSETools.PKIntraDay import Intra_Day
 import pkscreener.classes.Fetcher as Fetcher
 import pkscreener.classes.ScreeningStatistics as ScreeningStatistics
 import pkscreener.classes.Utility as Utility
+from pkscreener.classes.PKWorkerTuner import PKWorkerTuner
+from pkscreener.classes.PKScanScheduler import PKScanScheduler
+from pkscreener.classes.PKPredicatePlanner import PKPredicatePlanner
+from pkscreener.classes.PKRelativeStrength import PKRelativeStrength
+from pkscreener.classes.PKBbandsSqueeze import PKBbandsSqueeze
+from pkscreener.classes.PKOrderInfo import PKOrderInfo
 
 class PKScanRunner:
     configManager = tools()
@@ -57,6 +62,15 @@ class PKScanRunner:
     results_queue = None
     scr = None
     consumers = None
+    activeWorkersLimit = None
+    spawnWorker = None
+    scanTimings = None
+    # Most expensive stocks first with continuous refill instead of fixed batches
+    costAwareScheduling = True
+    # Backtests screen each stock once for all the backtest dates
+    multiDayBacktests = True
+    # Backtest dates already scanned with the same data come from the results cache
+    cacheBacktestResults = True
 
     def initDataframes():
         screenResults = pd.DataFrame(
@@ -102,9 +116,8 @@ class PKScanRunner:
         results_queue = multiprocessing.Queue()
         logging_queue = multiprocessing.Queue()
 
-        totalConsumers = 1 if (userPassedArgs is not None and userPassedArgs.singlethread) else min(minimumCount, multiprocessing.cpu_count())
-        if totalConsumers == 1:
-            totalConsumers = 2  # This is required for single core machine
+        # Within the CPU and memory limits, and tuned by what the workers needed in an earlier scan
+        totalConsumers = PKWorkerTuner().initialWorkers(minimumCount, singleThread=(userPassedArgs is not None and userPassedArgs.singlethread))
         # if PKScanRunner.configManager.cacheEnabled is True and multiprocessing.cpu_count() > 2:
         #     totalConsumers -= 1
         return tasks_queue, results_queue, totalConsumers, logging_queue
@@ -116,7 +129,8 @@ class PKScanRunner:
         mayBePiped = userPassedArgs is not None and (userPassedArgs.monitor is not None or "|" in userPassedArgs.options)
         if exit and not mayBePiped:
             # Append exit signal for each process indicated by None
-            for _ in range(multiprocessing.cpu_count()):
+            # The worker tuner may have started more workers than there are CPUs
+            for _ in range(max(multiprocessing.cpu_count(), len(PKScanRunner.consumers) if PKScanRunner.consumers is not None else 0)):
                 tasks_queue.put(None)
 
 
@@ -169,6 +183,26 @@ class PKScanRunner:
                     ]
         items.extend(moreItems)
 
+    def groupBacktestItems(items):
+        """
+        Merges the backtest items of each stock (one per backtest date) into
+        one item that carries all the backtest dates of the stock, in the
+        order they were added (oldest first).
+        """
+        groupedItems = {}
+        for item in items:
+            stock = item[12]
+            groupedItem = groupedItems.get(stock)
+            if groupedItem is None:
+                groupedItems[stock] = item[:18] + ((item[18],),) + item[19:]
+            elif item[18] not in groupedItem[18]:
+                groupedItems[stock] = groupedItem[:18] + (groupedItem[18] + (item[18],),) + groupedItem[19:]
+        return list(groupedItems.values())
+
+    def resultsCount(items):
+        # Multi-day backtest items give one result per backtest date
+        return sum(len(item[18]) if isinstance(item[18], tuple) else 1 for item in items)
+
     def getStocksListForScan(userArgs, menuOption, totalStocksInReview, downloadedRecently, daysInPast):
         savedStocksCount = 0
         pastDate, savedListResp = PKScanRunner.downloadSavedResults(daysInPast,downloadedRecently=downloadedRecently)
@@ -253,6 +287,10 @@ class PKScanRunner:
             
     def runScanWithParams(userPassedArgs,keyboardInterruptEvent,screenCounter,screenResultsCounter,stockDictPrimary,stockDictSecondary,testing, backtestPeriod, menuOption, executeOption, samplingDuration, items,screenResults, saveResults, backtest_df,scanningCb,tasks_queue, results_queue, consumers,logging_queue):
         if tasks_queue is None or results_queue is None or consumers is None:
+            # Fetching the bid/ask of a few thousand stocks can take longer than
+            # prepareToRunScan may, so it's done before the workers get started.
+            if PKScanRunner.needsOrderInfo(items):
+                PKScanRunner.prefetchOrderInfo(items)
             tasks_queue, results_queue, consumers,logging_queue = PKScanRunner.prepareToRunScan(menuOption,keyboardInterruptEvent,screenCounter, screenResultsCounter, stockDictPrimary,stockDictSecondary, items,executeOption,userPassedArgs)
             try:
                 if logging_queue is not None:
@@ -298,57 +336,161 @@ class PKScanRunner:
                 worker._clear()
         return screenResults, saveResults,backtest_df,tasks_queue, results_queue, consumers, logging_queue
 
+    def indexStrength():
+        # Get RS rating stock value of the index, once per trading day
+        from pkscreener.classes.Fetcher import screenerStockDataFetcher
+        configManager = PKScanRunner.configManager
+        return PKRelativeStrength().indexStrength(
+            f"{configManager.baseIndex}:{configManager.period}:{configManager.duration}",
+            lambda: screenerStockDataFetcher().fetchStockData(configManager.baseIndex,configManager.period,configManager.duration,None,0,0,0,exchangeSuffix=""))
+
     @exit_after(180) # Should not remain stuck starting the multiprocessing clients beyond this time
     def prepareToRunScan(menuOption,keyboardInterruptEvent, screenCounter, screenResultsCounter, stockDictPrimary,stockDictSecondary, items, executeOption,userPassedArgs):
         tasks_queue, results_queue, totalConsumers, logging_queue = PKScanRunner.initQueues(len(items),userPassedArgs)
         scr = ScreeningStatistics.ScreeningStatistics(PKScanRunner.configManager, default_logger())
         exists, cache_file = Utility.tools.afterMarketStockDataExists(intraday=PKScanRunner.configManager.isIntradayConfig())
         sec_cache_file = cache_file if "intraday_" in cache_file else f"intraday_{cache_file}"
-        # Get RS rating stock value of the index
-        from pkscreener.classes.Fetcher import screenerStockDataFetcher
-        nsei_df = screenerStockDataFetcher().fetchStockData(PKScanRunner.configManager.baseIndex,PKScanRunner.configManager.period,PKScanRunner.configManager.duration,None,0,0,0,exchangeSuffix="")
-        rs_score_index = -1
+        rs_score_index = PKScanRunner.indexStrength()
         PKScanRunner.configManager.getConfig(parser)
-        if nsei_df is not None:
-            rs_score_index = scr.calc_relative_strength(nsei_df[::-1])
-        consumers = [
-                    PKMultiProcessorClient(
-                        StockScreener().screenStocks,
-                        tasks_queue,
-                        results_queue,
-                        logging_queue,
-                        screenCounter,
-                        screenResultsCounter,
-                        # stockDictPrimary,
-                        # stockDictSecondary,
-                        (stockDictPrimary if menuOption not in ["C"] else None),
-                        (stockDictSecondary if menuOption not in ["C"] else None),
-                        PKScanRunner.fetcher.proxyServer,
-                        keyboardInterruptEvent,
-                        default_logger(),
-                        PKScanRunner.fetcher,
-                        PKScanRunner.configManager,
-                        PKScanRunner.candlePatterns,
-                        scr,
-                        # None,
-                        # None
-                        (cache_file if (exists and menuOption in ["C"]) else None),
-                        (sec_cache_file if (exists and menuOption in ["C"]) else None),
-                        rs_strange_index=rs_score_index
-                    )
-                    for _ in range(totalConsumers)
-                ]
-        # if executeOption == 29: # Intraday Bid/Ask, for which we need to fetch data from NSE instead of yahoo
-        try:
-            intradayFetcher = None
-            intradayFetcher = Intra_Day("SBINEQN") # This will initialise the cookies etc.
-        except:
-            pass
+        if menuOption not in ["C"]:
+            stockData = PKScanRunner.cachedStockData(stockDictPrimary, items)
+            if PKScanRunner.needsCandlePatterns(items):
+                PKScanRunner.precomputeCandlePatterns(stockData)
+            if rs_score_index > 0 and PKScanRunner.needsRelativeStrength(items):
+                PKScanRunner.precomputeRelativeStrength(scr, stockData)
+            if PKScanRunner.needsBbandsSqueeze(items):
+                PKScanRunner.precomputeBbandsSqueeze(scr, stockData)
+        # Each worker needs a permit to screen a stock. The worker tuner can
+        # then change how many of them screen at a time.
+        activeWorkersLimit = multiprocessing.Semaphore(totalConsumers)
+        # The workers report back how long each stock took to screen
+        scanTimings = multiprocessing.Queue()
+        def newConsumer():
+            return PKMultiProcessorClient(
+                            StockScreener().screenStocksWithinLimits,
+                            tasks_queue,
+                            results_queue,
+                            logging_queue,
+                            screenCounter,
+                            screenResultsCounter,
+                            # stockDictPrimary,
+                            # stockDictSecondary,
+                            (stockDictPrimary if menuOption not in ["C"] else None),
+                            (stockDictSecondary if menuOption not in ["C"] else None),
+                            PKScanRunner.fetcher.proxyServer,
+                            keyboardInterruptEvent,
+                            default_logger(),
+                            PKScanRunner.fetcher,
+                            PKScanRunner.configManager,
+                            PKScanRunner.candlePatterns,
+                            scr,
+                            # None,
+                            # None
+                            (cache_file if (exists and menuOption in ["C"]) else None),
+                            (sec_cache_file if (exists and menuOption in ["C"]) else None),
+                            rs_strange_index=rs_score_index
+                        )
+        consumers = [newConsumer() for _ in range(totalConsumers)]
+        # Intraday Bid/Ask comes from NSE instead of yahoo and has been fetched above
+        orderInfo = PKOrderInfo()
         for consumer in consumers:
-            consumer.intradayNSEFetcher = intradayFetcher
+            consumer.orderInfo = orderInfo
+            consumer.activeWorkersLimit = activeWorkersLimit
+            consumer.scanTimings = scanTimings
+        def spawnWorker():
+            consumer = newConsumer()
+            consumer.orderInfo = orderInfo
+            consumer.activeWorkersLimit = activeWorkersLimit
+            consumer.scanTimings = scanTimings
+            consumer.daemon = True
+            consumer.start()
+            consumers.append(consumer)
+        PKScanRunner.activeWorkersLimit = activeWorkersLimit
+        PKScanRunner.spawnWorker = spawnWorker
+        PKScanRunner.scanTimings = scanTimings
         PKScanRunner.startWorkers(consumers)
         return tasks_queue,results_queue,consumers,logging_queue
 
+    def cachedStockData(stockDictPrimary, items):
+        # The cached data of the stocks to be screened
+        stockData = {}
+        if stockDictPrimary is None or len(stockDictPrimary) == 0:
+            return stockData
+        try:
+            for stock in set(item[12] for item in items):
+                data = stockDictPrimary.get(stock)
+                if data is not None:
+                    stockData[stock] = data
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+        return stockData
+
+    def needsCandlePatterns(items):
+        # Backtests screen older slices of the candles, which never match the
+        # latest candles the patterns get precomputed for. Without TA-Lib the
+        # patterns would be found one stock after another in the main process,
+        # so the workers find them in parallel instead.
+        if len(items) == 0 or not PKScanRunner.candlePatterns.canBatchPatterns():
+            return False
+        return not any((max(item[18]) if isinstance(item[18], tuple) else item[18]) > 0 for item in items)
+
+    def precomputeCandlePatterns(stockData):
+        # Find the candle patterns for all the stocks with the cached data in one
+        # sweep. The workers get a copy of PKScanRunner.candlePatterns and only
+        # need to look the patterns up when the candles are the same.
+        if len(stockData) == 0:
+            return
+        try:
+            PKScanRunner.candlePatterns.precomputePatterns(stockData)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            PKScanRunner.candlePatterns.precomputedHits = {}
+
+    def needsRelativeStrength(items):
+        # The VCP scans and the scans tagged for VCP show the RS rating
+        if len(items) == 0:
+            return False
+        executeOption, respChartPattern, userArgs = items[0][2], items[0][8], items[0][17]
+        return (executeOption == 7 and respChartPattern in [4, 8]) or (userArgs is not None and userArgs.usertag is not None and "VCP" in userArgs.usertag)
+
+    def precomputeRelativeStrength(scr, stockData):
+        # The workers get a copy of scr and only look the score of a stock up
+        try:
+            scr.relativeStrengths = PKRelativeStrength().precompute(stockData)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            scr.relativeStrengths = {}
+
+    def needsBbandsSqueeze(items):
+        # The TTM squeeze scan
+        if len(items) == 0:
+            return False
+        return items[0][2] == 7 and items[0][8] == 6
+
+    def precomputeBbandsSqueeze(scr, stockData):
+        # The workers get a copy of scr and only look the state of a stock up
+        try:
+            scr.bbandsSqueezes = PKBbandsSqueeze().precompute(stockData)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            scr.bbandsSqueezes = {}
+
+    def needsOrderInfo(items):
+        # The intraday bid/ask build-up scan
+        if len(items) == 0:
+            return False
+        return items[0][2] == 29
+
+    def prefetchOrderInfo(items):
+        # Bid/ask of all the stocks with concurrent requests. The workers get a
+        # copy of PKOrderInfo and only look the stocks up.
+        try:
+            orderInfo = PKOrderInfo()
+            orderInfo.beginScan()
+            orderInfo.fetchAll([item[12] for item in items])
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
     @exit_after(120) # Should not remain stuck starting the multiprocessing clients beyond this time
     def startWorkers(consumers):
         try:
@@ -422,8 +564,30 @@ class PKScanRunner:
         counter = 0
         shouldContinue = True
         lastNonNoneResult = None
+        totalStocks = numStocks
+        workerTuner = PKWorkerTuner()
+        workerTuner.beginScan(PKScanRunner.consumers if PKScanRunner.consumers is not None else [], PKScanRunner.activeWorkersLimit, numStocks)
+        scheduler = PKScanScheduler()
+        costAware = PKScanRunner.costAwareScheduling
+        if costAware:
+            items = scheduler.orderItems(items)
+        # Anything left over from an earlier interrupted scan
+        scheduler.drainTimings(PKScanRunner.scanTimings)
+        timings = []
+        resultTimes = []
+        queuedCount = 0
+        startTime = time.time()
         while numStocks:
-            if counter == 0 and numStocks > 0:
+            if costAware:
+                # Keep up to numStocksPerIteration stocks in the queue by
+                # topping it up after every result instead of waiting for
+                # the whole batch to finish.
+                outstanding = queuedCount - (totalStocks - numStocks)
+                if queuedCount < len(items) and outstanding < numStocksPerIteration:
+                    newItems = items[queuedCount : queuedCount + numStocksPerIteration - outstanding]
+                    queuedCount += len(newItems)
+                    PKScanRunner.populateQueues(newItems, tasks_queue, queuedCount >= len(items), userPassedArgs)
+            elif counter == 0 and numStocks > 0:
                 if queueCounter < int(iterations):
                     PKScanRunner.populateQueues(
                         items[
@@ -447,11 +611,18 @@ class PKScanRunner:
                     )
             numStocks -= 1
             result = results_queue.get()
-            if result is not None:
-                lastNonNoneResult = result
-            
-            if resultsReceivedCb is not None:
-                shouldContinue, backtest_df = resultsReceivedCb(result, numStocks, backtest_df,*otherArgs)
+            resultTimes.append(time.time())
+            timings.extend(scheduler.drainTimings(PKScanRunner.scanTimings))
+            if PKScanRunner.consumers is not None:
+                workerTuner.observe(PKScanRunner.consumers, totalStocks - numStocks, PKScanRunner.spawnWorker)
+            # Multi-day backtest items come back with one result per backtest date
+            for result in (result if isinstance(result, list) else [result]):
+                if result is not None:
+                    lastNonNoneResult = result
+                if resultsReceivedCb is not None:
+                    shouldContinue, backtest_df = resultsReceivedCb(result, numStocks, backtest_df,*otherArgs)
+                    if not shouldContinue:
+                        break
             counter += 1
             # If it's being run under unit testing, let's wrap up if we find at least 1
             # stock or if we've already tried screening through 5% of the list.
@@ -463,8 +634,14 @@ class PKScanRunner:
                         worker._clear()
                 break
             # Add to the queue when we're through 75% of the previously added items already
-            if counter >= numStocksPerIteration: #int(numStocksPerIteration * 0.75):
+            if counter >= numStocksPerIteration and not costAware: #int(numStocksPerIteration * 0.75):
                 queueCounter += 1
                 counter = 0
-        
+        if len(items) > 0:
+            timings.extend(scheduler.drainTimings(PKScanRunner.scanTimings))
+            scheduler.finishScan(scheduler.scanType(items[0]), timings, resultTimes, startTime)
+            # The next scans can then order the eligibility checks by what they cost
+            planner = PKPredicatePlanner()
+            planner.mergeObservations([check for timing in timings if len(timing) > 2 for check in timing[2]])
+            planner.saveStats()
         return backtest_df, lastNonNoneResult
@@ -0,0 +1,146 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+class PKScanScheduler(SingletonMixin, metaclass=SingletonType):
+    """
+    Orders the scan items so that the stocks which took the longest to screen
+    in earlier scans of the same type get screened first, and keeps the tasks
+    queue topped up as the results come in instead of waiting for each batch
+    to finish. The cheap stocks then fill the gaps at the end of the scan
+    rather than one slow stock holding up all the workers.
+    """
+    def __init__(self, costsFilePath=None, smoothing=0.5, maxStocksPerScanType=10000):
+        super(PKScanScheduler, self).__init__()
+        self.costsFilePath = costsFilePath if costsFilePath is not None else os.path.join(Archiver.get_user_data_dir(), "scan_costs.json")
+        self.smoothing = smoothing
+        self.maxStocksPerScanType = maxStocksPerScanType
+        self.costs = None
+        self.lastScanStats = None
+        self.lock = threading.Lock()
+
+    def scanType(self, item):
+        # menuOption:executeOption:reversalOption
+        return f"{item[0]}:{item[2]}:{item[3]}"
+
+    def loadCosts(self):
+        with self.lock:
+            if self.costs is None:
+                self.costs = {}
+                try:
+                    if os.path.exists(self.costsFilePath):
+                        with open(self.costsFilePath, "r") as f:
+                            self.costs = json.load(f)
+                except Exception as e: # pragma: no cover
+                    default_logger().debug(e, exc_info=True)
+                    self.costs = {}
+            return self.costs
+
+    def saveCosts(self):
+        with self.lock:
+            if self.costs is None:
+                return
+            content = json.dumps(self.costs).encode("utf-8")
+        try:
+            PKCompressedCache.atomicWrite(self.costsFilePath, lambda f: f.write(content))
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+
+    def orderItems(self, items):
+        """
+        Returns the items sorted by the historical cost of their stocks, the
+        most expensive first. Stocks without any history are assumed to cost
+        the median and the order is otherwise kept as is.
+        """
+        if len(items) < 2:
+            return list(items)
+        scanCosts = self.loadCosts().get(self.scanType(items[0]), {})
+        if len(scanCosts) == 0:
+            return list(items)
+        medianCost = float(np.median(list(scanCosts.values())))
+        return sorted(items, key=lambda item: scanCosts.get(str(item[12]), medianCost), reverse=True)
+
+    def drainTimings(self, timingsQueue):
+        timings = []
+        if timingsQueue is None:
+            return timings
+        while True:
+            try:
+                timings.append(timingsQueue.get_nowait())
+            except queue.Empty:
+                break
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+                break
+        return timings
+
+    def updateCosts(self, scanType, timings):
+        if len(timings) == 0:
+            return
+        costs = self.loadCosts()
+        with self.lock:
+            scanCosts = costs.get(scanType, {})
+            for timing in timings:
+                stock, seconds = str(timing[0]), timing[1]
+                previous = scanCosts.get(stock)
+                scanCosts[stock] = round(seconds if previous is None else (self.smoothing * seconds + (1 - self.smoothing) * previous), 6)
+            if len(scanCosts) > self.maxStocksPerScanType:
+                scanCosts = dict(sorted(scanCosts.items(), key=lambda cost: cost[1], reverse=True)[:self.maxStocksPerScanType])
+            costs[scanType] = scanCosts
+
+    def tailLatencyStats(self, timings, resultTimes, startTime):
+        """
+        Summarises how long the stocks took to screen and how long the last
+        10% of the results took to come in after the first 90% were in.
+        """
+        stats = {"stocks": len(resultTimes), "totalSeconds": 0.0, "tailSeconds": 0.0}
+        if len(resultTimes) > 0:
+            resultTimes = np.asarray(resultTimes) - startTime
+            stats["totalSeconds"] = round(float(resultTimes[-1]), 4)
+            stats["tailSeconds"] = round(float(resultTimes[-1] - resultTimes[int(np.ceil(0.9 * len(resultTimes))) - 1]), 4)
+        if len(timings) > 0:
+            durations = np.asarray([timing[1] for timing in timings])
+            for name, percentile in [("p50", 50), ("p90", 90), ("p99", 99)]:
+                stats[name] = round(float(np.percentile(durations, percentile)), 4)
+            stats["max"] = round(float(durations.max()), 4)
+        return stats
+
+    def finishScan(self, scanType, timings, resultTimes, startTime):
+        self.updateCosts(scanType, timings)
+        self.saveCosts()
+        self.lastScanStats = self.tailLatencyStats(timings, resultTimes, startTime)
+        default_logger().debug(f"Scan {scanType} latency: {self.lastScanStats}")
+        return self.lastScanStats
@@ -46,6 +46,7 @@ from rich.console import Console
 from rich.control import Control
 from rich.segment import ControlType
 from pkscreener.classes.PKTask import PKTask
+from pkscreener.classes.PKWorkerTuner import PKWorkerTuner
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
@@ -66,7 +67,8 @@ if __name__ == '__main__':
 progressUpdater=None
 class PKScheduler():
     def scheduleTasks(tasksList=[], label:str=None, showProgressBars=False,submitTaskAsArgs=True, timeout=6, minAcceptableCompletionPercentage=100):
-        n_workers = multiprocessing.cpu_count() - 1  # set this to the number of cores you have on your machine
+        # One less than the CPUs this process may use (cgroup limits of CI runners/containers included)
+        n_workers = max(1, PKWorkerTuner().cpuLimit() - 1)
         global progressUpdater
         console = Console()
         with Progress(
@@ -0,0 +1,78 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+import pandas as pd
+
+class PKScreeningContext:
+    """
+    The candles of the stock being screened. The validators share one
+    sanitised (missing and infinite values as 0) copy of fullData and of
+    processedData, in both the most recent first and the oldest first
+    orientation, instead of each of them copying the candles again. The
+    shared candles are read-only. With verifyReadOnly, every access checks
+    that nobody changed them since the previous one.
+    """
+    def __init__(self, fullData=None, processedData=None, verifyReadOnly=False):
+        self.fullData = fullData
+        self.processedData = processedData
+        self.verifyReadOnly = verifyReadOnly
+        self.sanitisedViews = {}
+        # The shared candles along with their fingerprints, with verifyReadOnly
+        self.fingerprints = []
+        self.lastReader = None
+        if verifyReadOnly:
+            for df in [fullData, processedData]:
+                if df is not None:
+                    self.fingerprints.append((df, self.fingerprint(df)))
+
+    def owns(self, df):
+        return df is not None and (df is self.fullData or df is self.processedData)
+
+    def fingerprint(self, df):
+        return (tuple(df.columns), tuple(df.index), pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+    def sanitised(self, df, oldestFirst=False, reader=None):
+        """
+        Returns the shared sanitised candles of df (fullData or
+        processedData). They must not be changed.
+        """
+        if self.verifyReadOnly:
+            self.verifyUnchanged(reader)
+        key = (id(df), oldestFirst)
+        data = self.sanitisedViews.get(key)
+        if data is None:
+            if oldestFirst:
+                data = self.sanitised(df, reader=reader)[::-1]
+            else:
+                data = df.fillna(0).replace([np.inf, -np.inf], 0)
+            self.sanitisedViews[key] = data
+            if self.verifyReadOnly:
+                self.fingerprints.append((data, self.fingerprint(data)))
+        return data
+
+    def verifyUnchanged(self, reader=None):
+        for data, fingerprint in self.fingerprints:
+            assert self.fingerprint(data) == fingerprint, f"The shared candles were changed by {self.lastReader or 'the screener'} (noticed by {reader or 'the screener'})"
+        self.lastReader = reader
@@ -0,0 +1,134 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import threading
+
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+class PKStockCachePreload:
+    def __init__(self, filePath, store):
+        self.filePath = filePath
+        self.store = store
+        self.fileStat = PKStockCachePreload.fileStat(filePath)
+        self.loadedCount = 0
+        self.populated = False
+        self.error = None
+        self.finished = threading.Event()
+
+    def fileStat(filePath):
+        try:
+            stat = os.stat(filePath)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    @property
+    def isDone(self):
+        return self.finished.is_set()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+class PKStockCachePreloader(SingletonMixin, metaclass=SingletonType):
+    """
+    Loads the stock data cache in the background, while the user is still
+    going through the menus, straight into the (still empty) store that the
+    scans will use. loadStockData then only needs to attach to the store once
+    the loading has finished instead of loading the cache all over again.
+    """
+    def __init__(self):
+        super(PKStockCachePreloader, self).__init__()
+        self.lock = threading.Lock()
+        self.preloads = {}
+
+    def preload(self, filePath, store):
+        """
+        Starts loading the cache at filePath into the store. Returns the
+        PKStockCachePreload or None if there's nothing to preload.
+        """
+        if store is None or not os.path.exists(filePath):
+            return None
+        with self.lock:
+            preload = self.preloads.get(filePath)
+            if preload is not None and preload.store is store:
+                return preload
+            preload = PKStockCachePreload(filePath, store)
+            self.preloads[filePath] = preload
+        threading.Thread(target=self._preload, args=(preload,), name="PKStockCachePreloader", daemon=True).start()
+        return preload
+
+    def _preload(self, preload):
+        try:
+            stockData = PKCompressedCache.load(preload.filePath)
+            stockData = {stock: (data.to_dict("split") if hasattr(data, "to_dict") else data) for stock, data in stockData.items()}
+            # Someone else already started filling up the store. Let them
+            # merge the cache the usual way.
+            if len(preload.store) == 0 and len(stockData) > 0:
+                preload.store.update(stockData)
+                preload.loadedCount = len(stockData)
+                preload.populated = True
+        except Exception as e:
+            default_logger().debug(e, exc_info=True)
+            preload.error = e
+        finally:
+            preload.finished.set()
+
+    def attach(self, filePath, store):
+        """
+        Waits for the preloading of filePath to finish and returns True if
+        the store has been populated with the cache as it's on the disk now.
+        """
+        # A preload of some other cache (say, the daily candles when the user
+        # has since switched over to intraday) must not end up in the store.
+        self.discard(store, keepFilePath=filePath)
+        with self.lock:
+            preload = self.preloads.pop(filePath, None)
+        if preload is None or preload.store is not store:
+            return False
+        preload.wait()
+        if not preload.populated:
+            return False
+        if preload.fileStat != PKStockCachePreload.fileStat(filePath) or len(store) < preload.loadedCount:
+            # The cache got replaced in the meantime. The stale candles must
+            # not win over the ones that get loaded next.
+            store.clear()
+            return False
+        return True
+
+    def discard(self, store, keepFilePath=None):
+        # The preloaded cache is not going to be used after all (for example
+        # because the market opened in the meantime or the user switched
+        # between daily and intraday candles). Take the preloaded candles out.
+        with self.lock:
+            preloads = [preload for filePath, preload in self.preloads.items() if preload.store is store and filePath != keepFilePath]
+            for preload in preloads:
+                self.preloads.pop(preload.filePath)
+        for preload in preloads:
+            preload.wait()
+            if preload.populated:
+                store.clear()
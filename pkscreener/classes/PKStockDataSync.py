@@ -0,0 +1,277 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+SYNC_SERVER_URL = "https://raw.githubusercontent.com/pkjmesra/PKScreener/actions-data-download/actions-data-download/"
+
+class PKStockDataSync:
+    """
+    Delta sync for the stock data cache. Along with the full stock_data_*.pkl,
+    the server publishes small per-day segments with just the candles of that
+    day for each symbol, and a manifest with the list of segments and the last
+    timestamp and a content hash of each symbol. A client that already has an
+    older cache only downloads the segments it does not have yet and appends
+    them to its local copy.
+    """
+    def __init__(self, isIntraday=False, baseUrl=SYNC_SERVER_URL, localFolder=None, fetcher=None, maxSegments=10, maxFailureRatio=0.05):
+        self.prefix = f"{'intraday_' if isIntraday else ''}stock_delta_"
+        self.baseUrl = baseUrl
+        self.localFolder = localFolder if localFolder is not None else Archiver.get_user_outputs_dir()
+        self.fetcher = fetcher
+        self.maxSegments = maxSegments
+        self.maxFailureRatio = maxFailureRatio
+        self.downloadedBytes = 0
+        self.downloadedSegments = []
+
+    @property
+    def manifestName(self):
+        return f"{self.prefix}manifest.json"
+
+    def segmentName(self, date):
+        return f"{self.prefix}{pd.Timestamp(date).strftime('%d%m%y')}.pkl"
+
+    def symbolHash(self, stockData):
+        # The hash of the latest candle along with its timestamp and columns
+        if stockData is None or len(stockData.get("index", [])) == 0:
+            return None
+        latest = [str(stockData["index"][-1]), list(stockData["columns"]), list(stockData["data"][-1])]
+        return hashlib.sha256(json.dumps(latest, default=str).encode("utf-8")).hexdigest()
+
+    def lastTimestamp(self, stockData):
+        if stockData is None or len(stockData.get("index", [])) == 0:
+            return None
+        return pd.Timestamp(stockData["index"][-1])
+
+    def publish(self, stockDict, outputFolder=None):
+        """
+        Writes the segment with the candles of the latest date in stockDict
+        and updates the manifest in outputFolder. Segments older than the
+        latest maxSegments get removed. Returns the list of files that were
+        written.
+        """
+        outputFolder = outputFolder if outputFolder is not None else self.localFolder
+        # One symbol at a time, keeping only the candles of its latest date,
+        # so that a Manager dict doesn't get copied over as a whole.
+        symbols = {}
+        latestRows = {}
+        for symbol, data in PKCompressedCache.symbolItems(stockDict):
+            data = data.to_dict("split") if isinstance(data, pd.DataFrame) else data
+            lastTimestamp = self.lastTimestamp(data)
+            if lastTimestamp is None:
+                continue
+            symbols[symbol] = {"last": str(lastTimestamp), "hash": self.symbolHash(data)}
+            index = pd.DatetimeIndex(data.get("index", []))
+            latestDate = index.normalize().max()
+            newRows = index.normalize() == latestDate
+            olderDates = index[~newRows]
+            segmentData = {key: value for key, value in data.items() if key not in ["index", "data"]}
+            segmentData["index"] = list(index[newRows])
+            segmentData["data"] = [row for row, isNew in zip(data["data"], newRows) if isNew]
+            latestRows[symbol] = (latestDate, lastTimestamp, olderDates.max().normalize() if len(olderDates) > 0 else None, segmentData)
+        if len(latestRows) == 0:
+            return []
+        segmentDate = max(latestDate for latestDate, _, _, _ in latestRows.values())
+        lastTimestamp = max(timestamp for _, timestamp, _, _ in latestRows.values())
+        previousDate = None
+        segment = {}
+        for symbol, (latestDate, _, olderDate, segmentData) in latestRows.items():
+            if latestDate != segmentDate:
+                continue
+            if olderDate is not None:
+                previousDate = max(olderDate, previousDate) if previousDate is not None else olderDate
+            segment[symbol] = segmentData
+        segmentFile = self.segmentName(segmentDate)
+        segmentBytes = pickle.dumps(segment, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(outputFolder, segmentFile), "wb") as f:
+            f.write(segmentBytes)
+        manifest = self.readLocalManifest(outputFolder)
+        segments = [entry for entry in manifest.get("segments", []) if entry["file"] != segmentFile]
+        segments.append({
+            "date": segmentDate.strftime("%Y-%m-%d"),
+            "last": str(lastTimestamp),
+            "after": previousDate.strftime("%Y-%m-%d") if previousDate is not None else None,
+            "file": segmentFile,
+            "sha256": hashlib.sha256(segmentBytes).hexdigest(),
+            "size": len(segmentBytes),
+        })
+        segments = sorted(segments, key=lambda entry: entry["date"])
+        for entry in segments[:-self.maxSegments]:
+            try:
+                os.remove(os.path.join(outputFolder, entry["file"]))
+            except FileNotFoundError: # pragma: no cover
+                pass
+        manifest = {
+            "version": 1,
+            "segments": segments[-self.maxSegments:],
+            "symbols": symbols,
+        }
+        with open(os.path.join(outputFolder, self.manifestName), "w") as f:
+            json.dump(manifest, f)
+        return [os.path.join(outputFolder, segmentFile), os.path.join(outputFolder, self.manifestName)]
+
+    def readLocalManifest(self, folder):
+        try:
+            with open(os.path.join(folder, self.manifestName), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def download(self, fileName):
+        if self.fetcher is None:
+            from pkscreener.classes.Fetcher import screenerStockDataFetcher
+            self.fetcher = screenerStockDataFetcher()
+        # stream=True, so that it does not get served from the requests cache
+        resp = self.fetcher.fetchURL(f"{self.baseUrl}{fileName}", stream=True)
+        if resp is None or resp.status_code != 200:
+            default_logger().debug(f"Delta sync: {fileName} request status ->{resp.status_code if resp is not None else None}")
+            return None
+        content = resp.content
+        self.downloadedBytes += len(content)
+        return content
+
+    def fetchManifest(self):
+        content = self.download(self.manifestName)
+        if content is None:
+            return None
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            default_logger().debug(e, exc_info=True)
+            return None
+
+    def fetchSegment(self, entry):
+        # Segments downloaded earlier are re-used as long as they are intact
+        localPath = os.path.join(self.localFolder, entry["file"])
+        if os.path.exists(localPath):
+            with open(localPath, "rb") as f:
+                content = f.read()
+            if hashlib.sha256(content).hexdigest() == entry["sha256"]:
+                return pickle.loads(content)
+        content = self.download(entry["file"])
+        if content is None or hashlib.sha256(content).hexdigest() != entry["sha256"]:
+            default_logger().debug(f"Delta sync: segment {entry['file']} is missing or corrupt.")
+            return None
+        self.downloadedSegments.append(entry["file"])
+        try:
+            with open(localPath, "wb") as f:
+                f.write(content)
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+        return pickle.loads(content)
+
+    def appendSegment(self, stockData, segmentData):
+        # Returns stockData with the candles in segmentData that are newer than
+        # what stockData already has. None if the columns don't line up.
+        columns = list(stockData["columns"])
+        segmentColumns = list(segmentData["columns"])
+        if columns != segmentColumns:
+            if sorted(columns) != sorted(segmentColumns):
+                return None
+            order = [segmentColumns.index(column) for column in columns]
+            segmentData = dict(segmentData)
+            segmentData["data"] = [[row[i] for i in order] for row in segmentData["data"]]
+        last = self.lastTimestamp(stockData)
+        appended = {key: value for key, value in segmentData.items() if key not in ["index", "data", "columns"]}
+        appended = {**stockData, **appended}
+        appended["index"] = list(stockData["index"])
+        appended["data"] = list(stockData["data"])
+        for timestamp, row in zip(segmentData["index"], segmentData["data"]):
+            if last is None or pd.Timestamp(timestamp) > last:
+                appended["index"].append(timestamp)
+                appended["data"].append(row)
+        return appended
+
+    def canContinue(self, segments, last):
+        # Each segment that we need must start right after the previous one
+        previousDate = last.strftime("%Y-%m-%d")
+        for entry in segments:
+            if entry["date"] <= previousDate:
+                continue
+            if entry["after"] is not None and entry["after"] > previousDate:
+                return False
+            previousDate = entry["date"]
+        return True
+
+    def sync(self, stockDict):
+        """
+        Brings stockDict (symbol -> data in to_dict("split") form, from an
+        older local cache) up to date with the server using the delta
+        segments. Returns (syncedStockDict, synced). Symbols that could not be
+        verified against the manifest are left out so that they get fetched
+        afresh. synced is False if there's no manifest, a segment could not be
+        downloaded or verified, or too many symbols failed, in which case the
+        full cache should be downloaded instead.
+        """
+        manifest = self.fetchManifest()
+        if manifest is None or len(manifest.get("segments", [])) == 0:
+            return stockDict, False
+        segments = sorted(manifest["segments"], key=lambda entry: entry["date"])
+        symbols = manifest.get("symbols", {})
+        # Only the symbols for which the segments continue right from where
+        # our data ends can be brought up to date.
+        syncedDict = {}
+        neededFrom = None
+        for symbol in symbols.keys():
+            last = self.lastTimestamp(stockDict.get(symbol))
+            if last is None or not self.canContinue(segments, last):
+                continue
+            syncedDict[symbol] = stockDict[symbol]
+            neededFrom = last if neededFrom is None else min(neededFrom, last)
+        if neededFrom is None:
+            return stockDict, False
+        for entry in segments:
+            if pd.Timestamp(entry["last"]) <= neededFrom:
+                # We already have all of it
+                continue
+            segment = self.fetchSegment(entry)
+            if segment is None:
+                return stockDict, False
+            for symbol, segmentData in segment.items():
+                stockData = syncedDict.get(symbol)
+                if stockData is None:
+                    continue
+                appended = self.appendSegment(stockData, segmentData)
+                if appended is not None:
+                    syncedDict[symbol] = appended
+        failed = []
+        for symbol, expected in symbols.items():
+            stockData = syncedDict.get(symbol)
+            if stockData is None or str(self.lastTimestamp(stockData)) != expected["last"] or self.symbolHash(stockData) != expected["hash"]:
+                failed.append(symbol)
+        for symbol in failed:
+            syncedDict.pop(symbol, None)
+        default_logger().debug(f"Delta sync: {len(symbols) - len(failed)} symbols synced, {len(failed)} failed, {self.downloadedBytes} bytes downloaded.")
+        if len(failed) > len(symbols) * self.maxFailureRatio:
+            return stockDict, False
+        return syncedDict, True
@@ -0,0 +1,150 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from PKDevTools.classes import Archiver
+from PKDevTools.classes.log import default_logger
+
+def nseSymbolInfo(symbol):
+    # The quote of the symbol from NSE with its info, metadata and industryInfo
+    from PKNSETools.PKCompanyGeneral import download
+    from pkscreener.classes.PKTask import PKTask
+    task = PKTask(f"DataDownload-{symbol}", long_running_fn=download, long_running_fn_args=(symbol))
+    task.userData = symbol
+    download(task)
+    return None if task.result is None else json.loads(task.result)
+
+class PKSymbolMetadata:
+    """
+    Local sqlite database of the company name, sector and industry of the
+    symbols. These rarely change, so the symbols only get downloaded again
+    (in bulk, a few at a time) once their record is older than maxAgeDays,
+    and the scans look them up by symbol, sector or industry with indexed
+    queries instead of going to NSE for each symbol.
+    """
+    columns = ["symbol", "companyName", "macro", "sector", "industry", "basicIndustry", "isin", "info", "updatedAt"]
+    # Older sqlite builds allow at most 999 variables in a statement
+    maxQueryVariables = 900
+
+    def __init__(self, dbPath=None, source=None, maxAgeDays=30, maxWorkers=4):
+        self.dbPath = dbPath if dbPath is not None else os.path.join(Archiver.get_user_data_dir(), "symbol_metadata.db")
+        self.source = source if source is not None else nseSymbolInfo
+        self.maxAgeDays = maxAgeDays
+        self.maxWorkers = maxWorkers
+        with closing(self.connect()) as connection, connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS symbols (
+                                    symbol TEXT PRIMARY KEY, companyName TEXT, macro TEXT, sector TEXT, industry TEXT,
+                                    basicIndustry TEXT, isin TEXT, info TEXT, updatedAt REAL)""")
+            connection.execute("CREATE INDEX IF NOT EXISTS symbols_sector ON symbols (sector)")
+            connection.execute("CREATE INDEX IF NOT EXISTS symbols_industry ON symbols (industry)")
+
+    def connect(self):
+        connection = sqlite3.connect(self.dbPath, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def record(symbol, quote):
+        """
+        The row for the symbol from its NSE quote. The info part is kept as is
+        since that's what the Sector/Industry download saves.
+        """
+        if not isinstance(quote, dict) or not isinstance(quote.get("info"), dict):
+            return None
+        info = quote["info"]
+        industryInfo = quote.get("industryInfo") if isinstance(quote.get("industryInfo"), dict) else {}
+        return (symbol, info.get("companyName"), industryInfo.get("macro"), industryInfo.get("sector"),
+                industryInfo.get("industry", info.get("industry")), industryInfo.get("basicIndustry"),
+                info.get("isin"), json.dumps(info), time.time())
+
+    def fetchRecord(self, symbol):
+        try:
+            return PKSymbolMetadata.record(symbol, self.source(symbol))
+        except Exception as e:
+            default_logger().debug(e, exc_info=True)
+            return None
+
+    def staleSymbols(self, symbols):
+        updatedAt = {row["symbol"]: row["updatedAt"] for row in self.query("symbol", symbols, columns=["symbol", "updatedAt"])}
+        oldest = time.time() - self.maxAgeDays * 86400
+        return [symbol for symbol in symbols if updatedAt.get(symbol, 0) < oldest]
+
+    def refresh(self, symbols, force=False, progress=None):
+        """
+        Downloads the metadata of the symbols that we don't have or that are
+        older than maxAgeDays (all of them when forced) and saves them in one
+        transaction. Returns the symbols that could not be downloaded.
+        progress, if given, gets called with the number of symbols done so
+        far and the total after each of them.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        pending = symbols if force else self.staleSymbols(symbols)
+        if len(pending) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.maxWorkers, len(pending)))) as executor:
+            records = []
+            for record in executor.map(self.fetchRecord, pending):
+                records.append(record)
+                if progress is not None:
+                    progress(len(records), len(pending))
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(f"INSERT OR REPLACE INTO symbols ({', '.join(PKSymbolMetadata.columns)}) VALUES ({', '.join('?' * len(PKSymbolMetadata.columns))})",
+                                   [record for record in records if record is not None])
+        failed = [symbol for symbol, record in zip(pending, records) if record is None]
+        default_logger().debug(f"Refreshed the metadata of {len(pending) - len(failed)} of {len(symbols)} symbols. {len(failed)} failed.")
+        return failed
+
+    def query(self, column, values, columns=None):
+        # The rows with the column having any of the values, in as few
+        # queries as the sqlite limit on the number of variables allows
+        values = [values] if isinstance(values, str) else list(values)
+        if len(values) == 0:
+            return []
+        rows = []
+        with closing(self.connect()) as connection:
+            for chunkStart in range(0, len(values), PKSymbolMetadata.maxQueryVariables):
+                chunk = values[chunkStart : chunkStart + PKSymbolMetadata.maxQueryVariables]
+                rows.extend(connection.execute(f"SELECT {', '.join(columns or PKSymbolMetadata.columns)} FROM symbols WHERE {column} IN ({', '.join('?' * len(chunk))}) ORDER BY symbol",
+                                               chunk).fetchall())
+        if len(values) > PKSymbolMetadata.maxQueryVariables and "symbol" in (columns or PKSymbolMetadata.columns):
+            rows.sort(key=lambda row: row["symbol"])
+        return rows
+
+    def metadata(self, symbols):
+        return {row["symbol"]: dict(row) for row in self.query("symbol", symbols, columns=PKSymbolMetadata.columns[:-2])}
+
+    def symbolsBySector(self, sectors):
+        return [row["symbol"] for row in self.query("sector", sectors, columns=["symbol"])]
+
+    def symbolsByIndustry(self, industries):
+        return [row["symbol"] for row in self.query("industry", industries, columns=["symbol"])]
+
+    def sectors(self):
+        with closing(self.connect()) as connection:
+            return [row["sector"] for row in connection.execute("SELECT DISTINCT sector FROM symbols WHERE sector IS NOT NULL ORDER BY sector")]
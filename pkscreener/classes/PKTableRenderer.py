@@ -0,0 +1,244 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+# Vertical gap between the lines of a multiline text. Same as the PIL default.
+LINE_SPACING = 4
+
+class PKTableRenderer(SingletonMixin, metaclass=SingletonType):
+    """
+    Caches everything that tableToImage needs over and over for similar
+    tables: the loaded fonts, per-glyph metrics, the rendered text masks for
+    repeated strings (grid lines, column separators, legend, repo and art
+    texts) and the pre-computed layout of each tabulated block.
+    """
+    def __init__(self, maxMaskPixels=32*1024*1024, maxLayouts=64):
+        super(PKTableRenderer, self).__init__()
+        self.maxMaskPixels = maxMaskPixels
+        self.maxLayouts = maxLayouts
+        self.fonts = {}
+        self.glyphs = {}
+        self.cellColors = {}
+        self.masks = OrderedDict()
+        self.maskPixels = 0
+        self.layouts = OrderedDict()
+        self.measuringDraw = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+    def font(self, fontPath, fontSize):
+        key = (fontPath, fontSize)
+        if key not in self.fonts.keys():
+            self.fonts[key] = ImageFont.truetype(fontPath, fontSize)
+        return self.fonts[key]
+
+    def glyphMetrics(self, font, char):
+        key = (font.path, font.size, char)
+        metrics = self.glyphs.get(key)
+        if metrics is None:
+            left, _, right, _ = font.getbbox(char, anchor="ls")
+            metrics = (font.getlength(char), left, right)
+            self.glyphs[key] = metrics
+        return metrics
+
+    def textWidth(self, font, text):
+        # Same as font.getsize(text)[0] for fonts without kerning (like the
+        # report font), but computed from the cached glyph metrics.
+        if len(text) == 0:
+            return 0
+        x = 0
+        left = 0
+        right = 0
+        for char in text:
+            advance, glyphLeft, glyphRight = self.glyphMetrics(font, char)
+            left = min(left, x + glyphLeft)
+            right = max(right, x + glyphRight)
+            x += advance
+        return int(max(right, x) - left)
+
+    def lineHeight(self, font):
+        return self.textSize(font, "A")[1]
+
+    def textSize(self, font, text):
+        # Same as font.getsize_multiline(text)
+        key = (font.path, font.size, "lineHeight")
+        lineHeight = self.glyphs.get(key)
+        if lineHeight is None:
+            lineHeight = font.getsize("A")[1]
+            self.glyphs[key] = lineHeight
+        lines = text.split("\n")
+        width = max([self.textWidth(font, line) for line in lines])
+        return width, (lineHeight + LINE_SPACING) * len(lines) - LINE_SPACING
+
+    def textMask(self, font, text):
+        key = (font.path, font.size, text)
+        cached = self.masks.get(key)
+        if cached is not None:
+            self.masks.move_to_end(key)
+            return cached
+        left, top, right, bottom = self.measuringDraw.textbbox((0, 0), text, font=font)
+        mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+        cached = (mask, left, top)
+        self.masks[key] = cached
+        self.maskPixels += mask.size[0] * mask.size[1]
+        while self.maskPixels > self.maxMaskPixels and len(self.masks) > 1:
+            _, (evicted, _, _) = self.masks.popitem(last=False)
+            self.maskPixels -= evicted.size[0] * evicted.size[1]
+        return cached
+
+    def drawText(self, image, xy, text, font, fill, reuse=True):
+        if text is None or len(text.strip()) == 0:
+            return
+        if not reuse and (font.path, font.size, text) not in self.masks.keys():
+            ImageDraw.Draw(image).text(xy, text, font=font, fill=fill)
+            return
+        mask, left, top = self.textMask(font, text)
+        image.paste(fill, (int(xy[0] + left), int(xy[1] + top)), mask)
+
+    def drawOps(self, image, ops, x, y, font):
+        draw = ImageDraw.Draw(image)
+        for dx, dy, text, fill, reuse in ops:
+            if len(text.strip()) == 0:
+                # Nothing to be inked
+                continue
+            if reuse or (font.path, font.size, text) in self.masks.keys():
+                mask, left, top = self.textMask(font, text)
+                image.paste(fill, (int(x + dx + left), int(y + dy + top)), mask)
+            else:
+                draw.text((x + dx, y + dy), text, font=font, fill=fill)
+
+    def cachedLayout(self, key, builder):
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.layouts.move_to_end(key)
+            return layout
+        layout = builder()
+        self.layouts[key] = layout
+        while len(self.layouts) > self.maxLayouts:
+            self.layouts.popitem(last=False)
+        return layout
+
+    def parsedCellColors(self, cellValue, gridColor, cellColorsParser):
+        key = (cellValue, gridColor)
+        parsed = self.cellColors.get(key)
+        if parsed is None:
+            if len(self.cellColors) > 65536:
+                self.cellColors.clear()
+            parsed = cellColorsParser(cellValue, defaultCellFillColor=gridColor)
+            self.cellColors[key] = parsed
+        return parsed
+
+    def tableLayout(self, styledTable, unstyledTable, font, gridColor, bgColor, cellColorsParser):
+        """
+        Lays out a tabulated (grid format) block in one pass and returns
+        (ops, height, hasCells). Each op is (dx, dy, text, fill, reuse) relative
+        to the top-left of the block. Repeated strings are marked for reuse so
+        that they get drawn from the cached text masks.
+        """
+        key = ("table", styledTable, unstyledTable, font.path, font.size, gridColor, bgColor)
+        return self.cachedLayout(key, lambda: self._tableLayout(styledTable, unstyledTable, font, gridColor, bgColor, cellColorsParser))
+
+    def _tableLayout(self, styledTable, unstyledTable, font, gridColor, bgColor, cellColorsParser):
+        column_separator = "|"
+        sepWidth = self.textWidth(font, column_separator)
+        lineHeight = self.lineHeight(font)
+        unstyledLines = unstyledTable.splitlines()
+        ops = []
+        counts = {}
+        hasCells = False
+        dy = 0
+        lineNumber = 0
+        for line in styledTable.splitlines():
+            if not line.startswith(column_separator):
+                # Print the row separators
+                ops.append([0, dy, line, gridColor])
+            else:
+                # Print each colored value of each cell as we go over each row
+                dx = 0
+                valueScreenCols = line.split(column_separator)[1:-1]
+                for columnNumber, val in enumerate(valueScreenCols):
+                    if lineNumber >= len(unstyledLines):
+                        continue
+                    ops.append([dx, dy, column_separator, gridColor])
+                    dx += sepWidth
+                    unstyledLine = unstyledLines[lineNumber]
+                    cellStyles, cellCleanValues = self.parsedCellColors(val, gridColor, cellColorsParser)
+                    for style, cleanValue in zip(cellStyles, cellCleanValues):
+                        if columnNumber == 0 and len(cleanValue.strip()) > 0:
+                            if column_separator in unstyledLine:
+                                cleanValue = unstyledLine.split(column_separator)[1]
+                            if "\\" in cleanValue:
+                                cleanValue = cleanValue.split("\\")[-1]
+                        if bgColor == "white" and style == "yellow":
+                            # Yellow on a white background is difficult to read
+                            style = "blue"
+                        elif bgColor == "black" and style == "blue":
+                            # blue on a black background is difficult to read
+                            style = "yellow"
+                        ops.append([dx, dy, cleanValue, style])
+                        dx += self.textWidth(font, cleanValue)
+                        if columnNumber == 0:
+                            hasCells = True
+                if len(valueScreenCols) > 0:
+                    # Close the row with the separator
+                    ops.append([dx, dy, column_separator, gridColor])
+            dy += lineHeight + 1
+            lineNumber += 1
+        for op in ops:
+            counts[op[2]] = counts.get(op[2], 0) + 1
+        ops = [(dx, dy, text, fill, counts[text] > 1) for dx, dy, text, fill in ops]
+        return ops, dy, hasCells
+
+    def legendLayout(self, legendText, font, gridColor, legendSeperator="***"):
+        """
+        Lays out the legend where the text between a pair of separators is
+        highlighted in red. Returns (ops, height).
+        """
+        key = ("legend", legendText, font.path, font.size, gridColor, legendSeperator)
+        return self.cachedLayout(key, lambda: self._legendLayout(legendText, font, gridColor, legendSeperator))
+
+    def _legendLayout(self, legendText, font, gridColor, legendSeperator):
+        col_width_sep = self.textWidth(font, legendSeperator)
+        lineHeight = self.lineHeight(font)
+        ops = []
+        dy = 0
+        for line in legendText.splitlines():
+            dx = 0
+            red = True
+            for lineitem in line.split(legendSeperator):
+                if lineitem == "" or not red:
+                    ops.append((dx, dy, legendSeperator, gridColor, True))
+                    dx += col_width_sep + 1
+                style = "red" if not red else gridColor
+                red = not red
+                lineitem = lineitem.replace(": ","***: ")
+                ops.append((dx, dy, lineitem, style, True))
+                # Move to the next text in the same line
+                dx += self.textWidth(font, lineitem) + 1
+            # Let's go to the next line
+            dy += lineHeight + 1
+        return ops, dy
@@ -0,0 +1,250 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import math
+import multiprocessing
+import os
+import time
+
+from PKDevTools.classes.ColorText import colorText
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.OutputControls import OutputControls
+from PKDevTools.classes.Singleton import SingletonType, SingletonMixin
+
+class PKWorkerTuner(SingletonMixin, metaclass=SingletonType):
+    """
+    Picks the number of scan workers from the CPUs and the memory that this
+    process can really use (including the cgroup limits of containers and
+    CI runners) and from the profile of the first results of a scan: the
+    memory that each worker needs and how busy the workers keep the CPUs
+    (CPU-bound screening vs waiting for the network).
+    """
+    def __init__(self, cgroupRoot="/sys/fs/cgroup", procRoot="/proc", memoryHeadroom=0.8, maxIOBoundFactor=4, cpuBoundUtilisation=0.7):
+        super(PKWorkerTuner, self).__init__()
+        self.cgroupRoot = cgroupRoot
+        self.procRoot = procRoot
+        self.memoryHeadroom = memoryHeadroom
+        self.maxIOBoundFactor = maxIOBoundFactor
+        self.cpuBoundUtilisation = cpuBoundUtilisation
+        # From the last scan, so that the next one can start with the right count
+        self.profile = None
+        self.configuration = None
+        self.resetScan()
+
+    def resetScan(self):
+        self.activeWorkersLimit = None
+        self.activeWorkers = 0
+        self.retiringWorkers = 0
+        self.scanStartedAt = None
+        self.cpuAtStart = {}
+        self.profileAfter = 0
+        self.profiled = False
+
+    def readFile(self, *paths):
+        try:
+            with open(os.path.join(*paths), "r") as f:
+                return f.read().strip()
+        except (OSError, ValueError):
+            return None
+
+    def cpuLimit(self):
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            cpus = multiprocessing.cpu_count()
+        quota = None
+        cpuMax = self.readFile(self.cgroupRoot, "cpu.max")
+        if cpuMax is not None:
+            # cgroup v2: "<quota> <period>" or "max <period>"
+            values = cpuMax.split()
+            if len(values) == 2 and values[0] != "max":
+                quota = int(values[0]) / int(values[1])
+        else:
+            quotaMicros = self.readFile(self.cgroupRoot, "cpu", "cpu.cfs_quota_us")
+            periodMicros = self.readFile(self.cgroupRoot, "cpu", "cpu.cfs_period_us")
+            if quotaMicros is not None and periodMicros is not None and int(quotaMicros) > 0:
+                quota = int(quotaMicros) / int(periodMicros)
+        if quota is not None:
+            cpus = min(cpus, max(1, math.ceil(quota)))
+        return max(1, cpus)
+
+    def availableMemory(self):
+        # Bytes that can still be used, or None if that's unknown
+        available = None
+        meminfo = self.readFile(self.procRoot, "meminfo")
+        if meminfo is not None:
+            for line in meminfo.splitlines():
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+        limit = self.readFile(self.cgroupRoot, "memory.max")
+        usage = self.readFile(self.cgroupRoot, "memory.current")
+        if limit is None:
+            limit = self.readFile(self.cgroupRoot, "memory", "memory.limit_in_bytes")
+            usage = self.readFile(self.cgroupRoot, "memory", "memory.usage_in_bytes")
+        # cgroup v1 reports a huge number when there's no limit
+        if limit is not None and limit != "max" and usage is not None and int(limit) < 2**60:
+            cgroupAvailable = max(0, int(limit) - int(usage))
+            available = cgroupAvailable if available is None else min(available, cgroupAvailable)
+        return available
+
+    def processMemory(self, pid):
+        # Memory that's private to the process. Pages shared with the parent
+        # after forking don't count.
+        statm = self.readFile(self.procRoot, str(pid), "statm")
+        if statm is None:
+            return None
+        _, resident, shared = [int(value) for value in statm.split()[:3]]
+        return max(0, resident - shared) * os.sysconf("SC_PAGE_SIZE")
+
+    def processCpuSeconds(self, pid):
+        stat = self.readFile(self.procRoot, str(pid), "stat")
+        if stat is None:
+            return None
+        # The process name may contain spaces. utime and stime come after it.
+        fields = stat[stat.rindex(")") + 2:].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def targetWorkers(self, profile, cpus, availableMemory, activeWorkers=0):
+        utilisation = profile.get("cpuUtilisation")
+        if utilisation is None or utilisation >= self.cpuBoundUtilisation:
+            target = cpus
+        else:
+            # Waiting for the network most of the time. More workers than CPUs help.
+            target = min(math.ceil(cpus * self.cpuBoundUtilisation / max(utilisation, 0.01)), cpus * self.maxIOBoundFactor)
+        rssPerWorker = profile.get("rssPerWorker")
+        if availableMemory is not None and rssPerWorker is not None and rssPerWorker > 0:
+            # The memory of the active workers can go to the tuned workers, but
+            # part of the whole lot is kept spare.
+            target = min(target, int((availableMemory + activeWorkers * rssPerWorker) * self.memoryHeadroom / rssPerWorker))
+        return max(1, target)
+
+    def initialWorkers(self, minimumCount, singleThread=False):
+        """
+        Number of workers to start a scan of minimumCount stocks with. Without
+        a profile from an earlier scan, that's as many as there are CPUs.
+        """
+        cpus = self.cpuLimit()
+        if singleThread:
+            workers = 1
+        elif self.profile is not None:
+            workers = min(minimumCount, self.targetWorkers(self.profile, cpus, self.availableMemory()))
+        else:
+            workers = min(minimumCount, cpus)
+        if workers == 1:
+            workers = 2  # This is required for single core machine
+        self.configuration = {"workers": workers, "cpus": cpus}
+        return workers
+
+    def beginScan(self, consumers, activeWorkersLimit, numStocks):
+        """
+        Starts profiling the workers. activeWorkersLimit is the semaphore that
+        each worker needs to acquire before screening a stock.
+        """
+        # Workers reused from the previous scan (piped scans, monitoring)
+        # still have the tuned number of permits.
+        activeWorkers = self.activeWorkers if (activeWorkersLimit is not None and activeWorkersLimit is self.activeWorkersLimit) else len(consumers)
+        self.resetScan()
+        self.activeWorkersLimit = activeWorkersLimit
+        self.activeWorkers = activeWorkers
+        self.scanStartedAt = time.time()
+        self.cpuAtStart = {consumer.pid: self.processCpuSeconds(consumer.pid) for consumer in consumers if consumer.pid is not None}
+        # Enough results to tell the workers' behaviour apart from their warm up,
+        # while leaving enough stocks for the tuned workers.
+        self.profileAfter = max(4 * len(consumers), 50)
+        self.profiled = activeWorkersLimit is None or numStocks < 2 * self.profileAfter
+
+    def observe(self, consumers, processedCount, spawnWorker=None):
+        """
+        Gets called for every result. Once the first results are in, the
+        workers get profiled and the number of active workers adjusted.
+        """
+        self.retireWorkers()
+        if self.profiled or processedCount < self.profileAfter:
+            return self.configuration
+        self.profiled = True
+        try:
+            self.profile = self.profileWorkers(consumers, processedCount)
+            if self.profile is None:
+                return self.configuration
+            cpus = self.cpuLimit()
+            availableMemory = self.availableMemory()
+            target = self.targetWorkers(self.profile, cpus, availableMemory, self.activeWorkers)
+            if target < self.activeWorkers:
+                self.retiringWorkers += self.activeWorkers - target
+                self.retireWorkers()
+            elif target > self.activeWorkers and spawnWorker is not None:
+                for _ in range(target - self.activeWorkers):
+                    spawnWorker()
+                    self.activeWorkersLimit.release()
+                    self.activeWorkers += 1
+            self.configuration = {
+                "workers": target,
+                "cpus": cpus,
+                "availableMemory": availableMemory,
+                **self.profile,
+            }
+            self.report()
+        except Exception as e: # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+        return self.configuration
+
+    def profileWorkers(self, consumers, processedCount):
+        elapsed = time.time() - self.scanStartedAt
+        cpuSeconds = 0
+        rss = []
+        for consumer in consumers:
+            cpuAtStart = self.cpuAtStart.get(consumer.pid)
+            cpuNow = self.processCpuSeconds(consumer.pid)
+            if cpuAtStart is not None and cpuNow is not None:
+                cpuSeconds += cpuNow - cpuAtStart
+            memory = self.processMemory(consumer.pid)
+            if memory is not None:
+                rss.append(memory)
+        if len(rss) == 0 or elapsed <= 0:
+            # Not on linux
+            return None
+        return {
+            "rssPerWorker": max(rss),
+            "cpuPerStock": cpuSeconds / max(1, processedCount),
+            "cpuUtilisation": cpuSeconds / (elapsed * max(1, self.activeWorkers)),
+        }
+
+    def retireWorkers(self):
+        # Workers retire by the main process holding on to their permits. The
+        # permits get taken as and when the workers finish their stocks.
+        while self.retiringWorkers > 0 and self.activeWorkers > 1 and self.activeWorkersLimit.acquire(False):
+            self.retiringWorkers -= 1
+            self.activeWorkers -= 1
+
+    def report(self):
+        configuration = self.configuration
+        availableMemory = configuration.get("availableMemory")
+        message = (f"[+] Tuned to {configuration['workers']} workers for {configuration['cpus']} CPUs"
+                   + (f", {int(availableMemory/1024/1024)} MB available memory" if availableMemory is not None else "")
+                   + f", ~{int(configuration['rssPerWorker']/1024/1024)} MB per worker"
+                   + f", {int(configuration['cpuUtilisation']*100)}% CPU busy"
+                   + f", {configuration['cpuPerStock']*1000:.1f} ms CPU per stock")
+        default_logger().debug(message)
+        OutputControls().printOutput(colorText.GREEN + message + colorText.END)
@@ -54,27 +54,62 @@ class PortfolioSecurity:
                 "Growth": self.growth, "Profits" : 0}
 
 class Portfolio(PKScheduledTaskProgress):
+    # The ledger is kept column-wise. Each ledger entry is one value in each of these columns.
+    ledgerColumnNames = ["Date", "Name", "LTP", "Quantity", "Growth"]
+
     def __init__(self, name):
         super(Portfolio, self).__init__()
         self.name = name
         self._initialValue = 0
         self._currentValue = 0
-        self.ledger = {}
+        self.ledgerColumns = {column: [] for column in Portfolio.ledgerColumnNames}
         self.securities = {}
-    
+
+    @property
+    def ledger(self):
+        # The textual ledger: date -> list of ledger entry dicts, in the order of the entries
+        ledger = {}
+        for date, name, ltp, quantity, growth in zip(*[self.ledgerColumns[column] for column in Portfolio.ledgerColumnNames]):
+            security = PortfolioSecurity(name)
+            security.date = date
+            security.ltp = ltp
+            security.quantity = quantity
+            security.growth = growth
+            ledgerEntries = ledger.get(date) or []
+            ledgerEntries.append({"ScanType": self.name, "Date": date} | security.description)
+            ledger[date] = ledgerEntries
+        return ledger
+
+    @property
+    def ledgerAsDataframe(self):
+        """
+        The numeric form of the ledger. Entries are grouped by the date on which
+        they were first recorded. `RunningTotal` is the cumulative investment,
+        `Profits` is the cumulative P&L and `Drawdown` is how far the cumulative
+        P&L is below its running peak.
+        """
+        if len(self.ledgerColumns["Date"]) == 0:
+            return None
+        ledger_df = pd.DataFrame(self.ledgerColumns)
+        dateOrder, _ = pd.factorize(ledger_df["Date"])
+        ledger_df = ledger_df.iloc[np.argsort(dateOrder, kind="stable")].reset_index(drop=True)
+        ledger_df.insert(0, "ScanType", self.name)
+        ledger_df["Investment"] = ledger_df["LTP"] * ledger_df["Quantity"]
+        ledger_df["RunningTotal"] = ledger_df["Investment"].cumsum()
+        ledger_df["Profits"] = ledger_df["Growth"].cumsum()
+        ledger_df["Drawdown"] = ledger_df["Profits"].cummax().clip(lower=0) - ledger_df["Profits"]
+        return ledger_df
+
     @property
     def descriptionAsDataframe(self):
-        portfolio_df = None
-        for date, ledgerEntries in self.ledger.items():
-            firstLedgerEntry = ledgerEntries[0]
-            if portfolio_df is None:
-                portfolio_df = pd.DataFrame(ledgerEntries,columns=firstLedgerEntry.keys())
-            else:
-                newEntries_df = pd.DataFrame(ledgerEntries,columns=firstLedgerEntry.keys())
-                portfolio_df = pd.concat([portfolio_df,newEntries_df], axis=0)
+        portfolio_df = self.ledgerAsDataframe
         if portfolio_df is not None:
-            portfolio_df["RunningTotal"] = portfolio_df[['Investment']].cumsum()
-            portfolio_df["Profits"] = portfolio_df[['Growth']].cumsum()
+            quantity = portfolio_df["Quantity"].to_numpy()
+            portfolio_df["Action"] = np.where(quantity > 0, colorText.GREEN + "[Buy]"+ colorText.END,
+                                              np.where(quantity < 0, colorText.FAIL + "[Sell]"+ colorText.END,
+                                                       colorText.WARN + "[Hold]"+ colorText.END))
+            portfolio_df = portfolio_df[["ScanType", "Date", "Name", "LTP", "Quantity", "Action",
+                                         "Investment", "RunningTotal", "Growth", "Profits"]]
         return portfolio_df
     
     def updatePortfolioFromXRayDataFrame(self,df:pd.DataFrame, periods:list,task:PKTask=None):
@@ -82,60 +117,68 @@ class Portfolio(PKScheduledTaskProgress):
             taskId = task.taskId
             if taskId > 0:
                 self.tasksDict[taskId] = task
-        xray_df = df.copy()
-        df_grouped = xray_df.groupby("Stock")
-        periodCounter = -1
-        task.progress = 0
-        for period in periods:
-            periodCounter += 1
-            if f"LTP{period}" not in xray_df.columns:
+            task.progress = 0
+            task.total = len(periods)
+        # Only the first row for each stock is used, in the order of the stock names.
+        xray_df = df.groupby("Stock").head(1).sort_values("Stock", kind="stable")
+        stocks = xray_df["Stock"].to_numpy()
+        dates = xray_df["Date"].to_numpy()
+        ltp = xray_df["LTP"].astype(float).fillna(0).to_numpy()
+        held = np.array([self.hasSecurity(stock) for stock in stocks], dtype=bool)
+        lastLTP = ltp.copy()
+        nextTradingDates = {}
+        entries = []
+        for periodCounter, period in enumerate(periods):
+            previousColumn = "LTP" if periodCounter == 0 else f"LTP{periods[periodCounter-1]}"
+            if f"LTP{period}" not in xray_df.columns or previousColumn not in xray_df.columns:
                 continue
-            for stock, df_group in df_grouped:
-                df_group["LTP"] = df_group["LTP"].astype(float).fillna(0)
-                df_group[f"LTP{period}"] = df_group[f"LTP{period}"].astype(float).fillna(0)
-                df_group[f"Growth{period}"] = df_group[f"Growth{period}"].astype(float).fillna(0)
-                if df_group.iloc[0][f"LTP{period}"] == 0 or df_group.iloc[0][f"LTP"] == 0:
-                    continue
-                task.total = len(periods) * len(df_grouped)
-                task.progress += 1
+            ltpPeriod = xray_df[f"LTP{period}"].astype(float).fillna(0).to_numpy()
+            priceRise = np.round(ltpPeriod - xray_df[previousColumn].astype(float).fillna(0).to_numpy(), 2)
+            for date in set(dates):
+                if (date, period) not in nextTradingDates:
+                    try:
+                        nextTradingDates[(date, period)] = PKDateUtilities.nextTradingDate(date, days=period).strftime("%Y-%m-%d")
+                    except Exception:
+                        nextTradingDates[(date, period)] = None
+            nextDates = np.array([nextTradingDates[(date, period)] for date in dates], dtype=object)
+            periodDates = dates if periodCounter == 0 else nextDates
+            valid = (ltpPeriod != 0) & (ltp != 0) & (periodDates != None)  # noqa: E711
+            falling = priceRise < 0
+            buys = valid & ~held
+            holds = valid & held & ~falling
+            sells = valid & held & falling
+            # A security that was bought and fell in the same period is bought and then sold right away.
+            buySells = buys & falling & (nextDates != None)  # noqa: E711
+            for mask, entryDates, entryLTP, quantity, growth, order in [
+                    (buys, dates, ltp, 1, np.zeros(len(stocks)), 0),
+                    (holds, periodDates, ltpPeriod, 0, priceRise, 0),
+                    (sells, periodDates, ltpPeriod, -1, priceRise, 0),
+                    (buySells, nextDates, ltpPeriod, -1, priceRise, 1)]:
+                positions = np.flatnonzero(mask)
+                entries.append(pd.DataFrame({"Period": periodCounter, "Position": positions, "Order": order,
+                                             "Date": entryDates[positions], "Name": stocks[positions],
+                                             "LTP": entryLTP[positions], "Quantity": quantity,
+                                             "Growth": growth[positions]}))
+            held = (held & ~sells) | (buys & ~buySells)
+            lastLTP = np.where(holds, ltpPeriod, np.where(buys, ltp, lastLTP))
+            if task is not None:
+                task.progress = periodCounter + 1
                 self.updateProgress(task.taskId)
-                security = PortfolioSecurity(stock)
-                security.ltp = df_group.iloc[0]["LTP"] if not self.hasSecurity(stock) else df_group.iloc[0][f"LTP{period}"]
-                previousPeriod = periods[periodCounter-1]
-                try:
-                    priceRise = round(df_group.iloc[0][f"LTP{period}"] - df_group.iloc[0]["LTP" if periodCounter == 0 else f"LTP{previousPeriod}"],2)
-                    growth = df_group.iloc[0][f"Growth{period}"]
-                    security.date = df_group.iloc[0]["Date"] if periodCounter == 0 else PKDateUtilities.nextTradingDate(df_group.iloc[0]["Date"], days=period).strftime("%Y-%m-%d")
-                    if self.hasSecurity(stock):
-                        # This security was already added earlier and exists in the portfolio
-                        security.quantity = 1 if priceRise >= 0 else -1
-                        if priceRise < 0:
-                            security.growth = priceRise * abs(security.quantity)
-                            self.removeSecurity(security=security)
-                        else:
-                            security.quantity = 0 # This is not an actual buy
-                            security.growth = priceRise
-                            security.ltp = df_group.iloc[0][f"LTP{period}"]
-                            self.addSecurity(security=security)
-                    else:
-                        # This security was never added earlier. The very fact it exists under this
-                        # outcome dataframe, we need to take losses and then remove it from portfolio
-                        security.quantity = 1
-                        security.growth = 0 # First day of trade
-                        security.date = df_group.iloc[0]["Date"]
-                        security.ltp = df_group.iloc[0]["LTP"]
-                        self.addSecurity(security=security)
-                        if priceRise < 0:
-                            security.date = PKDateUtilities.nextTradingDate(df_group.iloc[0]["Date"], days=period).strftime("%Y-%m-%d")
-                            security.ltp = df_group.iloc[0][f"LTP{period}"]
-                            security.quantity = -1
-                            security.growth = priceRise * abs(security.quantity)
-                            self.removeSecurity(security=security)
-                except:
-                    pass
-                    continue
-        task.progress = task.total
-        self.updateProgress(task.taskId)
+        if len(entries) > 0:
+            entries_df = pd.concat(entries, axis=0).sort_values(["Period", "Position", "Order"], kind="stable")
+            for column in Portfolio.ledgerColumnNames:
+                self.ledgerColumns[column].extend(entries_df[column].tolist())
+            self._currentValue = 0
+        for stock, isHeld, stockLTP in zip(stocks, held, lastLTP):
+            if isHeld:
+                security = self.securities.get(stock) or PortfolioSecurity(stock)
+                security.ltp = stockLTP
+                self.securities[stock] = security
+            elif self.hasSecurity(stock):
+                del self.securities[stock]
+        if task is not None:
+            task.progress = task.total
+            self.updateProgress(task.taskId)
 
     @property
     def profit(self):
@@ -192,10 +235,9 @@ class Portfolio(PKScheduledTaskProgress):
         self.updateLedger(security=security)
 
     def updateLedger(self,security:PortfolioSecurity=None):
-        ledgerEntries = self.ledger.get(security.date) or []
-        runningLedger = {"ScanType": self.name, "Date": security.date} | security.description
-        ledgerEntries.append(runningLedger)
-        self.ledger[security.date] = ledgerEntries
+        description = security.description
+        for column in Portfolio.ledgerColumnNames:
+            self.ledgerColumns[column].append(description[column])
 
     def getDifference(self,x):
         return x.iloc[-1] - x.iloc[0]
@@ -231,71 +273,41 @@ class PortfolioCollection(SingletonMixin,PKScheduledTaskProgress, metaclass=Sing
     
     @property
     def ledgerSummaryAsDataframe(self):
-        task = None
-        if self._portfoliosSummary_df is not None:
-            if self.ledgerSummaryAsDataframeTaskId > 0:
-                task = self.tasksDict.get(self.ledgerSummaryAsDataframeTaskId)
-                task.total = len(self._portfolios.keys())
-                task.progress = task.total
-                self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-                task.result = self._portfoliosSummary_df
-                task.resultsDict[task.taskId] = self._portfoliosSummary_df
-            return self._portfoliosSummary_df
-        portfolios_df = None
-        if len(self._portfolios) > 0:
-            for _, portfolio in self._portfolios.items():
-                portfolio_df = portfolio.descriptionAsDataframe
-                if portfolio_df is None:
-                    continue
-                if portfolios_df is None:
-                    portfolios_df = portfolio_df.tail(5).copy()
-                else:
-                    portfolios_df = pd.concat([portfolios_df,portfolio_df.tail(5)], axis=0)
-                if task is not None:
-                    task.progress = len(portfolios_df)
-                self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-        self._portfoliosSummary_df = portfolios_df
-        if task is not None:
-            # Mark the progress finished
-            task.progress = task.total
-            self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-            task.result = portfolios_df
-            task.resultsDict[task.taskId] = self.portfolios_df
-        return portfolios_df
+        if self._portfoliosSummary_df is None:
+            self._portfoliosSummary_df = self._concatenatedDescriptions(lastEntries=5)
+        self._updateTaskResult(self.ledgerSummaryAsDataframeTaskId, self._portfoliosSummary_df)
+        return self._portfoliosSummary_df
         
     @property
     def portfoliosAsDataframe(self):
-        task = None
-        if self._portfolios_df is not None:
-            if self.portfoliosAsDataframeTaskId > 0:
-                task = self.tasksDict.get(self.portfoliosAsDataframeTaskId)
-                task.total = len(self._portfolios.keys())
-                task.progress = task.total
-                self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-                task.result = self._portfolios_df
-                task.resultsDict[task.taskId] = self._portfolios_df
-            return self._portfolios_df
-        portfolios_df = None
-        if len(self._portfolios) > 0:
-            for _, portfolio in self._portfolios.items():
-                portfolio_df = portfolio.descriptionAsDataframe
-                if portfolio_df is None:
-                    continue
-                if portfolios_df is None:
-                    portfolios_df = portfolio_df.copy()
-                else:
-                    portfolios_df = pd.concat([portfolios_df,portfolio_df], axis=0)
-                if task is not None:
-                    task.progress = len(portfolios_df)
-                self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-        self._portfolios_df = portfolios_df
+        if self._portfolios_df is None:
+            self._portfolios_df = self._concatenatedDescriptions()
+        self._updateTaskResult(self.portfoliosAsDataframeTaskId, self._portfolios_df)
+        return self._portfolios_df
+
+    @property
+    def ledgersAsDataframe(self):
+        # The numeric ledgers (with cumulative P&L and drawdowns) of all the portfolios
+        ledgers = [portfolio.ledgerAsDataframe for portfolio in self._portfolios.values()]
+        ledgers = [ledger_df for ledger_df in ledgers if ledger_df is not None]
+        return pd.concat(ledgers, axis=0, ignore_index=True) if len(ledgers) > 0 else None
+
+    def _concatenatedDescriptions(self, lastEntries=None):
+        descriptions = [portfolio.descriptionAsDataframe for portfolio in self._portfolios.values()]
+        descriptions = [portfolio_df if lastEntries is None else portfolio_df.tail(lastEntries)
+                        for portfolio_df in descriptions if portfolio_df is not None]
+        return pd.concat(descriptions, axis=0) if len(descriptions) > 0 else None
+
+    def _updateTaskResult(self, taskId, result_df):
+        task = self.tasksDict.get(taskId) if taskId > 0 else None
         if task is not None:
-            # Mark the progress finished
+            task.total = len(self._portfolios.keys())
             task.progress = task.total
-            self.updateProgress(self.ledgerSummaryAsDataframeTaskId)
-            task.result = portfolios_df
-            task.resultsDict[task.taskId] = self.portfolios_df
-        return portfolios_df
+            self.updateProgress(taskId)
+            task.result = result_df
+            task.resultsDict[task.taskId] = result_df
 
     def addPortfolio(self,portfolio:Portfolio):
         self._portfolios[portfolio.name] = portfolio
+        self._portfolios_df = None
+        self._portfoliosSummary_df = None
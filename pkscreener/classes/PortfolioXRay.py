@@ -34,7 +34,6 @@ from PKDevTools.classes.log import default_logger
 from pkscreener.classes.ConfigManager import parser, tools
 from pkscreener.classes.Portfolio import Portfolio, PortfolioCollection
 from pkscreener.classes.PKTask import PKTask
-from pkscreener.classes.PKScheduler import PKScheduler
 from PKDevTools.classes.OutputControls import OutputControls
 
 configManager = tools()
@@ -295,6 +294,130 @@ def performXRay(*args, **kwargs):
             task.result = df
     return df
 
+def performGroupedXRay(savedResults, userArgs=None, progressLabel:str=None):
+    """
+    Computes the X-Ray for all the backtest dates in a single pass.
+
+    The backtest results are cleaned up only once and each strategy is
+    evaluated once over the whole frame. The per-date sums are then derived
+    from the strategy mask matrix over the `Date` key instead of running
+    `performXRay` in a separate process for each date. The result is the
+    same as concatenating `performXRay` results for each date.
+    """
+    if savedResults is None or not isinstance(savedResults, pd.DataFrame) or savedResults.empty:
+        return None
+    periods = configManager.periodsRange
+    saveResults = cleanupData(savedResults)
+    for period in periods:
+        # A missing value for one date must not fail the X-Ray for all dates
+        saveResults[f"LTP{period}"] = (
+                    pd.to_numeric(saveResults[f"LTP{period}"], errors="coerce").fillna(0.0)
+                )
+        saveResults[f"Growth{period}"] = (
+                    pd.to_numeric(saveResults[f"Growth{period}"], errors="coerce").fillna(0.0)
+                )
+    scanResults = groupedStatScanCalculations(userArgs, saveResults, periods)
+    if len(scanResults) == 0:
+        return None
+    df_stats = pd.DataFrame(scanResults)
+    df_xray = None
+    for calcForDate, df_date in df_stats.groupby("Date", sort=True):
+        df = cleanFormattingForStatsData(calcForDate, saveResults, df_date.drop(columns=["Date"]))
+        if df is None:
+            continue
+        df_xray = df if df_xray is None else pd.concat([df_xray, df], axis=0)
+    return df_xray
+
+def xRayFilterStrategies():
+    """
+    Returns the (strategy key, filter) pairs in the order in which
+    `statScanCalculations` reports them. Patterns and NoFilter are not
+    included because their keys depend on the data.
+    """
+    strategies = strategyDictionary()
+    keys = ["[RSI]>=50", "[RSI]50<=RSI<=67", "[RSI]>=68",
+            "[T]StrongUp", "[T]WeakUp", "[T]TrendUp", "[T]StrongDown", "[T]WeakDown", "[T]Sideways", "[T]TrendDown",
+            "[MA]Bull", "[MA]Bear", "[MA]Neutral", "[MA]BullCross", "[MA]BearCross", "[MA]Support", "[MA]Resist",
+            "Vol<2.5", "Vol>=2.5",
+            "Cons.<=10", "Cons.>10",
+            "[BO]LTP<BO", "[BO]LTP>=BO", "[BO]LTP<R", "[BO]LTP>=R",
+            "[52Wk]LTP>=H", "[52Wk]LTP>=.9*H", "[52Wk]LTP<.9*H", "[52Wk]LTP>L", "[52Wk]LTP>=1.1*L", "[52Wk]LTP<=L",
+            "[CCI]<=-100", "[CCI]-100<C<0", "[CCI]0<=C<=100", "[CCI]100<C<=200", "[CCI]>200"]
+    return [(key, strategies[key]) for key in keys]
+
+def groupedStatScanCalculations(userArgs, saveResults, periods):
+    '''
+    Important
+    ---------
+    You should have called `cleanupData` before calling this.
+    '''
+    keys, masks = strategyMaskMatrix(saveResults)
+    sumColumns, values = returnsMatrix(saveResults, periods)
+    portfolioCalculations = configManager.enablePortfolioCalculations and userArgs is not None and userArgs.options.startswith("B")
+    dates = saveResults["Date"].to_numpy()
+    scanResults = []
+    for calcForDate in sorted(saveResults["Date"].unique()):
+        onDate = dates == calcForDate
+        dateMasks = masks[:, onDate]
+        strategySums = dateMasks.astype(float) @ values[onDate]
+        for keyIndex, (key, dateMask, sums) in enumerate(zip(keys, dateMasks, strategySums)):
+            if key.startswith("[P]") and not dateMask.any():
+                # Only the patterns found on this date are reported for this date
+                continue
+            if portfolioCalculations:
+                updatePortfolioForStrategy(saveResults[masks[keyIndex] & onDate], key)
+            result = calculatedValuesFromSums(key, dict(zip(sumColumns, sums)), periods)
+            result["Date"] = calcForDate
+            scanResults.append(result)
+    return scanResults
+
+def strategyMaskMatrix(saveResults):
+    '''
+    Returns the strategy keys and a boolean matrix (strategies x rows) where
+    each row marks the results selected by that strategy. The keys are in
+    the same order in which `statScanCalculations` reports them.
+
+    Important
+    ---------
+    You should have called `cleanupData` before calling this.
+    '''
+    filterColumns = ["LTP", "RSI", f"Trend({configManager.daysToLookback}Prds)", "MA-Signal", "Volume",
+                     "Consol.", "Breakout", "Resistance", "52Wk-H", "52Wk-L", "CCI"]
+    df = saveResults[[col for col in filterColumns if col in saveResults.columns]].reset_index(drop=True)
+    keys = []
+    masks = []
+    for key, filterFn in xRayFilterStrategies():
+        mask = np.zeros(len(df), dtype=bool)
+        mask[filterFn(df).index] = True
+        keys.append(key)
+        masks.append(mask)
+    patterns = saveResults["Pattern"].to_numpy()
+    for pattern in sorted(saveResults["Pattern"].dropna().unique()):
+        keys.append(f"[P]{pattern if len(pattern) > 0 else 'No Pattern'}")
+        masks.append(patterns == pattern)
+    keys.append("NoFilter")
+    masks.append(np.ones(len(df), dtype=bool))
+    return keys, np.vstack(masks)
+
+def returnsMatrix(saveResults, periods):
+    '''
+    Returns the column names and a matrix (rows x columns) of the LTP and
+    the LTP/Growth for each of the periods. Multiplying the strategy mask
+    matrix with this gives the sums needed for every strategy at once.
+    '''
+    sumColumns = ["LTP"]
+    for period in periods:
+        sumColumns.extend([f"LTP{period}", f"Growth{period}"])
+    values = np.nan_to_num(saveResults[sumColumns].to_numpy(dtype=float))
+    return sumColumns, values
+
+def updatePortfolioForStrategy(df, key, task=None):
+    portfolio = Portfolio(name=key)
+    if task is None:
+        task = PKTask(f"Portfolio | {key}", long_running_fn=portfolio.updatePortfolioFromXRayDataFrame)
+    portfolio.updatePortfolioFromXRayDataFrame(df,configManager.periodsRange,task)
+    PortfolioCollection().addPortfolio(portfolio)
+
 def getUpdatedBacktestPeriod(calcForDate, backtestPeriods, saveResults):
     targetDate = (
             calcForDate if calcForDate is not None else saveResults["Date"].iloc[0]
@@ -357,46 +480,6 @@ def getBacktestDataFromCleanedData(args, saveResults, df, periods,progressLabel:
         df = pd.concat([df, df_target], axis=1)
     return df
 
-def statScanCalculationForNoFilter(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(saveResults, period, "NoFilter", userArgs,task)
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForPatterns(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    df_grouped = saveResults.groupby("Pattern")
-    for pattern, df_group in df_grouped:
-        if pattern is None or len(pattern) == 0:
-            pattern = "No Pattern"
-        scanResults.append(
-                    getCalculatedValues(df_group, period, f"[P]{pattern}", userArgs,task)
-                )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
 def ensureColumnsExist(saveResults):
     columns = ['Stock', 'Date', 'Volume', 'Trend', 'MA-Signal', 'LTP', '52Wk-H',
                '52Wk-L', '1-Pd', '2-Pd', '3-Pd', '4-Pd', '5-Pd', '10-Pd', '15-Pd',
@@ -415,15 +498,10 @@ def ensureColumnsExist(saveResults):
 def cleanupData(savedResults):
     saveResults = savedResults.copy()
     saveResults = ensureColumnsExist(saveResults)
-    for col in saveResults.columns:
-        saveResults.loc[:, col] = saveResults.loc[:, col].apply(
-                lambda x: Utility.tools.removeAllColorStyles(x)
-            )
-
     saveResults["LTP"] = saveResults["LTP"].astype(float).fillna(0.0)
     saveResults["RSI"] = saveResults["RSI"].astype(float).fillna(0.0)
     saveResults.loc[:, "Volume"] = saveResults.loc[:, "Volume"].apply(
-            lambda x: x.replace("x", "")
+            lambda x: str(x).replace("x", "")
         )
     if f"Trend({configManager.daysToLookback}Prds)" not in saveResults.columns:
         saveResults.rename(
@@ -470,355 +548,18 @@ def getbacktestPeriod(args):
     return backtestPeriods
 
 def statScanCalculations(userArgs, saveResults, periods,progressLabel:str=None):
+    keys, masks = strategyMaskMatrix(saveResults)
+    sumColumns, values = returnsMatrix(saveResults, periods)
+    # One matrix product gives the sums for every strategy and every period
+    strategySums = masks.astype(float) @ values
+    portfolioCalculations = configManager.enablePortfolioCalculations and userArgs is not None and userArgs.options.startswith("B")
     scanResults = []
-    task1 = PKTask(f"[{len(saveResults)}] RSI Stats",long_running_fn=statScanCalculationForRSI)
-    task2 = PKTask(f"[{len(saveResults)}] Trend Stats",long_running_fn=statScanCalculationForTrend)
-    task3 = PKTask(f"[{len(saveResults)}] MA Stats",long_running_fn=statScanCalculationForMA)
-    task4 = PKTask(f"[{len(saveResults)}] Volume Stats",long_running_fn=statScanCalculationForVol)
-    task5 = PKTask(f"[{len(saveResults)}] Consolidation Stats",long_running_fn=statScanCalculationForConsol)
-    task6 = PKTask(f"[{len(saveResults)}] Breakout Stats",long_running_fn=statScanCalculationForBO)
-    task7 = PKTask(f"[{len(saveResults)}] 52Week Stats",long_running_fn=statScanCalculationFor52Wk)
-    task8 = PKTask(f"[{len(saveResults)}] CCI Stats",long_running_fn=statScanCalculationForCCI)
-    task9 = PKTask(f"[{len(saveResults)}] CCI Stats",long_running_fn=statScanCalculationForPatterns)
-    task10 = PKTask(f"[{len(saveResults)}] NoFilter Stats",long_running_fn=statScanCalculationForNoFilter)
-    tasksList=[task1,task2,task3,task4,task5,task6,task7,task8,task9,task10]
-    for task in tasksList:
-        task.long_running_fn_args = (userArgs, saveResults, periods, scanResults)
-    if configManager.enablePortfolioCalculations:
-        PKScheduler.scheduleTasks(tasksList,label=progressLabel,showProgressBars=True,timeout=600)
-    else:
-        for task in tasksList:
-            task.long_running_fn(*(task,))
-    for task in tasksList:
-        if task.result is not None and len(task.result) > 0:
-            scanResults.extend(task.result)
-    return scanResults
-
-def statScanCalculationForCCI(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterCCIBelowMinus100(saveResults), period, "[CCI]<=-100", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterCCIBelow0(saveResults), period, "[CCI]-100<C<0", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterCCI0To100(saveResults), period, "[CCI]0<=C<=100", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterCCI100To200(saveResults), period, "[CCI]100<C<=200", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterCCIAbove200(saveResults), period, "[CCI]>200", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationFor52Wk(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPMoreOREqual52WkH(saveResults), period, "[52Wk]LTP>=H", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPWithin90Percent52WkH(saveResults),
-                    period,
-                    "[52Wk]LTP>=.9*H",
-                    userArgs,
-                    task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPLess90Percent52WkH(saveResults),
-                    period,
-                    "[52Wk]LTP<.9*H",
-                    userArgs,
-                    task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPMore52WkL(saveResults), period, "[52Wk]LTP>L", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPWithin90Percent52WkL(saveResults),
-                    period,
-                    "[52Wk]LTP>=1.1*L",
-                    userArgs,
-                    task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPLess52WkL(saveResults), period, "[52Wk]LTP<=L", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
+    for key, mask, sums in zip(keys, masks, strategySums):
+        if portfolioCalculations:
+            updatePortfolioForStrategy(saveResults[mask], key)
+        scanResults.append(calculatedValuesFromSums(key, dict(zip(sumColumns, sums)), periods))
     return scanResults
 
-def statScanCalculationForBO(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPLessThanBreakout(saveResults), period, "[BO]LTP<BO", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPMoreOREqualBreakout(saveResults),
-                    period,
-                    "[BO]LTP>=BO",
-                    userArgs,
-                    task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPLessThanResistance(saveResults), period, "[BO]LTP<R", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterLTPMoreOREqualResistance(saveResults),
-                    period,
-                    "[BO]LTP>=R",
-                    userArgs,
-                    task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForConsol(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterConsolidating10Percent(saveResults), period, "Cons.<=10", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterConsolidatingMore10Percent(saveResults),
-                    period,
-                    "Cons.>10",
-                    userArgs,
-                    task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForVol(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterVolumeLessThan25(saveResults), period, "Vol<2.5", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterVolumeMoreThan25(saveResults), period, "Vol>=2.5", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForMA(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalBullish(saveResults), period, "[MA]Bull", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalBearish(saveResults), period, "[MA]Bear", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalNeutral(saveResults), period, "[MA]Neutral", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalBullCross(saveResults), period, "[MA]BullCross", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalBearCross(saveResults), period, "[MA]BearCross", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalSupport(saveResults), period, "[MA]Support", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterMASignalResist(saveResults), period, "[MA]Resist", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForTrend(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendStrongUp(saveResults), period, "[T]StrongUp", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendWeakUp(saveResults), period, "[T]WeakUp", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendUp(saveResults), period, "[T]TrendUp", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendStrongDown(saveResults), period, "[T]StrongDown", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendWeakDown(saveResults), period, "[T]WeakDown", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendSideways(saveResults), period, "[T]Sideways", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterTrendDown(saveResults), period, "[T]TrendDown", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-def statScanCalculationForRSI(*args, **kwargs):
-    task = None
-    if isinstance(args[0], PKTask):
-        task = args[0]
-        userArgs, saveResults, period, scanResults = task.long_running_fn_args
-    else:
-        userArgs, saveResults, period, scanResults = args[0],args[1],args[2],args[3]
-    scanResults.append(
-                getCalculatedValues(
-                    filterRSIAbove50(saveResults), period, "[RSI]>=50", userArgs, task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterRSI50To67(saveResults), period, "[RSI]50<=RSI<=67", userArgs,task
-                )
-            )
-    scanResults.append(
-                getCalculatedValues(
-                    filterRSI68OrAbove(saveResults), period, "[RSI]>=68", userArgs,task
-                )
-            )
-    if task is not None:
-        if task.taskId > 0:
-            task.resultsDict[task.taskId] = scanResults
-            task.progressStatusDict[task.taskId] = {'progress': 1, 'total': 1}
-        else:
-            task.result = scanResults
-    return scanResults
-
-
 def formatGridOutput(df,replacenan=True):
     if replacenan:
         df = df.replace(np.nan, "-", regex=True)
@@ -888,20 +629,17 @@ def formatGridOutput(df,replacenan=True):
     return df
 
 
-def getCalculatedValues(df, periods, key, userArgs=None, task=None):
+def calculatedValuesFromSums(key, sums, periods):
     collated_df = None
     for period in periods:
-        ltpSum1ShareEach = round(df["LTP"].sum(), 2)
-        tdySum1ShareEach = round(df[f"LTP{period}"].sum(), 2)
-        growthSum1ShareEach = round(df[f"Growth{period}"].sum(), 2)
+        ltpSum1ShareEach = round(sums["LTP"], 2)
+        tdySum1ShareEach = round(sums[f"LTP{period}"], 2)
+        growthSum1ShareEach = round(sums[f"Growth{period}"], 2)
         percentGrowth = 0
         if ltpSum1ShareEach > 0:
-            percentGrowth = round(100 * growthSum1ShareEach / ltpSum1ShareEach, 2)
+            # Adding 0.0 turns a -0.0 from rounding off a tiny negative sum into 0.0
+            percentGrowth = round(100 * growthSum1ShareEach / ltpSum1ShareEach, 2) + 0.0
         growth10k = round(10000 * (1 + 0.01 * percentGrowth), 2)
-        if configManager.enablePortfolioCalculations and userArgs.options.startswith("B"): # backtests
-            portfolio = Portfolio(name=key)
-            portfolio.updatePortfolioFromXRayDataFrame(df,configManager.periodsRange,task)
-            PortfolioCollection().addPortfolio(portfolio)
         result_df = {
             "ScanType": key, #if tdySum1ShareEach != 0 else 999999999,
             f"{period}Pd-PFV": tdySum1ShareEach,
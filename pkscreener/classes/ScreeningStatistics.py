@@ -37,6 +37,8 @@ from sys import float_info as sflt
 import pkscreener.classes.Utility as Utility
 from pkscreener import Imports
 from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.PKBbandsSqueeze import PKBbandsSqueeze
+from pkscreener.classes.PKResultRecord import PKResultRecord, PKSignal
 from PKDevTools.classes.OutputControls import OutputControls
 from PKNSETools.morningstartools import Stock
 
@@ -89,6 +91,12 @@ class ScreeningStatistics:
         self.configManager = configManager
         self.default_logger = default_logger
         self.shouldLog = shouldLog
+        # {stock: (score, numCandles, lastDate)} from PKRelativeStrength
+        self.relativeStrengths = {}
+        # {stock: (state, numCandles, lastDate)} from PKBbandsSqueeze
+        self.bbandsSqueezes = {}
+        # PKScreeningContext of the stock being screened
+        self.screeningContext = None
 
     def calc_relative_strength(self,df:pd.DataFrame):
         if df is None or len(df) <= 1:
@@ -97,16 +105,16 @@ class ScreeningStatistics:
         if closeColumn not in df.columns:
             closeColumn = 'Close'
 
-        with pd.option_context('mode.chained_assignment', None):
-            df.sort_index(inplace=True)
-            ## relative gain and losses
-            df['close_shift'] = df[closeColumn].shift(1)
-            ## Gains (true) and Losses (False)
-            df['gains'] = df.apply(lambda x: x[closeColumn] if x[closeColumn] >= x['close_shift'] else 0, axis=1)
-            df['loss'] = df.apply(lambda x: x[closeColumn] if x[closeColumn] <= x['close_shift'] else 0, axis=1)
+        # Oldest first, without changing the candles that the other
+        # validators share
+        closes = df[closeColumn].sort_index().to_numpy(dtype=np.float64)
+        previousCloses = np.concatenate([[np.nan], closes[:-1]])
+        ## Gains (true) and Losses (False)
+        gains = np.where(closes >= previousCloses, closes, 0)
+        losses = np.where(closes <= previousCloses, closes, 0)
 
-        avg_gain = df['gains'].mean()
-        avg_losses = df['loss'].mean()
+        avg_gain = gains.mean()
+        avg_losses = losses.mean()
 
         return avg_gain / avg_losses
 
@@ -210,13 +218,9 @@ class ScreeningStatistics:
         # https://chartink.com/screener/52-week-low-breakout
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
         one_week = 5
-        recent = data.head(1)["High"].iloc[0]
-        full52Week = data.head(50 * one_week)
-        full52WeekHigh = full52Week["High"].max()
+        recent = df.head(1)["High"].fillna(0).replace([np.inf, -np.inf], 0).iloc[0]
+        full52WeekHigh = self.rollingExtreme(df.head(50 * one_week), "High")
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
         return recent >= full52WeekHigh
@@ -226,37 +230,29 @@ class ScreeningStatistics:
     def find52WeekHighLow(self, df, saveDict, screenDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
         one_week = 5
         week_52 = one_week * 50  # Considering holidays etc as well of 10 days
-        full52Week = data.head(week_52 + 1).tail(week_52+1)
-        recentHigh = data.head(1)["High"].iloc[0]
-        recentLow = data.head(1)["Low"].iloc[0]
-        full52WeekHigh = full52Week["High"].max()
-        full52WeekLow = full52Week["Low"].min()
+        full52Week = df.head(week_52 + 1).tail(week_52+1)
+        recent = df.head(1)[["High", "Low"]].fillna(0).replace([np.inf, -np.inf], 0)
+        recentHigh = recent["High"].iloc[0]
+        recentLow = recent["Low"].iloc[0]
+        full52WeekHigh = self.rollingExtreme(full52Week, "High")
+        full52WeekLow = self.rollingExtreme(full52Week, "Low", stat="min")
 
-        saveDict["52Wk-H"] = "{:.2f}".format(full52WeekHigh)
-        saveDict["52Wk-L"] = "{:.2f}".format(full52WeekLow)
         if recentHigh >= full52WeekHigh:
-            highColor = colorText.GREEN
+            highSignal = PKSignal.BULLISH
         elif recentHigh >= 0.9 * full52WeekHigh:
-            highColor = colorText.WARN
+            highSignal = PKSignal.NEUTRAL
         else:
-            highColor = colorText.FAIL
+            highSignal = PKSignal.BEARISH
         if recentLow <= full52WeekLow:
-            lowColor = colorText.FAIL
+            lowSignal = PKSignal.BEARISH
         elif recentLow <= 1.1 * full52WeekLow:
-            lowColor = colorText.WARN
+            lowSignal = PKSignal.NEUTRAL
         else:
-            lowColor = colorText.GREEN
-        screenDict[
-            "52Wk-H"
-        ] = f"{highColor}{str('{:.2f}'.format(full52WeekHigh))}{colorText.END}"
-        screenDict[
-            "52Wk-L"
-        ] = f"{lowColor}{str('{:.2f}'.format(full52WeekLow))}{colorText.END}"
+            lowSignal = PKSignal.BULLISH
+        PKResultRecord.setField(screenDict, saveDict, "52Wk-H", "{:.2f}".format(full52WeekHigh), highSignal)
+        PKResultRecord.setField(screenDict, saveDict, "52Wk-L", "{:.2f}".format(full52WeekLow), lowSignal)
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
 
@@ -264,9 +260,7 @@ class ScreeningStatistics:
     def find10DaysLowBreakout(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         one_week = 5
         recent = data.head(1)["Low"].iloc[0]
         last1Week = data.head(one_week)
@@ -285,18 +279,14 @@ class ScreeningStatistics:
         if df is None or len(df) == 0:
             return False
         # https://chartink.com/screener/52-week-low-breakout
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
         one_week = 5
-        recent = data.head(1)["Low"].iloc[0]
+        recent = df.head(1)["Low"].fillna(0).replace([np.inf, -np.inf], 0).iloc[0]
         # last1Week = data.head(one_week)
         # last2Week = data.head(2 * one_week)
         # previousWeek = last2Week.tail(one_week)
-        full52Week = data.head(50 * one_week)
         # last1WeekLow = last1Week["Low"].min()
         # previousWeekLow = previousWeek["Low"].min()
-        full52WeekLow = full52Week["Low"].min()
+        full52WeekLow = self.rollingExtreme(df.head(50 * one_week), "Low", stat="min")
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
         return recent <= full52WeekLow
@@ -305,9 +295,7 @@ class ScreeningStatistics:
     def findAroonBullishCrossover(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         period = 14
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         aroondf = pktalib.Aroon(data["High"], data["Low"], period)
@@ -323,9 +311,7 @@ class ScreeningStatistics:
         #https://chartink.com/screener/stock-crossing-atr
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(1)
         recentCandleHeight = self.getCandleBodyHeight(recent)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
@@ -334,8 +320,7 @@ class ScreeningStatistics:
         bullishRSI = recent["RSI"].iloc[0] >= 55 or recent["RSIi"].iloc[0] >= 55
         smav7 = pktalib.SMA(data["Volume"],timeperiod=7).tail(1).iloc[0]
         atrCrossCondition = atrCross and bullishRSI and (smav7 < recent["Volume"].iloc[0])
-        saveDict["ATR"] = round(atr.tail(1).iloc[0],1)
-        screenDict["ATR"] = saveDict["ATR"] #(colorText.GREEN if atrCrossCondition else colorText.FAIL) + str(atr.tail(1).iloc[0]) + colorText.END
+        PKResultRecord.setField(screenDict, saveDict, "ATR", round(atr.tail(1).iloc[0],1))
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
         return atrCrossCondition
@@ -343,15 +328,12 @@ class ScreeningStatistics:
     def findATRTrailingStops(self,df,sensitivity=1, atr_period=10, ema_period=1,buySellAll=1,saveDict=None,screenDict=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
 
         SENSITIVITY = sensitivity
         # Compute ATR And nLoss variable
-        data["xATR"] = pktalib.ATR(data["High"], data["Low"], data["Close"], timeperiod=atr_period)
-        data["nLoss"] = SENSITIVITY * data["xATR"]
+        xATR = pktalib.ATR(data["High"], data["Low"], data["Close"], timeperiod=atr_period)
+        data = data.assign(xATR=xATR, nLoss=SENSITIVITY * xATR)
         
         #Drop all rows that have nan, X first depending on the ATR preiod for the moving average
         data = data.dropna()
@@ -372,8 +354,8 @@ class ScreeningStatistics:
         recent = data.tail(1)
         buy = recent["Buy"].iloc[0]
         sell = recent["Sell"].iloc[0]
-        saveDict["B/S"] = "Buy" if buy else ("Sell" if sell else "NA")
-        screenDict["B/S"] = ((colorText.GREEN + "Buy") if buy else ((colorText.FAIL+ "Sell") if sell else (colorText.WARN + "NA"))) + colorText.END
+        PKResultRecord.setField(screenDict, saveDict, "B/S", "Buy" if buy else ("Sell" if sell else "NA"),
+                                PKSignal.BULLISH if buy else (PKSignal.BEARISH if sell else PKSignal.NEUTRAL))
         # if self.shouldLog:
         #     self.default_logger.debug(data.head(10))
         return buy if buySellAll==1 else (sell if buySellAll == 2 else (True if buySellAll == 3 else False))
@@ -784,7 +766,7 @@ class ScreeningStatistics:
     #     print("Analysis completed and results saved.")
 
     # @measure_time
-    def findBbandsSqueeze(self,fullData, screenDict, saveDict, filter=4):
+    def findBbandsSqueeze(self,fullData, screenDict, saveDict, filter=4, stockName=None):
         """
         The TTM Squeeze indicator measures the relationship between the 
         Bollinger Bands and Keltner's Channel. When the volatility increases, 
@@ -806,54 +788,43 @@ class ScreeningStatistics:
         """
         if fullData is None or len(fullData) < 20:
             return False
-        oldestRecordsFirst_df = fullData.head(30).copy()
-        latestRecordsFirst_df = oldestRecordsFirst_df[::-1].tail(30)
-        latestRecordsFirst_df = latestRecordsFirst_df.fillna(0)
-        latestRecordsFirst_df = latestRecordsFirst_df.replace([np.inf, -np.inf], 0)
-        # Bollinger bands
-        latestRecordsFirst_df.loc[:,'BBands-U'], latestRecordsFirst_df.loc[:,'BBands-M'], latestRecordsFirst_df.loc[:,'BBands-L'] = pktalib.BBANDS(latestRecordsFirst_df["Close"], 20)
-        # compute Keltner's channel
-        latestRecordsFirst_df['low_kel'], latestRecordsFirst_df['upp_kel'] = pktalib.KeltnersChannel(latestRecordsFirst_df["High"], latestRecordsFirst_df["Low"],latestRecordsFirst_df["Close"],20)
-        # squeeze indicator
-        def in_squeeze(df):
-            return df['low_kel'] < df['BBands-L'] < df['BBands-U'] < df['upp_kel']
-
-        latestRecordsFirst_df['squeeze'] = latestRecordsFirst_df.apply(in_squeeze, axis=1)
-
-        # Let's review just the previous 3 candles including today (at the end)
-        latestRecordsFirst_df = latestRecordsFirst_df.tail(3)
-        # stock is coming out of the squeeze
-        saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-        candle3Sqz = latestRecordsFirst_df.iloc[-3]["squeeze"]
-        candle1Sqz = latestRecordsFirst_df.iloc[-1]["squeeze"]
-        candle2Sqz = latestRecordsFirst_df.iloc[-2]["squeeze"]
-        if candle3Sqz and not candle1Sqz:
+        state = self.precomputedBbandsSqueeze(stockName, fullData)
+        if state is None:
+            # The most recent 30 candles, oldest first
+            recentCandles = fullData.head(30)[::-1][["High", "Low", "Close"]]
+            recentCandles = recentCandles.fillna(0).replace([np.inf, -np.inf], 0)
+            state = PKBbandsSqueeze().squeezeStates(recentCandles.to_numpy(dtype=np.float64)[np.newaxis])[0]
+        if state in [PKBbandsSqueeze.FIRED_BUY, PKBbandsSqueeze.FIRED_SELL]:
             # 3rd candle from the most recent one was in squeeze but the most recent one is not.
-            if filter not in [1,3,4]: # Buy/Sell/All
+            # The action depends on whether the close is nearer the upper or the lower band.
+            action = state == PKBbandsSqueeze.FIRED_BUY
+            if filter not in ([1,4] if action else [3,4]): # Buy/All or Sell/All
                 return False
-            # decide which action to take by comparing distances                
-            distance_to_upper = abs(latestRecordsFirst_df['BBands-U'].values[-1] - latestRecordsFirst_df['Close'].values[-1])
-            distance_to_lower = abs(latestRecordsFirst_df['BBands-L'].values[-1] - latestRecordsFirst_df['Close'].values[-1])
-            
-            action = False
-            if distance_to_upper < distance_to_lower:
-                if filter not in [1,4]: # Buy/All
-                    return False
-                action = True
-            elif filter not in [3,4]: # Sell/All
-                return False
-            screenDict["Pattern"] = saved[0] + (colorText.GREEN if action else colorText.FAIL) + f"BBands-SQZ-{'Buy' if action else 'Sell'}" + colorText.END
-            saveDict["Pattern"] = saved[1] + f"TTM-SQZ-{'Buy' if action else 'Sell'}"
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"TTM-SQZ-{'Buy' if action else 'Sell'}",
+                                       parts=[(f"BBands-SQZ-{'Buy' if action else 'Sell'}", PKSignal.BULLISH if action else PKSignal.BEARISH)])
             return True
-        elif candle3Sqz and candle2Sqz and candle1Sqz:
+        elif state == PKBbandsSqueeze.SQUEEZE_ON:
             # Last 3 candles in squeeze
             if filter not in [2,4]: # SqZ/All
                 return False
-            screenDict["Pattern"] = f'{saved[0]}{colorText.WARN}TTM-SQZ{colorText.END}'
-            saveDict["Pattern"] = f'{saved[1]}TTM-SQZ'
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", "TTM-SQZ", PKSignal.NEUTRAL)
             return True
         return False
 
+    def precomputedBbandsSqueeze(self, stockName, fullData):
+        # Only while the candles are still the ones the state was computed from
+        precomputed = self.bbandsSqueezes.get(stockName) if stockName is not None else None
+        if precomputed is None:
+            return None
+        state, numCandles, lastDate = precomputed
+        try:
+            if len(fullData) != numCandles or fullData.index[0] != lastDate:
+                return None
+        except Exception as e: # pragma: no cover
+            self.default_logger.debug(e, exc_info=True)
+            return None
+        return state
+
     # Find accurate breakout value
     def findBreakingoutNow(self, df, fullData, saveDict, screenDict):
         if df is None or len(df) == 0:
@@ -880,8 +851,7 @@ class ScreeningStatistics:
         maxOfLast5Candles = ulr.tail(5).max()
         # bandwidth = 100 * ulr / recents.loc[:,'BBands-M']
         # percent = self.non_zero_range(recents.loc[:,'Close'], recents.loc[:,'BBands-L']) / ulr
-        saveDict["bbands_ulr_ratio_max5"] = round(ulr.iloc[0]/maxOfLast5Candles,2) #percent.iloc[0]
-        screenDict["bbands_ulr_ratio_max5"] = saveDict["bbands_ulr_ratio_max5"]
+        PKResultRecord.setField(screenDict, saveDict, "bbands_ulr_ratio_max5", round(ulr.iloc[0]/maxOfLast5Candles,2)) #percent.iloc[0]
         # saveDict["bbands_bandwidth"] = bandwidth.iloc[0]
         # screenDict["bbands_bandwidth"] = saveDict["bbands_bandwidth"]
         # saveDict["bbands_ulr"] = ulr.iloc[0]
@@ -900,37 +870,25 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(1)
         data = data[1:]
-        maxHigh = round(data.describe()["High"]["max"], 2)
-        maxClose = round(data.describe()["Close"]["max"], 2)
+        maxHigh = round(self.rollingExtreme(df[1:], "High"), 2)
+        maxClose = round(self.rollingExtreme(df[1:], "Close"), 2)
         recentClose = round(recent["Close"].iloc[0], 2)
         if np.isnan(maxClose) or np.isnan(maxHigh):
-            saveDict["Breakout"] = "BO: 0 R: 0"
-            screenDict["Breakout"] = (
-                colorText.WARN + "BO: 0 R: 0" + colorText.END
-            )
+            PKResultRecord.setField(screenDict, saveDict, "Breakout", "BO: 0 R: 0", PKSignal.NEUTRAL)
             # self.default_logger.info(
             #     f'For Stock:{saveDict["Stock"]}, the breakout is unknown because max-high ({maxHigh}) or max-close ({maxClose}) are not defined.'
             # )
             return False
+        resistanceSignal = PKSignal.BULLISH if recentClose >= maxHigh else PKSignal.BEARISH
         if maxHigh > maxClose:
             if (maxHigh - maxClose) <= (maxHigh * 2 / 100):
-                saveDict["Breakout"] = "BO: " + str(maxClose) + " R: " + str(maxHigh)
+                PKResultRecord.setField(screenDict, saveDict, "Breakout", "BO: " + str(maxClose) + " R: " + str(maxHigh),
+                                        parts=[("BO: " + str(maxClose), PKSignal.BULLISH if recentClose >= maxClose else PKSignal.BEARISH),
+                                               (" R: " + str(maxHigh), resistanceSignal)])
                 if recentClose >= maxClose:
-                    screenDict["Breakout"] = (
-                        colorText.GREEN
-                        + "BO: "
-                        + str(maxClose)
-                        + colorText.END
-                        + (colorText.GREEN if recentClose >= maxHigh else colorText.FAIL)
-                        + " R: "
-                        + str(maxHigh)
-                        + colorText.END
-                    )
                     # self.default_logger.info(
                     #     f'Stock:{saveDict["Stock"]}, has a breakout because max-high ({maxHigh}) >= max-close ({maxClose})'
                     # )
@@ -938,28 +896,12 @@ class ScreeningStatistics:
                 # self.default_logger.info(
                 #     f'Stock:{saveDict["Stock"]}, does not have a breakout yet because max-high ({maxHigh}) < max-close ({maxClose})'
                 # )
-                screenDict["Breakout"] = (
-                    colorText.FAIL
-                    + "BO: "
-                    + str(maxClose)
-                    + colorText.END
-                    + (colorText.GREEN if recentClose >= maxHigh else colorText.FAIL)
-                    + " R: "
-                    + str(maxHigh)
-                    + colorText.END
-                )
                 return not alreadyBrokenout
             noOfHigherShadows = len(data[data.High > maxClose])
             if daysToLookback / noOfHigherShadows <= 3:
-                saveDict["Breakout"] = "BO: " + str(maxHigh) + " R: 0"
+                PKResultRecord.setField(screenDict, saveDict, "Breakout", "BO: " + str(maxHigh) + " R: 0",
+                                        PKSignal.BULLISH if recentClose >= maxHigh else PKSignal.BEARISH)
                 if recentClose >= maxHigh:
-                    screenDict["Breakout"] = (
-                        colorText.GREEN
-                        + "BO: "
-                        + str(maxHigh)
-                        + " R: 0"
-                        + colorText.END
-                    )
                     # self.default_logger.info(
                     #     f'Stock:{saveDict["Stock"]}, has a breakout because recent-close ({recentClose}) >= max-high ({maxHigh})'
                     # )
@@ -967,68 +909,30 @@ class ScreeningStatistics:
                 # self.default_logger.info(
                 #     f'Stock:{saveDict["Stock"]}, does not have a breakout yet because recent-close ({recentClose}) < max-high ({maxHigh})'
                 # )
-                screenDict["Breakout"] = (
-                    colorText.FAIL
-                    + "BO: "
-                    + str(maxHigh)
-                    + " R: 0"
-                    + colorText.END
-                )
                 return not alreadyBrokenout
-            saveDict["Breakout"] = "BO: " + str(maxClose) + " R: " + str(maxHigh)
+            PKResultRecord.setField(screenDict, saveDict, "Breakout", "BO: " + str(maxClose) + " R: " + str(maxHigh),
+                                    parts=[("BO: " + str(maxClose), PKSignal.BULLISH if recentClose >= maxClose else PKSignal.BEARISH),
+                                           (" R: " + str(maxHigh), resistanceSignal)])
             if recentClose >= maxClose:
                 # self.default_logger.info(
                 #     f'Stock:{saveDict["Stock"]}, has a breakout because recent-close ({recentClose}) >= max-close ({maxClose})'
                 # )
-                screenDict["Breakout"] = (
-                    colorText.GREEN
-                    + "BO: "
-                    + str(maxClose)
-                    + colorText.END
-                    + (colorText.GREEN if recentClose >= maxHigh else colorText.FAIL)
-                    + " R: "
-                    + str(maxHigh)
-                    + colorText.END
-                )
                 return True and alreadyBrokenout and self.getCandleType(recent)
             # self.default_logger.info(
             #     f'Stock:{saveDict["Stock"]}, does not have a breakout yet because recent-close ({recentClose}) < max-high ({maxHigh})'
             # )
-            screenDict["Breakout"] = (
-                colorText.FAIL
-                + "BO: "
-                + str(maxClose)
-                + colorText.END
-                + (colorText.GREEN if recentClose >= maxHigh else colorText.FAIL)
-                + " R: "
-                + str(maxHigh)
-                + colorText.END
-            )
             return not alreadyBrokenout
         else:
-            saveDict["Breakout"] = "BO: " + str(maxClose) + " R: 0"
+            PKResultRecord.setField(screenDict, saveDict, "Breakout", "BO: " + str(maxClose) + " R: 0",
+                                    PKSignal.BULLISH if recentClose >= maxClose else PKSignal.BEARISH)
             if recentClose >= maxClose:
                 # self.default_logger.info(
                 #     f'Stock:{saveDict["Stock"]}, has a breakout because recent-close ({recentClose}) >= max-close ({maxClose})'
                 # )
-                screenDict["Breakout"] = (
-                    colorText.GREEN
-                    + "BO: "
-                    + str(maxClose)
-                    + " R: 0"
-                    + colorText.END
-                )
                 return True and alreadyBrokenout and self.getCandleType(recent)
             # self.default_logger.info(
             #     f'Stock:{saveDict["Stock"]}, has a breakout because recent-close ({recentClose}) < max-close ({maxClose})'
             # )
-            screenDict["Breakout"] = (
-                colorText.FAIL
-                + "BO: "
-                + str(maxClose)
-                + " R: 0"
-                + colorText.END
-            )
             return not alreadyBrokenout
 
     def findBullishAVWAP(self, df, screenDict, saveDict):
@@ -1069,10 +973,8 @@ class ScreeningStatistics:
                 diffFromAVWAP <= self.configManager.anchoredAVWAPPercentage)
 
         if isBullishAVWAP:
-            saveDict["AVWAP"] = round(recentAVWAP,2)
-            screenDict["AVWAP"] = round(recentAVWAP,2)
-            saveDict["Anchor"] = str(anchored_date).split(" ")[0]
-            screenDict["Anchor"] = str(anchored_date).split(" ")[0]
+            PKResultRecord.setField(screenDict, saveDict, "AVWAP", round(recentAVWAP,2))
+            PKResultRecord.setField(screenDict, saveDict, "Anchor", str(anchored_date).split(" ")[0])
         return isBullishAVWAP
 
     # Find stocks that are bullish intraday: RSI crosses 55, Macd Histogram positive, price above EMA 10
@@ -1137,23 +1039,14 @@ class ScreeningStatistics:
         trend_arr = np.array(trend)
         data.insert(len(data.columns), "trend", trend_arr)
         trend = trend[0]
-        saveDict["B/S"] = "Buy" if trend == 1 else ("Sell" if trend == -1 else "NA")
-        screenDict["B/S"] = (colorText.GREEN + "Buy") if trend == 1 else ((colorText.FAIL+ "Sell") if trend == -1 else (colorText.WARN + "NA")) + colorText.END
+        PKResultRecord.setField(screenDict, saveDict, "B/S", "Buy" if trend == 1 else ("Sell" if trend == -1 else "NA"),
+                                PKSignal.BULLISH if trend == 1 else (PKSignal.BEARISH if trend == -1 else PKSignal.NEUTRAL))
         return buySellAll == trend
 
-    def findCurrentSavedValue(self, screenDict, saveDict, key):
-        existingScreen = screenDict.get(key)
-        existingSave = saveDict.get(key)
-        existingScreen = f"{existingScreen}, " if (existingScreen is not None and len(existingScreen) > 0) else ""
-        existingSave = f"{existingSave}, " if (existingSave is not None and len(existingSave) > 0) else ""
-        return existingScreen, existingSave
-
     def findHigherBullishOpens(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -1163,9 +1056,7 @@ class ScreeningStatistics:
     def findHigherOpens(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -1176,10 +1067,7 @@ class ScreeningStatistics:
         #https://chartink.com/screener/deel-momentum-rsi-14-mfi-14-cci-14
         if df is None or len(df) < 2:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
         mfis = pktalib.MFI(data["High"],data["Low"],data["Close"],data["Volume"], 14)
         ccis = pktalib.CCI(data["High"],data["Low"],data["Close"], 14)
         sma7 = pktalib.SMA(data["Close"], 7)
@@ -1197,10 +1085,7 @@ class ScreeningStatistics:
     def findIntradayHighCrossover(self, df, afterTimestamp=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
         diff_df = None
         try:
             # Let's only consider those candles that are after the alert issue-time in the mornings + 2 candles (for buy/sell)
@@ -1219,9 +1104,7 @@ class ScreeningStatistics:
     def findIntradayOpenSetup(self,df,df_intraday,saveDict,screenDict,buySellAll=1):
         if df is None or len(df) == 0 or df_intraday is None or len(df_intraday) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         previousDay = data.head(1)
         prevDayHigh = previousDay["High"].iloc[0]
         prevDayLow = previousDay["Low"].iloc[0]
@@ -1247,8 +1130,8 @@ class ScreeningStatistics:
                 elif buySellAll == 2 or buySellAll == 3:
                     hasIntradaySetup = openPrice == highPrice and openPrice > prevDayLow and closePrice < prevDayLow
                 if hasIntradaySetup:
-                    saveDict["B/S"] = f"{'Buy' if buySellAll == 1 else ('Sell' if buySellAll == 2 else 'All')}-{candle1MinuteNumberSinceMarketStarted}m"
-                    screenDict["B/S"] = (colorText.GREEN if buySellAll == 1 else (colorText.FAIL if buySellAll == 2 else colorText.WARN)) + f"{'Buy' if buySellAll == 1 else ('Sell' if buySellAll == 2 else 'All')}-{candle1MinuteNumberSinceMarketStarted}m" + colorText.END
+                    PKResultRecord.setField(screenDict, saveDict, "B/S", f"{'Buy' if buySellAll == 1 else ('Sell' if buySellAll == 2 else 'All')}-{candle1MinuteNumberSinceMarketStarted}m",
+                                            PKSignal.BULLISH if buySellAll == 1 else (PKSignal.BEARISH if buySellAll == 2 else PKSignal.NEUTRAL))
                     break
         return hasIntradaySetup
 
@@ -1409,10 +1292,11 @@ class ScreeningStatistics:
         recent = data.head(1)
         recentVolume = recent["Volume"].iloc[0]
         recentClose = round(recent["Close"].iloc[0] * 1.05, 2)
-        highestHigh200 = round(data.head(201).tail(200).describe()["High"]["max"], 2)
-        highestHigh30 = round(data.head(31).tail(30).describe()["High"]["max"], 2)
-        highestHigh200From30 = round(data.tail(200).describe()["High"]["max"], 2)
-        highestHigh8From30 = round(data.head(39).tail(8).describe()["High"]["max"], 2)
+        candles = df.head(231)
+        highestHigh200 = round(self.rollingExtreme(candles.head(201).tail(200), "High"), 2)
+        highestHigh30 = round(self.rollingExtreme(candles.head(31).tail(30), "High"), 2)
+        highestHigh200From30 = round(self.rollingExtreme(candles.tail(200), "High"), 2)
+        highestHigh8From30 = round(self.rollingExtreme(candles.head(39).tail(8), "High"), 2)
         data = data.head(200)
         data = data[::-1]  # Reverse the dataframe so that its the oldest date first
         vol200 = pktalib.SMA(data["Volume"],timeperiod=200)
@@ -1439,10 +1323,8 @@ class ScreeningStatistics:
                  ((highestHigh30 < highestHigh8From30) and (recentVolume > sma50v))
                 )
         ):
-            saveDict["Breakout"] = saveDict["Breakout"] + "(Potential)"
-            screenDict["Breakout"] = screenDict["Breakout"] + (
-                colorText.GREEN + " (Potential)" + colorText.END
-            )
+            PKResultRecord.appendField(screenDict, saveDict, "Breakout", "(Potential)",
+                                       parts=[(" (Potential)", PKSignal.BULLISH)], separator="")
             return True
         return False
 
@@ -1461,10 +1343,7 @@ class ScreeningStatistics:
     def findProbableShortSellsFutures(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
         recent = data.tail(4)
         recent = recent[::-1]
         if len(recent) < 4:
@@ -1505,14 +1384,7 @@ class ScreeningStatistics:
                     (dayMinus1RSI <= minRSI) and \
                     (dayRSI >= dayMinus1RSI))
         if hasReversal:
-            saved = self.findCurrentSavedValue(screenDict,saveDict, "Pattern")
-            screenDict["Pattern"] = (
-                saved[0] 
-                + colorText.GREEN
-                + f"PSAR-RSI-Rev"
-                + colorText.END
-            )
-            saveDict["Pattern"] = saved[1] + f"PSAR-RSI-Rev"
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", "PSAR-RSI-Rev", PKSignal.BULLISH)
                 # (((dayMinus2Psar >= dayMinus2Close) and \
                 # ((dayMinus1Close >= dayMinus1Psar) and \
                 # (dayClose >= dayPSAR))) and \
@@ -1530,7 +1402,6 @@ class ScreeningStatistics:
         results = []
         hasReversals = False
         data = data[::-1]
-        saved = self.findCurrentSavedValue(screenDict,saveDict, "MA-Signal")
         for maLength in maRange:
             dataCopy = data
             if self.configManager.useEMA or maLength == 9:
@@ -1556,13 +1427,8 @@ class ScreeningStatistics:
                 hasReversals = True
                 results.append(str(maLength))
         if hasReversals:
-            screenDict["MA-Signal"] = (
-                saved[0] 
-                + (colorText.GREEN if bullishMAReversal else (colorText.FAIL if bearishMAReversal else colorText.WARN))
-                + f"Reversal-[{','.join(results)}]{'EMA' if (maLength == 9 or self.configManager.useEMA) else 'MA'}"
-                + colorText.END
-            )
-            saveDict["MA-Signal"] = saved[1] + f"Reversal-[{','.join(results)}]{'EMA' if (maLength == 9 or self.configManager.useEMA) else 'MA'}"
+            PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"Reversal-[{','.join(results)}]{'EMA' if (maLength == 9 or self.configManager.useEMA) else 'MA'}",
+                                       PKSignal.BULLISH if bullishMAReversal else (PKSignal.BEARISH if bearishMAReversal else PKSignal.NEUTRAL))
         return hasReversals
     
     # Find stocks with rising RSI from lower levels
@@ -1596,33 +1462,48 @@ class ScreeningStatistics:
         maRsi = pktalib.MA(data[rsiKey], timeperiod=maLength)
         data = data[::-1].head(3)
         maRsi = maRsi[::-1].head(3)
-        saved = self.findCurrentSavedValue(screenDict,saveDict,"Trend")
         if lookFor in [1,3] and maRsi.iloc[0] <= data[rsiKey].iloc[0] and maRsi.iloc[1] > data[rsiKey].iloc[1]:
-            screenDict['MA-Signal'] = saved[0] + colorText.GREEN + f'RSI-MA-Buy' + colorText.END
-            saveDict['MA-Signal'] = saved[1] + f'RSI-MA-Buy'
+            if "RSI-MA-Buy" not in str(saveDict.get("MA-Signal", "")):
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "RSI-MA-Buy", PKSignal.BULLISH)
             return True if (rsiKey == "RSIi") else (self.findRSICrossingMA(df, screenDict, saveDict,lookFor=lookFor, maLength=maLength, rsiKey="RSIi") or True)
         elif lookFor in [2,3] and maRsi.iloc[0] >= data[rsiKey].iloc[0] and maRsi.iloc[1] < data[rsiKey].iloc[1]:
-            screenDict['MA-Signal'] = saved[0] + colorText.FAIL + f'RSI-MA-Sell' + colorText.END
-            saveDict['MA-Signal'] = saved[1] + f'RSI-MA-Sell'
+            if "RSI-MA-Sell" not in str(saveDict.get("MA-Signal", "")):
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "RSI-MA-Sell", PKSignal.BEARISH)
             return True if (rsiKey == "RSIi") else (self.findRSICrossingMA(df, screenDict, saveDict,lookFor=lookFor, maLength=maLength, rsiKey="RSIi") or True)
         return False if (rsiKey == "RSIi") else (self.findRSICrossingMA(df, screenDict, saveDict,lookFor=lookFor, maLength=maLength, rsiKey="RSIi"))
     
-    def findRSRating(self, stock_rs_value=-1, index_rs_value=-1,df=None,screenDict={}, saveDict={}):
+    def findRSRating(self, stock_rs_value=-1, index_rs_value=-1,df=None,screenDict={}, saveDict={},stockName=None):
+        if stock_rs_value <= 0:
+            stock_rs_value = self.precomputedRelativeStrength(stockName, df)
         if stock_rs_value <= 0:
             stock_rs_value = self.calc_relative_strength(df=df)
         rs_rating = round(100 * ( stock_rs_value / index_rs_value ),2)
-        screenDict[f"RS_Rating{self.configManager.baseIndex}"] = rs_rating
-        saveDict[f"RS_Rating{self.configManager.baseIndex}"] = rs_rating
+        PKResultRecord.setField(screenDict, saveDict, f"RS_Rating{self.configManager.baseIndex}", rs_rating)
         return rs_rating
     
+    def precomputedRelativeStrength(self, stockName, df):
+        # Only while the candles are still the ones the score was computed from
+        precomputed = self.relativeStrengths.get(stockName) if stockName is not None else None
+        if precomputed is None or df is None:
+            return -1
+        strength, numCandles, lastDate = precomputed
+        try:
+            if len(df) != numCandles or df.index.max() != lastDate:
+                return -1
+        except Exception as e: # pragma: no cover
+            self.default_logger.debug(e, exc_info=True)
+            return -1
+        return strength
+
     # Relative volatality measure
     def findRVM(self, df=None,screenDict={}, saveDict={}):
         if df is None or len(df) == 0 or len(df) < 144:
             return 0
-        # RVM over the lookback period of 15 periods
-        rvm = pktalib.RVM(df["High"],df["Low"],df["Close"],15)
-        screenDict["RVM(15)"] = rvm
-        saveDict["RVM(15)"] = rvm
+        # RVM over the lookback period of 15 periods, from the oldest candle
+        # to the latest one
+        data = df.sort_index()
+        rvm = pktalib.RVM(data["High"],data["Low"],data["Close"],15)
+        PKResultRecord.setField(screenDict, saveDict, "RVM(15)", rvm)
         return rvm
 
     def findShortSellCandidatesForVolumeSMA(self, df):
@@ -1661,7 +1542,6 @@ class ScreeningStatistics:
         data = data.set_index(np.arange(len(data)))
         data = data.fillna(0)
         data = data.replace([np.inf, -np.inf], 0)
-        saved = self.findCurrentSavedValue(screenDict,saveDict,"Trend")
         try:
             with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
                 data["tops"] = data["Close"].iloc[
@@ -1687,51 +1567,27 @@ class ScreeningStatistics:
                     slope = 0
             except np.linalg.LinAlgError as e: # pragma: no cover
                 self.default_logger.debug(e, exc_info=True)
-                screenDict["Trend"] = (
-                    saved[0] + colorText.WARN + "Unknown" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Unknown"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Unknown", PKSignal.NEUTRAL)
                 return saveDict["Trend"]
             except Exception as e:  # pragma: no cover
                 self.default_logger.debug(e, exc_info=True)
                 slope, _ = 0, 0
             angle = np.rad2deg(np.arctan(slope))
             if angle == 0:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.WARN + "Unknown" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Unknown"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Unknown", PKSignal.NEUTRAL)
             elif angle <= 30 and angle >= -30:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.WARN + "Sideways" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Sideways"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Sideways", PKSignal.NEUTRAL)
             elif angle >= 30 and angle < 61:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.GREEN + "Weak Up" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Weak Up"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Weak Up", PKSignal.BULLISH)
             elif angle >= 60:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.GREEN + "Strong Up" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Strong Up"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Strong Up", PKSignal.BULLISH)
             elif angle <= -30 and angle > -61:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.FAIL + "Weak Down" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Weak Down"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Weak Down", PKSignal.BEARISH)
             elif angle < -60:
-                screenDict["Trend"] = (
-                    saved[0] + colorText.FAIL + "Strong Down" + colorText.END
-                )
-                saveDict["Trend"] = saved[1] + "Strong Down"
+                PKResultRecord.appendField(screenDict, saveDict, "Trend", "Strong Down", PKSignal.BEARISH)
         except np.linalg.LinAlgError as e: # pragma: no cover
             self.default_logger.debug(e, exc_info=True)
-            screenDict["Trend"] = (
-                saved[0] + colorText.WARN + "Unknown" + colorText.END
-            )
-            saveDict["Trend"] = saved[1] + "Unknown"
+            PKResultRecord.appendField(screenDict, saveDict, "Trend", "Unknown", PKSignal.NEUTRAL)
         return saveDict["Trend"]
 
     # Find stocks approching to long term trendlines
@@ -1773,12 +1629,8 @@ class ScreeningStatistics:
 
         limit_upper = now["Support"].iloc[0] + (now["Support"].iloc[0] * percentage)
         limit_lower = now["Support"].iloc[0] - (now["Support"].iloc[0] * percentage)
-        saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
         if limit_lower < now["Close"].iloc[0] < limit_upper and slope > 0.15:
-            screenDict["Pattern"] = (
-                saved[0] + colorText.GREEN + "Trendline-Support" + colorText.END
-            )
-            saveDict["Pattern"] = saved[1] + "Trendline-Support"
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Trendline-Support", PKSignal.BULLISH)
             return True
 
         """ Plots for debugging
@@ -1845,7 +1697,6 @@ class ScreeningStatistics:
         mf_inst_ownershipChange = 0
         change_millions =""
         mf = ""
-        mfs = ""
         if refreshMFAndFV:
             try:
                 mf_inst_ownershipChange = self.getMutualFundStatus(stock,onlyMF=onlyMF,hostData=hostData,force=(hostData is None or hostData.empty or not ("MF" in hostData.columns or "FII" in hostData.columns)) and downloadOnly,exchangeName=exchangeName)
@@ -1866,28 +1717,25 @@ class ScreeningStatistics:
                 if fairValue is not None and fairValue != 0:
                     ltp = saveDict["LTP"]
                     fairValueDiff = round(fairValue - ltp,0)
-                    saveDict["FairValue"] = str(fairValue)
-                    saveDict["FVDiff"] = fairValueDiff
-                    screenDict["FVDiff"] = fairValueDiff
-                    screenDict["FairValue"] = (colorText.GREEN if fairValue >= ltp else colorText.FAIL) + saveDict["FairValue"] + colorText.END
+                    PKResultRecord.setField(screenDict, saveDict, "FairValue", str(fairValue), PKSignal.BULLISH if fairValue >= ltp else PKSignal.BEARISH)
+                    PKResultRecord.setField(screenDict, saveDict, "FVDiff", fairValueDiff)
             except Exception as e:  # pragma: no cover
                 self.default_logger.debug(e, exc_info=True)
                 pass
             
             if mf_inst_ownershipChange > 0:
                 mf = f"MFI:▲ {change_millions}"
-                mfs = colorText.GREEN + mf + colorText.END
             elif mf_inst_ownershipChange < 0:
                 mf = f"MFI:▼ {change_millions}"
-                mfs = colorText.FAIL + mf + colorText.END
-
-        saved = self.findCurrentSavedValue(screenDict,saveDict,"Trend")
-        decision_scr = (colorText.GREEN if isUptrend else (colorText.FAIL if isDowntrend else colorText.WARN)) + f"{decision}" + colorText.END
-        dma50decision_scr = (colorText.GREEN if is50DMAUptrend else (colorText.FAIL if is50DMADowntrend else colorText.WARN)) + f"{dma50decision}" + colorText.END
-        saveDict["Trend"] = f"{saved[1]} {decision} {dma50decision} {mf}"
-        screenDict["Trend"] = f"{saved[0]} {decision_scr} {dma50decision_scr} {mfs}"
-        saveDict["MFI"] = mf_inst_ownershipChange
-        screenDict["MFI"] = mf_inst_ownershipChange
+
+        PKResultRecord.appendField(screenDict, saveDict, "Trend", f" {decision} {dma50decision} {mf}",
+                                   parts=[(" ", PKSignal.NONE),
+                                          (decision, PKSignal.BULLISH if isUptrend else (PKSignal.BEARISH if isDowntrend else PKSignal.NEUTRAL)),
+                                          (" ", PKSignal.NONE),
+                                          (dma50decision, PKSignal.BULLISH if is50DMAUptrend else (PKSignal.BEARISH if is50DMADowntrend else PKSignal.NEUTRAL)),
+                                          (" ", PKSignal.NONE),
+                                          (mf, PKSignal.BULLISH if mf_inst_ownershipChange > 0 else PKSignal.BEARISH)])
+        PKResultRecord.setField(screenDict, saveDict, "MFI", mf_inst_ownershipChange)
         return isUptrend, mf_inst_ownershipChange, fairValueDiff
 
     def getCandleBodyHeight(self, dailyData):
@@ -2163,10 +2011,7 @@ class ScreeningStatistics:
     def getTopsAndBottoms(self, df, window=3, numTopsBottoms=6):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data.reset_index(inplace=True)
+        data = self.sanitisedData(df).reset_index()
         data.rename(columns={"index": "Date"}, inplace=True)
         data = data[data["High"]>0]
         data = data[data["Low"]>0]
@@ -2176,59 +2021,71 @@ class ScreeningStatistics:
         bots = data[data.bots > 0]
         return tops, bots
 
-    def monitorFiveEma(self, fetcher, result_df, last_signal, risk_reward=3):
+    # Finds the latest 5-EMA signal from all the candles of one index
+    def findFiveEmaSignal(self, d, label, col_names, risk_reward=3):
+        d["5EMA"] = pktalib.EMA(d["Close"], timeperiod=5)
+        d = d[col_names]
+        d = d.dropna().round(2)
+
+        with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
+            if "sell" in label:
+                streched = d[(d.Low > d["5EMA"]) & (d.Low - d["5EMA"] > 0.5)]
+                streched["SL"] = streched.High
+                validate = d[
+                    (d.Low.shift(1) > d["5EMA"].shift(1))
+                    & (d.Low.shift(1) - d["5EMA"].shift(1) > 0.5)
+                ]
+                old_index = validate.index
+            else:
+                mask = (d.High < d["5EMA"]) & (d["5EMA"] - d.High > 0.5)  # Buy
+                streched = d[mask]
+                streched["SL"] = streched.Low
+                validate = d.loc[mask.shift(1).fillna(False)]
+                old_index = validate.index
+        tgt = pd.DataFrame(
+            (
+                validate.Close.reset_index(drop=True)
+                - (
+                    (
+                        streched.SL.reset_index(drop=True)
+                        - validate.Close.reset_index(drop=True)
+                    )
+                    * risk_reward
+                )
+            ),
+            columns=["Target"],
+        )
+        validate = pd.concat(
+            [
+                validate.reset_index(drop=True),
+                streched["SL"].reset_index(drop=True),
+                tgt,
+            ],
+            axis=1,
+        )
+        validate = validate.tail(len(old_index))
+        validate = validate.set_index(old_index)
+        if "sell" in label:
+            final = validate[validate.Close < validate["5EMA"]].tail(1)
+        else:
+            final = validate[validate.Close > validate["5EMA"]].tail(1)
+        return final
+
+    def monitorFiveEma(self, fetcher, result_df, last_signal, risk_reward=3, liveMonitor=None):
         col_names = ["High", "Low", "Close", "5EMA"]
         data_list = ["nifty_buy", "banknifty_buy", "nifty_sell", "banknifty_sell"]
 
-        data_tuple = fetcher.fetchFiveEmaData()
-        for cnt in range(len(data_tuple)):
-            d = data_tuple[cnt]
-            d["5EMA"] = pktalib.EMA(d["Close"], timeperiod=5)
-            d = d[col_names]
-            d = d.dropna().round(2)
-
-            with SuppressOutput(suppress_stderr=True, suppress_stdout=True):
-                if "sell" in data_list[cnt]:
-                    streched = d[(d.Low > d["5EMA"]) & (d.Low - d["5EMA"] > 0.5)]
-                    streched["SL"] = streched.High
-                    validate = d[
-                        (d.Low.shift(1) > d["5EMA"].shift(1))
-                        & (d.Low.shift(1) - d["5EMA"].shift(1) > 0.5)
-                    ]
-                    old_index = validate.index
-                else:
-                    mask = (d.High < d["5EMA"]) & (d["5EMA"] - d.High > 0.5)  # Buy
-                    streched = d[mask]
-                    streched["SL"] = streched.Low
-                    validate = d.loc[mask.shift(1).fillna(False)]
-                    old_index = validate.index
-            tgt = pd.DataFrame(
-                (
-                    validate.Close.reset_index(drop=True)
-                    - (
-                        (
-                            streched.SL.reset_index(drop=True)
-                            - validate.Close.reset_index(drop=True)
-                        )
-                        * risk_reward
-                    )
-                ),
-                columns=["Target"],
-            )
-            validate = pd.concat(
-                [
-                    validate.reset_index(drop=True),
-                    streched["SL"].reset_index(drop=True),
-                    tgt,
-                ],
-                axis=1,
-            )
-            validate = validate.tail(len(old_index))
-            validate = validate.set_index(old_index)
-            if "sell" in data_list[cnt]:
-                final = validate[validate.Close < validate["5EMA"]].tail(1)
+        if liveMonitor is not None:
+            # Only the new candles get fetched and looked at
+            liveSignals = liveMonitor.refresh(riskReward=risk_reward)
+        else:
+            liveSignals = None
+            data_tuple = fetcher.fetchFiveEmaData()
+        for cnt in range(len(data_list)):
+            if liveSignals is not None:
+                final = liveSignals[data_list[cnt]]
             else:
-                final = validate[validate.Close > validate["5EMA"]].tail(1)
+                final = self.findFiveEmaSignal(data_tuple[cnt], data_list[cnt], col_names, risk_reward)
 
             if data_list[cnt] not in last_signal:
                 last_signal[data_list[cnt]] = final
@@ -2392,6 +2249,45 @@ class ScreeningStatistics:
         dataframe['volume_mean_exit_s'] = dataframe['volume'].rolling(self.volume_check_exit_s.value).mean().shift(1)
         return dataframe
     
+    def sanitisedData(self, df, oldestFirst=False):
+        """
+        Returns the candles with the missing and infinite values as 0. For
+        the candles of the stock being screened, these are shared with the
+        other validators and must not be changed. Others get a copy.
+        """
+        context = self.screeningContext
+        if context is not None and context.owns(df):
+            reader = sys._getframe(1).f_code.co_name if context.verifyReadOnly else None
+            return context.sanitised(df, oldestFirst=oldestFirst, reader=reader)
+        data = df.fillna(0).replace([np.inf, -np.inf], 0)
+        return data[::-1] if oldestFirst else data
+
+    def rollingExtremeLookbacks(self, daysToLookback):
+        # (column, stat, candles) looked at by the breakout, potential breakout,
+        # consolidation and 52 week high/low screeners
+        return [("High", "max", daysToLookback - 1), ("Close", "max", daysToLookback - 1),
+                ("Close", "max", daysToLookback), ("Close", "min", daysToLookback),
+                ("High", "max", 8), ("High", "max", 30), ("High", "max", 200),
+                ("High", "max", 250), ("Low", "min", 250), ("High", "max", 251), ("Low", "min", 251)]
+
+    def rollingExtremeColumn(self, column, stat, candles):
+        return f"{stat.capitalize()}{column}{candles}"
+
+    def rollingExtreme(self, window, column, stat="max"):
+        """
+        Returns the highest (stat="max") or the lowest (stat="min") value of
+        the column over the consecutive candles in the window (most recent
+        first), taking the missing values as 0. The rolling extremes from
+        preprocessData get used when they were computed for as many candles.
+        """
+        extremeColumn = self.rollingExtremeColumn(column, stat, len(window))
+        if extremeColumn in window.columns and len(window) > 0:
+            extreme = window[extremeColumn].iloc[0]
+            if not np.isnan(extreme):
+                return extreme
+        values = window[column].fillna(0).replace([np.inf, -np.inf], 0)
+        return values.max() if stat == "max" else values.min()
+
     # Preprocess the acquired data
     def preprocessData(self, df, daysToLookback=None):
         assert isinstance(df, pd.DataFrame)
@@ -2434,6 +2330,12 @@ class ScreeningStatistics:
             except Exception as e:
                 self.default_logger.debug(e, exc_info=True)
                 pass
+            extremes = {}
+            for column, stat, candles in self.rollingExtremeLookbacks(daysToLookback):
+                if candles > 0:
+                    rolling = data[column].rolling(candles, min_periods=candles)
+                    extremes[self.rollingExtremeColumn(column, stat, candles)] = rolling.max() if stat == "max" else rolling.min()
+            data = pd.concat([data, pd.DataFrame(extremes, index=data.index)], axis=1)
         except Exception as e:
                 self.default_logger.debug(e, exc_info=True)
                 pass
@@ -2474,11 +2376,8 @@ class ScreeningStatistics:
     def validateBullishForTomorrow(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # https://chartink.com/screener/bullish-for-tomorrow
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
         macdLine = pktalib.MACD(data["Close"], 12, 26, 9)[0].tail(3)
         macdSignal = pktalib.MACD(data["Close"], 12, 26, 9)[1].tail(3)
         macdHist = pktalib.MACD(data["Close"], 12, 26, 9)[2].tail(3)
@@ -2509,29 +2408,23 @@ class ScreeningStatistics:
     def validateCCI(self, df, screenDict, saveDict, minCCI, maxCCI):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         cci = int(data.head(1)["CCI"].iloc[0])
-        saveDict["CCI"] = cci
         if (cci >= minCCI and cci <= maxCCI):
+            strongTrend = "Strong" in saveDict["Trend"]
             if ("Up" in saveDict["Trend"]):
-                screenDict["CCI"] = (
-                    (colorText.BOLD if ("Strong" in saveDict["Trend"]) else "") + colorText.GREEN + str(cci) + colorText.END
-                )
+                PKResultRecord.setField(screenDict, saveDict, "CCI", cci, PKSignal.STRONG_BULLISH if strongTrend else PKSignal.BULLISH)
             else:
-                screenDict["CCI"] = (
-                    (colorText.BOLD if ("Strong" in saveDict["Trend"]) else "") + colorText.FAIL + str(cci) + colorText.END
-                )
+                PKResultRecord.setField(screenDict, saveDict, "CCI", cci, PKSignal.STRONG_BEARISH if strongTrend else PKSignal.BEARISH)
             return True
-        screenDict["CCI"] = colorText.FAIL + str(cci) + colorText.END
+        PKResultRecord.setField(screenDict, saveDict, "CCI", cci, PKSignal.BEARISH)
         return False
 
     # Find Conflucence
     def validateConfluence(self, stock, df, full_df, screenDict, saveDict, percentage=0.1,confFilter=3):
         if df is None or len(df) == 0:
             return False
-        data = df.copy() if confFilter < 4 else full_df.copy()
+        data = df if confFilter < 4 else full_df
         recent = data.head(2)
         if len(recent) < 2:
             return False
@@ -2539,7 +2432,6 @@ class ScreeningStatistics:
         key2 = "LMA"
         key3 = "50DMA"
         key4 = "200DMA"
-        saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
         if confFilter == 4:
             maxRecentDays = int(self.configManager.superConfluenceMaxReviewDays)
             recentCurrentDay = 1
@@ -2555,7 +2447,7 @@ class ScreeningStatistics:
             ema8CrossedEMA55 = False
             ema21CrossedEMA55 = False
             emasCrossedSMA200 = False
-            silverCross = False
+            silverCross = None
             while recentCurrentDay <= maxRecentDays:
                 # 8 ema>21 ema > 55 ema >200 sma each OF THE ema AND THE 200 sma SEPARATED BY LESS THAN 1%(ideally 0.1% TO 0.5%) DURING CONFLUENCE
                 if len(emas) >= 1:
@@ -2585,37 +2477,22 @@ class ScreeningStatistics:
                 if superbConfluence:
                     indexDate = PKDateUtilities.dateFromYmdString(str(data.index[recentCurrentDay-1]).split(" ")[0])
                     dayDate = f"{indexDate.day}/{indexDate.month}"
-                    screenDict["MA-Signal"] = (
-                        saved[0] 
-                        + (colorText.GREEN)
-                        + f"SuperGoldenConf.({dayDate})"
-                        + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"SuperGoldenConf(-{dayDate})"
-                    screenDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{colorText.GREEN if (ema_8>=ema_21 and ema_8>=ema_55) else (colorText.WARN if (ema_8>=ema_21 or ema_8>=ema_55) else colorText.FAIL)}{round(ema_8,1)}{colorText.END},{colorText.GREEN if ema_21>=ema_55 else colorText.FAIL}{round(ema_21,1)}{colorText.END},{round(ema_55,1)}, {colorText.GREEN if sma_200<= ema_55 and emasCrossedSMA200 else (colorText.WARN if sma_200<= ema_55 else colorText.FAIL)}{round(sma_200,1)} ({round(ema55_percentage*100,1)}%){colorText.END}"
-                    saveDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)"
-                    saveDict[f"SuperConfSort"] = int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}") #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
-                    screenDict[f"SuperConfSort"] = saveDict[f"SuperConfSort"]
+                    PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"SuperGoldenConf(-{dayDate})",
+                                               parts=[(f"SuperGoldenConf.({dayDate})", PKSignal.BULLISH)])
+                    self.setSuperConfluenceEMAs(screenDict, saveDict, indexDate, ema_8, ema_21, ema_55, sma_200, ema55_percentage, emasCrossedSMA200)
                     return superbConfluence
                 elif ema8CrossedEMA21 and ema8CrossedEMA55 and ema21CrossedEMA55:
                     indexDate = PKDateUtilities.dateFromYmdString(str(data.index[recentCurrentDay-1]).split(" ")[0])
                     dayDate = f"{indexDate.day}/{indexDate.month}"
-                    screenDict["MA-Signal"] = (
-                        saved[0] 
-                        + (colorText.WHITE)
-                        + f"SilverCrossConf.({dayDate})"
-                        + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"SilverCrossConf.({dayDate})"
-                    screenDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{colorText.GREEN if (ema_8>=ema_21 and ema_8>=ema_55) else (colorText.WARN if (ema_8>=ema_21 or ema_8>=ema_55) else colorText.FAIL)}{round(ema_8,1)}{colorText.END},{colorText.GREEN if ema_21>=ema_55 else colorText.FAIL}{round(ema_21,1)}{colorText.END},{round(ema_55,1)}, {colorText.GREEN if sma_200<= ema_55 and emasCrossedSMA200 else (colorText.WARN if sma_200<= ema_55 else colorText.FAIL)}{round(sma_200,1)} ({round(ema55_percentage*100,1)}%){colorText.END}"
-                    saveDict[f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)"] = f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)"
-                    saveDict[f"SuperConfSort"] = int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}") #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
-                    screenDict[f"SuperConfSort"] = saveDict[f"SuperConfSort"]
-                    silverCross = True
+                    # The oldest silver cross within the review days is the one reported
+                    silverCross = (dayDate, indexDate, ema_8, ema_21, ema_55, sma_200, ema55_percentage, emasCrossedSMA200)
                 
                 recentCurrentDay += 1
             
             if silverCross:
+                dayDate = silverCross[0]
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"SilverCrossConf.({dayDate})", PKSignal.HIGHLIGHT)
+                self.setSuperConfluenceEMAs(screenDict, saveDict, *silverCross[1:])
                 return True
         is20DMACrossover50DMA = (recent["SSMA20"].iloc[0] >= recent["SMA"].iloc[0]) and \
                             (recent["SSMA20"].iloc[1] <= recent["SMA"].iloc[1])
@@ -2643,47 +2520,37 @@ class ScreeningStatistics:
                 * 100,
                 2,
             )
-        saveDict["ConfDMADifference"] = difference
-        screenDict["ConfDMADifference"] = difference
+        PKResultRecord.setField(screenDict, saveDict, "ConfDMADifference", difference)
         # difference = abs(difference)
         confText = f"{goldenxOverText if isGoldenCrossOver else (deadxOverText if isDeadCrossOver else ('Conf.Up' if is50DMAUpTrend else ('Conf.Down' if is50DMADownTrend else (key3 if is50DMA else (key4 if is200DMA else 'Unknown')))))}"
         if abs(recent[key1].iloc[0] - recent[key2].iloc[0]) <= (
             recent[key1].iloc[0] * percentage
         ):
-            if recent[key1].iloc[0] >= recent[key2].iloc[0]:
-                screenDict["MA-Signal"] = (
-                    saved[0] 
-                    + (colorText.GREEN if is50DMAUpTrend else (colorText.FAIL if is50DMADownTrend else colorText.WARN))
-                    + f"{confText} ({difference}%)"
-                    + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + f"{confText} ({difference}%)"
-            else:
-                screenDict["MA-Signal"] = (
-                    saved[0] 
-                    + (colorText.GREEN if is50DMAUpTrend else (colorText.FAIL if is50DMADownTrend else colorText.WARN))
-                    + f"{confText} ({difference}%)"
-                    + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + f"{confText} ({difference}%)"
+            PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"{confText} ({difference}%)",
+                                       PKSignal.BULLISH if is50DMAUpTrend else (PKSignal.BEARISH if is50DMADownTrend else PKSignal.NEUTRAL))
             return confFilter == 3 or \
                 (confFilter == 1 and not isDeadCrossOver and (is50DMAUpTrend or (isGoldenCrossOver or 'Up' in confText))) or \
                 (confFilter == 2 and not isGoldenCrossOver and (is50DMADownTrend or isDeadCrossOver or 'Down' in confText))
         # Maybe the difference is not within the range, but we'd still like to keep the stock in
         # the list if it's a golden crossover or dead crossover
         if isGoldenCrossOver or isDeadCrossOver:
-            screenDict["MA-Signal"] = (
-                    saved[0] 
-                    + (colorText.GREEN if is50DMAUpTrend else (colorText.FAIL if is50DMADownTrend else colorText.WARN))
-                    + f"{confText} ({difference}%)"
-                    + colorText.END
-                )
-            saveDict["MA-Signal"] = saved[1] + f"{confText} ({difference}%)"
+            PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"{confText} ({difference}%)",
+                                       PKSignal.BULLISH if is50DMAUpTrend else (PKSignal.BEARISH if is50DMADownTrend else PKSignal.NEUTRAL))
             return confFilter == 3 or \
                 (confFilter == 1 and isGoldenCrossOver) or \
                 (confFilter == 2 and isDeadCrossOver)
         return False
 
+    def setSuperConfluenceEMAs(self, screenDict, saveDict, indexDate, ema_8, ema_21, ema_55, sma_200, ema55_percentage, emasCrossedSMA200):
+        PKResultRecord.setField(screenDict, saveDict, f"Latest EMA-{self.configManager.superConfluenceEMAPeriods}, SMA-200 (EMA55 %)",
+                                f"{round(ema_8,1)},{round(ema_21,1)},{round(ema_55,1)}, {round(sma_200,1)} ({round(ema55_percentage*100,1)}%)",
+                                parts=[(f"{round(ema_8,1)}", PKSignal.BULLISH if (ema_8>=ema_21 and ema_8>=ema_55) else (PKSignal.NEUTRAL if (ema_8>=ema_21 or ema_8>=ema_55) else PKSignal.BEARISH)),
+                                       (",", PKSignal.NONE),
+                                       (f"{round(ema_21,1)}", PKSignal.BULLISH if ema_21>=ema_55 else PKSignal.BEARISH),
+                                       (f",{round(ema_55,1)}, ", PKSignal.NONE),
+                                       (f"{round(sma_200,1)} ({round(ema55_percentage*100,1)}%)", PKSignal.BULLISH if sma_200<= ema_55 and emasCrossedSMA200 else (PKSignal.NEUTRAL if sma_200<= ema_55 else PKSignal.BEARISH))])
+        PKResultRecord.setField(screenDict, saveDict, "SuperConfSort", int(f"{indexDate.year:04}{indexDate.month:02}{indexDate.day:02}")) #0 if ema_8>=ema_21 and ema_8>=ema_55 and ema_21>=ema_55 and sma_200<=ema_55 else (1 if (ema_8>=ema_21 or ema_8>=ema_55) else (2 if sma_200<=ema_55 else 3))
+
     def findPotentialProfitableEntriesBullishTodayForPDOPDC(self, df, saveDict, screenDict):
         if df is None or len(df) == 0:
             return False
@@ -2749,37 +2616,18 @@ class ScreeningStatistics:
     def validateConsolidation(self, df, screenDict, saveDict, percentage=10):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        hc = data.describe()["Close"]["max"]
-        lc = data.describe()["Close"]["min"]
-        if (hc - lc) <= (hc * percentage / 100) and (hc - lc != 0):
-            screenDict["Consol."] = (
-                colorText.GREEN
-                + "Range:"
-                + str(round((abs((hc - lc) / hc) * 100), 1))
-                + "%"
-                + colorText.END
-            )
-        else:
-            screenDict["Consol."] = (
-                colorText.FAIL
-                + "Range:"
-                + str(round((abs((hc - lc) / hc) * 100), 1))
-                + "%"
-                + colorText.END
-            )
-        saveDict["Consol."] = f'Range:{str(round((abs((hc-lc)/hc)*100),1))+"%"}'
+        hc = self.rollingExtreme(df, "Close")
+        lc = self.rollingExtreme(df, "Close", stat="min")
+        PKResultRecord.setField(screenDict, saveDict, "Consol.", f'Range:{str(round((abs((hc-lc)/hc)*100),1))+"%"}',
+                                PKSignal.BULLISH if ((hc - lc) <= (hc * percentage / 100) and (hc - lc != 0)) else PKSignal.BEARISH)
         return round((abs((hc - lc) / hc) * 100), 1)
 
     def validateConsolidationContraction(self, df,legsToCheck=2,stockName=None):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # We can use window =3 because we need at least 3 candles to get the next top or bottom
         # but to better identify the pattern, we'd use window = 5
-        tops, bots = self.getTopsAndBottoms(df=data,window=5,numTopsBottoms=3*(legsToCheck if legsToCheck > 0 else 3))
+        tops, bots = self.getTopsAndBottoms(df=df,window=5,numTopsBottoms=3*(legsToCheck if legsToCheck > 0 else 3))
         # bots = bots.tail(3*legsToCheck-1)
         consolidationPercentages = []
         # dfc.assign(topbots=dfc["tops","bots"].sum(1)).drop("tops","bots", 1)
@@ -2894,7 +2742,6 @@ class ScreeningStatistics:
             return False
         data = df.copy()
         orgData = data
-        saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
         for i in range(int(daysToLookback), int(round(daysToLookback * 0.5)) - 1, -1):
             if i == 2:
                 return 0  # Exit if only last 2 candles are left
@@ -2911,13 +2758,7 @@ class ScreeningStatistics:
                         and (len(data.Open[data.Open > refCandle.High.item()]) == 0)
                         and (len(data.Close[data.Close < refCandle.Low.item()]) == 0)
                     ):
-                        screenDict["Pattern"] = (
-                            saved[0]
-                            + colorText.WARN
-                            + ("Inside Bar (%d)" % i)
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Inside Bar (%d)" % i, PKSignal.NEUTRAL)
                         return i
                 else:
                     return 0
@@ -2933,13 +2774,7 @@ class ScreeningStatistics:
                         and (len(data.Open[data.Open > refCandle.High.item()]) == 0)
                         and (len(data.Close[data.Close < refCandle.Low.item()]) == 0)
                     ):
-                        screenDict["Pattern"] = (
-                            saved[0]
-                            + colorText.WARN
-                            + ("Inside Bar (%d)" % i)
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Inside Bar (%d)" % i
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Inside Bar (%d)" % i, PKSignal.NEUTRAL)
                         return i
                 else:
                     return 0
@@ -2952,7 +2787,7 @@ class ScreeningStatistics:
         data = df.copy()
         listingPrice = data[::-1].head(1)["Open"].iloc[0]
         currentPrice = data.head(1)["Close"].iloc[0]
-        ATH = data.describe()["High"]["max"]
+        ATH = data["High"].max()
         if ATH > (listingPrice + (listingPrice * percentage)):
             return False
         away = round(((currentPrice - listingPrice) / listingPrice) * 100, 1)
@@ -2961,24 +2796,8 @@ class ScreeningStatistics:
             <= currentPrice
             <= (listingPrice + (listingPrice * percentage))
         ):
-            saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-            if away > 0:
-                screenDict["Pattern"] = (
-                    saved[0] 
-                    + colorText.GREEN
-                    + f"IPO Base ({away} %)"
-                    + colorText.END
-                )
-            else:
-                screenDict["Pattern"] = (
-                    saved[0]
-                    + colorText.GREEN
-                    + "IPO Base "
-                    + colorText.FAIL
-                    + f"({away} %)"
-                    + colorText.END
-                )
-            saveDict["Pattern"] = saved[1] + f"IPO Base ({away} %)"
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"IPO Base ({away} %)",
+                                       parts=[("IPO Base ", PKSignal.BULLISH), (f"({away} %)", PKSignal.BULLISH if away > 0 else PKSignal.BEARISH)])
             return True
         return False
 
@@ -3002,19 +2821,12 @@ class ScreeningStatistics:
         try:
             with SuppressOutput(suppress_stdout=True, suppress_stderr=True):
                 lc = ata.LorentzianClassification(data=data)
-            saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
             if lc.df.iloc[-1]["isNewBuySignal"]:
-                screenDict["Pattern"] = (
-                    saved[0] + colorText.GREEN + "Lorentzian-Buy" + colorText.END
-                )
-                saveDict["Pattern"] = saved[1] + "Lorentzian-Buy"
+                PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Lorentzian-Buy", PKSignal.BULLISH)
                 if lookFor != 2: # Not Sell
                     return True
             elif lc.df.iloc[-1]["isNewSellSignal"]:
-                screenDict["Pattern"] = (
-                    saved[0] + colorText.FAIL + "Lorentzian-Sell" + colorText.END
-                )
-                saveDict["Pattern"] = saved[1] + "Lorentzian-Sell"
+                PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Lorentzian-Sell", PKSignal.BEARISH)
                 if lookFor != 1: # Not Buy
                     return True
         except Exception:  # pragma: no cover
@@ -3061,9 +2873,7 @@ class ScreeningStatistics:
     def validateLowestVolume(self, df, daysForLowestVolume):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         if daysForLowestVolume is None:
             daysForLowestVolume = 30
         if len(data) < daysForLowestVolume:
@@ -3094,14 +2904,8 @@ class ScreeningStatistics:
         if pct_change == np.inf or pct_change == -np.inf:
             pct_change = 0
         pct_save = "%.1f%%" % pct_change
-        if pct_change > 0.2:
-            pct_change = colorText.GREEN + ("%.1f%%" % pct_change) + colorText.END
-        elif pct_change < -0.2:
-            pct_change = colorText.FAIL + ("%.1f%%" % pct_change) + colorText.END
-        else:
-            pct_change = colorText.WARN + ("%.1f%%" % pct_change) + colorText.END
-        saveDict["%Chng"] = pct_save
-        screenDict["%Chng"] = pct_change
+        PKResultRecord.setField(screenDict, saveDict, "%Chng", pct_save,
+                                PKSignal.BULLISH if pct_change > 0.2 else (PKSignal.BEARISH if pct_change < -0.2 else PKSignal.NEUTRAL))
         ltp = round(recent["Close"].iloc[0], 2)
         verifyStageTwo = True
         if len(data) > 250:
@@ -3109,17 +2913,15 @@ class ScreeningStatistics:
             yearlyHigh = data.head(250)["Close"].max()
             if ltp < (2 * yearlyLow) and ltp < (0.75 * yearlyHigh):
                 verifyStageTwo = False
-                screenDict["Stock"] = colorText.FAIL + saveDict["Stock"] + colorText.END
+                PKResultRecord.setField(screenDict, saveDict, "Stock", saveDict["Stock"], PKSignal.BEARISH)
         if ltp >= minLTP and ltp <= maxLTP:
             ltpValid = True
             if minChange != 0:
                 # User has supplied some filter for percentage change
                 ltpValid = float(str(pct_save).replace("%","")) >= minChange
-            saveDict["LTP"] = round(ltp, 2)
-            screenDict["LTP"] = (colorText.GREEN if ltpValid else colorText.FAIL) + ("%.2f" % ltp) + colorText.END
+            PKResultRecord.setField(screenDict, saveDict, "LTP", round(ltp, 2), PKSignal.BULLISH if ltpValid else PKSignal.BEARISH, fmt="%.2f")
             return ltpValid, verifyStageTwo
-        screenDict["LTP"] = colorText.FAIL + ("%.2f" % ltp) + colorText.END
-        saveDict["LTP"] = round(ltp, 2)
+        PKResultRecord.setField(screenDict, saveDict, "LTP", round(ltp, 2), PKSignal.BEARISH, fmt="%.2f")
         return ltpValid, verifyStageTwo
 
     def validateLTPForPortfolioCalc(self, df, screenDict, saveDict,requestedPeriod=0):
@@ -3137,52 +2939,31 @@ class ScreeningStatistics:
                 if isinstance(prevLtp,pd.Series):
                     prevLtp = prevLtp[0]
                     ltpTdy = ltpTdy[0]
-                screenDict[f"LTP{prd}"] = (
-                    (colorText.GREEN if (ltpTdy >= prevLtp) else (colorText.FAIL))
-                    + str("{:.2f}".format(ltpTdy))
-                    + colorText.END
-                )
-                screenDict[f"Growth{prd}"] = (
-                    (colorText.GREEN if (ltpTdy >= prevLtp) else (colorText.FAIL))
-                    + str("{:.2f}".format(ltpTdy - prevLtp))
-                    + colorText.END
-                )
-                saveDict[f"LTP{prd}"] = round(ltpTdy, 2)
-                saveDict[f"Growth{prd}"] = round(ltpTdy - prevLtp, 2)
+                growthSignal = PKSignal.BULLISH if (ltpTdy >= prevLtp) else PKSignal.BEARISH
+                PKResultRecord.setField(screenDict, saveDict, f"LTP{prd}", round(ltpTdy, 2), growthSignal, fmt="%.2f")
+                PKResultRecord.setField(screenDict, saveDict, f"Growth{prd}", round(ltpTdy - prevLtp, 2), growthSignal, fmt="%.2f")
                 if prd == 22 or (prd == requestedPeriod):
                     changePercent = round(((prevLtp-ltpTdy) if requestedPeriod ==0 else (ltpTdy - prevLtp))*100/ltpTdy, 2)
-                    saveDict[f"{prd}-Pd"] = f"{changePercent}%" if not pd.isna(changePercent) else '-'
-                    screenDict[f"{prd}-Pd"] = ((colorText.GREEN if changePercent >=0 else colorText.FAIL) + f"{changePercent}%" + colorText.END) if not pd.isna(changePercent) else '-'
+                    if not pd.isna(changePercent):
+                        PKResultRecord.setField(screenDict, saveDict, f"{prd}-Pd", f"{changePercent}%", PKSignal.BULLISH if changePercent >=0 else PKSignal.BEARISH)
+                    else:
+                        PKResultRecord.setField(screenDict, saveDict, f"{prd}-Pd", '-')
                     if (prd == requestedPeriod):
                         maxLTPPotential = max(data["High"].head(prd))
-                        screenDict[f"MaxLTP"] = (
-                            (colorText.GREEN if (maxLTPPotential >= prevLtp) else (colorText.FAIL))
-                            + str("{:.2f}".format(maxLTPPotential))
-                            + colorText.END
-                        )
-                        screenDict[f"Pot.Grw"] = (
-                            (colorText.GREEN if (maxLTPPotential >= prevLtp) else (colorText.FAIL))
-                            + str("{:.2f}%".format((maxLTPPotential - prevLtp)*100/prevLtp))
-                            + colorText.END
-                        )
-                        saveDict[f"MaxLTP"] = round(maxLTPPotential, 2)
-                        saveDict[f"Pot.Grw"] = f"{round((maxLTPPotential - prevLtp)*100/prevLtp, 2)}%"
-                screenDict["Date"] = calc_date
-                saveDict["Date"] = calc_date
+                        potentialSignal = PKSignal.BULLISH if (maxLTPPotential >= prevLtp) else PKSignal.BEARISH
+                        PKResultRecord.setField(screenDict, saveDict, "MaxLTP", round(maxLTPPotential, 2), potentialSignal, fmt="%.2f")
+                        PKResultRecord.setField(screenDict, saveDict, "Pot.Grw", f"{round((maxLTPPotential - prevLtp)*100/prevLtp, 2)}%", potentialSignal)
+                PKResultRecord.setField(screenDict, saveDict, "Date", calc_date)
             else:
-                saveDict[f"LTP{prd}"] = np.nan
-                saveDict[f"Growth{prd}"] = np.nan
-                screenDict["Date"] = calc_date
-                saveDict["Date"] = calc_date
+                PKResultRecord.setField(screenDict, saveDict, f"LTP{prd}", np.nan)
+                PKResultRecord.setField(screenDict, saveDict, f"Growth{prd}", np.nan)
+                PKResultRecord.setField(screenDict, saveDict, "Date", calc_date)
 
     # Find stocks that are bearish intraday: Macd Histogram negative
     def validateMACDHistogramBelow0(self, df):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
-        data = data[::-1]  # Reverse the dataframe so that its the oldest date first
+        data = self.sanitisedData(df, oldestFirst=True)  # Oldest date first
         macd = pktalib.MACD(data["Close"], 12, 26, 9)[2].tail(1)
         return macd.iloc[:1][0] < 0
 
@@ -3225,14 +3006,7 @@ class ScreeningStatistics:
                         # self.default_logger.info(
                         #     f'Stock:{saveDict["Stock"]}, is a momentum-gainer because today-open ({to}) >= yesterday-close ({yc}) and yesterday-open({yo}) >= day-before-close({dyc})'
                         # )
-                        saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-                        screenDict["Pattern"] = (
-                            saved[0]
-                            + colorText.GREEN
-                            + "Momentum Gainer"
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Momentum Gainer"
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Momentum Gainer", PKSignal.BULLISH)
                         return True
                     # self.default_logger.info(
                     #     f'Stock:{saveDict["Stock"]}, is not a momentum-gainer because either today-open ({to}) < yesterday-close ({yc}) or yesterday-open({yo}) < day-before-close({dyc})'
@@ -3249,38 +3023,23 @@ class ScreeningStatistics:
     #@measure_time
     # Validate Moving averages and look for buy/sell signals
     def validateMovingAverages(self, df, screenDict, saveDict, maRange=2.5,maLength=0,filters={}):
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(1)
         maSignals = []
         if str(maLength) in ["0","2","3"]:
-            saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
             if (
                 recent["SMA"].iloc[0] > recent["LMA"].iloc[0]
                 and recent["Close"].iloc[0] > recent["SMA"].iloc[0]
             ):
-                screenDict["MA-Signal"] = (
-                    saved[0] + colorText.GREEN + "Bullish" + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + "Bullish"
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "Bullish", PKSignal.BULLISH)
                 maSignals.append("3")
             elif recent["SMA"].iloc[0] < recent["LMA"].iloc[0]:
-                screenDict["MA-Signal"] = (
-                    saved[0] + colorText.FAIL + "Bearish" + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + "Bearish"
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "Bearish", PKSignal.BEARISH)
                 maSignals.append("2")
             elif recent["SMA"].iloc[0] == 0:
-                screenDict["MA-Signal"] = (
-                    saved[0] + colorText.WARN + "Unknown" + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + "Unknown"
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "Unknown", PKSignal.NEUTRAL)
             else:
-                screenDict["MA-Signal"] = (
-                    saved[0] + colorText.WARN + "Neutral" + colorText.END
-                )
-                saveDict["MA-Signal"] = saved[1] + "Neutral"
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "Neutral", PKSignal.NEUTRAL)
         reversedData = data[::-1]  # Reverse the dataframe
         ema_20 = pktalib.EMA(reversedData["Close"],20).tail(1).iloc[0]
         vwap = pktalib.VWAP(reversedData["High"],reversedData["Low"],reversedData["Close"],reversedData["Volume"]).tail(1).iloc[0]
@@ -3304,44 +3063,30 @@ class ScreeningStatistics:
         bullishCandle = self.getCandleType(data)
         if str(maLength) not in ["2","3"]:
             for ma in mas:
-                saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
                 # Taking Support
                 if close > ma and low <= (ma + maDevs[index]) and str(maLength) in ["0","1"]:
-                    screenDict["MA-Signal"] = (
-                        saved[0] + colorText.GREEN + f"{maTexts[index]}-Support" + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"{maTexts[index]}-Support"
+                    PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"{maTexts[index]}-Support", PKSignal.BULLISH)
                     maReversal = 1
                     maSignals.append("1")
                 # Validating Resistance
                 elif close < ma and high >= (ma - maDevs[index]) and str(maLength) in ["0","6"]:
-                    screenDict["MA-Signal"] = (
-                        saved[0] + colorText.FAIL + f"{maTexts[index]}-Resist" + colorText.END
-                    )
-                    saveDict["MA-Signal"] = saved[1] + f"{maTexts[index]}-Resist"
+                    PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"{maTexts[index]}-Resist", PKSignal.BEARISH)
                     maReversal = -1
                     maSignals.append("6")
                     
-                saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
                 # For a Bullish Candle
                 if bullishCandle:
                     # Crossing up
                     if open < ma and close > ma:
                         if (str(maLength) in ["0","5"]) or (str(maLength) in ["7"] and index == maTexts.index("VWAP")):
-                            screenDict["MA-Signal"] = (
-                                saved[0] + colorText.GREEN + f"BullCross-{maTexts[index]}" + colorText.END
-                            )
-                            saveDict["MA-Signal"] = saved[1] + f"BullCross-{maTexts[index]}"
+                            PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"BullCross-{maTexts[index]}", PKSignal.BULLISH)
                             maReversal = 1
                             maSignals.append(str(maLength))
                 # For a Bearish Candle
                 elif not bullishCandle:
                     # Crossing down
                     if open > sma and close < sma and str(maLength) in ["0","4"]:
-                        screenDict["MA-Signal"] = (
-                            saved[0] + colorText.FAIL + f"BearCross-{maTexts[index]}" + colorText.END
-                        )
-                        saveDict["MA-Signal"] = saved[1] + f"BearCross-{maTexts[index]}"
+                        PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", f"BearCross-{maTexts[index]}", PKSignal.BEARISH)
                         maReversal = -1
                         maSignals.append("4")
                 index += 1
@@ -3357,7 +3102,6 @@ class ScreeningStatistics:
         if df is None or len(df) == 0:
             return False
         data = df.copy()
-        saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
         if PKDateUtilities.isTradingTime():
             rangeData = data.head(nr + 1)[1:]
             now_candle = data.head(1)
@@ -3365,36 +3109,27 @@ class ScreeningStatistics:
             recent = rangeData.head(1)
             if (
                 len(recent) == 1
-                and recent["Range"].iloc[0] == rangeData.describe()["Range"]["min"]
+                and recent["Range"].iloc[0] == rangeData["Range"].min()
             ):
                 if (
                     self.getCandleType(recent)
                     and now_candle["Close"].iloc[0] >= recent["Close"].iloc[0]
                 ):
-                    screenDict["Pattern"] = (
-                        saved[0] + colorText.GREEN + f"Buy-NR{nr}" + colorText.END
-                    )
-                    saveDict["Pattern"] = saved[1] + f"Buy-NR{nr}"
+                    PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"Buy-NR{nr}", PKSignal.BULLISH)
                     return True
                 elif (
                     not self.getCandleType(recent)
                     and now_candle["Close"].iloc[0] <= recent["Close"].iloc[0]
                 ):
-                    screenDict["Pattern"] = (
-                        saved[0] + colorText.FAIL + f"Sell-NR{nr}" + colorText.END
-                    )
-                    saveDict["Pattern"] = saved[1] + f"Sell-NR{nr}"
+                    PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"Sell-NR{nr}", PKSignal.BEARISH)
                     return True
             return False
         else:
             rangeData = data.head(nr)
             rangeData.loc[:,'Range'] = abs(rangeData["Close"] - rangeData["Open"])
             recent = rangeData.head(1)
-            if recent["Range"].iloc[0] == rangeData.describe()["Range"]["min"]:
-                screenDict["Pattern"] = (
-                    saved[0] + colorText.GREEN + f"NR{nr}" + colorText.END
-                )
-                saveDict["Pattern"] = saved[1] + f"NR{nr}"
+            if recent["Range"].iloc[0] == rangeData["Range"].min():
+                PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"NR{nr}", PKSignal.BULLISH)
                 return True
             return False
 
@@ -3428,19 +3163,16 @@ class ScreeningStatistics:
             if hasCrossed:
                 if not hasAtleastOneMACross:
                     hasAtleastOneMACross = True
-                saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
                 maText = f"{ma}-{'EMA' if isEMA else 'SMA'}-Cross-{'FromBelow' if maDirectionFromBelow else 'FromAbove'}"
-                saveDict["MA-Signal"] = saved[1] + maText + f"({percentageDiff}%)"
-                screenDict["MA-Signal"] = saved[0] + f"{colorText.GREEN}{maText}{colorText.END}{colorText.FAIL if abs(percentageDiff) > 1 else colorText.WARN}({percentageDiff}%){colorText.END}"
+                PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", maText + f"({percentageDiff}%)",
+                                           parts=[(maText, PKSignal.BULLISH), (f"({percentageDiff}%)", PKSignal.BEARISH if abs(percentageDiff) > 1 else PKSignal.NEUTRAL)])
         return hasAtleastOneMACross
     
     # Validate if the stock prices are at least rising by 2% for the last 3 sessions
     def validatePriceRisingByAtLeast2Percent(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         data = data.head(4)
         if len(data) < 4:
             return False
@@ -3458,8 +3190,7 @@ class ScreeningStatistics:
                 + (" (%.1f%%," % percent2)
                 + (" %.1f%%)" % percent3)
             )
-            saveDict["%Chng"] = pct_change_text
-            screenDict["%Chng"] = colorText.GREEN + pct_change_text + colorText.END
+            PKResultRecord.setField(screenDict, saveDict, "%Chng", pct_change_text, PKSignal.BULLISH)
             return True and self.getCandleType(data.head(1))
         return False
 
@@ -3470,18 +3201,13 @@ class ScreeningStatistics:
             return False
         if rsiKey not in df.columns:
             return False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         rsi = int(data.head(1)[rsiKey].iloc[0])
-        saveDict[rsiKey] = rsi
         # https://chartink.com/screener/rsi-screening
         if rsi> 0 and rsi >= minRSI and rsi <= maxRSI:  # or (rsi <= 71 and rsi >= 67):
-            screenDict[rsiKey] = (
-                colorText.GREEN + str(rsi) + colorText.END
-            )
+            PKResultRecord.setField(screenDict, saveDict, rsiKey, rsi, PKSignal.BULLISH)
             return True if (rsiKey == "RSIi") else (self.validateRSI(df, screenDict, saveDict, minRSI, maxRSI,rsiKey="RSIi") or True)
-        screenDict[rsiKey] = colorText.FAIL + str(rsi) + colorText.END
+        PKResultRecord.setField(screenDict, saveDict, rsiKey, rsi, PKSignal.BEARISH)
         # If either daily or intraday RSI comes within range?
         return False if (rsiKey == "RSIi") else (self.validateRSI(df, screenDict, saveDict, minRSI, maxRSI,rsiKey="RSIi"))
 
@@ -3489,10 +3215,8 @@ class ScreeningStatistics:
     def validateShortTermBullish(self, df, screenDict, saveDict):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
         # https://chartink.com/screener/short-term-bullish
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(1)
         fk = 0 if len(data) < 3 else np.round(data["FASTK"].iloc[2], 5)
         # Reverse the dataframe for ichimoku calculations with date in ascending order
@@ -3547,11 +3271,7 @@ class ScreeningStatistics:
                         and recent["Close"].iloc[0] > recent["SSMA"].iloc[0]
                         and recent["Close"].iloc[0] > recent["LMA"].iloc[0]
                     ):
-                        saved = self.findCurrentSavedValue(screenDict,saveDict,"MA-Signal")
-                        screenDict["MA-Signal"] = (
-                            saved[0] + colorText.GREEN + "Bullish" + colorText.END
-                        )
-                        saveDict["MA-Signal"] = saved[1] + "Bullish"
+                        PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "Bullish", PKSignal.BULLISH)
                         return True
         return False
     
@@ -3561,7 +3281,7 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False
-        data = df.copy()
+        data = df
         try:
             if self.configManager.enableAdditionalVCPEMAFilters:
                 reversedData = data[::-1] 
@@ -3570,7 +3290,7 @@ class ScreeningStatistics:
                 if not (data["Close"].iloc[0] >= ema.tail(1).iloc[0] and data["Close"].iloc[0] >= sema20.tail(1).iloc[0]):
                     return False
             percentageFromTop /= 100
-            data.reset_index(inplace=True)
+            data = data.reset_index()
             data.rename(columns={"index": "Date"}, inplace=True)
             data["tops"] = (data["High"].iloc[list(pktalib.argrelextrema(np.array(data["High"]), np.greater_equal, order=window)[0])].head(4))
             data["bots"] = (data["Low"].iloc[list(pktalib.argrelextrema(np.array(data["Low"]), np.less_equal, order=window)[0])].head(4))
@@ -3578,8 +3298,8 @@ class ScreeningStatistics:
             data = data.replace([np.inf, -np.inf], 0)
             tops = data[data.tops > 0]
             # bots = data[data.bots > 0]
-            highestTop = round(tops.describe()["High"]["max"], 1)
-            allTimeHigh = max(data["High"])
+            highestTop = round(tops["High"].max(), 1)
+            allTimeHigh = data["High"].max()
             withinATHRange = data["Close"].iloc[0] >= (allTimeHigh-allTimeHigh * float(self.configManager.vcpRangePercentageFromTop)/100)
             if not withinATHRange and self.configManager.enableAdditionalVCPFilters:
                 # Last close is not within all time high range
@@ -3589,14 +3309,14 @@ class ScreeningStatistics:
             ]
             if filteredTops.equals(tops):  # Tops are in the range
                 lowPoints = []
+                dates = data["Date"].to_numpy()
+                lows = data["Low"].to_numpy()
+                topDates = tops["Date"].to_numpy()
                 for i in range(len(tops) - 1):
-                    endDate = tops.iloc[i]["Date"]
-                    startDate = tops.iloc[i + 1]["Date"]
-                    lowPoints.append(
-                        data[
-                            (data.Date >= startDate) & (data.Date <= endDate)
-                        ].describe()["Low"]["min"]
-                    )
+                    endDate = topDates[i]
+                    startDate = topDates[i + 1]
+                    lowsBetweenTops = lows[(dates >= startDate) & (dates <= endDate)]
+                    lowPoints.append(lowsBetweenTops.min() if len(lowsBetweenTops) > 0 else np.nan)
                 lowPointsOrg = lowPoints
                 lowPoints.sort(reverse=True)
                 lowPointsSorted = lowPoints
@@ -3608,19 +3328,11 @@ class ScreeningStatistics:
                     and ltp < highestTop
                     and ltp > lowPoints[0]
                 ):
-                    saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-                    isTightening, consolidations, deviationScore = self.validateConsolidationContraction(df=df.copy(),legsToCheck=(int(self.configManager.vcpLegsToCheckForConsolidation) if self.configManager.enableAdditionalVCPFilters else 0),stockName=stockName)
+                    isTightening, consolidations, deviationScore = self.validateConsolidationContraction(df=df,legsToCheck=(int(self.configManager.vcpLegsToCheckForConsolidation) if self.configManager.enableAdditionalVCPFilters else 0),stockName=stockName)
                     consolidations = [f"{str(x)}%" for x in consolidations]
                     if isTightening:
-                        screenDict["Pattern"] = (
-                            saved[0] 
-                            + colorText.GREEN
-                            + f"VCP (BO: {highestTop}, Cons.:{','.join(consolidations)})"
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + f"VCP (BO: {highestTop}, Cons.:{','.join(consolidations)})"
-                        screenDict["deviationScore"] = deviationScore
-                        saveDict["deviationScore"] = deviationScore
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", f"VCP (BO: {highestTop}, Cons.:{','.join(consolidations)})", PKSignal.BULLISH)
+                        PKResultRecord.setField(screenDict, saveDict, "deviationScore", deviationScore)
                         return True
                     return False
         except Exception as e:  # pragma: no cover
@@ -3686,14 +3398,7 @@ class ScreeningStatistics:
                 recentVolumeHasAboveAvgVol and \
                 recent_close > 10
         if isVCP:
-            saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
-            screenDict["Pattern"] = (
-                saved[0] 
-                + colorText.GREEN
-                + f"VCP(Minervini)"
-                + colorText.END
-            )
-            saveDict["Pattern"] = saved[1] + f"VCP(Minervini)"
+            PKResultRecord.appendField(screenDict, saveDict, "Pattern", "VCP(Minervini)", PKSignal.BULLISH)
         return isVCP
 
     # Validate if volume of last day is higher than avg
@@ -3702,9 +3407,7 @@ class ScreeningStatistics:
     ):
         if df is None or len(df) == 0:
             return False, False
-        data = df.copy()
-        data = data.fillna(0)
-        data = data.replace([np.inf, -np.inf], 0)
+        data = self.sanitisedData(df)
         recent = data.head(1)
         # Either the rolling volume of past 20 sessions or today's volume should be > min volume
         hasMinimumVolume = (
@@ -3712,15 +3415,12 @@ class ScreeningStatistics:
             or recent["Volume"].iloc[0] >= minVolume
         )
         if recent["VolMA"].iloc[0] == 0:  # Handles Divide by 0 warning
-            saveDict["Volume"] = 0  # "Unknown"
-            screenDict["Volume"] = 0
+            PKResultRecord.setField(screenDict, saveDict, "Volume", 0)  # "Unknown"
             return False, hasMinimumVolume
         ratio = round(recent["Volume"].iloc[0] / recent["VolMA"].iloc[0], 2)
-        saveDict["Volume"] = ratio
+        PKResultRecord.setField(screenDict, saveDict, "Volume", ratio)
         if ratio >= volumeRatio and ratio != np.nan and (not math.isinf(ratio)):
-            screenDict["Volume"] = ratio
             return True, hasMinimumVolume
-        screenDict["Volume"] = ratio
         return False, hasMinimumVolume
 
     # Find if stock is validating volume spread analysis
@@ -3744,7 +3444,6 @@ class ScreeningStatistics:
                     )
                     vol1 = data.iloc[1]["Volume"]
                     vol0 = data.iloc[0]["Volume"]
-                    saved = self.findCurrentSavedValue(screenDict, saveDict, "Pattern")
                     if (
                         spread0 > spread1
                         and vol0 < vol1
@@ -3753,13 +3452,7 @@ class ScreeningStatistics:
                         and spread0 < lower_wick_spread0
                         and data.iloc[0]["Volume"] <= int(data.iloc[1]["Volume"] * 0.75)
                     ):
-                        screenDict["Pattern"] = (
-                            saved[0] 
-                            + colorText.GREEN
-                            + "Supply Drought"
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Supply Drought"
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Supply Drought", PKSignal.BULLISH)
                         return True
                     if (
                         spread0 < spread1
@@ -3767,13 +3460,7 @@ class ScreeningStatistics:
                         and data.iloc[0]["Volume"] > data.iloc[0]["VolMA"]
                         and data.iloc[0]["Close"] <= data.iloc[1]["Open"]
                     ):
-                        screenDict["Pattern"] = (
-                            saved[0] 
-                            + colorText.GREEN
-                            + "Demand Rise"
-                            + colorText.END
-                        )
-                        saveDict["Pattern"] = saved[1] + "Demand Rise"
+                        PKResultRecord.appendField(screenDict, saveDict, "Pattern", "Demand Rise", PKSignal.BULLISH)
                         return True
             except IndexError as e: # pragma: no cover
                 # self.default_logger.debug(e, exc_info=True)
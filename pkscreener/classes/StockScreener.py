@@ -27,6 +27,7 @@ import logging
 import sys
 import time
 import warnings
+from contextlib import nullcontext
 
 import numpy as np
 
@@ -34,6 +35,7 @@ warnings.simplefilter("ignore", DeprecationWarning)
 warnings.simplefilter("ignore", FutureWarning)
 import pandas as pd
 # from PKDevTools.classes.log import tracelog
+from PKDevTools.classes.log import default_logger
 # from PKDevTools.classes.PKTimer import PKTimer
 from PKDevTools.classes import Archiver
 from PKDevTools.classes.ColorText import colorText
@@ -44,12 +46,75 @@ from PKDevTools.classes.PKDateUtilities import PKDateUtilities
 import pkscreener.classes.ScreeningStatistics as ScreeningStatistics
 from pkscreener import Imports
 from pkscreener.classes.CandlePatterns import CandlePatterns
+from pkscreener.classes.PKBacktestHistory import PKBacktestHistory
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+from pkscreener.classes.PKPredicatePlanner import PKPredicatePlanner
+from pkscreener.classes.PKResultRecord import PKResultRecord, PKSignal
+from pkscreener.classes.PKUnmatchedResult import PKUnmatchedResult
+from pkscreener.classes.PKScreeningContext import PKScreeningContext
 from PKDevTools.classes.OutputControls import OutputControls
 
 class StockScreener:
+    # Intraday candles of this (worker) process at their finest interval
+    intradayStore = PKIntradayStore()
+
     def __init__(self):
         self.isTradingTime = PKDateUtilities.isTradingTime()
         self.configManager = None
+        self.backtestHistory = None
+
+    def screenStocksWithinLimits(self, *args, **kwargs):
+        # The worker tuner may let fewer workers screen at a time than were started
+        hostRef = kwargs.get("hostRef", args[-1] if len(args) > 0 else None)
+        activeWorkersLimit = getattr(hostRef, "activeWorkersLimit", None)
+        # The scan scheduler orders the next scans by how long each stock took
+        scanTimings = getattr(hostRef, "scanTimings", None)
+        if activeWorkersLimit is None:
+            return self.screenStocksTimed(scanTimings, *args, **kwargs)
+        with activeWorkersLimit:
+            return self.screenStocksTimed(scanTimings, *args, **kwargs)
+
+    def screenStocksTimed(self, scanTimings, *args, **kwargs):
+        if scanTimings is None:
+            try:
+                return self.screenStocksOverHistory(*args, **kwargs)
+            finally:
+                PKPredicatePlanner().popObservations()
+        startTime = time.perf_counter()
+        try:
+            return self.screenStocksOverHistory(*args, **kwargs)
+        finally:
+            try:
+                stock = kwargs.get("stock", args[12] if len(args) > 12 else None)
+                # Along with how long each of the eligibility checks took
+                scanTimings.put((stock, time.perf_counter() - startTime, PKPredicatePlanner().popObservations()))
+            except Exception as e: # pragma: no cover
+                default_logger().debug(e, exc_info=True)
+
+    def screenStocksOverHistory(self, *args, **kwargs):
+        """
+        Multi-day backtests pass all the backtest dates (backtestDuration)
+        of a stock at once. The stock then gets loaded and pre-processed only
+        once and screened as it was on each of those dates, giving one result
+        (or None) per date. Everything else is screened as usual.
+        """
+        backtestDurations = kwargs.get("backtestDuration", args[18] if len(args) > 18 else 0)
+        if not isinstance(backtestDurations, (list, tuple)):
+            return self.screenStocks(*args, **kwargs)
+        args = list(args)
+        stock = kwargs.get("stock", args[12] if len(args) > 12 else None)
+        results = []
+        self.backtestHistory = PKBacktestHistory(stock, None)
+        try:
+            for backtestDuration in backtestDurations:
+                if "backtestDuration" in kwargs.keys():
+                    kwargs["backtestDuration"] = backtestDuration
+                else:
+                    args[18] = backtestDuration
+                results.append(self.screenStocks(*args, **kwargs))
+        finally:
+            self.backtestHistory = None
+        return results
 
     # @tracelog
     def screenStocks(
@@ -93,7 +158,8 @@ class StockScreener:
         printCounter = userArgs.log if (userArgs is not None and userArgs.log is not None) else False
         userArgsLog = printCounter
         start_time = time.time()
-        self.isTradingTime = False if menuOption in "B" else self.isTradingTime
+        # Long-lived workers keep screening across the market open and close
+        self.isTradingTime = False if menuOption in "B" else PKDateUtilities.isTradingTime()
         try:
             with hostRef.processingCounter.get_lock():
                 hostRef.processingCounter.value += 1
@@ -103,7 +169,14 @@ class StockScreener:
             #     hostRef.default_logger.info(f"For stock:{stock}, stock exists in objectDictionary:{hostRef.objectDictionaryPrimary.get(stock)}, cacheEnabled:{configManager.cacheEnabled}, isTradingTime:{self.isTradingTime}, downloadOnly:{downloadOnly}")
             data = None
             intraday_data = None
-            data = self.getRelevantDataForStock(totalSymbols, shouldCache, stock, downloadOnly, printCounter, backtestDuration, hostRef,hostRef.objectDictionaryPrimary, configManager, fetcher, period,None, testData,exchangeName)
+            history = self.backtestHistory
+            if history is not None and history.stock == stock and history.data is not None:
+                # Already loaded for one of the other backtest dates
+                data = history.data
+            else:
+                data = self.getRelevantDataForStock(totalSymbols, shouldCache, stock, downloadOnly, printCounter, backtestDuration, hostRef,hostRef.objectDictionaryPrimary, configManager, fetcher, period,None, testData,exchangeName)
+                if history is not None and history.stock == stock and data is not None:
+                    history.load(data)
             if str(executeOption) in ["32","38"] or (not configManager.isIntradayConfig() and configManager.calculatersiintraday):
                 # Daily data is already available in "data" above.
                 # We need the intraday data for 1-d RSI values when config is not for intraday
@@ -114,12 +187,17 @@ class StockScreener:
                     raise StockDataEmptyException(f"Data length:{len(data)}")
             else:
                 raise StockDataEmptyException(f"Data is None: {data}")
+            if history is not None and history.owns(data) and backtestDuration > 0:
+                # The LTP check comes first in backtests and has been evaluated for all the dates at once
+                if history.ltpWithinRange(screener, backtestDuration, configManager.daysToLookback,
+                                          configManager.minLTP if exchangeName == "INDIA" else configManager.minLTP/80,
+                                          configManager.maxLTP, configManager.minimumChangePercentage) is False:
+                    raise ScreeningStatistics.LTPNotInConfiguredRange
             
             bidGreaterThanAsk = False
             bidAskRatio = 0
             if executeOption == 29:
-                hostRef.intradayNSEFetcher.symbol = stock.upper()
-                priceData = hostRef.intradayNSEFetcher.price_order_info()
+                priceData = hostRef.orderInfo.orderInfo(stock)
                 if priceData is not None:
                     try:
                         totalBid = priceData["BidQty"].iloc[0]
@@ -169,14 +247,14 @@ class StockScreener:
                         bidGreaterThanAsk = True
                         bidAskRatio = round(totalBid/totalAsk,1) if totalAsk > 0 else (0 if not bidAskSimulate else 3)
                         bidAskBuildupDict = {"BidQty":totalBid,"AskQty":totalAsk,"LwrCP":lwrCP,"UprCP":uprCP,"VWAP":vwap,"DayVola":dayVola,"Del(%)":delPercent}
-                        screeningDictionary.update(bidAskBuildupDict)
-                        saveDictionary.update(bidAskBuildupDict)
+                        for field, value in bidAskBuildupDict.items():
+                            PKResultRecord.setField(screeningDictionary, saveDictionary, field, value)
                     else:
                         raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
                 else:
                     raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
             # hostRef.default_logger.info(f"Will pre-process data:\n{data.tail(10)}")
-            fullData, processedData, data = self.getCleanedDataForDuration(backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data)
+            fullData, processedData, data = self.getCleanedDataForDuration(backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data, stock=stock)
             if "RUNNER" not in os.environ.keys() and backtestDuration == 0 and configManager.calculatersiintraday:
                 if (intraday_data is not None and not intraday_data.empty):
                     intraday_fullData, intraday_processedData = screener.preprocessData(
@@ -200,6 +278,11 @@ class StockScreener:
                     with SuppressOutput(suppress_stderr=(logLevel==logging.NOTSET), suppress_stdout=(not (printCounter or testbuild))):
                         processedData.insert(len(processedData.columns), "RSIi", np.array(np.nan))
                         fullData.insert(len(fullData.columns), "RSIi", np.array(np.nan))
+            # The validators share the sanitised candles instead of copying them
+            # Checking that nobody changes them costs a hash of the candles on each access,
+            # so that's only done when asked for.
+            verifyReadOnly = os.environ.get("PKSCREENER_VERIFY_READONLY", "").lower() in ("yes", "y", "on", "true", "1")
+            screener.screeningContext = PKScreeningContext(fullData, processedData, verifyReadOnly=verifyReadOnly)
 
             def returnLegibleData(exceptionMessage=None):
                 if backtestDuration == 0 or menuOption not in ["B"]:
@@ -218,13 +301,13 @@ class StockScreener:
                     screener.find52WeekHighLow(
                             fullData, saveDictionary, screeningDictionary
                         )
-                    return (
+                    return PKUnmatchedResult((
                             screeningDictionary,
                             saveDictionary,
                             data,
                             stock,
                             backtestDuration,
-                        )
+                        ))
             if newlyListedOnly:
                 if not screener.validateNewlyListed(fullData, period):
                     raise ScreeningStatistics.NotNewlyListed
@@ -236,11 +319,6 @@ class StockScreener:
             with SuppressOutput(suppress_stderr=suppressError, suppress_stdout=suppressOut):
                 self.updateStock(stock, screeningDictionary, saveDictionary, executeOption, exchangeName,userArgs)
                 
-                self.performBasicLTPChecks(executeOption, screeningDictionary, saveDictionary, fullData, configManager, screener, exchangeName)
-                hasMinVolumeRatio = self.performBasicVolumeChecks(executeOption, volumeRatio, screeningDictionary, saveDictionary, processedData, configManager, screener)
-                if bidGreaterThanAsk:
-                    if not hasMinVolumeRatio or bidAskRatio < 2:
-                        raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
                 isConfluence = False
                 isInsideBar = 0
                 isMaReversal = 0
@@ -268,171 +346,193 @@ class StockScreener:
                 hasBbandsSqz = False
                 hasMASignalFilter = False
                 priceCrossed = False
-
-                isValidityCheckMet = self.performValidityCheckForExecuteOptions(executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,maLength,intraday_data)
-                if not isValidityCheckMet:
-                    return returnLegibleData("Validity Check not met!")
+                hasMinVolumeRatio = False
+                isValidityCheckMet = True
+                # The independent eligibility checks go cheapest and most selective first.
+                # In backtests, the stocks that fail them still get returned, so the
+                # order there must stay the same.
+                planChecks = backtestDuration == 0 or menuOption not in ["B"]
+                planner = PKPredicatePlanner()
+                scanKey = f"{executeOption}:{reversalOption}:{respChartPattern}"
+                checks = ["ltp", "volume", "validity", "option"]
+                if planChecks:
+                    # Breakouts need the volume ratio and the price rise overwrites %Chng
+                    checks = planner.plan(scanKey, checks, dependencies={"option": (["volume"] if executeOption in [1,2] else (["ltp"] if executeOption == 10 else []))})
+                for check in checks:
+                    with (planner.measure(scanKey, check) if planChecks else nullcontext()):
+                        if check == "ltp":
+                            self.performBasicLTPChecks(executeOption, screeningDictionary, saveDictionary, fullData, configManager, screener, exchangeName)
+                        elif check == "volume":
+                            hasMinVolumeRatio = self.performBasicVolumeChecks(executeOption, volumeRatio, screeningDictionary, saveDictionary, processedData, configManager, screener)
+                            if bidGreaterThanAsk:
+                                if not hasMinVolumeRatio or bidAskRatio < 2:
+                                    raise ScreeningStatistics.EligibilityConditionNotMet("Bid/Ask Eligibility Not met.")
+                        elif check == "validity":
+                            isValidityCheckMet = self.performValidityCheckForExecuteOptions(executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,maLength,intraday_data)
+                            if not isValidityCheckMet:
+                                return returnLegibleData("Validity Check not met!")
+                        elif check == "option":
+                            if newlyListedOnly:
+                                isIpoBase = screener.validateIpoBase(
+                                    stock, fullData, screeningDictionary, saveDictionary
+                                )
+                            if executeOption in [1,2]:
+                                isBreaking = screener.findBreakoutValue(
+                                    processedData,
+                                    screeningDictionary,
+                                    saveDictionary,
+                                    daysToLookback=configManager.daysToLookback,
+                                    alreadyBrokenout=(executeOption == 2),
+                                )
+                                if executeOption == 1:
+                                    isPotentialBreaking = screener.findPotentialBreakout(
+                                        fullData,
+                                        screeningDictionary,
+                                        saveDictionary,
+                                        daysToLookback=configManager.daysToLookback,
+                                    )
+                                    if not (isBreaking or isPotentialBreaking) or not hasMinVolumeRatio:
+                                        return returnLegibleData(f"isBreaking:{isBreaking},isPotentialBreaking:{isPotentialBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
+                                elif executeOption == 2:
+                                    if not (isBreaking) or not hasMinVolumeRatio:
+                                        return returnLegibleData(f"isBreaking:{isBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
+                            elif executeOption == 3:
+                                consolidationValue = screener.validateConsolidation(
+                                    processedData,
+                                    screeningDictionary,
+                                    saveDictionary,
+                                    percentage=configManager.consolidationPercentage,
+                                )
+                                if ((consolidationValue == 0 or consolidationValue > configManager.consolidationPercentage)):
+                                    return returnLegibleData(f"consolidationValue:{consolidationValue}")
+                            elif executeOption == 4:
+                                isLowestVolume = screener.validateLowestVolume(
+                                    processedData, daysForLowestVolume
+                                )
+                                if not isLowestVolume:
+                                    return returnLegibleData(f"isLowestVolume:{isLowestVolume}")
+                            elif executeOption == 5:
+                                isValidRsi = screener.validateRSI(
+                                    processedData, screeningDictionary, saveDictionary, minRSI, maxRSI
+                                )
+                                if not isValidRsi:
+                                    return returnLegibleData(f"isValidRsi:{isValidRsi}")
+                            elif executeOption == 6:
+                                if reversalOption == 10:
+                                    hasRSIMAReversal = screener.findRSICrossingMA(processedData,
+                                                                                  screeningDictionary,
+                                                                                  saveDictionary,
+                                                                                  lookFor=maLength) # 1 =Buy, 2 =Sell, 3 = Any
+                                    if not hasRSIMAReversal:
+                                        return returnLegibleData(f"hasRSIMAReversal:{hasRSIMAReversal}")
+                                elif reversalOption == 9:
+                                    hasRisingRSIReversal = screener.findRisingRSI(processedData)
+                                    if not hasRisingRSIReversal:
+                                        return returnLegibleData(f"hasRisingRSIReversal:{hasRisingRSIReversal}")
+                                elif reversalOption == 8:
+                                    hasPsarRSIReversal = screener.findPSARReversalWithRSI(
+                                        processedData,
+                                        screeningDictionary,
+                                        saveDictionary
+                                        # minRSI=maLength if maLength is not None else 40,
+                                    )
+                                    if not hasPsarRSIReversal:
+                                        return returnLegibleData(f"hasPsarRSIReversal:{hasPsarRSIReversal}")
+                                elif reversalOption == 6:
+                                    isNR = screener.validateNarrowRange(
+                                        processedData,
+                                        screeningDictionary,
+                                        saveDictionary,
+                                        nr=maLength if maLength is not None else 4,
+                                    )
+                                    if not isNR:
+                                        return returnLegibleData(f"isNR:{isNR}")
+                                elif reversalOption == 5:
+                                    isVSA = screener.validateVolumeSpreadAnalysis(
+                                        processedData, screeningDictionary, saveDictionary
+                                    )
+                                    if not isVSA:
+                                        return returnLegibleData(f"isVSA:{isVSA}")
+                                elif reversalOption == 4 and maLength is not None:
+                                    isMaSupport = screener.findReversalMA(
+                                        fullData, screeningDictionary, saveDictionary, maLength
+                                    )
+                                    if not isMaSupport:
+                                        return returnLegibleData(f"isMaSupport:{isMaSupport}")
+                                elif reversalOption == 7:
+                                    if sys.version_info >= (3, 11):
+                                        isLorentzian = screener.validateLorentzian(
+                                            fullData,
+                                            screeningDictionary,
+                                            saveDictionary,
+                                            lookFor=maLength, # 1 =Buy, 2 =Sell, 3 = Any
+                                        )
+                                        if not isLorentzian:
+                                            return returnLegibleData(f"isLorentzian:{isLorentzian}")
+                            elif executeOption == 7:
+                                if respChartPattern == 3:
+                                    isConfluence = screener.validateConfluence(
+                                        stock,
+                                        processedData,
+                                        fullData,
+                                        screeningDictionary,
+                                        saveDictionary,
+                                        percentage=insideBarToLookback,
+                                        confFilter=(maLength if maLength > 0 else 3) # 1 = Conf up, 2 = Conf Down, 3 = all, 4 super confluence (10>20>55 EMA > 200SMA)
+                                    )
+                                    if not isConfluence:
+                                        return returnLegibleData(f"isConfluence:{isConfluence}")
+                                elif respChartPattern == 4:
+                                    isVCP = screener.validateVCP(
+                                        fullData, screeningDictionary, saveDictionary,stockName=stock
+                                    )
+                                    if not isVCP:
+                                        return returnLegibleData(f"isVCP:{isVCP}")
+                                    else:
+                                        if hostRef.rs_strange_index > 0:
+                                            screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary,stockName=stock)
+                                        screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
+                                elif respChartPattern == 5:
+                                    if Imports["scipy"]:
+                                        isBuyingTrendline = screener.findTrendlines(
+                                            fullData, screeningDictionary, saveDictionary
+                                        )
+                                        if not isBuyingTrendline:
+                                            return returnLegibleData(f"isBuyingTrendline:{isBuyingTrendline}")
+                                elif respChartPattern == 6:
+                                    hasBbandsSqz = screener.findBbandsSqueeze(fullData, screeningDictionary, saveDictionary, filter=(maLength if maLength > 0 else 4), stockName=stock)
+                                    if not hasBbandsSqz:
+                                        return returnLegibleData(f"hasBbandsSqz:{hasBbandsSqz}")
+                                elif respChartPattern == 7:
+                                    isCandlePattern = candlePatterns.findPattern(
+                                    processedData, screeningDictionary, saveDictionary)
+                                    if not isCandlePattern:
+                                        return returnLegibleData(f"isCandlePattern:{isCandlePattern}")
+                                elif respChartPattern == 8:
+                                    isMinerviniVCP = screener.validateVCPMarkMinervini(
+                                        fullData, screeningDictionary, saveDictionary
+                                    )
+                                    if not isMinerviniVCP:
+                                        return returnLegibleData(f"isMinerviniVCP:{isMinerviniVCP}")
+                                    else:
+                                        if hostRef.rs_strange_index > 0:
+                                            screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary,stockName=stock)
+                                        screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
+                                elif respChartPattern == 9:
+                                    hasMASignalFilter = screener.validateMovingAverages(
+                                        fullData, screeningDictionary, saveDictionary,maRange=1.25,maLength=maLength
+                                    )
+                                    if not hasMASignalFilter:
+                                        return returnLegibleData(f"hasMASignalFilter:{hasMASignalFilter}")
+                            elif executeOption == 10:
+                                isPriceRisingByAtLeast2Percent = (
+                                    screener.validatePriceRisingByAtLeast2Percent(
+                                        processedData, screeningDictionary, saveDictionary
+                                    )
+                                )
+                                if not isPriceRisingByAtLeast2Percent:
+                                    return returnLegibleData(f"isPriceRisingByAtLeast2Percent:{isPriceRisingByAtLeast2Percent}")
                 isShortTermBullish = (executeOption == 11 and isValidityCheckMet)
-                if newlyListedOnly:
-                    isIpoBase = screener.validateIpoBase(
-                        stock, fullData, screeningDictionary, saveDictionary
-                    )
-                if executeOption in [1,2]:
-                    isBreaking = screener.findBreakoutValue(
-                        processedData,
-                        screeningDictionary,
-                        saveDictionary,
-                        daysToLookback=configManager.daysToLookback,
-                        alreadyBrokenout=(executeOption == 2),
-                    )
-                    if executeOption == 1:
-                        isPotentialBreaking = screener.findPotentialBreakout(
-                            fullData,
-                            screeningDictionary,
-                            saveDictionary,
-                            daysToLookback=configManager.daysToLookback,
-                        )
-                        if not (isBreaking or isPotentialBreaking) or not hasMinVolumeRatio:
-                            return returnLegibleData(f"isBreaking:{isBreaking},isPotentialBreaking:{isPotentialBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
-                    elif executeOption == 2:
-                        if not (isBreaking) or not hasMinVolumeRatio:
-                            return returnLegibleData(f"isBreaking:{isBreaking},hasMinVolumeRatio:{hasMinVolumeRatio}")
-                elif executeOption == 3:
-                    consolidationValue = screener.validateConsolidation(
-                        processedData,
-                        screeningDictionary,
-                        saveDictionary,
-                        percentage=configManager.consolidationPercentage,
-                    )
-                    if ((consolidationValue == 0 or consolidationValue > configManager.consolidationPercentage)):
-                        return returnLegibleData(f"consolidationValue:{consolidationValue}")
-                elif executeOption == 4:
-                    isLowestVolume = screener.validateLowestVolume(
-                        processedData, daysForLowestVolume
-                    )
-                    if not isLowestVolume:
-                        return returnLegibleData(f"isLowestVolume:{isLowestVolume}")
-                elif executeOption == 5:
-                    isValidRsi = screener.validateRSI(
-                        processedData, screeningDictionary, saveDictionary, minRSI, maxRSI
-                    )
-                    if not isValidRsi:
-                        return returnLegibleData(f"isValidRsi:{isValidRsi}")
-                elif executeOption == 6:
-                    if reversalOption == 10:
-                        hasRSIMAReversal = screener.findRSICrossingMA(processedData,
-                                                                      screeningDictionary,
-                                                                      saveDictionary,
-                                                                      lookFor=maLength) # 1 =Buy, 2 =Sell, 3 = Any
-                        if not hasRSIMAReversal:
-                            return returnLegibleData(f"hasRSIMAReversal:{hasRSIMAReversal}")
-                    elif reversalOption == 9:
-                        hasRisingRSIReversal = screener.findRisingRSI(processedData)
-                        if not hasRisingRSIReversal:
-                            return returnLegibleData(f"hasRisingRSIReversal:{hasRisingRSIReversal}")
-                    elif reversalOption == 8:
-                        hasPsarRSIReversal = screener.findPSARReversalWithRSI(
-                            processedData,
-                            screeningDictionary,
-                            saveDictionary
-                            # minRSI=maLength if maLength is not None else 40,
-                        )
-                        if not hasPsarRSIReversal:
-                            return returnLegibleData(f"hasPsarRSIReversal:{hasPsarRSIReversal}")
-                    elif reversalOption == 6:
-                        isNR = screener.validateNarrowRange(
-                            processedData,
-                            screeningDictionary,
-                            saveDictionary,
-                            nr=maLength if maLength is not None else 4,
-                        )
-                        if not isNR:
-                            return returnLegibleData(f"isNR:{isNR}")
-                    elif reversalOption == 5:
-                        isVSA = screener.validateVolumeSpreadAnalysis(
-                            processedData, screeningDictionary, saveDictionary
-                        )
-                        if not isVSA:
-                            return returnLegibleData(f"isVSA:{isVSA}")
-                    elif reversalOption == 4 and maLength is not None:
-                        isMaSupport = screener.findReversalMA(
-                            fullData, screeningDictionary, saveDictionary, maLength
-                        )
-                        if not isMaSupport:
-                            return returnLegibleData(f"isMaSupport:{isMaSupport}")
-                    elif reversalOption == 7:
-                        if sys.version_info >= (3, 11):
-                            isLorentzian = screener.validateLorentzian(
-                                fullData,
-                                screeningDictionary,
-                                saveDictionary,
-                                lookFor=maLength, # 1 =Buy, 2 =Sell, 3 = Any
-                            )
-                            if not isLorentzian:
-                                return returnLegibleData(f"isLorentzian:{isLorentzian}")
-                elif executeOption == 7:
-                    if respChartPattern == 3:
-                        isConfluence = screener.validateConfluence(
-                            stock,
-                            processedData,
-                            fullData,
-                            screeningDictionary,
-                            saveDictionary,
-                            percentage=insideBarToLookback,
-                            confFilter=(maLength if maLength > 0 else 3) # 1 = Conf up, 2 = Conf Down, 3 = all, 4 super confluence (10>20>55 EMA > 200SMA)
-                        )
-                        if not isConfluence:
-                            return returnLegibleData(f"isConfluence:{isConfluence}")
-                    elif respChartPattern == 4:
-                        isVCP = screener.validateVCP(
-                            fullData, screeningDictionary, saveDictionary,stockName=stock
-                        )
-                        if not isVCP:
-                            return returnLegibleData(f"isVCP:{isVCP}")
-                        else:
-                            if hostRef.rs_strange_index > 0:
-                                screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                            screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                    elif respChartPattern == 5:
-                        if Imports["scipy"]:
-                            isBuyingTrendline = screener.findTrendlines(
-                                fullData, screeningDictionary, saveDictionary
-                            )
-                            if not isBuyingTrendline:
-                                return returnLegibleData(f"isBuyingTrendline:{isBuyingTrendline}")
-                    elif respChartPattern == 6:
-                        hasBbandsSqz = screener.findBbandsSqueeze(fullData, screeningDictionary, saveDictionary, filter=(maLength if maLength > 0 else 4))
-                        if not hasBbandsSqz:
-                            return returnLegibleData(f"hasBbandsSqz:{hasBbandsSqz}")
-                    elif respChartPattern == 7:
-                        isCandlePattern = candlePatterns.findPattern(
-                        processedData, screeningDictionary, saveDictionary)
-                        if not isCandlePattern:
-                            return returnLegibleData(f"isCandlePattern:{isCandlePattern}")
-                    elif respChartPattern == 8:
-                        isMinerviniVCP = screener.validateVCPMarkMinervini(
-                            fullData, screeningDictionary, saveDictionary
-                        )
-                        if not isMinerviniVCP:
-                            return returnLegibleData(f"isMinerviniVCP:{isMinerviniVCP}")
-                        else:
-                            if hostRef.rs_strange_index > 0:
-                                screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                            screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
-                    elif respChartPattern == 9:
-                        hasMASignalFilter = screener.validateMovingAverages(
-                            fullData, screeningDictionary, saveDictionary,maRange=1.25,maLength=maLength
-                        )
-                        if not hasMASignalFilter:
-                            return returnLegibleData(f"hasMASignalFilter:{hasMASignalFilter}")
-                elif executeOption == 10:
-                    isPriceRisingByAtLeast2Percent = (
-                        screener.validatePriceRisingByAtLeast2Percent(
-                            processedData, screeningDictionary, saveDictionary
-                        )
-                    )
-                    if not isPriceRisingByAtLeast2Percent:
-                        return returnLegibleData(f"isPriceRisingByAtLeast2Percent:{isPriceRisingByAtLeast2Percent}")
                 # Must-run, but only at the end
                 try:
                     if executeOption != 7 or (executeOption == 7 and respChartPattern != 7):
@@ -446,8 +546,7 @@ class StockScreener:
                         )
                 except Exception as e:  # pragma: no cover
                     hostRef.default_logger.debug(e, exc_info=True)
-                    screeningDictionary["Pattern"] = ""
-                    saveDictionary["Pattern"] = ""
+                    PKResultRecord.setField(screeningDictionary, saveDictionary, "Pattern", "")
 
                 try:
                     currentTrend = screener.findTrend(
@@ -475,8 +574,7 @@ class StockScreener:
                             hostRef.objectDictionaryPrimary[stock] = data.to_dict("split")
                 except np.RankWarning as e: # pragma: no cover 
                     hostRef.default_logger.debug(e, exc_info=True)
-                    screeningDictionary["Trend"] = "Unknown"
-                    saveDictionary["Trend"] = "Unknown"
+                    PKResultRecord.setField(screeningDictionary, saveDictionary, "Trend", "Unknown")
                 # CCI also uses "Trend" value from findTrend above.
                 # So it must only be called after findTrend
                 if executeOption == 8:
@@ -649,7 +747,7 @@ class StockScreener:
                         if userArgs is not None and userArgs.usertag is not None and "VCP" in userArgs.usertag:
                             if hostRef.rs_strange_index > 0:
                                 if f"RS_Rating{self.configManager.baseIndex}" not in saveDictionary.keys():
-                                    screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
+                                    screener.findRSRating(index_rs_value=hostRef.rs_strange_index,df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary,stockName=stock)
                             if "RVM" not in saveDictionary.keys():
                                 screener.findRVM(df=fullData,screenDict=screeningDictionary, saveDict=saveDictionary)
                         hostRef.processingResultsCounter.value += 1
@@ -730,6 +828,15 @@ class StockScreener:
                     )
                     + colorText.END
                 )
+        finally:
+            screeningContext = screener.screeningContext
+            screener.screeningContext = None
+            if isinstance(screeningContext, PKScreeningContext) and screeningContext.verifyReadOnly:
+                try:
+                    screeningContext.verifyUnchanged()
+                except AssertionError as e:
+                    # Must not replace what's being returned or raised already
+                    default_logger().debug(e, exc_info=True)
         return None
 
     def performValidityCheckForExecuteOptions(self,executeOption,screener,fullData,screeningDictionary,saveDictionary,processedData,configManager,subMenuOption=3,intraday_data=None):
@@ -831,14 +938,13 @@ class StockScreener:
 
     def updateStock(self, stock, screeningDictionary, saveDictionary, executeOption=0,exchangeName='INDIA',userArgs=None):
         doNotAnchorText = executeOption == 26 or (userArgs is not None and userArgs.systemlaunched)
-        screeningDictionary["Stock"] = (
-                    colorText.WHITE
-                    + (f"\x1B]8;;https://in.tradingview.com/chart?symbol={'NSE' if exchangeName=='INDIA' else 'NASDAQ'}%3A{stock}\x1B\\{stock}\x1B]8;;\x1B\\")
-                    + colorText.END
-                ) if not doNotAnchorText else stock
-        saveDictionary["Stock"] = stock
+        if doNotAnchorText:
+            PKResultRecord.setField(screeningDictionary, saveDictionary, "Stock", stock)
+        else:
+            PKResultRecord.setField(screeningDictionary, saveDictionary, "Stock", stock, PKSignal.HIGHLIGHT,
+                                    link=f"https://in.tradingview.com/chart?symbol={'NSE' if exchangeName=='INDIA' else 'NASDAQ'}%3A{stock}")
 
-    def getCleanedDataForDuration(self, backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data):
+    def getCleanedDataForDuration(self, backtestDuration, portfolio, screeningDictionary, saveDictionary, configManager, screener, data, stock=None):
         fullData = None
         processedData = None
         ohlc_dict = {
@@ -852,13 +958,23 @@ class StockScreener:
         candleDuration = self.configManager.candleDurationInt
         candleDurationFrequency = self.configManager.candleDurationFrequency
         durationFrequency = "T" if candleDurationFrequency=="m" else ("H" if candleDurationFrequency=="h" else ("M" if candleDurationFrequency=="mo" else ("W" if candleDurationFrequency=="wk" else "T")))
-        if int(candleDuration) >= 1 and (candleDurationFrequency in ["m","h","mo","wk"]):
+        if int(candleDuration) >= 1 and candleDurationFrequency in ["m","h"] and stock is not None:
+            # Only the candles added since the last scan of the stock get resampled
+            data = StockScreener.intradayStore.resampled(stock, data, f"{candleDuration}{candleDurationFrequency}")
+        elif int(candleDuration) >= 1 and (candleDurationFrequency in ["m","h","mo","wk"]):
             data = data.resample(f'{candleDuration}{durationFrequency}', offset='15min').agg(ohlc_dict)
             data = data[data["High"]>0] # resampling can introduce 0 value rows for non-market hours
+        history = self.backtestHistory
+        if history is not None and not history.owns(data):
+            # Resampled
+            history = None
         if backtestDuration == 0:
-            fullData, processedData = screener.preprocessData(
-                    data, daysToLookback=configManager.effectiveDaysToLookback
-                )
+            if history is not None:
+                fullData, processedData = history.cleanedData(screener, 0, configManager.effectiveDaysToLookback)
+            else:
+                fullData, processedData = screener.preprocessData(
+                        data, daysToLookback=configManager.effectiveDaysToLookback
+                    )
             if processedData.empty:
                 raise StockDataEmptyException(f"Empty processedData with data length ({len(data)})")
             if portfolio:
@@ -885,9 +1001,12 @@ class StockScreener:
                             data, screeningDictionary, saveDictionary,requestedPeriod=backtestDuration
                         )
                     # data has the last row from inputData at the top.
-                fullData, processedData = screener.preprocessData(
-                        inputData, daysToLookback=configManager.daysToLookback
-                    )
+                if history is not None:
+                    fullData, processedData = history.cleanedData(screener, backtestDuration, configManager.daysToLookback)
+                else:
+                    fullData, processedData = screener.preprocessData(
+                            inputData, daysToLookback=configManager.daysToLookback
+                        )
                 
         return fullData,processedData,data
 
@@ -911,22 +1030,32 @@ class StockScreener:
                 or (hostData is None and self.isTradingTime)
                 or hostData is None or hostDataLength == 0
             ):
+            requestedDuration = configManager.duration if duration is None else duration
+            intradayStore = StockScreener.intradayStore
+            storeKey = f"{stock}:{period}:{lastTradingDate}"
+            isIntraday = str(requestedDuration)[-1:] in ["m","h"] and PKIntradayStore.intervalTimedelta(requestedDuration) is not None
             if testData is not None:
                 data = testData
             else:
-                data = fetcher.fetchStockData(
-                        stock,
-                        period,
-                        configManager.duration if duration is None else duration,
-                        hostRef.proxyServer,
-                        hostRef.processingResultsCounter,
-                        hostRef.processingCounter,
-                        totalSymbols,
-                        start=start,
-                        end=start,
-                        exchangeSuffix=".NS" if exchangeName == "INDIA" else "",
-                        printCounter=printCounter
-                    )
+                if isIntraday and backtestDuration == 0 and intradayStore.canServe(storeKey, requestedDuration, maxAgeSeconds=intradayStore.maxAge(self.isTradingTime)):
+                    # Resampled from the finer candles we fetched earlier instead of another download
+                    data = intradayStore.view(storeKey, requestedDuration).copy()
+                else:
+                    data = fetcher.fetchStockData(
+                            stock,
+                            period,
+                            requestedDuration,
+                            hostRef.proxyServer,
+                            hostRef.processingResultsCounter,
+                            hostRef.processingCounter,
+                            totalSymbols,
+                            start=start,
+                            end=start,
+                            exchangeSuffix=".NS" if exchangeName == "INDIA" else "",
+                            printCounter=printCounter
+                        )
+                    if isIntraday and backtestDuration == 0 and data is not None and len(data) > 0 and isinstance(data.index, pd.DatetimeIndex) and "High" in data.columns:
+                        intradayStore.update(storeKey, data, interval=requestedDuration)
                 if hostData is not None and data is not None:
                     # During the market trading hours, we don't want to go for MFI/FV value fetching
                     # So let's copy the old saved ones.
@@ -1051,43 +1180,7 @@ class StockScreener:
 
     def initResultDictionaries(self):
         periods = self.configManager.periodsRange
-        columns = [
-            "Stock",
-            "LTP",
-            "%Chng",
-            "52Wk-H",
-            "52Wk-L",
-            "RSI",
-            "RSIi",
-            "Volume",
-            "22-Pd",
-            "Consol.",
-            "Breakout",
-            "MA-Signal",
-            "Trend",
-            "Pattern",
-            "CCI",
-            "FairValue"
-        ]
-        screeningDictionary = {
-            "Stock": "",
-            "LTP": 0,
-            "%Chng": 0,
-            "52Wk-H": 0,
-            "52Wk-L": 0,
-            "RSI": 0,
-            "RSIi": 0,
-            "Volume": "",
-            "22-Pd": "",
-            "Consol.": "Range:0%",
-            "Breakout": "BO: 0 R: 0",
-            "MA-Signal": "",
-            "Trend": "",
-            "Pattern": "",
-            "CCI": 0,
-            "FairValue": "-"
-        }
-        saveDictionary = {
+        defaultResults = {
             "Stock": "",
             "LTP": 0,
             "%Chng": 0,
@@ -1106,13 +1199,9 @@ class StockScreener:
             "FairValue": "-"
         }
         for prd in periods:
-            columns.append(f"LTP{prd}")
-            columns.append(f"Growth{prd}")
-            screeningDictionary[f"LTP{prd}"] = np.nan
-            saveDictionary[f"LTP{prd}"] = np.nan
-            screeningDictionary[f"Growth{prd}"] = np.nan
-            saveDictionary[f"Growth{prd}"] = np.nan
-
-        screenResults = pd.DataFrame(columns=columns)
-
-        return screeningDictionary, saveDictionary
+            defaultResults[f"LTP{prd}"] = np.nan
+            defaultResults[f"Growth{prd}"] = np.nan
+        # One typed record holds the results. It gets coloured for the
+        # screen only when presented (see PKResultPresenter).
+        record = PKResultRecord(defaultResults)
+        return record, record
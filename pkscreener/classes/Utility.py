@@ -70,6 +70,10 @@ from pkscreener.classes import VERSION, Changelog
 from pkscreener.classes.MenuOptions import menus
 from PKNSETools.PKNSEStockDataFetcher import nseStockDataFetcher
 from pkscreener.classes.PKTask import PKTask
+from pkscreener.classes.PKTableRenderer import PKTableRenderer
+from pkscreener.classes.PKStockDataSync import PKStockDataSync
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+from pkscreener.classes.PKStockCachePreloader import PKStockCachePreloader
 from pkscreener.classes.MarketStatus import MarketStatus
 from pkscreener.classes.PKScheduler import PKScheduler
 from PKDevTools.classes.OutputControls import OutputControls
@@ -338,8 +342,8 @@ class tools:
         font_size = int(diagonal_to_use / (message_length / FONT_RATIO))
         font_size_vertical = int(height_to_use / (message_length / FONT_RATIO))
         fontPath = tools.setupReportFont()
-        font = ImageFont.truetype(fontPath, font_size)
-        font_vertical = ImageFont.truetype(fontPath, font_size_vertical)
+        font = PKTableRenderer().font(fontPath, font_size)
+        font_vertical = PKTableRenderer().font(fontPath, font_size_vertical)
         #font = ImageFont.load_default() # fallback
 
         # watermark
@@ -482,10 +486,12 @@ class tools:
         warnings.filterwarnings("ignore", category=DeprecationWarning)
         ART_FONT_SIZE = 30
         STD_FONT_SIZE = 60
-        # First 4 lines are headers. Last 1 line is bottom grid line
+        # Fonts, glyph metrics, text masks and table layouts are cached across
+        # calls by the renderer since we keep drawing similar tables.
+        renderer = PKTableRenderer()
         fontPath = tools.setupReportFont()
-        artfont = ImageFont.truetype(fontPath, ART_FONT_SIZE)
-        stdfont = ImageFont.truetype(fontPath, STD_FONT_SIZE)
+        artfont = renderer.font(fontPath, ART_FONT_SIZE)
+        stdfont = renderer.font(fontPath, STD_FONT_SIZE)
         
         bgColor, gridColor, artColor, menuColor = tools.getDefaultColors()
 
@@ -497,32 +503,29 @@ class tools:
             summaryLabel if summaryLabel is not None else "[+] For chosen scan, summary of correctness from past: [Example, 70% of (100) under 1-Pd, means out of 100 stocks that were in the scan result in the past, 70% of them gained next day.)",
             detailLabel if detailLabel is not None else "[+] 1 to 30 period gain/loss % for matching stocks on respective date from earlier predictions:[Example, 5% under 1-Pd, means the stock price actually gained 5% the next day from given date.]",
         ]
-
-        artfont_arttext_width, artfont_arttext_height = artfont.getsize_multiline(artText+ f" | {marketStatus()}")
-        stdFont_oneLinelabel_width, stdFont_oneLinelabel_height = stdfont.getsize_multiline(label)
-        stdFont_scanResulttext_width, stdFont_scanResulttext_height = stdfont.getsize_multiline(table) if len(table) > 0 else (0,0)
+        mktStatus = marketStatus()
+        artfont_arttext_width, artfont_arttext_height = renderer.textSize(artfont, artText+ f" | {mktStatus}")
+        stdFont_oneLinelabel_width, stdFont_oneLinelabel_height = renderer.textSize(stdfont, label)
+        stdFont_scanResulttext_width, stdFont_scanResulttext_height = renderer.textSize(stdfont, table) if len(table) > 0 else (0,0)
         unstyled_backtestsummary = tools.removeAllColorStyles(backtestSummary)
         unstyled_backtestDetail = tools.removeAllColorStyles(backtestDetail)
-        stdFont_backtestSummary_text_width,stdFont_backtestSummary_text_height= stdfont.getsize_multiline(unstyled_backtestsummary) if len(unstyled_backtestsummary) > 0 else (0,0)
-        stdFont_backtestDetail_text_width, stdFont_backtestDetail_text_height = stdfont.getsize_multiline(unstyled_backtestDetail) if len(unstyled_backtestDetail) > 0 else (0,0)
-        artfont_scanResultText_width, _ = artfont.getsize_multiline(table) if len(table) > 0 else (0,0)
-        artfont_backtestSummary_text_width, _ = artfont.getsize_multiline(backtestSummary) if (backtestSummary is not None and len(backtestSummary)) > 0 else (0,0)
+        stdFont_backtestSummary_text_width,stdFont_backtestSummary_text_height= renderer.textSize(stdfont, unstyled_backtestsummary) if len(unstyled_backtestsummary) > 0 else (0,0)
+        stdFont_backtestDetail_text_width, stdFont_backtestDetail_text_height = renderer.textSize(stdfont, unstyled_backtestDetail) if len(unstyled_backtestDetail) > 0 else (0,0)
+        artfont_scanResultText_width, _ = renderer.textSize(artfont, table) if len(table) > 0 else (0,0)
+        artfont_backtestSummary_text_width, _ = renderer.textSize(artfont, backtestSummary) if (backtestSummary is not None and len(backtestSummary)) > 0 else (0,0)
         stdfont_addendumtext_height = 0
         stdfont_addendumtext_width = 0
         if addendum is not None and len(addendum) > 0:
             unstyled_addendum = tools.removeAllColorStyles(addendum)
-            stdfont_addendumtext_width , stdfont_addendumtext_height = stdfont.getsize_multiline(unstyled_addendum)
+            stdfont_addendumtext_width , stdfont_addendumtext_height = renderer.textSize(stdfont, unstyled_addendum)
             titleLabels.append(addendumLabel)
             dfs_to_print.append(addendum)
             unstyled_dfs.append(unstyled_addendum)
 
         repoText = tools.getRepoHelpText(table,backtestSummary)
-        artfont_repotext_width, artfont_repotext_height = artfont.getsize_multiline(repoText)
+        artfont_repotext_width, artfont_repotext_height = renderer.textSize(artfont, repoText)
         legendText = legendPrefixText + tools.getLegendHelpText(table,backtestSummary)
-        _, artfont_legendtext_height = artfont.getsize_multiline(legendText)
-        column_separator = "|"
-        line_separator = "+"
-        stdfont_sep_width, _ = stdfont.getsize_multiline(column_separator)
+        _, artfont_legendtext_height = renderer.textSize(artfont, legendText)
 
         startColValue = 100
         xVertical = startColValue
@@ -549,160 +552,36 @@ class tools:
                     + stdfont_addendumtext_height + (stdFont_oneLinelabel_height if stdfont_addendumtext_height > 0 else 0)
                 )
         im = Image.new("RGB",(im_width,im_height),bgColor)
-        draw = ImageDraw.Draw(im)
         # artwork
-        draw.text((startColValue, rowPixelRunValue), artText+ f" | {tools.removeAllColorStyles(marketStatus())}", font=artfont, fill=artColor)
+        renderer.drawText(im, (startColValue, rowPixelRunValue), artText+ f" | {tools.removeAllColorStyles(mktStatus)}", artfont, artColor)
         rowPixelRunValue += artfont_arttext_height + 1
         # Report title
-        # reportTitle = tools.wrapFitLegendText(table,backtestSummary, reportTitle)
-        draw.text((startColValue, rowPixelRunValue), reportTitle, font=stdfont, fill=menuColor)
+        renderer.drawText(im, (startColValue, rowPixelRunValue), reportTitle, stdfont, menuColor, reuse=False)
         rowPixelRunValue += stdFont_oneLinelabel_height + 1
-        counter = -1
-        for df in dfs_to_print:
-            counter += 1
-            colPixelRunValue = startColValue
+        colPixelRunValue = startColValue
+        for counter, df in enumerate(dfs_to_print):
             try:
                 if df is None or len(df) == 0:
                     continue
             except:
                 continue
             # selected menu options and As of DateTime
-            draw.text(
-                (colPixelRunValue, rowPixelRunValue),
-                titleLabels[counter],
-                font=stdfont,
-                fill=menuColor,
-            )
+            renderer.drawText(im, (colPixelRunValue, rowPixelRunValue), titleLabels[counter], stdfont, menuColor)
             rowPixelRunValue += stdFont_oneLinelabel_height
-            unstyledLines = unstyled_dfs[counter].splitlines()
-            lineNumber = 0
-            screenLines = df.splitlines()
-            for line in screenLines:
-                _, stdfont_line_height = stdfont.getsize_multiline(line)
-                # Print the row separators
-                if not (line.startswith(column_separator)):
-                    draw.text(
-                        (colPixelRunValue, rowPixelRunValue),
-                        line,
-                        font=stdfont,
-                        fill=gridColor,
-                    )
-                    rowPixelRunValue += stdfont_line_height + 1
-                else: # if (line.startswith(column_separator)):
-                    # Print the row contents
-                    columnNumber = 0
-                    valueScreenCols = line.split(column_separator)
-                    try:
-                        del valueScreenCols[0] # Remove the empty column header at the first position
-                        del valueScreenCols[-1] # Remove the empty column header at the last position
-                    except Exception as e:# pragma: no cover
-                        default_logger().debug(e, exc_info=True)
-                        draw.text(
-                            (colPixelRunValue, rowPixelRunValue),
-                            line,
-                            font=stdfont,
-                            fill=gridColor,
-                        )
-                        lineNumber = lineNumber - 1
-                        pass
-                    # Print each colored value of each cell as we go over each row
-                    for val in valueScreenCols:
-                        if lineNumber >= len(unstyledLines):
-                            continue
-                        # Draw the column separator first
-                        draw.text(
-                            (colPixelRunValue, rowPixelRunValue),
-                            column_separator,
-                            font=stdfont,
-                            fill=gridColor,
-                        )
-                        colPixelRunValue = colPixelRunValue + stdfont_sep_width
-                        unstyledLine = unstyledLines[lineNumber]
-                        cellStyles, cellCleanValues = tools.getCellColors(
-                            val, defaultCellFillColor=gridColor
-                        )
-                        valCounter = 0
-                        for style in cellStyles:
-                            cleanValue = cellCleanValues[valCounter]
-                            valCounter += 1
-                            if columnNumber == 0 and len(cleanValue.strip()) > 0:
-                                if column_separator in unstyledLine:
-                                    cleanValue = unstyledLine.split(column_separator)[1]
-                                if "\\" in cleanValue:
-                                    cleanValue = cleanValue.split("\\")[-1]
-                                # style = style if "%" in cleanValue else gridColor
-                            if bgColor == "white" and style == "yellow":
-                                # Yellow on a white background is difficult to read
-                                style = "blue"
-                            elif bgColor == "black" and style == "blue":
-                                # blue on a black background is difficult to read
-                                style = "yellow"
-                            col_width, _ = stdfont.getsize_multiline(cleanValue)
-                            draw.text(
-                                (colPixelRunValue, rowPixelRunValue),
-                                cleanValue,
-                                font=stdfont,
-                                fill=style,
-                            )
-                            colPixelRunValue = colPixelRunValue + col_width
-                            if columnNumber == 0:
-                                xVertical = int(columnNumber/2)
-
-                        columnNumber = columnNumber + 1
-                    if len(valueScreenCols) > 0:
-                        # Close the row with the separator
-                        draw.text(
-                            (colPixelRunValue, rowPixelRunValue),
-                            column_separator,
-                            font=stdfont,
-                            fill=gridColor,
-                        )
-                        colPixelRunValue = startColValue
-                    rowPixelRunValue +=  stdfont_line_height + 1
-                lineNumber = lineNumber + 1
+            # Print each colored value of each cell as per the pre-computed layout
+            ops, blockHeight, hasCells = renderer.tableLayout(df, unstyled_dfs[counter], stdfont, gridColor, bgColor, tools.getCellColors)
+            renderer.drawOps(im, ops, colPixelRunValue, rowPixelRunValue, stdfont)
+            rowPixelRunValue += blockHeight
+            if hasCells:
+                xVertical = 0
             rowPixelRunValue += stdFont_oneLinelabel_height
         
         # Repo text
-        draw.text(
-            (colPixelRunValue, rowPixelRunValue + 1),
-            repoText,
-            font=artfont,
-            fill=menuColor,
-        )
+        renderer.drawText(im, (colPixelRunValue, rowPixelRunValue + 1), repoText, artfont, menuColor)
         # Legend text
         rowPixelRunValue += 2 * stdFont_oneLinelabel_height + 20
-        legendLines = legendText.splitlines()
-        legendSeperator = "***"
-        col_width_sep, _ = artfont.getsize_multiline(legendSeperator)
-        for line in legendLines:
-            colPixelRunValue = startColValue
-            _, artfont_line_height = artfont.getsize_multiline(line)
-            lineitems = line.split(legendSeperator)
-            red = True
-            for lineitem in lineitems:
-                if lineitem == "" or not red:
-                    draw.text(
-                        (colPixelRunValue, rowPixelRunValue),
-                        legendSeperator,
-                        font=artfont,
-                        fill=gridColor,
-                    )
-                    colPixelRunValue += col_width_sep + 1
-                style = "red" if not red else gridColor
-                red = not red
-                lineitem = lineitem.replace(": ","***: ")
-                draw.text(
-                    (colPixelRunValue, rowPixelRunValue),
-                    lineitem,
-                    font=artfont,
-                    fill=style,
-                )
-                col_width, _ = artfont.getsize_multiline(lineitem)
-                # Move to the next text in the same line
-                colPixelRunValue += col_width + 1
-                
-            # Let's go to the next line
-            rowPixelRunValue += artfont_line_height + 1
+        ops, _ = renderer.legendLayout(legendText, artfont, gridColor)
+        renderer.drawOps(im, ops, startColValue, rowPixelRunValue, artfont)
 
         im = im.resize((int(im.size[0]*configManager.telegramImageCompressionRatio),int(im.size[1]*configManager.telegramImageCompressionRatio)), Image.ANTIALIAS, reducing_gap=2)
         im = tools.addQuickWatermark(im,xVertical,dataSrc="Yahoo!finance; Morningstar, Inc; National Stock Exchange of India Ltd;TradingHours.com;",dataSrcFontSize=ART_FONT_SIZE)
@@ -823,12 +702,25 @@ class tools:
         cache_file = os.path.join(outputFolder, fileName)
         if not os.path.exists(cache_file) or forceSave or (loadCount >= 0 and len(stockDict) > (loadCount + 1)):
             try:
-                with open(cache_file, "wb") as f:
-                    pickle.dump(stockDict.copy(), f, protocol=pickle.HIGHEST_PROTOCOL)
-                    OutputControls().printOutput(colorText.GREEN + "=> Done." + colorText.END)
+                # Symbols get written one at a time straight from the store
+                # instead of first copying it all into this process.
+                if downloadOnly:
+                    # The server copy stays a plain pickle so that the clients
+                    # already released can still read it.
+                    PKCompressedCache.savePickle(stockDict, cache_file)
+                else:
+                    PKCompressedCache.save(stockDict, cache_file)
+                OutputControls().printOutput(colorText.GREEN + "=> Done." + colorText.END)
                 if downloadOnly:
                     OutputControls().printOutput(colorText.GREEN + f"=> {cache_file}" + colorText.END)
                     Committer.execOSCommand(f"git add {cache_file} -f >/dev/null 2>&1")
+                    # Also publish the day's candles so that clients with an older cache
+                    # can just download the delta
+                    try:
+                        for deltaFile in PKStockDataSync(isIntraday=configManager.isIntradayConfig() or intraday).publish(stockDict, outputFolder):
+                            Committer.execOSCommand(f"git add {deltaFile} -f >/dev/null 2>&1")
+                    except Exception as e:  # pragma: no cover
+                        default_logger().debug(e, exc_info=True)
                     if "RUNNER" not in os.environ.keys():
                         copyFilePath = os.path.join(Archiver.get_user_outputs_dir(), f"copy_{fileName}")
                         cacheFileSize = os.stat(cache_file).st_size if os.path.exists(cache_file) else 0
@@ -912,6 +804,8 @@ class tools:
         isTrading = PKDateUtilities.isTradingTime() and (PKDateUtilities.wasTradedOn() or not PKDateUtilities.isTodayHoliday()[0])
         if userDownloadOption is not None and "B" in userDownloadOption: # Backtests
             isTrading = False
+        if isTrading or downloadOnly:
+            PKStockCachePreloader().discard(stockDict)
         # Check if NSEI data is requested
         if configManager.baseIndex not in stockCodes:
             stockCodes.insert(0,configManager.baseIndex)
@@ -936,7 +830,16 @@ class tools:
         if os.path.exists(copyFilePath):
             shutil.copy(copyFilePath,srcFilePath) # copy is the saved source of truth
         if os.path.exists(srcFilePath) and not forceRedownload:
-            stockDict, stockDataLoaded = tools.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading)
+            # The cache may already have been loaded into the store in the background
+            stockDataLoaded = PKStockCachePreloader().attach(srcFilePath, stockDict)
+            if stockDataLoaded:
+                OutputControls().printOutput(
+                        colorText.GREEN
+                        + f"[+] Automatically Using Cached Stock Data {'due to After-Market hours' if not PKDateUtilities.isTradingTime() else ''}!"
+                        + colorText.END
+                    )
+            else:
+                stockDict, stockDataLoaded = tools.loadDataFromLocalPickle(stockDict,configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading)
         if (
             not stockDataLoaded
             and ("1d" if isIntraday else ConfigManager.default_period)
@@ -959,12 +862,26 @@ class tools:
             tools.saveStockData(stockDict,configManager,initialLoadCount,isIntraday,downloadOnly, forceSave=stockDataLoaded)
         return stockDict
 
+    def preloadStockData(stockDict, configManager, isIntraday=False):
+        # Starts loading the cache that loadStockData would most likely load,
+        # in the background, so that it's ready by the time the user is done
+        # with the menus.
+        isIntraday = isIntraday or configManager.isIntradayConfig()
+        isTrading = PKDateUtilities.isTradingTime() and (PKDateUtilities.wasTradedOn() or not PKDateUtilities.isTodayHoliday()[0])
+        if isTrading or stockDict is None or len(stockDict) > 0:
+            # The latest data gets downloaded during trading hours anyway
+            return None
+        _, cache_file = tools.afterMarketStockDataExists(isIntraday)
+        if os.path.exists(os.path.join(Archiver.get_user_outputs_dir(), f"copy_{cache_file}")):
+            return None
+        return PKStockCachePreloader().preload(os.path.join(Archiver.get_user_outputs_dir(), cache_file), stockDict)
+
     def loadDataFromLocalPickle(stockDict, configManager, downloadOnly, defaultAnswer, exchangeSuffix, cache_file, isTrading):
         stockDataLoaded = False
         srcFilePath = os.path.join(Archiver.get_user_outputs_dir(), cache_file)
         with open(srcFilePath, "rb") as f:
             try:
-                stockData = pickle.load(f)
+                stockData = PKCompressedCache.loads(f.read())
                 if not downloadOnly:
                     OutputControls().printOutput(
                             colorText.GREEN
@@ -1035,6 +952,72 @@ class tools:
                     configManager.deleteFileWithPattern()
         return stockDict, stockDataLoaded
 
+    def mergeDownloadedStockData(stockDict, stockData, exchangeSuffix, isTrading):
+        multiIndex = stockData.keys()
+        if isinstance(multiIndex, pd.MultiIndex):
+                # If we requested for multiple stocks from yfinance
+                # we'd have received a multiindex dataframe
+            listStockCodes = multiIndex.get_level_values(0)
+            listStockCodes = sorted(list(filter(None,list(set(listStockCodes)))))
+            if len(listStockCodes) > 0 and len(exchangeSuffix) > 0 and exchangeSuffix in listStockCodes[0]:
+                listStockCodes = [x.replace(exchangeSuffix,"") for x in listStockCodes]
+        else:
+            listStockCodes = list(stockData.keys())
+            if len(listStockCodes) > 0 and len(exchangeSuffix) > 0 and exchangeSuffix in listStockCodes[0]:
+                listStockCodes = [x.replace(exchangeSuffix,"") for x in listStockCodes]
+        for stock in listStockCodes:
+            df_or_dict = stockData.get(stock)
+            df_or_dict = df_or_dict.to_dict("split") if isinstance(df_or_dict,pd.DataFrame) else df_or_dict
+                # This will keep all the latest security data we downloaded
+                # just now and also copy the additional data like, MF/FII,FairValue
+                # etc. data, from yesterday's saved data.
+            try:
+                existingPreLoadedData = stockDict.get(stock)
+                if existingPreLoadedData is not None:
+                    if isTrading:
+                            # Only copy the MF/FII/FairValue data and leave the stock prices as is.
+                        cols = ["MF", "FII","MF_Date","FII_Date","FairValue"]
+                        for col in cols:
+                            existingPreLoadedData[col] = df_or_dict.get(col)
+                        stockDict[stock] = existingPreLoadedData
+                    else:
+                        stockDict[stock] = df_or_dict | existingPreLoadedData
+                else:
+                    if not isTrading:
+                        stockDict[stock] = df_or_dict
+            except:
+                    # Probably, the "stock" got removed from the latest download
+                    # and so, was not found in stockDict
+                continue
+        return stockDict
+
+    def syncSavedDataFromServer(stockDict, exchangeSuffix, isIntraday, cache_file, isTrading):
+        # Brings the most recent older cache that we have locally up to date
+        # with just the daily delta segments from the server.
+        stockDataLoaded = False
+        outputFolder = Archiver.get_user_outputs_dir()
+        pattern = f"{'intraday_' if isIntraday else ''}stock_data_"
+        localCaches = [f for f in glob.glob(f"{pattern}*.pkl", root_dir=outputFolder) if not f.endswith(cache_file)]
+        if len(localCaches) == 0:
+            return stockDict, stockDataLoaded
+        localCache = max(localCaches, key=lambda f: os.path.getmtime(os.path.join(outputFolder, f)))
+        try:
+            stockData = PKCompressedCache.load(os.path.join(outputFolder, localCache))
+            stockData = {stock: (data.to_dict("split") if isinstance(data, pd.DataFrame) else data) for stock, data in stockData.items()}
+            dataSync = PKStockDataSync(isIntraday=isIntraday)
+            stockData, stockDataLoaded = dataSync.sync(stockData)
+            if stockDataLoaded:
+                stockDict = tools.mergeDownloadedStockData(stockDict, stockData, exchangeSuffix, isTrading)
+                OutputControls().printOutput(
+                    colorText.GREEN
+                    + f"[+] Updated {localCache} with {len(dataSync.downloadedSegments)} daily update(s) ({int(dataSync.downloadedBytes/1024)} KB) from server."
+                    + colorText.END
+                )
+        except Exception as e:  # pragma: no cover
+            default_logger().debug(e, exc_info=True)
+            stockDataLoaded = False
+        return stockDict, stockDataLoaded
+
     def downloadSavedDataFromServer(stockDict, configManager, downloadOnly, defaultAnswer, retrial, forceLoad, stockCodes, exchangeSuffix, isIntraday, forceRedownload, cache_file, isTrading):
         stockDataLoaded = False
         OutputControls().printOutput(
@@ -1047,6 +1030,10 @@ class tools:
                 + f"[+] Downloading {'Intraday' if configManager.isIntradayConfig() else 'Daily'} cache from server for faster processing, Please Wait.."
                 + colorText.END
             )
+        if not forceRedownload:
+            stockDict, stockDataLoaded = tools.syncSavedDataFromServer(stockDict, exchangeSuffix, isIntraday or configManager.isIntradayConfig(), cache_file, isTrading)
+            if stockDataLoaded:
+                return stockDict, stockDataLoaded
         cache_url = (
                 "https://raw.githubusercontent.com/pkjmesra/PKScreener/actions-data-download/actions-data-download/"
                 + cache_file  # .split(os.sep)[-1]
@@ -1102,42 +1089,7 @@ class tools:
                         ) as f:
                         stockData = pickle.load(f)
                     if len(stockData) > 0:
-                        multiIndex = stockData.keys()
-                        if isinstance(multiIndex, pd.MultiIndex):
-                                # If we requested for multiple stocks from yfinance
-                                # we'd have received a multiindex dataframe
-                            listStockCodes = multiIndex.get_level_values(0)
-                            listStockCodes = sorted(list(filter(None,list(set(listStockCodes)))))
-                            if len(listStockCodes) > 0 and len(exchangeSuffix) > 0 and exchangeSuffix in listStockCodes[0]:
-                                listStockCodes = [x.replace(exchangeSuffix,"") for x in listStockCodes]
-                        else:
-                            listStockCodes = list(stockData.keys())
-                            if len(listStockCodes) > 0 and len(exchangeSuffix) > 0 and exchangeSuffix in listStockCodes[0]:
-                                listStockCodes = [x.replace(exchangeSuffix,"") for x in listStockCodes]
-                        for stock in listStockCodes:
-                            df_or_dict = stockData.get(stock)
-                            df_or_dict = df_or_dict.to_dict("split") if isinstance(df_or_dict,pd.DataFrame) else df_or_dict
-                                # This will keep all the latest security data we downloaded
-                                # just now and also copy the additional data like, MF/FII,FairValue
-                                # etc. data, from yesterday's saved data.
-                            try:
-                                existingPreLoadedData = stockDict.get(stock)
-                                if existingPreLoadedData is not None:
-                                    if isTrading:
-                                            # Only copy the MF/FII/FairValue data and leave the stock prices as is.
-                                        cols = ["MF", "FII","MF_Date","FII_Date","FairValue"]
-                                        for col in cols:
-                                            existingPreLoadedData[col] = df_or_dict.get(col)
-                                        stockDict[stock] = existingPreLoadedData
-                                    else:
-                                        stockDict[stock] = df_or_dict | existingPreLoadedData
-                                else:
-                                    if not isTrading:
-                                        stockDict[stock] = df_or_dict
-                            except:
-                                    # Probably, the "stock" got removed from the latest download
-                                    # and so, was not found in stockDict
-                                continue
+                        stockDict = tools.mergeDownloadedStockData(stockDict, stockData, exchangeSuffix, isTrading)
                         stockDataLoaded = True
                         copyFilePath = os.path.join(Archiver.get_user_outputs_dir(), f"copy_{cache_file}")
                         srcFilePath = os.path.join(Archiver.get_user_outputs_dir(), cache_file)
@@ -100,6 +100,11 @@ from pkscreener.classes.PKTask import PKTask
 from pkscreener.classes.PKScheduler import PKScheduler
 from pkscreener.classes.PKScanRunner import PKScanRunner
 from pkscreener.classes.PKMarketOpenCloseAnalyser import PKMarketOpenCloseAnalyser
+from pkscreener.classes.PKFiveEmaMonitor import PKFiveEmaMonitor
+from pkscreener.classes.MarketMonitor import MarketMonitor
+from pkscreener.classes.PKResultsStream import PKResultsStream
+from pkscreener.classes.PKResultRecord import PKResultPresenter
+from pkscreener.classes.PKScanResultsCache import PKScanResultsCache
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
@@ -772,7 +777,7 @@ def labelDataForPrinting(screenResults, saveResults, configManager, volumeRatio,
         screenResults['Volume'] = screenResults['Volume'].astype(str)
         saveResults['Volume'] = saveResults['Volume'].astype(str)
         screenResults.loc[:, "Volume"] = screenResults.loc[:, "Volume"].apply(
-            lambda x: Utility.tools.formatRatio(float(Utility.tools.removeAllColorStyles(x)), volumeRatio) if len(str(x).strip()) > 0 else ''
+            lambda x: Utility.tools.formatRatio(float(x), volumeRatio) if len(str(x).strip()) > 0 else ''
         )
         saveResults.loc[:, "Volume"] = saveResults.loc[:, "Volume"].apply(
             lambda x: str(x) + "x"
@@ -866,6 +871,8 @@ def main(userArgs=None,optionalFinalOutcome_df=None):
         stockDictPrimary = mp_manager.dict()
         stockDictSecondary = mp_manager.dict()
         loadCount = 0
+        if configManager.cacheEnabled and not downloadOnly and not testing:
+            Utility.tools.preloadStockData(stockDictPrimary, configManager)
     endOfdayCandles = None
     minRSI = 0
     maxRSI = 100
@@ -1735,9 +1742,23 @@ def main(userArgs=None,optionalFinalOutcome_df=None):
                 if actualHistoricalDuration >= 0:
                     progressbar()
         OutputControls().moveCursorUpLines(2)    #sys.stdout.write(f"\x1b[1A") # Replace the download progress bar and start writing on the same line
+        resultsCache = PKScanResultsCache()
+        if menuOption in ["B", "G"] and PKScanRunner.cacheBacktestResults:
+            # The dates that were scanned before with the same scan, config and candles
+            # come from the results cache instead of getting screened again
+            items = resultsCache.beginScan(userPassedArgs.options, configManager, stockDictPrimary, items, intradayStockDict=stockDictSecondary, indexStrength=PKScanRunner.indexStrength())
+        if menuOption == "B" and PKScanRunner.multiDayBacktests:
+            # Each stock gets loaded and screened once for all the backtest dates
+            items = PKScanRunner.groupBacktestItems(items)
+        if keyboardInterruptEventFired:
+            resultsCache.resetScan()
         if not keyboardInterruptEventFired:
             global tasks_queue, results_queue, consumers, logging_queue
-            screenResults, saveResults, backtest_df, tasks_queue, results_queue, consumers,logging_queue = PKScanRunner.runScanWithParams(userPassedArgs,keyboardInterruptEvent,screenCounter,screenResultsCounter,stockDictPrimary,stockDictSecondary,testing, backtestPeriod, menuOption,executeOption, samplingDuration, items,screenResults, saveResults, backtest_df,scanningCb=runScanners,tasks_queue=tasks_queue, results_queue=results_queue, consumers=consumers,logging_queue=logging_queue)
+            if len(items) == 0 and resultsCache.scanning:
+                # Everything came from the results cache. No need for any workers.
+                screenResults, saveResults, backtest_df = runScanners(menuOption, items, None, None, 0, backtestPeriod, samplingDuration - 1, None, screenResults, saveResults, backtest_df, testing=testing)
+            else:
+                screenResults, saveResults, backtest_df, tasks_queue, results_queue, consumers,logging_queue = PKScanRunner.runScanWithParams(userPassedArgs,keyboardInterruptEvent,screenCounter,screenResultsCounter,stockDictPrimary,stockDictSecondary,testing, backtestPeriod, menuOption,executeOption, samplingDuration, items,screenResults, saveResults, backtest_df,scanningCb=runScanners,tasks_queue=tasks_queue, results_queue=results_queue, consumers=consumers,logging_queue=logging_queue)
             if userPassedArgs is not None and (userPassedArgs.monitor is None and "|" not in userPassedArgs.options and not userPassedArgs.options.upper().startswith("C")):
                 tasks_queue = None
                 results_queue = None
@@ -2138,7 +2159,7 @@ def getLatestTradeDateTime(stockDictPrimary):
 def FinishBacktestDataCleanup(backtest_df, df_xray):
     if df_xray is not None and len(df_xray) > 10:
         showBacktestResults(df_xray, sortKey="Date", optionalName="Insights")
-    summary_df = backtestSummary(backtest_df)
+    summary_df = backtestSummary(backtest_df, backtestSellSignal())
     backtest_df.loc[:, "Date"] = backtest_df.loc[:, "Date"].apply(
                 lambda x: x.replace("-", "/")
             )
@@ -2251,38 +2272,14 @@ def describeUser():
         pass
 
 def prepareGroupedXRay(backtestPeriod, backtest_df):
-    df_grouped = backtest_df.groupby("Date")
     userPassedArgs.backtestdaysago = backtestPeriod
     df_xray = None
-    groupCounter = 0
-    tasksList=[]
-    for calcForDate, df_group in df_grouped:
-        groupCounter += 1
-        func_args = (df_group, userPassedArgs, calcForDate,f"Portfolio X-Ray | {calcForDate} | {groupCounter} of {len(df_grouped)}")
-        task = PKTask(f"Portfolio X-Ray | {calcForDate} | {groupCounter} of {len(df_grouped)}",
-                      long_running_fn=PortfolioXRay.performXRay,
-                      long_running_fn_args=func_args)
-        task.total = len(df_grouped)
-        tasksList.append(task)
     try:
-        if 'RUNNER' not in os.environ.keys():
-            # if configManager.enablePortfolioCalculations:
-            # On Github CI, we may run out of memory because of saving results in
-            # shared multiprocessing dict.
-            PKScheduler.scheduleTasks(tasksList,f"Portfolio X-Ray for ({len(df_grouped)})", showProgressBars=False,timeout=600)
-        else:
-            # On Github CI, let's run synchronously.
-            for task in tasksList:
-                task.long_running_fn(*(task,))
-        for task in tasksList:
-            p_df = task.result
-            if p_df is not None:
-                if df_xray is not None:
-                    df_xray = pd.concat([df_xray, p_df.copy()], axis=0)
-                else:
-                    df_xray = p_df.copy()
-            # Let's drop the columns no longer required for backtest report
-
+        # All the dates are X-Rayed together in this process. This avoids
+        # sending a copy of each date's data to a separate process and
+        # cleaning it up again over there.
+        df_xray = PortfolioXRay.performGroupedXRay(backtest_df, userPassedArgs)
+        # Let's drop the columns no longer required for backtest report
         removedUnusedColumns(None, backtest_df, ["Consol.", "Breakout", "RSI", "Pattern", "CCI"], userArgs=userPassedArgs)
         df_xray = df_xray.replace(np.nan, "", regex=True)
         df_xray = PortfolioXRay.xRaySummary(df_xray)
@@ -2383,10 +2380,12 @@ def handleMonitorFiveEMA():
                 )
     last_signal = {}
     first_scan = True
+    liveMonitor = PKFiveEmaMonitor(fetcher)
     result_df = screener.monitorFiveEma(  # Dummy scan to avoid blank table on 1st scan
                     fetcher=fetcher,
                     result_df=result_df,
                     last_signal=last_signal,
+                    liveMonitor=liveMonitor,
                 )
     try:
         while True:
@@ -2397,6 +2396,7 @@ def handleMonitorFiveEMA():
                                 fetcher=fetcher,
                                 result_df=result_df,
                                 last_signal=last_signal,
+                                liveMonitor=liveMonitor,
                             )
             except Exception as e:  # pragma: no cover
                 default_logger().debug(e, exc_info=True)
@@ -3185,6 +3185,12 @@ def runScanners(
     backtest_df = None
     reviewDate = getReviewDate(userPassedArgs) if criteria_dateTime is None else criteria_dateTime
     max_allowed = getMaxAllowedResultsCount(iterations, testing)
+    resultsStream = getResultsStream(userPassedArgs)
+    # With the results streamed, the matches of the scans are read back from
+    # the results log at the end instead of being held until then
+    keepResults = resultsStream is None or menuOption not in ["X", "G", "C"]
+    resultsCache = PKScanResultsCache()
+    cachedResults = resultsCache.cachedResults() if resultsCache.scanning else []
     try:
         originalNumberOfStocks = numStocks
         iterations, numStocksPerIteration = getIterationsAndStockCounts(numStocks, iterations)
@@ -3207,7 +3213,7 @@ def runScanners(
                 + colorText.END
             )
         bar, spinner = Utility.tools.getProgressbarStyle()
-        with alive_bar(numStocks, bar=bar, spinner=spinner) as progressbar:
+        with alive_bar((PKScanRunner.resultsCount(items) if len(items) == numStocks else numStocks) + len(cachedResults), bar=bar, spinner=spinner) as progressbar:
             lstscreen = []
             lstsave = []
             result = None
@@ -3217,12 +3223,16 @@ def runScanners(
                 global userPassedArgs
                 (menuOption, backtestPeriod, result, lstscreen, lstsave) = otherArgs
                 numStocks = processedCount
-                result = resultItem
-                backtest_df = processResults(menuOption, backtestPeriod, result, lstscreen, lstsave, result_df)
+                # Colours get applied to the results only for the screen
+                result = PKResultPresenter.presentedResult(resultItem)
+                backtest_df = processResults(menuOption, backtestPeriod, result, lstscreen, lstsave, result_df, keepResults=keepResults)
+                if resultsStream is not None:
+                    resultsStream.appendResult(result)
+                resultsCount = len(lstscreen) if keepResults else resultsStream.count
                 progressbar()
                 progressbar.text(
                     colorText.GREEN
-                    + f"{'Remaining' if userPassedArgs.download else ('Found' if menuOption in ['X'] else 'Analysed')} {len(lstscreen) if not userPassedArgs.download else processedCount} {'Stocks' if menuOption in ['X'] else 'Records'}"
+                    + f"{'Remaining' if userPassedArgs.download else ('Found' if menuOption in ['X'] else 'Analysed')} {resultsCount if not userPassedArgs.download else processedCount} {'Stocks' if menuOption in ['X'] else 'Records'}"
                     + colorText.END
                 )
                 if result is not None:
@@ -3246,16 +3256,33 @@ def runScanners(
                         sys.stdout.write(f"\x1b[{tableLength}A")  # cursor up one line
                 if keyboardInterruptEventFired:
                     return False, backtest_df
-                return not ((testing and len(lstscreen) >= 1) or len(lstscreen) >= max_allowed), backtest_df
+                return not ((testing and resultsCount >= 1) or resultsCount >= max_allowed), backtest_df
+            def scanResultsCallback(resultItem, processedCount, result_df, *otherArgs):
+                resultsCache.addResult(resultItem)
+                return processResultsCallback(resultItem, processedCount, result_df, *otherArgs)
             otherArgs = (menuOption, backtestPeriod, result, lstscreen, lstsave)
-            backtest_df, result =PKScanRunner.runScan(userPassedArgs,testing,numStocks,iterations,items,numStocksPerIteration,tasks_queue,results_queue,originalNumberOfStocks,backtest_df,*otherArgs,resultsReceivedCb=processResultsCallback)
+            lastCachedResult = None
+            shouldContinue = True
+            for cachedResult in cachedResults:
+                shouldContinue, backtest_df = processResultsCallback(cachedResult, numStocks, backtest_df, *otherArgs)
+                lastCachedResult = cachedResult if cachedResult is not None else lastCachedResult
+                if not shouldContinue:
+                    break
+            # Nothing more to screen once the cached results already ended the scan
+            if shouldContinue and (len(items) > 0 or len(cachedResults) == 0):
+                backtest_df, result =PKScanRunner.runScan(userPassedArgs,testing,numStocks,iterations,items,numStocksPerIteration,tasks_queue,results_queue,originalNumberOfStocks,backtest_df,*otherArgs,resultsReceivedCb=scanResultsCallback)
+            result = result if result is not None else lastCachedResult
 
         OutputControls().printOutput(f"\x1b[{3 if OutputControls().enableMultipleLineOutput else 1}A")
-        if len(lstscreen) == 0 and userPassedArgs is not None and userPassedArgs.monitor is None:
+        if (len(lstscreen) if keepResults else resultsStream.count) == 0 and userPassedArgs is not None and userPassedArgs.monitor is None:
             OutputControls().printOutput("\x1b[2K") # Delete the progress bar line
         elapsed_time = time.time() - start_time
         if menuOption in ["X", "G", "C"]:
             # create extension
+            if not keepResults:
+                records = list(PKResultsStream.resultRecords(resultsStream.filePath))
+                lstscreen = [PKResultPresenter.screenDict(record) for record in records]
+                lstsave = records
             screenResults = pd.DataFrame(lstscreen)
             saveResults = pd.DataFrame(lstsave)
 
@@ -3282,6 +3309,11 @@ def runScanners(
         )
         PKScanRunner.terminateAllWorkers(userPassedArgs=userPassedArgs,consumers=consumers, tasks_queue=tasks_queue,testing=testing)
         logging.shutdown()
+    finally:
+        if resultsStream is not None:
+            resultsStream.close()
+        # Keeps the results of the dates that got screened completely
+        resultsCache.endScan()
 
     if result is not None and len(result) >=1 and criteria_dateTime is None:
         if userPassedArgs is not None and userPassedArgs.backtestdaysago is not None:
@@ -3306,10 +3338,11 @@ def runScanners(
     return screenResults, saveResults, backtest_df
 
         
-def processResults(menuOption, backtestPeriod, result, lstscreen, lstsave, backtest_df):
+def processResults(menuOption, backtestPeriod, result, lstscreen, lstsave, backtest_df, keepResults=True):
     if result is not None:
-        lstscreen.append(result[0])
-        lstsave.append(result[1])
+        if keepResults:
+            lstscreen.append(result[0])
+            lstsave.append(result[1])
         sampleDays = result[4]
         if menuOption == "B":
             backtest_df = updateBacktestResults(
@@ -3322,6 +3355,34 @@ def processResults(menuOption, backtestPeriod, result, lstscreen, lstsave, backt
             
     return backtest_df
 
+def getResultsStream(userPassedArgs=None):
+    # Matches get streamed to a results log (and the console, the monitor or
+    # the bot user) as they arrive only when asked for with --streamresults
+    streamResults = userPassedArgs.streamresults if userPassedArgs is not None and "streamresults" in vars(userPassedArgs) else None
+    if not isinstance(streamResults, str):
+        return None
+    filePath = streamResults
+    if len(filePath) == 0:
+        options = str(userPassedArgs.options).replace(":", "_").replace(" ", "")
+        filePath = os.path.join(Archiver.get_user_outputs_dir(), f"PKScreener_{options}_{PKDateUtilities.currentDateTime().strftime('%Y%m%d_%H%M%S')}.ndjson")
+    try:
+        resultsStream = PKResultsStream(filePath=filePath, options=userPassedArgs.options)
+    except OSError as e:
+        default_logger().debug(e, exc_info=True)
+        return None
+    if userPassedArgs.monitor is None:
+        resultsStream.subscribe(PKResultsStream.consoleSubscriber)
+    else:
+        monitor = MarketMonitor()
+        # The widget of the scan that the monitor just handed out (the pinned
+        # monitor waits after each refresh and gets the results at the end)
+        if len(getattr(monitor, "monitors", [])) > 0 and not monitor.isPinnedSingleMonitorMode:
+            resultsStream.subscribe(PKResultsStream.monitorSubscriber(monitor, monitor.monitors[monitor.monitorIndex - 1], chosenMenu=menuChoiceHierarchy[:120]))
+    if "user" in vars(userPassedArgs) and userPassedArgs.user is not None:
+        resultsStream.subscribe(PKResultsStream.botSubscriber(sendMessageToTelegramChannel, user=userPassedArgs.user))
+    OutputControls().printOutput(colorText.GREEN + f"[+] Streaming the results to {filePath}" + colorText.END)
+    return resultsStream
+
 def getReviewDate(userPassedArgs=None):
     reviewDate = PKDateUtilities.tradingDate().strftime('%Y-%m-%d')
     if userPassedArgs is not None and userPassedArgs.backtestdaysago is not None:
@@ -3353,9 +3414,6 @@ def updateBacktestResults(
     backtestPeriod, start_time, result, sampleDays, backtest_df
 ):
     global elapsed_time
-    sellSignal = (
-        str(selectedChoice["2"]) in ["6", "7"] and str(selectedChoice["3"]) in ["2"]
-    ) or selectedChoice["2"] in ["15", "16", "19", "25"]
     backtest_df = backtest(
         result[3],
         result[2],
@@ -3364,11 +3422,17 @@ def updateBacktestResults(
         backtestPeriod,
         sampleDays,
         backtest_df,
-        sellSignal,
+        backtestSellSignal(),
     )
     elapsed_time = time.time() - start_time
     return backtest_df
 
+def backtestSellSignal():
+    # The scanners for sell signals succeed when the prices fall
+    return (
+        str(selectedChoice["2"]) in ["6", "7"] and str(selectedChoice["3"]) in ["2"]
+    ) or selectedChoice["2"] in ["15", "16", "19", "25"]
+
 
 def saveDownloadedData(downloadOnly, testing, stockDictPrimary, configManager, loadCount):
     global userPassedArgs, keyboardInterruptEventFired, download_trials
@@ -3588,20 +3652,22 @@ def showBacktestResults(backtest_df:pd.DataFrame, sortKey="Stock", optionalName=
         else:
             summaryText = f"{summaryText}\nOverall Summary of (correctness of) Strategy Prediction Positive outcomes:"
     tabulated_text = ""
-    if backtest_df is not None and len(backtest_df) > 0:
+    # The period changes are kept as numbers and coloured only for the report
+    presented_df = PKResultPresenter.styledChanges(backtest_df, backtestSellSignal())
+    if presented_df is not None and len(presented_df) > 0:
         try:
             tabulated_text = colorText.miniTabulator().tabulate(
-                backtest_df,
+                presented_df,
                 headers="keys",
                 tablefmt=colorText.No_Pad_GridFormat,
                 showindex=False,
-                maxcolwidths=Utility.tools.getMaxColumnWidths(backtest_df)
+                maxcolwidths=Utility.tools.getMaxColumnWidths(presented_df)
             ).encode("utf-8").decode(STD_ENCODING)
         except ValueError:
             OutputControls().printOutput("ValueError! Going ahead without any column width restrictions!")
             # Maybe we were not able to fit the column width. Let's get rid of the column width restriction
             tabulated_text = colorText.miniTabulator().tabulate(
-                backtest_df,
+                presented_df,
                 headers="keys",
                 tablefmt=colorText.No_Pad_GridFormat,
                 showindex=False,
@@ -3618,7 +3684,7 @@ def showBacktestResults(backtest_df:pd.DataFrame, sortKey="Stock", optionalName=
             headerDict[index] = f"<th>{col}</th>"
             index += 1
 
-    colored_text = backtest_df.to_html(index=False)
+    colored_text = presented_df.to_html(index=False)
     summaryText = summaryText.replace("\n", "<br />")
     if "Summary" in optionalName:
        summaryText = f"{summaryText}<br /><input type='checkbox' id='chkActualNumbers' name='chkActualNumbers' value='0'><label for='chkActualNumbers'>Sort by actual numbers (Stocks + Date combinations of results. Higher the count, better the prediction reliability)</label><br>"
@@ -67,12 +67,15 @@ from PKDevTools.classes.ColorText import colorText
 from PKDevTools.classes.MarketHours import MarketHours
 from pkscreener.classes.MenuOptions import MenuRenderStyle, menu, menus,MAX_MENU_OPTION
 from pkscreener.classes.WorkflowManager import run_workflow
+from pkscreener.classes.PKScanJobQueue import PKScanJobQueue
 from pkscreener.globals import showSendConfigInfo, showSendHelpInfo
 import pkscreener.classes.ConfigManager as ConfigManager
 
 monitor_proc = None
 configManager = ConfigManager.tools()
 bot_available=True
+# Run user scans in the local job queue instead of dispatching GitHub workflows
+local_jobs_enabled=False
 
 # try:
 #     from telegram import __version_info__
@@ -711,9 +714,12 @@ def launchScreener(options, user, context, optionChoices, update):
             optionChoices = optionChoices.replace(" ", "").replace(">", "_")
             while optionChoices.endswith("_"):
                 optionChoices = optionChoices[:-1]
-            run_workflow(
-                optionChoices, str(user.id), str(options.upper().replace(":7:3:4",":7:3:0.008:4")), workflowType="X"
-            )
+            if local_jobs_enabled:
+                submitLocalScan(str(options.upper().replace(":7:3:4",":7:3:0.008:4")), user, context)
+            else:
+                run_workflow(
+                    optionChoices, str(user.id), str(options.upper().replace(":7:3:4",":7:3:0.008:4")), workflowType="X"
+                )
         elif str(optionChoices.upper()).startswith("G"):
             optionChoices = optionChoices.replace(" ", "").replace(">", "_")
             while optionChoices.endswith("_"):
@@ -742,6 +748,38 @@ def launchScreener(options, user, context, optionChoices, update):
         start(update, context)
 
 
+def submitLocalScan(options, user, context):
+    return PKScanJobQueue().submit(
+        options,
+        user=user,
+        callback=lambda job, user: sendLocalScanResults(job, user, context),
+    )
+
+def localScanResultsText(job):
+    if job.error is not None:
+        return f"Hmm...It looks like we could not finish the scan for {job.options}. Please try again later :-)"
+    results = job.result
+    if results is None or len(results) == 0:
+        return f"No stocks matched the scan for {job.options}!"
+    if "Stock" in results.columns:
+        results = results.set_index("Stock")
+    columns = [col for col in ["LTP", "%Chng", "volume", "Pattern"] if col in results.columns]
+    resultsText = results[columns].head(configManager.maxdisplayresults).to_string()
+    asOf = PKDateUtilities.currentDateTime().strftime("%d-%m-%y %H:%M") if not job.fromCache else datetime.fromtimestamp(job.completedAt).strftime("%d-%m-%y %H:%M")
+    return f"Results for {job.options} (as of {asOf}):\n<pre>{html.escape(resultsText)}</pre>"
+
+def sendLocalScanResults(job, user, context):
+    if user is None:
+        return
+    resultsText = localScanResultsText(job)
+    if len(resultsText) > 4096:
+        # Trim whole lines so that the pre-formatted block stays closed.
+        resultsText = resultsText[:4080]
+        resultsText = f"{resultsText[:resultsText.rfind(chr(10))]}</pre>"
+    context.bot.send_message(
+        chat_id=user.id, text=resultsText, parse_mode="HTML"
+    )
+
 def BBacktests(update: Update, context: CallbackContext) -> str:
     """Show new choice of buttons"""
     query = update.callback_query
@@ -1368,11 +1406,12 @@ def addCommandsForMenuItems(application):
 #   )
 
 
-def runpkscreenerbot(availability=True) -> None:
+def runpkscreenerbot(availability=True, localJobs=False) -> None:
     """Run the bot."""
     # Create the Application and pass it your bot's token.
-    global chat_idADMIN, Channel_Id, bot_available, _updater
+    global chat_idADMIN, Channel_Id, bot_available, _updater, local_jobs_enabled
     bot_available = availability
+    local_jobs_enabled = localJobs
     Channel_Id, TOKEN, chat_idADMIN, GITHUB_TOKEN = get_secrets()
     # TOKEN = '1234567'
     # Channel_Id = 1001785195297
@@ -137,6 +137,12 @@ argParser.add_argument(
     help="Enforce whether bot is going to be available or not.",
     required=False,
 )
+argParser.add_argument(
+    "--botlocaljobs",
+    action="store_true",
+    help="Run the scans requested via telegram bot in a local job queue instead of triggering GitHub workflows.",
+    required=False,
+)
 argParser.add_argument(
     "-c",
     "--croninterval",
@@ -245,6 +251,14 @@ argParser.add_argument(
     help="Comma separated list of stocks passed from previous scan results",
     required=False,
 )
+argParser.add_argument(
+    "--streamresults",
+    help="Append each matching stock to a newline delimited JSON results log (in the user outputs folder unless a file path is passed) and show it as soon as it is found.",
+    nargs='?',
+    const='',
+    type=str,
+    required=False,
+)
 argParser.add_argument(
     "--systemlaunched",
     action="store_true",
@@ -875,7 +889,7 @@ def pkscreenercli():
         # Check and see if we're running only the telegram bot
         if args.bot:
             from pkscreener import pkscreenerbot
-            pkscreenerbot.runpkscreenerbot(availability=args.botavailable)
+            pkscreenerbot.runpkscreenerbot(availability=args.botavailable, localJobs=args.botlocaljobs)
             return
         
         if args.intraday:
@@ -27,8 +27,10 @@ from unittest.mock import patch
 
 warnings.simplefilter("ignore", DeprecationWarning)
 warnings.simplefilter("ignore", FutureWarning)
+import numpy as np
 import pandas as pd
 import pytest
+from conftest import stockCache
 
 from pkscreener.classes import Pktalib
 from pkscreener.classes.CandlePatterns import CandlePatterns
@@ -426,3 +428,85 @@ def test_findPattern_bearish_engulfing(candle_patterns):
         assert candle_patterns.findPattern(df, dict, saveDict) is True
     assert dict["Pattern"] == "\033[1m\033[91mBearish Engulfing\033[0m"
     assert saveDict["Pattern"] == "Bearish Engulfing"
+
+
+def prepUniverse(numStocks=200):
+    def blankCandle(i, df):
+        if i % 50 == 0:
+            # Rows with nothing in them get dropped during pre-processing
+            df.iloc[-2, :] = np.nan
+        return df
+    stocks = stockCache(numStocks, 20, seed=7, alter=blankCandle, split=False, gap=0.02, start="2024-01-01", freq="D")
+    stocks = {stock: df.to_dict("split") if i % 2 == 0 else df for i, (stock, df) in enumerate(stocks.items())}
+    # A sure-shot bullish engulfing for the last one
+    df = stocks[f"STK{numStocks - 1:04d}"]
+    df.iloc[-2, 0:4] = [105, 106, 99, 100]
+    df.iloc[-1, 0:4] = [99, 108, 98, 107]
+    return stocks
+
+
+def processedData(stockData):
+    if not isinstance(stockData, pd.DataFrame):
+        stockData = pd.DataFrame(stockData["data"], columns=stockData["columns"], index=stockData["index"])
+    return stockData.dropna(how="all")[::-1]
+
+
+def test_patternHitMatrix_matches_findPattern_for_each_stock(candle_patterns):
+    stocks = prepUniverse()
+    matrix = candle_patterns.patternHitMatrix(stocks)
+    assert sorted(matrix.index) == sorted(stocks.keys())
+    assert list(matrix.columns) == [funcName for funcName, _, _ in CandlePatterns.patternTable]
+    assert matrix.loc["STK0199", "CDLENGULFING"] > 0
+    for stock, stockData in stocks.items():
+        perStock = candle_patterns.patternValues(processedData(stockData).head(4)[::-1])
+        assert matrix.loc[stock].to_dict() == perStock
+
+
+def test_findPattern_looks_up_precomputed_patterns(candle_patterns):
+    stocks = prepUniverse()
+    expected = {}
+    for stock, stockData in stocks.items():
+        dict, saveDict = {}, {}
+        candle_patterns.findPattern(processedData(stockData), dict, saveDict)
+        expected[stock] = (dict, saveDict)
+    candle_patterns.precomputePatterns(stocks)
+    with patch.object(Pktalib.pktalib, "CDLENGULFING") as cdl_obj:
+        for stock, stockData in stocks.items():
+            dict, saveDict = {}, {}
+            candle_patterns.findPattern(processedData(stockData), dict, saveDict)
+            assert (dict, saveDict) == expected[stock]
+        cdl_obj.assert_not_called()
+    assert expected["STK0199"][1]["Pattern"] == "Bullish Engulfing"
+    # Candles that were not seen before are still looked at for that stock
+    df = processedData(stocks["STK0001"])
+    df.iloc[0, 0:4] = [99, 108, 98, 107]
+    df.iloc[1, 0:4] = [105, 106, 99, 100]
+    dict, saveDict = {}, {}
+    assert candle_patterns.findPattern(df, dict, saveDict) is True
+    assert saveDict["Pattern"] == "Bullish Engulfing"
+
+
+def test_findPattern_keeps_all_patterns_in_order_of_priority(candle_patterns):
+    dict = {}
+    saveDict = {}
+    hits = {funcName: 0 for funcName, _, _ in CandlePatterns.patternTable}
+    hits.update({"CDLENGULFING": -100, "CDLMARUBOZU": -100, "CDLHAMMER": 100})
+    assert candle_patterns.findPattern(prepData(), dict, saveDict, hits=hits) is True
+    assert saveDict["Pattern"] == "Bearish Marubozu, Hammer, Bearish Engulfing"
+    assert saveDict["Pattern"].split(",")[0] not in CandlePatterns.reversalPatternsBullish
+
+def test_candle_patterns_are_not_precomputed_for_backtests():
+    from pkscreener.classes.PKScanRunner import PKScanRunner
+    def item(backtestDuration):
+        return (None,) * 12 + ("SBIN",) + (None,) * 5 + (backtestDuration,)
+    with patch.object(CandlePatterns, "canBatchPatterns", return_value=True):
+        assert PKScanRunner.needsCandlePatterns([item(0), item(0)])
+        assert not PKScanRunner.needsCandlePatterns([item(0), item(5)])
+        assert not PKScanRunner.needsCandlePatterns([item((30, 20, 0))])
+        assert not PKScanRunner.needsCandlePatterns([])
+
+def test_candle_patterns_are_not_precomputed_without_talib():
+    from pkscreener.classes.PKScanRunner import PKScanRunner
+    item = (None,) * 12 + ("SBIN",) + (None,) * 5 + (0,)
+    with patch.object(CandlePatterns, "canBatchPatterns", return_value=False):
+        assert not PKScanRunner.needsCandlePatterns([item, item])
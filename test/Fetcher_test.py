@@ -364,6 +364,36 @@ def test_fetchFiveEmaData_positive(configManager, tools_instance):
         )
 
 
+def test_fetchFiveEmaBars_positive(configManager, tools_instance):
+    columns = pd.MultiIndex.from_product([["^NSEI", "^NSEBANK"], ["High", "Low", "Close"]])
+    downloaded = pd.DataFrame([[1, 2, 3, 4, 5, 6], [7, 8, 9, 10, 11, 12]], columns=columns)
+    with patch("yfinance.download") as mock_download:
+        mock_download.return_value = downloaded
+        bars = tools_instance.fetchFiveEmaBars("5m")
+        assert list(bars["^NSEI"]["Close"]) == [3, 9]
+        assert list(bars["^NSEBANK"]["Close"]) == [6, 12]
+        mock_download.assert_called_once_with(
+            tickers=["^NSEI", "^NSEBANK"],
+            period="5d",
+            interval="5m",
+            proxy=None,
+            progress=False,
+            group_by="ticker",
+            timeout=configManager.longTimeout,
+        )
+        mock_download.reset_mock()
+        tools_instance.fetchFiveEmaBars("15m", start="2024-01-01 09:15")
+        mock_download.assert_called_once_with(
+            tickers=["^NSEI", "^NSEBANK"],
+            start="2024-01-01 09:15",
+            interval="15m",
+            proxy=None,
+            progress=False,
+            group_by="ticker",
+            timeout=configManager.longTimeout,
+        )
+
+
 def test_fetchWatchlist_positive(tools_instance):
     with patch("pandas.read_excel") as mock_read_excel:
         mock_read_excel.return_value = pd.DataFrame({"Stock Code": ["AAPL", "GOOG"]})
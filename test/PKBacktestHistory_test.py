@@ -0,0 +1,141 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import logging
+from argparse import Namespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import candles
+from PKDevTools.classes.log import default_logger
+from PKDevTools.classes.PKDateUtilities import PKDateUtilities
+
+from pkscreener.classes.CandlePatterns import CandlePatterns
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.PKBacktestHistory import PKBacktestHistory
+from pkscreener.classes.PKScanRunner import PKScanRunner
+from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+from pkscreener.classes.StockScreener import StockScreener
+
+configManager = tools()
+configManager.getConfig(parser)
+
+def historyCandles(numCandles=400, seed=0):
+    data = candles(numCandles, seed, drift=0.0005, gap=0.005, spread=0.015, adjClose=True)
+    # A holiday candle without any values
+    data.iloc[numCandles - 10] = np.nan
+    return data
+
+def vwap(high, low, close, volume):
+    typical = (high + low + close) / 3
+    return (typical * volume).cumsum() / volume.cumsum()
+
+@pytest.fixture
+def screener():
+    return ScreeningStatistics(configManager, default_logger())
+
+@pytest.fixture
+def hostRef(screener):
+    hostRef = MagicMock()
+    hostRef.configManager = configManager
+    hostRef.screener = screener
+    hostRef.candlePatterns = CandlePatterns()
+    hostRef.objectDictionaryPrimary = {f"STK{i}": historyCandles(seed=i).to_dict("split") for i in range(2)}
+    hostRef.objectDictionarySecondary = {}
+    hostRef.rs_strange_index = 0
+    hostRef.activeWorkersLimit = None
+    hostRef.scanTimings = None
+    hostRef.default_logger = default_logger()
+    with patch.object(pktalib, "VWAP", vwap), \
+         patch.object(PKDateUtilities, "isHoliday", return_value=(False, None)):
+        yield hostRef
+
+def scanArgs(stock, executeOption, backtestDuration, hostRef):
+    userArgs = Namespace(log=False, systemlaunched=False, usertag=None, simulate=None, options=f"B:12:{executeOption}",
+                         backtestdaysago=None, monitor=None, intraday=None)
+    return ["B", "INDIA", executeOption, None, 10, 5, 30, 70, 3, 5, 100, True, stock, False, False, 2.5, False,
+            userArgs, backtestDuration, 30, logging.NOTSET, True, None, hostRef]
+
+def sameResult(result, expected):
+    if result is None or expected is None:
+        return result is expected
+    # The results may have NaN growths for the candles without values
+    return pd.Series(result[0]).equals(pd.Series(expected[0])) and pd.Series(result[1]).equals(pd.Series(expected[1])) and \
+        result[2].equals(expected[2]) and result[3:] == expected[3:]
+
+def test_cleanedData_matches_preprocessing_each_date(screener):
+    data = historyCandles()
+    history = PKBacktestHistory("STK0", data)
+    assert history.owns(data) and not history.owns(data.copy())
+    for backtestDuration in [0, 1, 5, 9, 10, 11, 30, 399, 400]:
+        fullData, processedData = history.cleanedData(screener, backtestDuration, configManager.daysToLookback)
+        expectedFullData, expectedProcessedData = screener.preprocessData(data.head(len(data) - backtestDuration), daysToLookback=configManager.daysToLookback)
+        pd.testing.assert_frame_equal(fullData, expectedFullData, check_freq=False)
+        pd.testing.assert_frame_equal(processedData, expectedProcessedData, check_freq=False)
+    # Pre-processed only once and each date gets its own copy
+    assert list(history.preprocessed.keys()) == [configManager.daysToLookback]
+    fullData, _ = history.cleanedData(screener, 1, configManager.daysToLookback)
+    fullData["Close"] = 0
+    assert history.cleanedData(screener, 1, configManager.daysToLookback)[0]["Close"].iloc[0] != 0
+
+def test_ltpWithinRange_matches_validateLTP(screener):
+    data = historyCandles()
+    history = PKBacktestHistory("STK0", data)
+    closes = data["Close"].dropna()
+    minLTP, maxLTP = closes.quantile(0.3), closes.quantile(0.7)
+    for minChange in [0, 0.5]:
+        for backtestDuration in range(1, 60):
+            _, processedData = screener.preprocessData(data.head(len(data) - backtestDuration), daysToLookback=configManager.daysToLookback)
+            expected = screener.validateLTP(processedData, {}, {}, minLTP=minLTP, maxLTP=maxLTP, minChange=minChange)[0]
+            assert history.ltpWithinRange(screener, backtestDuration, configManager.daysToLookback, minLTP, maxLTP, minChange) == expected
+    assert history.ltpWithinRange(screener, len(data), configManager.daysToLookback, minLTP, maxLTP) is None
+
+def test_groupBacktestItems_merges_the_dates_of_each_stock():
+    items = []
+    for backtestDuration in [30, 20, 10]:
+        for stock in ["SBIN", "TCS"]:
+            item = tuple(range(25))
+            items.append(item[:12] + (stock,) + item[13:18] + (backtestDuration,) + item[19:])
+    items.append(items[0])
+    groupedItems = PKScanRunner.groupBacktestItems(items)
+    assert [item[12] for item in groupedItems] == ["SBIN", "TCS"]
+    assert all(item[18] == (30, 20, 10) for item in groupedItems)
+    assert all(item[:12] + item[13:18] + item[19:] == items[0][:12] + items[0][13:18] + items[0][19:] for item in groupedItems)
+    assert PKScanRunner.resultsCount(groupedItems) == 6
+    assert PKScanRunner.resultsCount(items) == len(items)
+
+def test_screenStocks_over_history_matches_each_date(hostRef):
+    backtestDurations = tuple(range(15, -1, -1))
+    numResults = 0
+    for executeOption in [0, 1, 2, 12]:
+        for stock in hostRef.objectDictionaryPrimary.keys():
+            expected = [StockScreener().screenStocksWithinLimits(*scanArgs(stock, executeOption, backtestDuration, hostRef)) for backtestDuration in backtestDurations]
+            results = StockScreener().screenStocksWithinLimits(*scanArgs(stock, executeOption, backtestDurations, hostRef))
+            assert len(results) == len(backtestDurations)
+            assert all(sameResult(result, expectedResult) for result, expectedResult in zip(results, expected))
+            numResults += sum(result is not None for result in results)
+    assert numResults > 0
@@ -0,0 +1,131 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import stockCache
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.PKBbandsSqueeze import PKBbandsSqueeze
+from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+def squeezeCandles(i, df):
+    if i % 5 == 0:
+        # Too few candles for some of the indicators
+        df = df.tail(22 + i % 10).copy()
+    if i % 7 == 0:
+        # A missing candle and one with missing values
+        df.iloc[-5] = np.nan
+        df.iloc[-8, df.columns.get_loc("High")] = np.nan
+    return df
+
+def squeezeCache(numSymbols, seed=0):
+    return stockCache(numSymbols, (100, 200), seed=seed, alter=squeezeCandles, volatility=(0.002, 0.03), spread=(0.005, 0.03))
+
+def fullData(stockData):
+    # The candles as the screener sees them, most recent first
+    df = pd.DataFrame(stockData["data"], columns=stockData["columns"], index=stockData["index"])
+    return df.replace([np.inf, -np.inf], np.nan).dropna(how="all")[::-1]
+
+def expectedState(fullData):
+    # Squeeze flags with the row-wise apply, as findBbandsSqueeze used to do it
+    df = fullData.head(30).copy()[::-1].fillna(0)
+    df.loc[:,'BBands-U'], df.loc[:,'BBands-M'], df.loc[:,'BBands-L'] = pktalib.BBANDS(df["Close"], 20)
+    df['low_kel'], df['upp_kel'] = pktalib.KeltnersChannel(df["High"], df["Low"], df["Close"], 20)
+    df['squeeze'] = df.apply(lambda row: row['low_kel'] < row['BBands-L'] < row['BBands-U'] < row['upp_kel'], axis=1)
+    df = df.tail(3)
+    if df.iloc[-3]["squeeze"] and not df.iloc[-1]["squeeze"]:
+        buy = abs(df['BBands-U'].values[-1] - df['Close'].values[-1]) < abs(df['BBands-L'].values[-1] - df['Close'].values[-1])
+        return PKBbandsSqueeze.FIRED_BUY if buy else PKBbandsSqueeze.FIRED_SELL
+    elif df["squeeze"].all():
+        return PKBbandsSqueeze.SQUEEZE_ON
+    return PKBbandsSqueeze.SQUEEZE_OFF
+
+@pytest.fixture
+def screener():
+    configManager = tools()
+    configManager.getConfig(parser)
+    return ScreeningStatistics(configManager, default_logger())
+
+def test_precompute_matches_the_per_stock_squeeze():
+    stockDict = squeezeCache(300)
+    squeezes = PKBbandsSqueeze().precompute(stockDict)
+    assert set(squeezes.keys()) == set(stockDict.keys())
+    for stock, stockData in stockDict.items():
+        state, numCandles, lastDate = squeezes[stock]
+        df = fullData(stockData)
+        assert (numCandles, lastDate) == (len(df), df.index[0])
+        assert state == expectedState(df), stock
+    assert set(state for state, _, _ in squeezes.values()) == {PKBbandsSqueeze.SQUEEZE_ON, PKBbandsSqueeze.SQUEEZE_OFF, PKBbandsSqueeze.FIRED_BUY, PKBbandsSqueeze.FIRED_SELL}
+    assert PKBbandsSqueeze().precompute({"NONE": None, "SHORT": squeezeCache(1)["STK0000"] | {"data": [[1.0] * 5] * 10, "index": list(range(10))}}) == {}
+
+@pytest.mark.parametrize("state,filter,expected,pattern", [
+    (PKBbandsSqueeze.FIRED_BUY, 1, True, "TTM-SQZ-Buy"),
+    (PKBbandsSqueeze.FIRED_BUY, 3, False, None),
+    (PKBbandsSqueeze.FIRED_SELL, 3, True, "TTM-SQZ-Sell"),
+    (PKBbandsSqueeze.FIRED_SELL, 1, False, None),
+    (PKBbandsSqueeze.SQUEEZE_ON, 2, True, "TTM-SQZ"),
+    (PKBbandsSqueeze.SQUEEZE_ON, 1, False, None),
+    (PKBbandsSqueeze.SQUEEZE_OFF, 4, False, None),
+])
+def test_findBbandsSqueeze_reads_the_precomputed_state(screener, state, filter, expected, pattern):
+    stockData = squeezeCache(2, seed=1)["STK0001"]
+    df = fullData(stockData)
+    screener.bbandsSqueezes = {"SBIN": (state, len(df), df.index[0])}
+    saveDict = {}
+    assert screener.findBbandsSqueeze(df, {}, saveDict, filter=filter, stockName="SBIN") == expected
+    assert saveDict.get("Pattern") == pattern
+
+def test_findBbandsSqueeze_falls_back_for_other_candles(screener):
+    stockDict = squeezeCache(100, seed=2)
+    screener.bbandsSqueezes = PKBbandsSqueeze().precompute(stockDict)
+    for stock, stockData in stockDict.items():
+        # Not the most recent candles any more, as in a backtest
+        df = fullData(stockData).tail(-2)
+        if len(df) < 20:
+            continue
+        saveDict = {}
+        found = screener.findBbandsSqueeze(df, {}, saveDict, filter=4, stockName=stock)
+        assert found == (expectedState(df) != PKBbandsSqueeze.SQUEEZE_OFF)
+
+@pytest.mark.benchmark
+def test_bbands_squeeze_benchmark(screener, capsys):
+    stockDict = squeezeCache(2000, seed=3)
+    frames = {stock: fullData(stockData) for stock, stockData in stockDict.items()}
+    start = time.perf_counter()
+    for df in frames.values():
+        expectedState(df)
+    applyTime = time.perf_counter() - start
+    start = time.perf_counter()
+    screener.bbandsSqueezes = PKBbandsSqueeze().precompute(stockDict)
+    for stock, df in frames.items():
+        screener.findBbandsSqueeze(df, {}, {}, filter=4, stockName=stock)
+    engineTime = time.perf_counter() - start
+    with capsys.disabled():
+        print(f"\n[+] TTM squeeze of {len(stockDict)} stocks: row-wise apply {applyTime:.3f}s, stacked {engineTime:.3f}s")
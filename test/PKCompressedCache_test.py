@@ -0,0 +1,154 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import stockCache
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+
+def downloadedCandles(i, df):
+    # Prices with two decimals and whole volumes like the downloaded candles
+    return df.round(2).astype({"Volume": np.int64})
+
+def savedCache(numSymbols, numCandles, **kwargs):
+    return stockCache(numSymbols, numCandles, seed=7, alter=downloadedCandles, adjClose=True, **kwargs)
+
+@pytest.mark.parametrize("codec", PKCompressedCache.availableCodecs())
+def test_round_trip_keeps_values_and_types(codec):
+    stockDict = savedCache(20, 30)
+    stockDict["INTRA"] = savedCache(1, 30, freq="min", tz="Asia/Kolkata")["STK0000"]
+    stockDict["STK0001"]["MF"] = {"Net": 1.5}
+    stockDict["STK0001"]["data"][3][2] = float("nan")
+    stockDict["EMPTY"] = {"index": [], "columns": ["Open", "Close"], "data": []}
+    # Odd entries can't be kept as arrays, but must come back as they were
+    stockDict["ODD"] = {"index": ["a", "b"], "columns": ["Open"], "data": [[1], [2]]}
+    stockDict["NUMBER"] = 42
+    loaded = PKCompressedCache.loads(PKCompressedCache.dumps(stockDict, codec=codec))
+    assert sorted(loaded.keys()) == sorted(stockDict.keys())
+    for symbol in ["STK0000", "STK0019", "INTRA", "EMPTY", "ODD", "NUMBER"]:
+        assert loaded[symbol] == stockDict[symbol]
+    assert loaded["STK0001"]["MF"] == {"Net": 1.5}
+    assert np.isnan(loaded["STK0001"]["data"][3][2])
+    assert type(loaded["STK0000"]["data"][0][5]) is int
+    assert type(loaded["STK0000"]["data"][0][0]) is float
+    assert loaded["INTRA"]["index"][0].tz is not None
+    assert str(loaded["INTRA"]["index"][0]) == str(stockDict["INTRA"]["index"][0])
+    pd.testing.assert_frame_equal(pd.DataFrame(**{k: v for k, v in loaded["STK0001"].items() if k != "MF"}),
+                                  pd.DataFrame(**{k: v for k, v in stockDict["STK0001"].items() if k != "MF"}))
+
+def test_dataframes_are_saved_as_split_dicts():
+    df = pd.DataFrame(**savedCache(1, 10)["STK0000"])
+    loaded = PKCompressedCache.loads(PKCompressedCache.dumps({"SBIN": df}))
+    assert loaded["SBIN"] == df.to_dict("split")
+
+def test_load_reads_compressed_files_and_plain_pickles(tmp_path):
+    stockDict = savedCache(5, 10)
+    compressedFile = os.path.join(tmp_path, "stock_data_010124.pkl")
+    pickleFile = os.path.join(tmp_path, "stock_data_020124.pkl")
+    PKCompressedCache.save(stockDict, compressedFile)
+    with open(pickleFile, "wb") as f:
+        pickle.dump(stockDict, f, protocol=pickle.HIGHEST_PROTOCOL)
+    assert PKCompressedCache.isCompressed(compressedFile)
+    assert not PKCompressedCache.isCompressed(pickleFile)
+    assert not PKCompressedCache.isCompressed(os.path.join(tmp_path, "missing.pkl"))
+    assert PKCompressedCache.load(compressedFile) == stockDict
+    assert PKCompressedCache.load(pickleFile) == stockDict
+    assert os.path.getsize(compressedFile) < os.path.getsize(pickleFile)
+
+def test_loads_rejects_other_versions():
+    content = bytearray(PKCompressedCache.dumps(savedCache(1, 10)))
+    content[len(b"PKSCACHE")] = 2
+    with pytest.raises(pickle.UnpicklingError):
+        PKCompressedCache.loads(bytes(content))
+
+def test_saves_stream_symbols_from_manager_dict(tmp_path):
+    import multiprocessing
+    stockDict = savedCache(30, 20)
+    stockDict["STK0001"]["FII"] = {"Net": -2.5}
+    with multiprocessing.Manager() as manager:
+        store = manager.dict()
+        store.update(stockDict)
+        compressedFile = os.path.join(tmp_path, "stock_data_010124.pkl")
+        pickleFile = os.path.join(tmp_path, "stock_data_020124.pkl")
+        PKCompressedCache.save(store, compressedFile)
+        PKCompressedCache.savePickle(store, pickleFile)
+    assert PKCompressedCache.load(compressedFile) == stockDict
+    # The server copy must still be a plain pickle of a dict
+    with open(pickleFile, "rb") as f:
+        loaded = pickle.load(f)
+    assert type(loaded) is dict
+    assert loaded == stockDict
+    assert sorted(os.listdir(tmp_path)) == ["stock_data_010124.pkl", "stock_data_020124.pkl"]
+
+class FailingStore(dict):
+    def __getitem__(self, key):
+        if key == "STK0003":
+            raise RuntimeError("Lost the connection to the store")
+        return super().__getitem__(key)
+
+@pytest.mark.parametrize("save", [PKCompressedCache.save, PKCompressedCache.savePickle])
+def test_failed_save_keeps_the_previous_cache(tmp_path, save):
+    cacheFile = os.path.join(tmp_path, "stock_data_010124.pkl")
+    PKCompressedCache.save(savedCache(2, 10), cacheFile)
+    with pytest.raises(RuntimeError):
+        save(FailingStore(savedCache(5, 10)), cacheFile)
+    assert PKCompressedCache.load(cacheFile) == savedCache(2, 10)
+    assert os.listdir(tmp_path) == ["stock_data_010124.pkl"]
+
+def test_codecs_fall_back_to_stdlib():
+    codecs = PKCompressedCache.availableCodecs()
+    assert codecs[-2:] == ["zlib", "lzma"]
+    assert PKCompressedCache.defaultCodec() == codecs[0]
+    for codec in codecs:
+        assert PKCompressedCache.decompress(PKCompressedCache.compress(b"pkscreener" * 100, codec), codec) == b"pkscreener" * 100
+
+@pytest.mark.benchmark
+def test_compressed_cache_benchmark(capsys):
+    for name, stockDict in [("daily 2000 x 250", savedCache(2000, 250)),
+                            ("intraday 2000 x 375", savedCache(2000, 375, freq="min", tz="Asia/Kolkata"))]:
+        start = time.perf_counter()
+        pickled = pickle.dumps(stockDict, protocol=pickle.HIGHEST_PROTOCOL)
+        saveTime = time.perf_counter() - start
+        start = time.perf_counter()
+        pickle.loads(pickled)
+        loadTime = time.perf_counter() - start
+        lines = [f"\n[+] {name}: pickle {len(pickled)/1024/1024:.1f}MB, save {saveTime:.2f}s, load {loadTime:.2f}s"]
+        for codec in PKCompressedCache.availableCodecs():
+            start = time.perf_counter()
+            compressed = PKCompressedCache.dumps(stockDict, codec=codec)
+            saveTime = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = PKCompressedCache.loads(compressed)
+            loadTime = time.perf_counter() - start
+            assert len(loaded) == len(stockDict)
+            assert len(compressed) < len(pickled)
+            lines.append(f"[+] {name}: {codec} {len(compressed)/1024/1024:.1f}MB, save {saveTime:.2f}s, load {loadTime:.2f}s")
+        with capsys.disabled():
+            print("\n".join(lines))
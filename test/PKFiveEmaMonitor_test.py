@@ -0,0 +1,135 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import candles
+
+from pkscreener.classes.PKFiveEmaMonitor import PKFiveEmaMonitor, PKFiveEmaSeries
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+def makeBars(symbol, interval, numBars=300):
+    rng = np.random.default_rng(sum(map(ord, symbol + interval)))
+    minutes = int(interval[:-1])
+    t = np.arange(numBars)
+    close = 20000 + 150 * np.sin(t / (6 if minutes == 5 else 4)) + rng.normal(0, 5, numBars)
+    index = pd.date_range("2024-01-01 09:15", periods=numBars, freq=f"{minutes}min")
+    return candles(rng=rng, close=close, gap=0.0002, spread=0.0001, index=index)
+
+class StubFiveEmaFetcher:
+    """
+    Serves the 5m candles as if time moves forward on each call to advance()
+    and the 15m candles made from those. The last candle served is still
+    forming and its close is off a bit.
+    """
+    def __init__(self, visibleBars=100):
+        self.bars = {symbol: makeBars(symbol, "5m", numBars=900)
+                     for _, symbol, _ in PKFiveEmaMonitor.seriesConfig}
+        self.visibleBars = visibleBars
+        self.calls = []
+
+    def advance(self, numBars):
+        self.visibleBars += numBars
+
+    def fetchFiveEmaBars(self, interval, symbols=None, start=None, proxyServer=None):
+        symbols = ["^NSEI", "^NSEBANK"] if symbols is None else symbols
+        self.calls.append((interval, tuple(symbols), start))
+        bars = {}
+        for symbol in symbols:
+            df = self.bars[symbol].head(self.visibleBars).copy()
+            df.iloc[-1, df.columns.get_loc("Close")] += 7.5
+            if interval != "5m":
+                df = df.resample(interval.replace("m", "min"), offset="15min").agg({column: how for column, how in PKIntradayStore.ohlcAggregation.items() if column in df.columns})
+            if start is not None:
+                df = df[df.index >= start]
+            bars[symbol] = df
+        return bars
+
+def referenceSignals(df, isSell, emaPeriod=5):
+    d = df[["High", "Low", "Close"]].copy()
+    d["5EMA"] = pktalib.EMA(d["Close"], timeperiod=emaPeriod)
+    d = d.round(2)
+    signals = []
+    for i in range(1, len(d)):
+        prev, cur = d.iloc[i - 1], d.iloc[i]
+        if isSell and prev.Low > prev["5EMA"] and prev.Low - prev["5EMA"] > 0.5 and cur.Close < cur["5EMA"]:
+            signals.append((i, prev.High))
+        elif not isSell and prev.High < prev["5EMA"] and prev["5EMA"] - prev.High > 0.5 and cur.Close > cur["5EMA"]:
+            signals.append((i, prev.Low))
+    return signals
+
+def test_incremental_updates_match_a_full_recompute():
+    fetcher = StubFiveEmaFetcher()
+    monitor = PKFiveEmaMonitor(fetcher)
+    monitor.refresh()
+    for step in [1, 0, 3, 1, 25]:
+        fetcher.advance(step)
+        monitor.refresh()
+        for label, symbol, interval in PKFiveEmaMonitor.seriesConfig:
+            series = monitor.series[label]
+            served = fetcher.fetchFiveEmaBars(interval, [symbol])[symbol]
+            assert len(series.bars) == len(served)
+            assert series.bars["Close"].iloc[-1] == served["Close"].iloc[-1]
+            expectedEma = pktalib.EMA(served["Close"], timeperiod=5).to_numpy()
+            assert np.allclose(series.ema, expectedEma, equal_nan=True)
+            assert series.signals == referenceSignals(served, series.isSell)
+    assert sum(len(series.signals) for series in monitor.series.values()) > 0
+
+def test_only_new_5m_candles_are_fetched_with_one_request():
+    fetcher = StubFiveEmaFetcher()
+    monitor = PKFiveEmaMonitor(fetcher)
+    monitor.refresh()
+    assert fetcher.calls == [("5m", ("^NSEI", "^NSEBANK"), None)]
+    lastTimestamp = monitor.series["nifty_sell"].lastTimestamp
+    fetcher.calls.clear()
+    fetcher.advance(2)
+    monitor.refresh()
+    assert fetcher.calls == [("5m", ("^NSEI", "^NSEBANK"), lastTimestamp)]
+
+def test_latestSignal():
+    series = PKFiveEmaSeries("nifty_sell", "^NSEI", "5m")
+    assert series.latestSignal().empty
+    fetcher = StubFiveEmaFetcher(visibleBars=300)
+    series.update(fetcher.fetchFiveEmaBars("5m", ["^NSEI"])["^NSEI"])
+    signal = series.latestSignal(riskReward=3)
+    position, sl = series.signals[-1]
+    assert signal.index[0] == series.bars.index[position]
+    assert signal["SL"].iloc[0] == sl
+    assert signal["Target"].iloc[0] == pytest.approx(signal["Close"].iloc[0] - (sl - signal["Close"].iloc[0]) * 3)
+
+def test_monitorFiveEma_with_live_monitor():
+    fetcher = StubFiveEmaFetcher(visibleBars=60)
+    monitor = PKFiveEmaMonitor(fetcher)
+    screener = ScreeningStatistics(None, None)
+    result_df = pd.DataFrame(columns=["Time", "Stock/Index", "Action", "SL", "Target", "R:R"])
+    last_signal = {}
+    result_df = screener.monitorFiveEma(fetcher=None, result_df=result_df, last_signal=last_signal, liveMonitor=monitor)
+    assert len(result_df) == 0
+    fetcher.advance(600)
+    result_df = screener.monitorFiveEma(fetcher=None, result_df=result_df, last_signal=last_signal, liveMonitor=monitor)
+    assert len(result_df) > 0
+    assert set(last_signal.keys()) == {label for label, _, _ in PKFiveEmaMonitor.seriesConfig}
@@ -0,0 +1,139 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from conftest import candles
+
+from pkscreener.classes.PKIntradayStore import PKIntradayStore
+from pkscreener.classes.StockScreener import StockScreener
+
+def minuteCandles(numCandles, seed=0):
+    # The candles of each minute the market is open
+    days = [pd.date_range(day + pd.Timedelta("9h15min"), periods=375, freq="1min", tz="Asia/Kolkata")
+            for day in pd.bdate_range("2024-06-03", periods=(numCandles // 375) + 1)]
+    index = days[0].append(days[1:])[:numCandles]
+    return candles(numCandles, seed, volatility=0.001, spread=0.001, index=index, adjClose=True)
+
+def screenerResample(data, interval):
+    # The way StockScreener resampled the intraday candles for each scan
+    rule = f"{interval[:-1]}{'T' if interval[-1] == 'm' else 'H'}"
+    resampled = data.resample(rule, offset="15min").agg(PKIntradayStore.ohlcAggregation)
+    return resampled[resampled["High"] > 0]
+
+def test_resampled_matches_the_screener_while_candles_come_in():
+    candles = minuteCandles(375 * 5)
+    store = PKIntradayStore()
+    for interval in ["5m", "15m", "30m", "60m", "1h", "7m"]:
+        store.remove("SBIN")
+        for numCandles in [400, 401, 405, 777, 1000, 1875]:
+            data = candles.head(numCandles).copy()
+            # The last candle is still forming
+            data.iloc[-1, data.columns.get_loc("Close")] += 0.5
+            assert store.resampled("SBIN", data, interval).equals(screenerResample(data, interval))
+    # Data that does not continue the stored candles replaces them
+    other = minuteCandles(500, seed=1)
+    assert store.resampled("SBIN", other, "15m").equals(screenerResample(other, "15m"))
+
+def test_views_are_updated_incrementally():
+    candles = minuteCandles(1000)
+    store = PKIntradayStore()
+    store.update("SBIN", candles.head(600), interval="1m")
+    assert store.view("SBIN", "15m").equals(screenerResample(candles.head(600), "15m"))
+    for numCandles in [601, 602, 650, 1000]:
+        # Fetched since the last candle we had, which may have been forming
+        store.update("SBIN", candles.iloc[store.candles["SBIN"].index.searchsorted(store.lastTimestamp("SBIN")):numCandles], interval="1m")
+        assert len(store.candles["SBIN"]) == numCandles
+        assert store.view("SBIN", "15m").equals(screenerResample(candles.head(numCandles), "15m"))
+        assert store.view("SBIN", "5m").equals(screenerResample(candles.head(numCandles), "5m"))
+    assert store.lastTimestamp("SBIN") == candles.index[999]
+    assert store.view("TCS", "5m") is None
+
+def test_canServe():
+    store = PKIntradayStore(maxSymbols=2)
+    assert not store.canServe("SBIN", "5m")
+    store.update("SBIN", minuteCandles(100).resample("5min", offset="15min").agg(PKIntradayStore.ohlcAggregation).dropna(), interval="5m")
+    assert store.canServe("SBIN", "15m") and store.canServe("SBIN", "5m") and store.canServe("SBIN", "1h")
+    assert not store.canServe("SBIN", "1m") and not store.canServe("SBIN", "7m") and not store.canServe("SBIN", "1wk")
+    assert store.canServe("SBIN", "15m", maxAgeSeconds=60)
+    store.updatedAt["SBIN"] -= 120
+    assert not store.canServe("SBIN", "15m", maxAgeSeconds=60)
+    # The least recently updated symbols get dropped
+    store.update("TCS", minuteCandles(10), interval="1m")
+    store.update("INFY", minuteCandles(10), interval="1m")
+    assert list(store.candles.keys()) == ["TCS", "INFY"]
+    assert PKIntradayStore.inferInterval(minuteCandles(10)) == "1m"
+
+def test_getRelevantDataForStock_resamples_earlier_candles_instead_of_fetching():
+    screener = StockScreener()
+    screener.isTradingTime = False
+    storeKey = "SBIN:5d:2024-06-28"
+    StockScreener.intradayStore.remove(storeKey)
+    candles = minuteCandles(375 * 3)
+    configManager = MagicMock(candlePeriodFrequency="d", candleDurationFrequency="m", duration="1m")
+    fetcher = MagicMock()
+    fetcher.fetchStockData.return_value = candles
+    args = dict(totalSymbols=1, shouldCache=False, stock="SBIN", downloadOnly=False, printCounter=False, backtestDuration=0,
+                hostRef=MagicMock(), objectDictionary={}, configManager=configManager, fetcher=fetcher, period="5d")
+    with patch("pkscreener.classes.StockScreener.PKDateUtilities.tradingDate", return_value=pd.Timestamp("2024-06-28")):
+        screener.getRelevantDataForStock(duration="1m", **args)
+        assert fetcher.fetchStockData.call_count == 1
+        for interval in ["5m", "15m"]:
+            data = screener.getRelevantDataForStock(duration=interval, **args)
+            assert data.equals(screenerResample(candles, interval))
+        assert fetcher.fetchStockData.call_count == 1
+        # Not even after the trading hours are the candles served forever
+        StockScreener.intradayStore.updatedAt[storeKey] -= StockScreener.intradayStore.maxAgeSecondsAfterHours + 1
+        screener.getRelevantDataForStock(duration="5m", **args)
+        assert fetcher.fetchStockData.call_count == 2
+        # Coarser candles can't give the finer ones
+        StockScreener.intradayStore.remove(storeKey)
+        fetcher.fetchStockData.return_value = screenerResample(candles, "15m")
+        screener.getRelevantDataForStock(duration="15m", **args)
+        screener.getRelevantDataForStock(duration="5m", **args)
+        assert fetcher.fetchStockData.call_count == 4
+    # Nor are the candles of the previous trading day
+    with patch("pkscreener.classes.StockScreener.PKDateUtilities.tradingDate", return_value=pd.Timestamp("2024-07-01")):
+        screener.getRelevantDataForStock(duration="15m", **args)
+        assert fetcher.fetchStockData.call_count == 5
+    StockScreener.intradayStore.remove(storeKey)
+    StockScreener.intradayStore.remove("SBIN:5d:2024-07-01")
+
+@pytest.mark.benchmark
+def test_resampled_benchmark(capsys):
+    candles = minuteCandles(375 * 20)
+    start = time.perf_counter()
+    for numCandles in range(7000, 7500):
+        screenerResample(candles.head(numCandles), "15m")
+    full = time.perf_counter() - start
+    store = PKIntradayStore()
+    start = time.perf_counter()
+    for numCandles in range(7000, 7500):
+        store.resampled("SBIN", candles.head(numCandles), "15m")
+    incremental = time.perf_counter() - start
+    with capsys.disabled():
+        print(f"\n[+] 1m -> 15m for 500 refreshes of 7000+ candles: full resample {full:.3f}s, incremental {incremental:.3f}s")
@@ -0,0 +1,168 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import pickle
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from pkscreener.classes.PKOrderInfo import PKOrderInfo
+from pkscreener.classes.PKScanRunner import PKScanRunner
+
+class StubIntraDay:
+    """
+    Gives the price and order info like Intra_Day after some latency. Symbols
+    starting with FAIL raise errors, the ones starting with THROTTLE come
+    back empty (as when NSE throttled us) and the ones starting with PRICE or
+    ORDER only have that part of the info.
+    """
+    latency = 0.02
+    lock = threading.Lock()
+    requests = []
+
+    def __init__(self, ticker):
+        self.symbol = ticker
+
+    def price_order_info(self):
+        with StubIntraDay.lock:
+            StubIntraDay.requests.append(self.symbol)
+        time.sleep(StubIntraDay.latency)
+        if self.symbol.startswith("FAIL"):
+            raise ValueError("Expecting value")
+        if self.symbol.startswith("THROTTLE"):
+            return None
+        number = sum(map(ord, self.symbol))
+        priceInfo = {"Stock": self.symbol, "LTP": number / 10, "%Chng": 1.23, "VWAP": number / 10 - 1,
+                     "LwrCP": number / 20, "UprCP": number / 5}
+        tradeInfo = {"Stock": self.symbol, "BidQty": number * 10, "AskQty": number * 7, "DayVola": 1.5, "YrVola": 30.2,
+                     "MktCap(Cr)": f"{number}k", "FFMCap(Cr)": "2k", "DelQty": number, "Del(%)": 45.5}
+        if self.symbol.startswith("ORDER"):
+            priceInfo.update({"LTP": 0, "%Chng": 0, "VWAP": 0, "LwrCP": 0, "UprCP": 0})
+        if self.symbol.startswith("PRICE"):
+            tradeInfo.update({"BidQty": 0, "AskQty": 0, "DayVola": 0, "YrVola": 0, "MktCap(Cr)": 0, "FFMCap(Cr)": 0,
+                              "DelQty": 0, "Del(%)": 0})
+        return pd.DataFrame([priceInfo]).merge(pd.DataFrame([tradeInfo]), on="Stock", how="inner")
+
+@pytest.fixture
+def orderInfo():
+    service = PKOrderInfo()
+    defaults = service.__dict__.copy()
+    service.clearCache()
+    StubIntraDay.requests = []
+    with patch("pkscreener.classes.PKOrderInfo.Intra_Day", new=StubIntraDay):
+        yield service
+    service.clearCache()
+    service.__dict__.update(defaults)
+
+def test_fetchAll_returns_the_order_info_and_caches_it(orderInfo):
+    result = orderInfo.fetchAll(["sbin", "TCS", "FAILCO"])
+    assert sorted(result.keys()) == ["FAILCO", "SBIN", "TCS"]
+    assert result["FAILCO"] is None
+    sbin = result["SBIN"]
+    number = sum(map(ord, "SBIN"))
+    assert list(sbin.columns) == ["Stock", "LTP", "%Chng", "VWAP", "LwrCP", "UprCP", "BidQty", "AskQty", "DayVola",
+                                  "YrVola", "MktCap(Cr)", "FFMCap(Cr)", "DelQty", "Del(%)"]
+    assert sbin["Stock"].iloc[0] == "SBIN"
+    assert sbin["BidQty"].iloc[0] == number * 10 and sbin["LTP"].iloc[0] == number / 10
+    assert len(StubIntraDay.requests) == 3
+    # Looked up from memory now, except for the one that failed
+    assert orderInfo.orderInfo("SBIN") is sbin
+    assert orderInfo.orderInfo("FAILCO") is None
+    assert len(StubIntraDay.requests) == 4
+    # And fetched again once stale
+    orderInfo.ttlSeconds = -1
+    assert orderInfo.orderInfo("SBIN")["BidQty"].iloc[0] == number * 10
+    assert len(StubIntraDay.requests) == 5
+
+def test_only_complete_order_info_is_used(orderInfo):
+    result = orderInfo.fetchAll(["PRICEONLY", "ORDERONLY", "THROTTLE1", "SBIN"])
+    assert result["PRICEONLY"] is None and result["ORDERONLY"] is None and result["THROTTLE1"] is None
+    assert result["SBIN"] is not None
+    # None of those are kept to be looked up again
+    assert orderInfo.cachedOrderInfo("PRICEONLY") is None and orderInfo.cachedOrderInfo("ORDERONLY") is None
+
+def test_fetches_are_batched_over_a_bounded_pool(orderInfo):
+    orderInfo.maxConnections = 3
+    orderInfo.batchSize = 4
+    threads = set()
+    def fetchOrderInfo(symbol):
+        threads.add(threading.current_thread().name)
+        return None
+    with patch.object(orderInfo, "fetchOrderInfo", side_effect=fetchOrderInfo) as mock_fetch:
+        orderInfo.fetchAll([f"STK{i}" for i in range(10)])
+    assert mock_fetch.call_count == 10
+    assert len(threads) <= 3
+
+def test_workers_get_a_copy_of_the_fetched_order_info(orderInfo):
+    items = [[None, None, 29] + [None] * 9 + [symbol] for symbol in ["SBIN", "TCS"]]
+    assert PKScanRunner.needsOrderInfo(items)
+    assert not PKScanRunner.needsOrderInfo([[None, None, 7] + [None] * 10])
+    PKScanRunner.prefetchOrderInfo(items)
+    copied = pickle.loads(pickle.dumps(orderInfo))
+    numRequests = len(StubIntraDay.requests)
+    assert copied.orderInfo("TCS").equals(orderInfo.orderInfo("TCS"))
+    assert len(StubIntraDay.requests) == numRequests
+    # However long the scan takes, it doesn't fetch them all over again
+    copied.ttlSeconds = -1
+    assert copied.cachedOrderInfo("SBIN") is not None
+    # Unlike the next scan
+    copied.beginScan()
+    assert copied.cachedOrderInfo("SBIN") is None
+
+def test_order_info_is_fetched_before_the_timed_preparation(orderInfo):
+    items = [[None, None, 29] + [None] * 9 + [symbol] for symbol in ["SBIN", "TCS"]]
+    def prepareToRunScan(*args):
+        # The workers get started with the order info already fetched
+        assert orderInfo.cachedOrderInfo("SBIN") is not None and orderInfo.cachedOrderInfo("TCS") is not None
+        return MagicMock(), MagicMock(), [], None
+    savedQueues = (PKScanRunner.tasks_queue, PKScanRunner.results_queue, PKScanRunner.consumers)
+    try:
+        with patch("pkscreener.classes.PKScanRunner.PKScanRunner.prepareToRunScan", side_effect=prepareToRunScan) as mock_prepare:
+            PKScanRunner.runScanWithParams(None, None, None, None, {}, {}, True, 0, "X", 29, 1, items, None, None, None,
+                                           lambda *args, **kwargs: (None, None, None), None, None, None, None)
+    finally:
+        PKScanRunner.tasks_queue, PKScanRunner.results_queue, PKScanRunner.consumers = savedQueues
+    mock_prepare.assert_called_once()
+
+@pytest.mark.benchmark
+def test_bulk_fetch_benchmark(orderInfo, capsys):
+    symbols = [f"STK{i:03d}" for i in range(200)]
+    start = time.perf_counter()
+    for symbol in symbols[:20]:
+        orderInfo.fetchOrderInfo(symbol)
+    serial = (time.perf_counter() - start) * len(symbols) / 20
+    start = time.perf_counter()
+    result = orderInfo.fetchAll(symbols)
+    bulk = time.perf_counter() - start
+    assert all(result[symbol] is not None for symbol in symbols)
+    assert bulk < serial / 3
+    start = time.perf_counter()
+    for symbol in symbols:
+        orderInfo.orderInfo(symbol)
+    cached = time.perf_counter() - start
+    with capsys.disabled():
+        print(f"\n[+] Bid/ask of {len(symbols)} stocks at {StubIntraDay.latency*1000:.0f}ms latency: one by one ~{serial:.2f}s, bulk {bulk:.2f}s, cached {cached:.4f}s")
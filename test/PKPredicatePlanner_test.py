@@ -0,0 +1,134 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import multiprocessing
+from unittest.mock import MagicMock, patch
+
+import pytest
+from conftest import candles
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.CandlePatterns import CandlePatterns
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.Pktalib import pktalib
+from pkscreener.classes.PKPredicatePlanner import PKPredicatePlanner
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+from pkscreener.classes.StockScreener import StockScreener
+
+checks = ["ltp", "volume", "validity", "option"]
+
+@pytest.fixture
+def planner(tmp_path):
+    planner = PKPredicatePlanner()
+    savedAttributes = (planner.statsFilePath, planner.stats, planner.statsFileStat, planner.plans, planner.observations)
+    planner.statsFilePath = str(tmp_path / "screening_checks.json")
+    planner.stats = None
+    planner.statsFileStat = None
+    planner.plans = {}
+    planner.observations = []
+    yield planner
+    planner.statsFilePath, planner.stats, planner.statsFileStat, planner.plans, planner.observations = savedAttributes
+
+def observations(scanKey, check, numStocks, seconds, rejections):
+    return [(scanKey, check, seconds, i >= rejections) for i in range(numStocks)]
+
+def test_plan_orders_the_cheap_and_selective_checks_first(planner):
+    # Not enough history yet
+    assert planner.plan("5:3:3", checks) == checks
+    planner.mergeObservations(observations("5:3:3", "ltp", 50, 0.003, 5)
+                              + observations("5:3:3", "volume", 50, 0.001, 0)
+                              + observations("5:3:3", "validity", 50, 0.0001, 0)
+                              + observations("5:3:3", "option", 50, 0.001, 40))
+    assert planner.plan("5:3:3", checks) == ["option", "ltp", "validity", "volume"]
+    # Never ahead of what it depends on
+    assert planner.plan("5:3:3", checks, dependencies={"option": ["volume"]}) == ["ltp", "validity", "volume", "option"]
+    assert planner.plan("5:3:3", checks, dependencies={"option": ["missing"]}) == ["option", "ltp", "validity", "volume"]
+    # History is kept per scan type
+    assert planner.plan("12:3:3", checks) == checks
+
+def test_measure_records_rejections_and_stats_persist(planner):
+    with planner.measure("5:3:3", "ltp"):
+        pass
+    with pytest.raises(ValueError):
+        with planner.measure("5:3:3", "option"):
+            raise ValueError("Not eligible")
+    observed = planner.popObservations()
+    assert [(check, passed) for _, check, _, passed in observed] == [("ltp", True), ("option", False)]
+    assert planner.popObservations() == []
+    planner.mergeObservations(observed)
+    planner.saveStats()
+    stats = planner.stats
+    planner.stats = None
+    assert planner.loadStats() == stats
+    assert planner.stats["5:3:3"]["option"][:2] == [1, 1]
+    planner.maxSamples = 1
+    try:
+        planner.mergeObservations(observed)
+    finally:
+        planner.maxSamples = 10000
+    assert planner.stats["5:3:3"]["ltp"][:2] == [1.5, 0]
+
+def test_plans_follow_the_stats_saved_by_later_scans(planner):
+    # Like a worker that planned with the stats from before the last scan
+    assert planner.plan("5:3:3", checks) == checks
+    savedStats = {"5:3:3": {"ltp": [50, 5, 0.15], "volume": [50, 0, 0.05], "validity": [50, 0, 0.005], "option": [50, 40, 0.05]}}
+    with open(planner.statsFilePath, "w") as f:
+        json.dump(savedStats, f)
+    assert planner.plan("5:3:3", checks) == checks
+    planner.statsCheckedAt = 0
+    assert planner.plan("5:3:3", checks) == ["option", "ltp", "validity", "volume"]
+    # Saving its own stats doesn't make it load them all over again
+    planner.saveStats()
+    planner.stats["5:3:3"]["ltp"][0] = 1
+    planner.statsCheckedAt = 0
+    assert planner.loadStats()["5:3:3"]["ltp"][0] == 1
+
+def vwap(high, low, close, volume, anchor=None):
+    return ((high + low + close) / 3 * volume).cumsum() / volume.cumsum()
+
+def test_reordered_checks_screen_the_same_results(planner):
+    configManager = tools()
+    configManager.getConfig(parser)
+    hostRef = MagicMock(configManager=configManager, screener=ScreeningStatistics(configManager, default_logger()),
+                        candlePatterns=CandlePatterns(), processingCounter=multiprocessing.Value("i", 0),
+                        processingResultsCounter=multiprocessing.Value("i", 0), objectDictionaryPrimary={},
+                        objectDictionarySecondary={}, rs_strange_index=-1)
+    userArgs = MagicMock(log=False, monitor=None, usertag=None, systemlaunched=False, simulate=None)
+    screener = StockScreener()
+    def screenedResults(executeOption):
+        results = []
+        for seed in range(6):
+            result = screener.screenStocks("X", "INDIA", executeOption, 3, 10, 5, 30, 70, 3, 5, 100, False, f"STK{seed}", False, False, 1.0,
+                                           userArgs=userArgs, testData=candles(300, seed, drift=0.001, gap=0.01, spread=0.005, adjClose=True), hostRef=hostRef)
+            results.append(None if result is None else (list(result[0].items()), list(result[1].items())))
+        return results
+    with patch.object(pktalib, "VWAP", side_effect=vwap):
+        for executeOption, reorderedChecks in [(1, ["volume", "option", "validity", "ltp"]), (3, ["option", "validity", "volume", "ltp"]), (5, ["option", "volume", "ltp", "validity"])]:
+            planner.popObservations()
+            results = screenedResults(executeOption)
+            assert any(result is not None for result in results)
+            assert set(check for _, check, _, _ in planner.popObservations()) == set(checks)
+            with patch.object(PKPredicatePlanner, "plan", return_value=reorderedChecks):
+                assert repr(screenedResults(executeOption)) == repr(results)
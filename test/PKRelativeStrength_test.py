@@ -0,0 +1,136 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import datetime
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from conftest import stockCache
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.PKRelativeStrength import PKRelativeStrength
+from pkscreener.classes.PKScanRunner import PKScanRunner
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+def unevenHistory(i, df):
+    if i % 3 == 0:
+        df["Adj Close"] = df["Close"] * 0.98
+    if i % 7 == 0:
+        # Candles missing for a few days
+        df = df.drop(df.index[10:15])
+    return df
+
+def fullData(stockData):
+    # The candles as the screener sees them, most recent first
+    return pd.DataFrame(stockData["data"], columns=stockData["columns"], index=stockData["index"])[::-1]
+
+@pytest.fixture
+def screener():
+    configManager = tools()
+    configManager.getConfig(parser)
+    return ScreeningStatistics(configManager, default_logger())
+
+def test_precompute_matches_calc_relative_strength(screener):
+    stockDict = stockCache(50, (100, 300), alter=unevenHistory)
+    precomputed = PKRelativeStrength().precompute(stockDict)
+    assert set(precomputed.keys()) == set(stockDict.keys())
+    for stock, stockData in stockDict.items():
+        strength, numCandles, lastDate = precomputed[stock]
+        df = fullData(stockData)
+        assert (numCandles, lastDate) == (len(df), df.index.max())
+        assert strength == pytest.approx(screener.calc_relative_strength(df), rel=1e-12)
+    ratings = PKRelativeStrength().ratings
+    strongest = max(precomputed.keys(), key=lambda stock: precomputed[stock][0])
+    weakest = min(precomputed.keys(), key=lambda stock: precomputed[stock][0])
+    assert ratings[strongest] == 100 and ratings[weakest] == 2
+    assert PKRelativeStrength().precompute({"NONE": None, "EMPTY": {"columns": ["Close"], "data": [], "index": []}}) == {}
+
+def test_findRSRating_reads_the_precomputed_score_for_the_same_candles(screener):
+    stockDict = stockCache(10, (100, 300), alter=unevenHistory)
+    screener.relativeStrengths = PKRelativeStrength().precompute(stockDict)
+    for stock, stockData in stockDict.items():
+        expected, expectedDict = fullData(stockData), {}
+        expectedRating = screener.findRSRating(index_rs_value=1.5, df=expected, saveDict=expectedDict, screenDict={})
+        df, saveDict = fullData(stockData), {}
+        with patch.object(screener, "calc_relative_strength") as calc:
+            rating = screener.findRSRating(index_rs_value=1.5, df=df, saveDict=saveDict, screenDict={}, stockName=stock)
+            calc.assert_not_called()
+        assert rating == expectedRating and saveDict == expectedDict
+        # Neither of them changed the candles
+        assert df.equals(fullData(stockData)) and expected.equals(df)
+    # Other candles than the precomputed ones
+    stock, stockData = list(stockDict.items())[0]
+    df = fullData(stockData).head(50)
+    with patch.object(screener, "calc_relative_strength", return_value=1.2) as calc:
+        assert screener.findRSRating(index_rs_value=1.5, df=df, saveDict={}, screenDict={}, stockName=stock) == 80
+        calc.assert_called_once()
+
+def test_indexStrength_is_fetched_once_per_trading_day(tmp_path):
+    relativeStrength = PKRelativeStrength()
+    savedAttributes = (relativeStrength.baselinesFilePath, relativeStrength.baselines)
+    relativeStrength.baselinesFilePath = str(tmp_path / "index_strength.json")
+    relativeStrength.baselines = None
+    indexData = stockCache(1, (100, 300), split=False)["STK0000"]
+    fetchIndexData = MagicMock(return_value=indexData)
+    try:
+        with patch("pkscreener.classes.PKRelativeStrength.PKDateUtilities.tradingDate", return_value=datetime.date(2024, 6, 28)):
+            strength = relativeStrength.indexStrength("^NSEI:1y:1d", fetchIndexData)
+            assert strength == relativeStrength.strength(indexData) > 0
+            relativeStrength.baselines = None
+            assert relativeStrength.indexStrength("^NSEI:1y:1d", fetchIndexData) == strength
+            assert fetchIndexData.call_count == 1
+        with patch("pkscreener.classes.PKRelativeStrength.PKDateUtilities.tradingDate", return_value=datetime.date(2024, 7, 1)):
+            relativeStrength.indexStrength("^NSEI:1y:1d", fetchIndexData)
+            assert fetchIndexData.call_count == 2
+            # Failed fetches are not cached
+            assert relativeStrength.indexStrength("^NSEBANK:1y:1d", MagicMock(return_value=None)) == -1
+            assert list(relativeStrength.baselines.keys()) == ["^NSEI:1y:1d:2024-07-01"]
+    finally:
+        relativeStrength.baselinesFilePath, relativeStrength.baselines = savedAttributes
+
+def test_needsRelativeStrength():
+    def item(executeOption, respChartPattern, usertag=None):
+        return (None, None, executeOption) + (None,) * 5 + (respChartPattern,) + (None,) * 8 + (MagicMock(usertag=usertag),)
+    assert PKScanRunner.needsRelativeStrength([item(7, 4)])
+    assert PKScanRunner.needsRelativeStrength([item(7, 8)])
+    assert PKScanRunner.needsRelativeStrength([item(12, 0, usertag="VCP")])
+    assert not PKScanRunner.needsRelativeStrength([item(7, 3)])
+    assert not PKScanRunner.needsRelativeStrength([])
+
+@pytest.mark.benchmark
+def test_relative_strength_benchmark(screener, capsys):
+    stockDict = stockCache(2000, (100, 300), alter=unevenHistory)
+    start = time.perf_counter()
+    PKRelativeStrength().precompute(stockDict)
+    panelTime = time.perf_counter() - start
+    frames = [fullData(stockData) for stockData in stockDict.values()]
+    start = time.perf_counter()
+    for df in frames:
+        screener.calc_relative_strength(df)
+    perStockTime = time.perf_counter() - start
+    with capsys.disabled():
+        print(f"\n[+] Relative strength of {len(stockDict)} stocks: panel {panelTime:.3f}s, per stock {perStockTime:.3f}s")
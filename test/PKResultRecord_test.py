@@ -0,0 +1,105 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import pickle
+
+import numpy as np
+import pandas as pd
+from PKDevTools.classes.ColorText import colorText
+
+from pkscreener.classes.PKResultRecord import PKResultPresenter, PKResultRecord, PKSignal
+from pkscreener.classes.PKUnmatchedResult import PKUnmatchedResult
+
+def test_record_keeps_plain_values_and_signals():
+    record = PKResultRecord({"Stock": "", "LTP": 0})
+    PKResultRecord.setField(record, record, "LTP", 123.456, fmt="%.2f")
+    PKResultRecord.setField(record, record, "%Chng", -1.5, PKSignal.BEARISH)
+    assert record["LTP"] == 123.456 and record["%Chng"] == -1.5
+    assert record.signal("%Chng") == PKSignal.BEARISH
+    assert record.signal("Stock") == PKSignal.NONE
+    screenDict = PKResultPresenter.screenDict(record)
+    assert screenDict["LTP"] == "123.46"
+    assert screenDict["%Chng"] == colorText.FAIL + "-1.5" + colorText.END
+    assert screenDict["Stock"] == ""
+    # Setting the field again forgets the earlier style
+    PKResultRecord.setField(record, record, "LTP", 100)
+    assert PKResultPresenter.presented(record, "LTP") == 100
+
+def test_appended_parts_keep_their_signals():
+    record = PKResultRecord({"Pattern": ""})
+    PKResultRecord.appendField(record, record, "Pattern", "Doji")
+    PKResultRecord.appendField(record, record, "Pattern", "3 Outside Up", parts=[("3 Inside Up", PKSignal.BULLISH)])
+    PKResultRecord.appendField(record, record, "Pattern", " (Potential)", PKSignal.BULLISH, separator="")
+    assert record["Pattern"] == "Doji, 3 Outside Up (Potential)"
+    assert PKResultPresenter.presented(record, "Pattern") == (
+        "Doji, " + colorText.GREEN + "3 Inside Up" + colorText.END
+        + colorText.GREEN + " (Potential)" + colorText.END)
+    copied = record.copy()
+    PKResultRecord.appendField(copied, copied, "Pattern", "Marubozu")
+    assert record["Pattern"] == "Doji, 3 Outside Up (Potential)"
+    assert copied["Pattern"].endswith(", Marubozu")
+
+def test_plain_dicts_get_the_styled_screen_values():
+    screenDict, saveDict = {}, {}
+    PKResultRecord.setField(screenDict, saveDict, "Trend", "Strong Up", PKSignal.STRONG_BULLISH)
+    assert saveDict["Trend"] == "Strong Up"
+    assert screenDict["Trend"] == colorText.BOLD + colorText.GREEN + "Strong Up" + colorText.END
+    PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "50MA-Support", PKSignal.BULLISH)
+    PKResultRecord.appendField(screenDict, saveDict, "MA-Signal", "BearCross-200MA", PKSignal.BEARISH)
+    assert saveDict["MA-Signal"] == "50MA-Support, BearCross-200MA"
+    assert screenDict["MA-Signal"] == (colorText.GREEN + "50MA-Support" + colorText.END + ", "
+                                       + colorText.FAIL + "BearCross-200MA" + colorText.END)
+
+def test_links_and_presented_results():
+    record = PKResultRecord()
+    PKResultRecord.setField(record, record, "Stock", "SBIN", PKSignal.HIGHLIGHT, link="https://example.com/SBIN")
+    assert record["Stock"] == "SBIN"
+    assert PKResultPresenter.presented(record, "Stock") == (
+        colorText.WHITE + "\x1B]8;;https://example.com/SBIN\x1B\\SBIN\x1B]8;;\x1B\\" + colorText.END)
+    result = PKUnmatchedResult((record, record, None, "SBIN", 0))
+    presented = PKResultPresenter.presentedResult(result)
+    assert isinstance(presented, PKUnmatchedResult)
+    assert type(presented[0]) is dict and presented[1] is record
+    # Results that were cached as plain dictionaries are shown as they are
+    older = ({"Stock": "SBIN"}, {"Stock": "SBIN"}, None, "SBIN", 0)
+    assert PKResultPresenter.presentedResult(older)[0] is older[0]
+    assert PKResultPresenter.presentedResult(None) is None
+
+def test_records_survive_pickling():
+    record = PKResultRecord({"Stock": "SBIN"})
+    PKResultRecord.setField(record, record, "%Chng", 2.0, PKSignal.BULLISH)
+    loaded = pickle.loads(pickle.dumps(record))
+    assert loaded == record and loaded.signal("%Chng") == PKSignal.BULLISH
+    assert pd.DataFrame([record]).to_dict("records") == [{"Stock": "SBIN", "%Chng": 2.0}]
+
+def test_styledChanges_colours_by_the_right_predictions():
+    df = pd.DataFrame({"Stock": ["A", "B", "C"], "1-Pd": [1.25, -0.5, np.nan], "Trend": ["Up", "Down", ""]})
+    styled = PKResultPresenter.styledChanges(df)
+    assert styled["1-Pd"].tolist()[:2] == [colorText.GREEN + "1.25%" + colorText.END,
+                                           colorText.FAIL + "-0.50%" + colorText.END]
+    assert np.isnan(styled["1-Pd"].iloc[2])
+    assert styled["Trend"].tolist() == df["Trend"].tolist()
+    assert df["1-Pd"].iloc[0] == 1.25
+    styled = PKResultPresenter.styledChanges(df, sellSignal=True)
+    assert styled["1-Pd"].iloc[1] == colorText.GREEN + "-0.50%" + colorText.END
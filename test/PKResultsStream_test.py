@@ -0,0 +1,167 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import json
+import os
+import pickle
+from argparse import Namespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+from PKDevTools.classes.ColorText import colorText
+
+from pkscreener.classes.PKResultRecord import PKResultPresenter, PKResultRecord, PKSignal
+from pkscreener.classes.PKUnmatchedResult import PKUnmatchedResult
+from pkscreener.classes.PKResultsStream import PKResultsStream
+
+def saveDict(i):
+    return {"Stock": f"STK{i:04d}", "LTP": np.float64(100 + i * 1.25), "%Chng": 1.5, "Volume": np.int64(1000 * i),
+            "Pattern": "Bullish", "52Wk-H": np.nan, "Date": pd.Timestamp("2024-06-28"), "Breakout": np.inf}
+
+def test_results_are_written_and_pushed_as_they_arrive(tmp_path):
+    filePath = os.path.join(tmp_path, "results.ndjson")
+    received = []
+    with PKResultsStream(filePath=filePath, options="X:12:9:2.5", subscribers=[received.append]) as stream:
+        stream.append({"Stock": "STK0001", "LTP": "\x1b[92m101.25\x1b[0m"}, saveDict(1), stock="STK0001")
+        # Already on disk and with the subscribers before the scan finishes
+        assert len(list(PKResultsStream.records(filePath))) == 1
+        assert len(received) == 1 and received[0]["screen"]["LTP"] == "\x1b[92m101.25\x1b[0m"
+        for i in range(2, 5):
+            stream.append({}, saveDict(i))
+    with open(filePath) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["type"] for record in records] == ["header", "result", "result", "result", "result", "end"]
+    assert records[0]["options"] == "X:12:9:2.5"
+    assert records[-1]["count"] == 4
+    assert [record["stock"] for record in records[1:-1]] == ["STK0001", "STK0002", "STK0003", "STK0004"]
+    result = records[1]["result"]
+    assert result["LTP"] == 101.25 and result["Volume"] == 1000
+    assert result["52Wk-H"] is None and result["Breakout"] is None
+    assert result["Date"] == "2024-06-28T00:00:00"
+    assert [record["seq"] for record in received] == [1, 2, 3, 4]
+
+def test_readResults_skips_incomplete_lines(tmp_path):
+    filePath = os.path.join(tmp_path, "results.ndjson")
+    stream = PKResultsStream(filePath=filePath)
+    for i in range(3):
+        stream.append({}, saveDict(i))
+    # The scan is still running and the last record is half written
+    stream.file.write('{"type": "result", "seq": 4, "res')
+    stream.file.flush()
+    df = PKResultsStream.readResults(filePath)
+    assert df["Stock"].tolist() == ["STK0000", "STK0001", "STK0002"]
+    assert df["LTP"].tolist() == [100.0, 101.25, 102.5]
+    stream.file.write("\n")
+    stream.close()
+    assert stream.file is None
+
+def test_failing_subscribers_do_not_stop_the_stream():
+    subscriber = MagicMock()
+    stream = PKResultsStream(subscribers=[MagicMock(side_effect=ValueError("boom")), subscriber])
+    stream.append({}, saveDict(1))
+    stream.append({}, saveDict(2))
+    assert subscriber.call_count == 2
+    stream.close()
+
+def test_only_the_matches_of_backtests_are_streamed():
+    stream = PKResultsStream()
+    matched = ({}, saveDict(1), None, "STK0001", 5)
+    # Coming back from the workers (or the results cache) in a backtest
+    unmatched = pickle.loads(pickle.dumps(PKUnmatchedResult(({}, saveDict(2), None, "STK0002", 5))))
+    assert isinstance(unmatched, PKUnmatchedResult) and unmatched[3] == "STK0002"
+    assert stream.appendResult(unmatched) is None
+    assert stream.appendResult(None) is None
+    assert stream.appendResult(matched)["stock"] == "STK0001"
+    assert stream.count == 1
+    stream.close()
+
+def test_consoleSubscriber_prints_each_match():
+    stream = PKResultsStream(subscribers=[PKResultsStream.consoleSubscriber])
+    with patch("PKDevTools.classes.OutputControls.OutputControls.printOutput") as mock_print:
+        stream.append({"Stock": "STK0001", "LTP": 101.25, "%Chng": "1.5%"}, saveDict(1), stock="STK0001")
+    output = mock_print.call_args[0][0]
+    assert "Found STK0001" in output and "101.25" in output and "1.5%" in output
+
+def test_getResultsStream_only_when_asked_for(tmp_path):
+    from pkscreener.globals import getResultsStream
+    assert getResultsStream(Namespace(options="X:12:9", monitor=None)) is None
+    assert getResultsStream(Namespace(options="X:12:9", monitor=None, streamresults=None)) is None
+    filePath = os.path.join(tmp_path, "scan", "results.ndjson")
+    stream = getResultsStream(Namespace(options="X:12:9", monitor=None, streamresults=filePath))
+    assert stream.filePath == filePath
+    assert PKResultsStream.consoleSubscriber in stream.subscribers
+    stream.close()
+    stream = getResultsStream(Namespace(options="X:12:9", monitor="X", streamresults=filePath))
+    assert len(stream.subscribers) == 0
+    stream.close()
+
+def test_records_read_back_are_presented_as_streamed(tmp_path):
+    filePath = os.path.join(tmp_path, "results.ndjson")
+    record = PKResultRecord(saveDict(1))
+    PKResultRecord.setField(record, record, "Stock", "STK0001", PKSignal.HIGHLIGHT, link="https://example.com/STK0001")
+    PKResultRecord.setField(record, record, "LTP", 101.25, PKSignal.BULLISH, fmt="%.2f")
+    PKResultRecord.appendField(record, record, "Pattern", "3 Outside Up", parts=[("3 Inside Up", PKSignal.BULLISH)])
+    with PKResultsStream(filePath=filePath) as stream:
+        stream.append(PKResultPresenter.screenDict(record), record)
+        stream.append({}, saveDict(2))
+    records = list(PKResultsStream.resultRecords(filePath))
+    assert [r["Stock"] for r in records] == ["STK0001", "STK0002"]
+    assert PKResultPresenter.screenDict(records[0]) == PKResultsStream.jsonValue(PKResultPresenter.screenDict(record))
+    assert records[1].signal("LTP") == PKSignal.NONE
+
+def test_botSubscriber_sends_each_match_to_the_user():
+    sendMessage = MagicMock()
+    stream = PKResultsStream(subscribers=[PKResultsStream.botSubscriber(sendMessage, user="12345")])
+    stream.append({}, saveDict(1), stock="STK0001")
+    sendMessage.assert_called_once_with(message="1. STK0001 (LTP: 101.25, %Chng: 1.5)", user="12345")
+
+def test_monitorSubscriber_fills_the_widget_as_matches_arrive():
+    monitor = MagicMock(maxNumRowsInEachResult=3)
+    stream = PKResultsStream(subscribers=[PKResultsStream.monitorSubscriber(monitor, "X:12:9", chosenMenu="Scanners")])
+    for i in range(1, 5):
+        stream.append({"Stock": f"STK{i:04d}", "LTP": 100 + i}, saveDict(i))
+    # The widget shows only as many rows as fit in it
+    assert monitor.refresh.call_count == 2
+    kwargs = monitor.refresh.call_args.kwargs
+    assert kwargs["screenOptions"] == "X:12:9" and kwargs["chosenMenu"] == "Scanners"
+    assert kwargs["screen_df"].index.tolist() == ["STK0001", "STK0002"]
+    stream.close()
+
+def test_streamed_scans_build_the_final_tables_from_the_results_log(tmp_path):
+    from pkscreener import globals as gbl
+    filePath = os.path.join(tmp_path, "results.ndjson")
+    stream = PKResultsStream(filePath=filePath)
+    lstscreen, lstsave = [], []
+    for i in range(3):
+        record = PKResultRecord(saveDict(i))
+        PKResultRecord.setField(record, record, "%Chng", 1.5, PKSignal.BULLISH)
+        result = PKResultPresenter.presentedResult((record, record, None, f"STK{i:04d}", 0))
+        gbl.processResults("X", 30, result, lstscreen, lstsave, None, keepResults=False)
+        stream.appendResult(result)
+    # Nothing is held until the scan ends
+    assert lstscreen == [] and lstsave == []
+    records = list(PKResultsStream.resultRecords(filePath))
+    assert [PKResultPresenter.screenDict(r)["%Chng"] for r in records] == [colorText.GREEN + "1.5" + colorText.END] * 3
+    stream.close()
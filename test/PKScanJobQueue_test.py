@@ -0,0 +1,140 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from pkscreener.classes.PKScanJobQueue import PKScanJob, PKScanJobQueue
+
+class FakeScanRunner:
+    def __init__(self, results=None, error=None):
+        self.calls = []
+        self.release = threading.Event()
+        self.results = results if results is not None else pd.DataFrame({"Stock": ["SBIN", "TCS"], "LTP": [800.5, 4000.0], "%Chng": [1.2, -0.5]})
+        self.error = error
+
+    def __call__(self, options):
+        self.calls.append(options)
+        self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+@pytest.fixture
+def jobQueue():
+    queue = PKScanJobQueue()
+    queue.useProcesses = False
+    queue.maxWorkers = 2
+    queue.cacheTTLSeconds = 900
+    yield queue
+    queue.shutdown()
+    queue.clearCache()
+    queue.pendingJobs.clear()
+
+def test_jobKey_normalises_options(jobQueue):
+    assert jobQueue.jobKey("x:12:9:2.5:D:D:D")[0] == "X:12:9:2.5"
+    assert jobQueue.jobKey("X_12_9_2.5")[0] == jobQueue.jobKey(" X:12::9:2.5 ")[0]
+    assert jobQueue.jobKey("X:12:9:2.5")[1] == jobQueue.jobKey("X:12:9:2.5")[1]
+
+def test_identical_concurrent_requests_share_one_job(jobQueue):
+    runner = FakeScanRunner()
+    jobQueue.jobRunner = runner
+    received = []
+    callback = lambda job, user: received.append((job, user))
+    job1 = jobQueue.submit("X:12:9:2.5", user="user1", callback=callback)
+    job2 = jobQueue.submit("X:12:9:2.5:D:D", user="user2", callback=callback)
+    job3 = jobQueue.submit("X:12:7", user="user3", callback=callback)
+    assert job1 is job2
+    assert job1 is not job3
+    runner.release.set()
+    assert job1.wait(10) and job3.wait(10)
+    assert sorted(runner.calls) == ["X:12:7", "X:12:9:2.5"]
+    assert sorted([user for _, user in received]) == ["user1", "user2", "user3"]
+    assert all(job.result is runner.results for job, _ in received)
+    assert len(jobQueue.pendingJobs) == 0
+
+def test_completed_results_are_answered_from_cache(jobQueue):
+    runner = FakeScanRunner()
+    runner.release.set()
+    jobQueue.jobRunner = runner
+    job = jobQueue.submit("X:12:9:2.5")
+    assert job.wait(10)
+    callback = MagicMock()
+    cachedJob = jobQueue.submit("X:12:9:2.5", user="user2", callback=callback)
+    assert cachedJob is job
+    assert cachedJob.fromCache
+    callback.assert_called_once_with(job, "user2")
+    assert len(runner.calls) == 1
+    # Expired cache entries are run again
+    jobQueue.cacheTTLSeconds = -1
+    newJob = jobQueue.submit("X:12:9:2.5")
+    assert newJob is not job
+    assert newJob.wait(10)
+    assert len(runner.calls) == 2
+
+def test_failed_jobs_are_not_cached(jobQueue):
+    runner = FakeScanRunner(error=ValueError("boom"))
+    runner.release.set()
+    jobQueue.jobRunner = runner
+    callback = MagicMock()
+    job = jobQueue.submit("X:12:9:2.5", user="user1", callback=callback)
+    assert job.wait(10)
+    assert isinstance(job.error, ValueError)
+    callback.assert_called_once_with(job, "user1")
+    assert len(jobQueue.completedJobs) == 0
+
+def test_bot_launchScreener_uses_local_job_queue(jobQueue):
+    from pkscreener import pkscreenerbot
+    runner = FakeScanRunner()
+    runner.release.set()
+    jobQueue.jobRunner = runner
+    user = MagicMock(id=1234, first_name="Test", username="test")
+    context = MagicMock()
+    update = MagicMock()
+    with patch("pkscreener.pkscreenerbot.local_jobs_enabled", True), \
+         patch("pkscreener.pkscreenerbot.run_workflow") as mock_workflow:
+        pkscreenerbot.launchScreener(options="X:12:9:2.5", user=user, context=context, optionChoices="X > 12 > 9 > 2.5", update=update)
+        job = jobQueue.pendingJobs.get(jobQueue.jobKey("X:12:9:2.5")) or jobQueue.completedJobs.get(jobQueue.jobKey("X:12:9:2.5"))
+        assert job is not None and job.wait(10)
+        mock_workflow.assert_not_called()
+        # A repeat request from another user gets answered right away from the cache
+        anotherUser = MagicMock(id=5678, first_name="Another", username="another")
+        pkscreenerbot.launchScreener(options="X:12:9:2.5", user=anotherUser, context=context, optionChoices="X > 12 > 9 > 2.5", update=update)
+    assert runner.calls == ["X:12:9:2.5"]
+    sentTo = [kwargs["chat_id"] for _, kwargs in context.bot.send_message.call_args_list]
+    assert sentTo == [1234, 5678]
+    sentText = context.bot.send_message.call_args_list[0][1]["text"]
+    assert "SBIN" in sentText and "TCS" in sentText
+    assert sentText.endswith("</pre>")
+
+def test_localScanResultsText_for_errors_and_empty_results():
+    from pkscreener import pkscreenerbot
+    job = PKScanJob(jobKey=("X:12:9:2.5", "2024-01-01"), options="X:12:9:2.5")
+    job.result = pd.DataFrame()
+    assert "No stocks matched" in pkscreenerbot.localScanResultsText(job)
+    job.error = ValueError("boom")
+    assert "could not finish" in pkscreenerbot.localScanResultsText(job)
@@ -0,0 +1,184 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import time
+from argparse import Namespace
+
+import pandas as pd
+import pytest
+from conftest import candles
+
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.PKScanResultsCache import PKScanResultsCache
+
+configManager = tools()
+configManager.getConfig(parser)
+
+def stockData(seed):
+    return candles(seed=seed).to_dict("split")
+
+def scanItems(stocks, backtestDurations, menuOption="B", executeOption=9, userArgs=None):
+    return [(menuOption, "INDIA", executeOption, None, 10, 5, 30, 70, 3, 5, len(stocks), True, stock, False, False, 2.5, False, userArgs, backtestDuration, 30, 0, True, None)
+            for backtestDuration in backtestDurations for stock in stocks]
+
+def scanResults(items, stockDict):
+    # Every other stock matches
+    results = []
+    for item in items:
+        stock, backtestDuration = item[12], item[18]
+        if int(stock[3:]) % 2 == 0:
+            data = pd.DataFrame(stockDict[stock]["data"], columns=stockDict[stock]["columns"], index=stockDict[stock]["index"]).tail(backtestDuration + 1)
+            results.append(({"Stock": stock, "LTP": data["Close"].iloc[0]}, {"Stock": stock, "LTP": data["Close"].iloc[0]}, data, stock, backtestDuration))
+        else:
+            results.append(None)
+    return results
+
+def runScan(resultsCache, items, stockDict, options="B:30:12:9:2.5", **kwargs):
+    pendingItems = resultsCache.beginScan(options, configManager, stockDict, items, **kwargs)
+    cachedResults = resultsCache.cachedResults()
+    for result in scanResults(pendingItems, stockDict):
+        resultsCache.addResult(result)
+    numSaved = resultsCache.endScan()
+    return pendingItems, cachedResults, numSaved
+
+def sameResults(results, expected):
+    assert len(results) == len(expected)
+    for result, expectedResult in zip(results, expected):
+        if expectedResult is None:
+            assert result is None
+        else:
+            assert result[0] == expectedResult[0] and result[1] == expectedResult[1] and result[3:] == expectedResult[3:]
+            pd.testing.assert_frame_equal(result[2], expectedResult[2])
+
+@pytest.fixture
+def resultsCache(tmp_path):
+    resultsCache = PKScanResultsCache()
+    resultsCache.cacheDirPath = str(tmp_path)
+    resultsCache.maxEntries = 1000
+    resultsCache.resetScan()
+    yield resultsCache
+    resultsCache.resetScan()
+
+def test_repeat_scans_come_from_the_cache(resultsCache):
+    stocks = [f"STK{i}" for i in range(6)]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    items = scanItems(stocks, [3, 2, 1])
+    pendingItems, cachedResults, numSaved = runScan(resultsCache, items, stockDict)
+    assert pendingItems == items and cachedResults == [] and numSaved == 3
+    assert len(os.listdir(resultsCache.cacheDirPath)) == 3
+    assert any(fileName.startswith("2024-06-25_") for fileName in os.listdir(resultsCache.cacheDirPath))
+    pendingItems, cachedResults, numSaved = runScan(resultsCache, items, stockDict)
+    assert pendingItems == [] and numSaved == 0
+    # Oldest date first, with the stocks that did not match as None
+    expected = []
+    for backtestDuration in [3, 2, 1]:
+        dateResults = scanResults(scanItems(stocks, [backtestDuration]), stockDict)
+        expected.extend([result for result in dateResults if result is not None] + [None] * dateResults.count(None))
+    sameResults(cachedResults, expected)
+    # Only the new date gets scanned
+    pendingItems, cachedResults, numSaved = runScan(resultsCache, scanItems(stocks, [4, 3, 2, 1]), stockDict)
+    assert set(item[18] for item in pendingItems) == {4} and len(cachedResults) == 18 and numSaved == 1
+
+def test_scans_with_other_data_config_or_options_are_not_reused(resultsCache):
+    stocks = [f"STK{i}" for i in range(4)]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    items = scanItems(stocks, [2, 1])
+    runScan(resultsCache, items, stockDict)
+    assert runScan(resultsCache, items, stockDict)[0] == []
+    assert runScan(resultsCache, items, stockDict, options="B:30:12:7:4")[0] == items
+    assert runScan(resultsCache, scanItems(stocks, [2, 1], executeOption=7), stockDict)[0] == scanItems(stocks, [2, 1], executeOption=7)
+    changedDict = dict(stockDict)
+    changedDict["STK1"] = stockData(100)
+    assert runScan(resultsCache, items, changedDict)[0] == items
+    minLTP = configManager.minLTP
+    try:
+        configManager.minLTP = minLTP + 1
+        assert runScan(resultsCache, items, stockDict)[0] == items
+    finally:
+        configManager.minLTP = minLTP
+    assert runScan(resultsCache, items, stockDict)[0] == []
+
+def test_scans_with_other_user_args_intraday_data_or_index_strength_are_not_reused(resultsCache):
+    stocks = [f"STK{i}" for i in range(4)]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    intradayDict = {stock: stockData(10 + i) for i, stock in enumerate(stocks)}
+    userArgs = Namespace(usertag=None, simulate=None, systemlaunched=False, monitor=None, options="B:30:12:9:2.5", log=False)
+    items = scanItems(stocks, [2, 1], userArgs=userArgs)
+    runScan(resultsCache, items, stockDict, intradayStockDict=intradayDict, indexStrength=1.5)
+    assert runScan(resultsCache, items, stockDict, intradayStockDict=intradayDict, indexStrength=1.5)[0] == []
+    # The VCP scans add the RS ratings and the RVM
+    vcpItems = scanItems(stocks, [2, 1], userArgs=Namespace(**dict(vars(userArgs), usertag="VCP")))
+    assert runScan(resultsCache, vcpItems, stockDict, intradayStockDict=intradayDict, indexStrength=1.5)[0] == vcpItems
+    # The other arguments (like logging) don't change the results
+    loggingItems = scanItems(stocks, [2, 1], userArgs=Namespace(**dict(vars(userArgs), log=True)))
+    assert runScan(resultsCache, loggingItems, stockDict, intradayStockDict=intradayDict, indexStrength=1.5)[0] == []
+    assert runScan(resultsCache, items, stockDict, intradayStockDict=intradayDict, indexStrength=2.5)[0] == items
+    changedIntradayDict = dict(intradayDict)
+    changedIntradayDict["STK2"] = stockData(100)
+    assert runScan(resultsCache, items, stockDict, intradayStockDict=changedIntradayDict, indexStrength=1.5)[0] == items
+
+def test_incomplete_or_unknown_scans_are_not_cached(resultsCache):
+    stocks = [f"STK{i}" for i in range(4)]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    items = scanItems(stocks, [2, 1])
+    pendingItems = resultsCache.beginScan("B:30:12:9:2.5", configManager, stockDict, items)
+    for result in scanResults(pendingItems, stockDict)[:-1]:
+        resultsCache.addResult(result)
+    assert resultsCache.endScan() == 0
+    assert os.listdir(resultsCache.cacheDirPath) == []
+    # Stocks without known candles get fetched by the workers
+    del stockDict["STK3"]
+    assert runScan(resultsCache, items, stockDict)[2] == 0
+    assert runScan(resultsCache, items, stockDict)[0] == items
+    # Nothing gets recorded outside of a scan
+    resultsCache.addResult(scanResults(items, {**stockDict, "STK3": stockData(3)})[0])
+    assert resultsCache.numReceived == 0
+
+def test_oldest_entries_get_pruned(resultsCache):
+    resultsCache.maxEntries = 2
+    stocks = ["STK0", "STK1"]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    for backtestDuration in [5, 4, 3]:
+        runScan(resultsCache, scanItems(stocks, [backtestDuration]), stockDict)
+        time.sleep(0.01)
+    assert len(os.listdir(resultsCache.cacheDirPath)) == 2
+    assert runScan(resultsCache, scanItems(stocks, [5]), stockDict)[0] != []
+    assert runScan(resultsCache, scanItems(stocks, [3]), stockDict)[0] == []
+
+@pytest.mark.benchmark
+def test_cached_backtest_benchmark(resultsCache, capsys):
+    stocks = [f"STK{i}" for i in range(200)]
+    stockDict = {stock: stockData(i) for i, stock in enumerate(stocks)}
+    items = scanItems(stocks, range(30, 0, -1))
+    startTime = time.perf_counter()
+    runScan(resultsCache, items, stockDict)
+    firstRun = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    pendingItems, cachedResults, _ = runScan(resultsCache, items, stockDict)
+    cachedRun = time.perf_counter() - startTime
+    assert pendingItems == [] and len(cachedResults) == len(items)
+    cacheSize = sum(os.path.getsize(os.path.join(resultsCache.cacheDirPath, fileName)) for fileName in os.listdir(resultsCache.cacheDirPath))
+    with capsys.disabled():
+        print(f"\n[+] {len(stocks)} stocks x 30 dates: scan+save {firstRun:.3f}s, from cache {cachedRun:.3f}s, {cacheSize/1024:.0f}KB")
@@ -0,0 +1,168 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import queue
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pkscreener.classes.PKScanRunner import PKScanRunner
+from pkscreener.classes.PKScanScheduler import PKScanScheduler
+
+def scanItem(stock, executeOption=12):
+    return ("X", "NSE", executeOption, 9) + (None,) * 8 + (stock,)
+
+class FakeScanWorkers:
+    # Screens the items from the tasks queue on threads, taking as long as the cost of each stock
+    def __init__(self, tasks_queue, results_queue, costs, numWorkers=4):
+        self.tasks_queue = tasks_queue
+        self.results_queue = results_queue
+        self.costs = costs
+        self.scanTimings = queue.Queue()
+        self.screened = []
+        self.maxOutstanding = 0
+        self.threads = [threading.Thread(target=self.run, daemon=True) for _ in range(numWorkers)]
+        for thread in self.threads:
+            thread.start()
+
+    def run(self):
+        while True:
+            self.maxOutstanding = max(self.maxOutstanding, self.tasks_queue.qsize())
+            item = self.tasks_queue.get()
+            if item is None:
+                break
+            stock = item[12]
+            self.screened.append(stock)
+            startTime = time.perf_counter()
+            time.sleep(self.costs[stock])
+            self.scanTimings.put((stock, time.perf_counter() - startTime))
+            self.results_queue.put(None)
+
+    def stop(self):
+        for _ in self.threads:
+            self.tasks_queue.put(None)
+        for thread in self.threads:
+            thread.join(10)
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = PKScanScheduler()
+    savedAttributes = (scheduler.costsFilePath, scheduler.costs, PKScanRunner.costAwareScheduling, PKScanRunner.scanTimings, PKScanRunner.consumers)
+    scheduler.costsFilePath = str(tmp_path / "scan_costs.json")
+    scheduler.costs = None
+    PKScanRunner.consumers = None
+    yield scheduler
+    scheduler.costsFilePath, scheduler.costs, PKScanRunner.costAwareScheduling, PKScanRunner.scanTimings, PKScanRunner.consumers = savedAttributes
+
+def runScan(items, costs, numStocksPerIteration, costAware):
+    tasks_queue = queue.Queue()
+    results_queue = queue.Queue()
+    workers = FakeScanWorkers(tasks_queue, results_queue, costs)
+    PKScanRunner.costAwareScheduling = costAware
+    PKScanRunner.scanTimings = workers.scanTimings
+    iterations = int(len(items) / numStocksPerIteration)
+    startTime = time.perf_counter()
+    PKScanRunner.runScan(None, False, len(items), iterations, items, numStocksPerIteration, tasks_queue, results_queue, len(items), None)
+    elapsed = time.perf_counter() - startTime
+    workers.stop()
+    return workers, elapsed
+
+def test_orderItems_puts_the_most_expensive_stocks_first(scheduler):
+    items = [scanItem(stock) for stock in ["A", "B", "C", "D", "E"]]
+    # Without any history the order is kept as is
+    assert scheduler.orderItems(items) == items
+    scheduler.updateCosts("X:12:9", [("A", 0.1), ("B", 0.5), ("C", 0.3), ("D", 0.9)])
+    assert [item[12] for item in scheduler.orderItems(items)] == ["D", "B", "E", "C", "A"]
+    # History is kept per scan type
+    otherItems = [scanItem(stock, executeOption=7) for stock in ["A", "B", "C"]]
+    assert scheduler.orderItems(otherItems) == otherItems
+
+def test_costs_are_smoothed_and_persisted(scheduler):
+    scheduler.updateCosts("X:12:9", [("A", 1.0), ("B", 0.2)])
+    scheduler.updateCosts("X:12:9", [("A", 0.2)])
+    assert scheduler.costs["X:12:9"] == {"A": 0.6, "B": 0.2}
+    scheduler.saveCosts()
+    scheduler.costs = None
+    assert scheduler.loadCosts() == {"X:12:9": {"A": 0.6, "B": 0.2}}
+    scheduler.maxStocksPerScanType = 1
+    try:
+        scheduler.updateCosts("X:12:9", [("C", 0.1)])
+    finally:
+        scheduler.maxStocksPerScanType = 10000
+    assert scheduler.costs["X:12:9"] == {"A": 0.6}
+
+def test_tailLatencyStats(scheduler):
+    timings = [(f"S{i}", 0.01 * (i + 1)) for i in range(100)]
+    resultTimes = [100 + 0.1 * i for i in range(90)] + [120 + i for i in range(10)]
+    stats = scheduler.tailLatencyStats(timings, resultTimes, 100)
+    assert stats["stocks"] == 100
+    assert stats["totalSeconds"] == 29
+    assert stats["tailSeconds"] == pytest.approx(29 - 8.9)
+    assert stats["p50"] == pytest.approx(0.505)
+    assert stats["max"] == 1.0
+    assert scheduler.tailLatencyStats([], [], 100) == {"stocks": 0, "totalSeconds": 0.0, "tailSeconds": 0.0}
+
+def test_screenStocksWithinLimits_reports_the_time_per_stock():
+    from pkscreener.classes.StockScreener import StockScreener
+    scanTimings = queue.Queue()
+    hostRef = MagicMock(activeWorkersLimit=None, scanTimings=scanTimings)
+    screener = StockScreener()
+    with patch.object(screener, "screenStocks", return_value="SBIN"):
+        assert screener.screenStocksWithinLimits(*scanItem("SBIN"), hostRef) == "SBIN"
+        assert screener.screenStocksWithinLimits(*scanItem("TCS")[:12], stock="TCS", hostRef=hostRef) == "SBIN"
+    timings = [scanTimings.get_nowait(), scanTimings.get_nowait()]
+    assert [timing[0] for timing in timings] == ["SBIN", "TCS"]
+    assert all(timing[1] >= 0 for timing in timings)
+
+def test_runScan_refills_the_queue_with_the_most_expensive_stocks_first(scheduler):
+    costs = {f"S{i:03d}": (0.02 if i % 10 == 9 else 0.001) for i in range(60)}
+    items = [scanItem(stock) for stock in costs.keys()]
+    # The first scan has no history and learns the costs
+    runScan(items, costs, 20, True)
+    assert set(scheduler.loadCosts()["X:12:9"].keys()) == set(costs.keys())
+    assert scheduler.lastScanStats["stocks"] == 60
+    scheduler.costs = None
+    workers, _ = runScan(items, costs, 20, True)
+    expensiveStocks = [stock for stock, cost in costs.items() if cost > 0.01]
+    assert set(workers.screened[:len(expensiveStocks)]) == set(expensiveStocks)
+    assert sorted(workers.screened) == sorted(costs.keys())
+    assert workers.maxOutstanding <= 20
+
+@pytest.mark.benchmark
+def test_tail_latency_benchmark(scheduler, capsys):
+    # 5% of the stocks are slow and sit at the end of every batch
+    numStocks, numStocksPerIteration = 800, 100
+    costs = {f"S{i:04d}": (0.04 if i % numStocksPerIteration >= 95 else 0.002) for i in range(numStocks)}
+    items = [scanItem(stock) for stock in costs.keys()]
+    scheduler.updateCosts("X:12:9", list(costs.items()))
+    results = {}
+    for name, costAware in [("batched FIFO", False), ("cost-aware refill", True)]:
+        _, elapsed = runScan(items, costs, numStocksPerIteration, costAware)
+        results[name] = (elapsed, scheduler.lastScanStats)
+    with capsys.disabled():
+        for name, (elapsed, stats) in results.items():
+            print(f"\n[+] {name}: {numStocks} stocks in {elapsed:.3f}s, last 10% took {stats['tailSeconds']:.3f}s, per stock p50 {stats['p50']*1000:.1f}ms p99 {stats['p99']*1000:.1f}ms max {stats['max']*1000:.1f}ms")
+    assert results["cost-aware refill"][0] < results["batched FIFO"][0]
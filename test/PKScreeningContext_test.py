@@ -0,0 +1,116 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import time
+
+import numpy as np
+import pytest
+from conftest import candles
+from PKDevTools.classes.log import default_logger
+
+from pkscreener.classes.ConfigManager import parser, tools
+from pkscreener.classes.PKScreeningContext import PKScreeningContext
+from pkscreener.classes.ScreeningStatistics import ScreeningStatistics
+
+@pytest.fixture
+def screener():
+    configManager = tools()
+    configManager.getConfig(parser)
+    return ScreeningStatistics(configManager, default_logger())
+
+def validatorResults(screener, fullData, processedData):
+    screener.relativeStrengths = {"SBIN": (1.2, len(fullData), fullData.index.max())}
+    validators = [lambda: screener.findBreakoutValue(processedData, {}, {}, daysToLookback=22),
+                  lambda: screener.validateRSI(processedData, {}, {}, 0, 100),
+                  lambda: screener.validateVolume(processedData, {}, {}),
+                  lambda: screener.validateConsolidationContraction(fullData, legsToCheck=2),
+                  lambda: screener.validateVCP(fullData, {}, {}),
+                  lambda: screener.validateConfluence("SBIN", processedData, fullData, {}, {}, confFilter=3),
+                  lambda: screener.validateBullishForTomorrow(fullData),
+                  lambda: screener.findATRTrailingStops(fullData, buySellAll=3, saveDict={}, screenDict={}),
+                  lambda: screener.getTopsAndBottoms(fullData, window=5)[0]["High"].tolist(),
+                  lambda: screener.findRSRating(index_rs_value=1.5, df=fullData, screenDict={}, saveDict={}),
+                  lambda: screener.findRSRating(index_rs_value=1.5, df=fullData, screenDict={}, saveDict={}, stockName="SBIN"),
+                  lambda: float(screener.findRVM(df=fullData, screenDict={}, saveDict={}))]
+    results = []
+    for validator in validators:
+        try:
+            results.append(validator())
+        except Exception as e:
+            results.append(type(e))
+    return results
+
+def test_sanitised_candles_are_shared(screener):
+    fullData, processedData = screener.preprocessData(candles(300), daysToLookback=22)
+    fullData.iloc[5, fullData.columns.get_loc("Volume")] = np.inf
+    fullData.iloc[6, fullData.columns.get_loc("Close")] = np.nan
+    context = PKScreeningContext(fullData, processedData)
+    screener.screeningContext = context
+    data = screener.sanitisedData(fullData)
+    assert data is screener.sanitisedData(fullData)
+    assert not np.isinf(data["Volume"]).any() and not data.isna().any().any()
+    assert np.isinf(fullData["Volume"]).any()
+    oldestFirst = screener.sanitisedData(fullData, oldestFirst=True)
+    assert oldestFirst is screener.sanitisedData(fullData, oldestFirst=True)
+    assert oldestFirst.index.equals(data.index[::-1])
+    assert screener.sanitisedData(processedData) is not data
+    # Candles of anything else are copied
+    others = fullData.head(10)
+    assert screener.sanitisedData(others) is not screener.sanitisedData(others)
+
+def test_validators_give_the_same_results_with_the_shared_candles(screener):
+    for seed in range(5):
+        fullData, processedData = screener.preprocessData(candles(300, seed), daysToLookback=22)
+        expected = validatorResults(screener, fullData, processedData)
+        screener.screeningContext = PKScreeningContext(fullData, processedData, verifyReadOnly=True)
+        assert validatorResults(screener, fullData, processedData) == expected
+        # None of the validators changed the shared candles
+        screener.screeningContext.verifyUnchanged()
+        screener.screeningContext = None
+
+def test_verifyReadOnly_finds_the_validator_that_changed_the_candles(screener):
+    fullData, processedData = screener.preprocessData(candles(300), daysToLookback=22)
+    screener.screeningContext = PKScreeningContext(fullData, processedData, verifyReadOnly=True)
+    def changingValidator(df):
+        data = screener.sanitisedData(df)
+        data["Close"] = 0
+    changingValidator(fullData)
+    with pytest.raises(AssertionError, match="changingValidator"):
+        screener.validateRSI(processedData, {}, {}, 0, 100)
+
+@pytest.mark.benchmark
+def test_screening_context_benchmark(screener, capsys):
+    frames = [screener.preprocessData(candles(300, seed), daysToLookback=22) for seed in range(20)]
+    start = time.perf_counter()
+    for fullData, processedData in frames:
+        validatorResults(screener, fullData, processedData)
+    copyingTime = (time.perf_counter() - start) / len(frames)
+    start = time.perf_counter()
+    for fullData, processedData in frames:
+        screener.screeningContext = PKScreeningContext(fullData, processedData)
+        validatorResults(screener, fullData, processedData)
+    sharedTime = (time.perf_counter() - start) / len(frames)
+    screener.screeningContext = None
+    with capsys.disabled():
+        print(f"\n[+] Validators per stock: copying {copyingTime*1000:.2f}ms, shared candles {sharedTime*1000:.2f}ms")
@@ -0,0 +1,117 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
+from pkscreener.classes.PKStockCachePreloader import PKStockCachePreloader
+from pkscreener.classes.Utility import tools
+
+def stockCache():
+    return {"SBIN": {"index": [1, 2], "columns": ["Close"], "data": [[800.5], [801.0]]},
+            "TCS": {"index": [1, 2], "columns": ["Close"], "data": [[4000.0], [4010.5]], "MF": {"Net": 1.5}}}
+
+@pytest.fixture
+def cacheFile(tmp_path):
+    filePath = os.path.join(tmp_path, "stock_data_010124.pkl")
+    PKCompressedCache.save(stockCache(), filePath)
+    yield filePath
+    PKStockCachePreloader().preloads.clear()
+
+def test_preload_populates_the_store_in_the_background(cacheFile):
+    store = {}
+    preload = PKStockCachePreloader().preload(cacheFile, store)
+    assert preload is not None and preload.wait(10)
+    assert store == stockCache()
+    assert PKStockCachePreloader().attach(cacheFile, store)
+    # Only once. Next time around, the cache gets loaded the usual way.
+    assert not PKStockCachePreloader().attach(cacheFile, store)
+
+def test_preload_leaves_stores_already_being_filled_alone(cacheFile):
+    store = {"INFY": {"index": [1], "columns": ["Close"], "data": [[1500.0]]}}
+    preload = PKStockCachePreloader().preload(cacheFile, store)
+    assert preload.wait(10)
+    assert not PKStockCachePreloader().attach(cacheFile, store)
+    assert list(store.keys()) == ["INFY"]
+
+def test_attach_clears_the_store_when_the_cache_changed(cacheFile):
+    store = {}
+    assert PKStockCachePreloader().preload(cacheFile, store).wait(10)
+    time.sleep(0.01)
+    PKCompressedCache.save({"SBIN": stockCache()["SBIN"]}, cacheFile)
+    assert not PKStockCachePreloader().attach(cacheFile, store)
+    assert len(store) == 0
+
+def test_preload_of_missing_cache_or_for_another_store(cacheFile):
+    assert PKStockCachePreloader().preload(cacheFile + ".missing", {}) is None
+    assert not PKStockCachePreloader().attach(cacheFile + ".missing", {})
+    store = {}
+    assert PKStockCachePreloader().preload(cacheFile, store).wait(10)
+    assert not PKStockCachePreloader().attach(cacheFile, {})
+    # discard takes the preloaded candles out again
+    store = {}
+    assert PKStockCachePreloader().preload(cacheFile, store).wait(10)
+    PKStockCachePreloader().discard(store)
+    assert len(store) == 0
+
+def test_loadStockData_attaches_to_the_preloaded_store(cacheFile):
+    configManager = MagicMock(baseIndex="^NSEI")
+    configManager.isIntradayConfig.return_value = False
+    store = {}
+    with patch("pkscreener.classes.Utility.Archiver.get_user_outputs_dir", return_value=os.path.dirname(cacheFile)), \
+         patch("pkscreener.classes.Utility.tools.afterMarketStockDataExists", return_value=(True, os.path.basename(cacheFile))), \
+         patch("pkscreener.classes.Utility.PKDateUtilities.isTradingTime", return_value=False), \
+         patch("pkscreener.classes.Utility.tools.loadDataFromLocalPickle") as mock_load, \
+         patch("pkscreener.classes.Utility.tools.saveStockData"):
+        preload = tools.preloadStockData(store, configManager)
+        assert preload is not None
+        loaded = tools.loadStockData(store, configManager, stockCodes=[])
+        mock_load.assert_not_called()
+    assert loaded is store
+    assert store == stockCache()
+
+def test_loadStockData_drops_the_daily_preload_after_switching_to_intraday(cacheFile, tmp_path):
+    intradayFile = os.path.join(tmp_path, "intraday_stock_data_010124.pkl")
+    intradayCache = {"SBIN": {"index": [1], "columns": ["Close"], "data": [[805.0]]}}
+    PKCompressedCache.save(intradayCache, intradayFile)
+    configManager = MagicMock(baseIndex="^NSEI")
+    configManager.isIntradayConfig.return_value = False
+    store = {}
+    with patch("pkscreener.classes.Utility.Archiver.get_user_outputs_dir", return_value=str(tmp_path)), \
+         patch("pkscreener.classes.Utility.PKDateUtilities.isTradingTime", return_value=False), \
+         patch("pkscreener.classes.Utility.tools.saveStockData"):
+        with patch("pkscreener.classes.Utility.tools.afterMarketStockDataExists", return_value=(True, os.path.basename(cacheFile))):
+            assert tools.preloadStockData(store, configManager).wait(10)
+        assert store == stockCache()
+        # The user picks an intraday scan (like executeOption 12) in the meantime
+        configManager.isIntradayConfig.return_value = True
+        with patch("pkscreener.classes.Utility.tools.afterMarketStockDataExists", return_value=(True, os.path.basename(intradayFile))):
+            loaded = tools.loadStockData(store, configManager, stockCodes=[])
+    assert loaded is store
+    assert store == intradayCache
+    assert len(PKStockCachePreloader().preloads) == 0
@@ -0,0 +1,155 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from pkscreener.classes.PKStockDataSync import PKStockDataSync
+
+class RecordingHandler(SimpleHTTPRequestHandler):
+    requestedFiles = []
+
+    def do_GET(self):
+        RecordingHandler.requestedFiles.append(self.path.split("/")[-1])
+        return super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def syncServer(tmp_path):
+    serverFolder = tmp_path / "server"
+    clientFolder = tmp_path / "client"
+    serverFolder.mkdir()
+    clientFolder.mkdir()
+    RecordingHandler.requestedFiles = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(RecordingHandler, directory=str(serverFolder)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", str(serverFolder), str(clientFolder)
+    server.shutdown()
+    server.server_close()
+
+dates = pd.bdate_range("2024-01-01", periods=30)
+
+def stockDictUpto(numDays, numSymbols=20):
+    stockDict = {}
+    for i in range(numSymbols):
+        df = pd.DataFrame(
+            {"Open": [100.0 + i + d for d in range(numDays)],
+             "High": [101.5 + i + d for d in range(numDays)],
+             "Low": [99.0 + i + d for d in range(numDays)],
+             "Close": [100.5 + i + d * 1.01 for d in range(numDays)],
+             "Volume": [1000 * (i + 1) + d for d in range(numDays)]},
+            index=dates[:numDays],
+        )
+        data = df.to_dict("split")
+        data["MF"] = numDays * 10 + i
+        stockDict[f"STOCK{i}"] = data
+    return stockDict
+
+def publishDays(serverFolder, fromDay, toDay, maxSegments=10):
+    for numDays in range(fromDay, toDay + 1):
+        PKStockDataSync(localFolder=serverFolder, maxSegments=maxSegments).publish(stockDictUpto(numDays), serverFolder)
+
+def test_sync_downloads_only_the_missing_segments(syncServer):
+    baseUrl, serverFolder, clientFolder = syncServer
+    publishDays(serverFolder, 20, 25)
+    dataSync = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder)
+    synced, ok = dataSync.sync(stockDictUpto(22))
+    assert ok
+    expected = stockDictUpto(25)
+    for symbol, data in expected.items():
+        assert synced[symbol]["index"] == data["index"]
+        assert synced[symbol]["data"] == data["data"]
+        assert synced[symbol]["MF"] == data["MF"]
+    segments = [dataSync.segmentName(date) for date in dates[22:25]]
+    assert RecordingHandler.requestedFiles == [dataSync.manifestName] + segments
+    assert dataSync.downloadedSegments == segments
+    # Segments we already have are not downloaded again
+    RecordingHandler.requestedFiles = []
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder).sync(stockDictUpto(23))
+    assert ok
+    assert RecordingHandler.requestedFiles == [dataSync.manifestName]
+    assert synced["STOCK0"]["index"] == expected["STOCK0"]["index"]
+
+def test_sync_fails_for_corrupt_segments(syncServer):
+    baseUrl, serverFolder, clientFolder = syncServer
+    publishDays(serverFolder, 20, 22)
+    dataSync = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder)
+    with open(os.path.join(serverFolder, dataSync.segmentName(dates[21])), "ab") as f:
+        f.write(b"tampered")
+    stockDict = stockDictUpto(20)
+    synced, ok = dataSync.sync(stockDict)
+    assert not ok
+    assert synced is stockDict
+
+def test_sync_leaves_out_symbols_that_cannot_be_verified(syncServer):
+    baseUrl, serverFolder, clientFolder = syncServer
+    publishDays(serverFolder, 20, 22)
+    stockDict = stockDictUpto(21)
+    # Too old to be brought up to date with the segments on the server
+    stockDict["STOCK1"] = stockDictUpto(15)["STOCK1"]
+    # Not available locally at all
+    del stockDict["STOCK2"]
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder, maxFailureRatio=0.2).sync(stockDict)
+    assert ok
+    assert "STOCK1" not in synced and "STOCK2" not in synced
+    assert synced["STOCK3"]["index"] == stockDictUpto(22)["STOCK3"]["index"]
+    # Too many failures and we'd rather download everything
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder, maxFailureRatio=0.05).sync(stockDict)
+    assert not ok
+
+def test_sync_fails_when_a_day_is_missing_on_server(syncServer):
+    baseUrl, serverFolder, clientFolder = syncServer
+    publishDays(serverFolder, 20, 21)
+    publishDays(serverFolder, 23, 23)
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder).sync(stockDictUpto(21))
+    assert not ok
+    # Those that already have the missing day are fine
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder).sync(stockDictUpto(22))
+    assert ok
+    assert synced["STOCK0"]["index"] == stockDictUpto(23)["STOCK0"]["index"]
+
+def test_sync_without_manifest_on_server(syncServer):
+    baseUrl, _, clientFolder = syncServer
+    stockDict = stockDictUpto(20)
+    synced, ok = PKStockDataSync(baseUrl=baseUrl, localFolder=clientFolder).sync(stockDict)
+    assert not ok
+    assert synced is stockDict
+
+def test_publish_keeps_only_the_latest_segments(tmp_path):
+    publishDays(str(tmp_path), 20, 25, maxSegments=3)
+    dataSync = PKStockDataSync(localFolder=str(tmp_path), maxSegments=3)
+    manifest = dataSync.readLocalManifest(str(tmp_path))
+    assert [entry["file"] for entry in manifest["segments"]] == [dataSync.segmentName(date) for date in dates[22:25]]
+    assert manifest["segments"][0]["after"] == dates[21].strftime("%Y-%m-%d")
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith(".pkl")) == sorted(dataSync.segmentName(date) for date in dates[22:25])
+    assert manifest["symbols"]["STOCK0"]["last"] == str(dates[24])
+    assert manifest["symbols"]["STOCK0"]["hash"] == dataSync.symbolHash(stockDictUpto(25)["STOCK0"])
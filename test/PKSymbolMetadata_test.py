@@ -0,0 +1,147 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pkscreener.classes.PKDataService import PKDataService
+from pkscreener.classes.PKSymbolMetadata import PKSymbolMetadata
+
+SECTORS = {"SBIN": ("Financial Services", "Banks"), "HDFCBANK": ("Financial Services", "Banks"),
+           "TCS": ("Information Technology", "IT - Software"), "INFY": ("Information Technology", "IT - Software"),
+           "SUNPHARMA": ("Healthcare", "Pharmaceuticals & Biotechnology")}
+
+class FakeSymbolSource:
+    """
+    Answers like the NSE quote API after some latency. Symbols starting
+    with FAIL raise errors and unknown ones come back without any info.
+    """
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, symbol):
+        with self.lock:
+            self.calls.append(symbol)
+        time.sleep(self.latency)
+        if symbol.startswith("FAIL"):
+            raise ConnectionError(symbol)
+        if symbol not in SECTORS:
+            return {"error": "not found"}
+        sector, industry = SECTORS[symbol]
+        return {"info": {"symbol": symbol, "companyName": f"{symbol} Ltd", "industry": industry.upper(), "isin": f"INE{symbol[:3]}01"},
+                "industryInfo": {"macro": sector, "sector": sector, "industry": industry, "basicIndustry": industry}}
+
+@pytest.fixture
+def symbolMetadata(tmp_path):
+    return PKSymbolMetadata(dbPath=os.path.join(tmp_path, "symbol_metadata.db"), source=FakeSymbolSource())
+
+def test_refresh_only_downloads_missing_or_stale_symbols(symbolMetadata):
+    source = symbolMetadata.source
+    assert symbolMetadata.refresh(["SBIN", "TCS", "FAIL1", "UNKNOWN", "SBIN"]) == ["FAIL1", "UNKNOWN"]
+    assert sorted(source.calls) == ["FAIL1", "SBIN", "TCS", "UNKNOWN"]
+    source.calls.clear()
+    assert symbolMetadata.refresh(["SBIN", "TCS", "INFY"]) == []
+    assert source.calls == ["INFY"]
+    source.calls.clear()
+    assert symbolMetadata.refresh(["SBIN", "TCS"], force=True) == []
+    assert sorted(source.calls) == ["SBIN", "TCS"]
+    source.calls.clear()
+    symbolMetadata.maxAgeDays = -1
+    symbolMetadata.refresh(["SBIN"])
+    assert source.calls == ["SBIN"]
+
+def test_queries_by_symbol_sector_and_industry(symbolMetadata):
+    symbolMetadata.refresh(list(SECTORS.keys()))
+    assert symbolMetadata.symbolsBySector("Financial Services") == ["HDFCBANK", "SBIN"]
+    assert symbolMetadata.symbolsBySector(["Healthcare", "Information Technology"]) == ["INFY", "SUNPHARMA", "TCS"]
+    assert symbolMetadata.symbolsByIndustry("IT - Software") == ["INFY", "TCS"]
+    assert symbolMetadata.sectors() == ["Financial Services", "Healthcare", "Information Technology"]
+    metadata = symbolMetadata.metadata(["SBIN", "MISSING"])
+    assert list(metadata.keys()) == ["SBIN"]
+    assert metadata["SBIN"] == {"symbol": "SBIN", "companyName": "SBIN Ltd", "macro": "Financial Services", "sector": "Financial Services",
+                                "industry": "Banks", "basicIndustry": "Banks", "isin": "INESBI01"}
+    # The database is there for the next run
+    source = FakeSymbolSource()
+    reopened = PKSymbolMetadata(dbPath=symbolMetadata.dbPath, source=source)
+    assert reopened.symbolsBySector("Healthcare") == ["SUNPHARMA"]
+    reopened.refresh(list(SECTORS.keys()))
+    assert source.calls == []
+
+def test_queries_for_many_values_are_split_into_chunks(symbolMetadata):
+    symbolMetadata.refresh(list(SECTORS.keys()))
+    # More symbols than an older sqlite allows variables for in a statement
+    symbols = [f"STK{i:04d}" for i in range(2500)] + list(SECTORS.keys())
+    assert list(symbolMetadata.metadata(symbols).keys()) == sorted(SECTORS.keys())
+    assert symbolMetadata.staleSymbols(symbols) == symbols[:2500]
+    with patch.object(PKSymbolMetadata, "maxQueryVariables", 2):
+        assert [row["symbol"] for row in symbolMetadata.query("symbol", list(SECTORS.keys()), columns=["symbol"])] == sorted(SECTORS.keys())
+        assert symbolMetadata.symbolsBySector(["Healthcare", "Information Technology", "Financial Services"]) == sorted(SECTORS.keys())
+
+def test_getSymbolsAndSectorInfo_uses_the_local_database(symbolMetadata):
+    with patch("PKNSETools.PKCompanyGeneral.initialize") as mock_initialize:
+        stockDictList, leftOutStocks = PKDataService().getSymbolsAndSectorInfo(None, stockCodes=["SBIN", "TCS", "FAIL1"], symbolMetadata=symbolMetadata)
+        # The NSE cookies get set up before downloading
+        mock_initialize.assert_called_once()
+        assert sorted(info["symbol"] for info in stockDictList) == ["SBIN", "TCS"]
+        assert stockDictList[0]["companyName"] == "SBIN Ltd"
+        assert leftOutStocks == ["FAIL1"]
+        symbolMetadata.source.calls.clear()
+        stockDictList, _ = PKDataService().getSymbolsAndSectorInfo(None, stockCodes=["SBIN", "TCS"], symbolMetadata=symbolMetadata)
+        assert len(stockDictList) == 2
+        assert symbolMetadata.source.calls == []
+        # Nothing to download, nothing to set up
+        mock_initialize.assert_called_once()
+
+def test_refresh_reports_the_progress(symbolMetadata):
+    progress = []
+    symbolMetadata.refresh(["SBIN", "TCS", "FAIL1"], progress=lambda completed, total: progress.append((completed, total)))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+@pytest.mark.benchmark
+def test_refresh_benchmark(symbolMetadata, capsys):
+    symbols = [f"STK{i:04d}" for i in range(200)]
+    SECTORS.update({symbol: (f"Sector{i % 10}", f"Industry{i % 25}") for i, symbol in enumerate(symbols)})
+    try:
+        start = time.perf_counter()
+        assert symbolMetadata.refresh(symbols) == []
+        refresh = time.perf_counter() - start
+        start = time.perf_counter()
+        symbolMetadata.refresh(symbols)
+        cachedRefresh = time.perf_counter() - start
+        start = time.perf_counter()
+        sectorSymbols = symbolMetadata.symbolsBySector("Sector3")
+        lookup = time.perf_counter() - start
+        assert len(sectorSymbols) == 20
+        with capsys.disabled():
+            print(f"\n[+] Symbol metadata of {len(symbols)} symbols at {symbolMetadata.source.latency*1000:.0f}ms each: download {refresh:.2f}s, "
+                  f"again from the database {cachedRefresh:.4f}s, by sector {lookup:.4f}s")
+    finally:
+        for symbol in symbols:
+            SECTORS.pop(symbol)
@@ -0,0 +1,119 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from PIL import Image, ImageChops, ImageDraw
+from PKDevTools.classes.ColorText import colorText
+
+import pkscreener
+from pkscreener.classes.PKTableRenderer import PKTableRenderer
+from pkscreener.classes.Utility import tools
+
+fontPath = os.path.join(os.path.dirname(pkscreener.__file__), "courbd.ttf")
+
+def resultTables(numRows):
+    rows = []
+    for i in range(numRows):
+        color = colorText.GREEN if i % 2 == 0 else colorText.FAIL
+        rows.append({"Stock": f"STK{i:04d}",
+                     "LTP": f"{color}{100 + i*1.25:.2f}{colorText.END}",
+                     "%Chng": f"{color}{(i % 7) - 3:.1f}%{colorText.END}",
+                     "MA-Signal": f"{colorText.GREEN}Bullish{colorText.END}, {colorText.FAIL}50MA-Resist{colorText.END}"})
+    styled_df = pd.DataFrame(rows).set_index("Stock")
+    unstyled_df = styled_df.map(tools.removeAllColorStyles)
+    styled = colorText.miniTabulator().tabulate(styled_df, headers="keys", tablefmt=colorText.No_Pad_GridFormat)
+    unstyled = colorText.miniTabulator().tabulate(unstyled_df, headers="keys", tablefmt=colorText.No_Pad_GridFormat)
+    return unstyled, styled
+
+def test_font_is_cached():
+    renderer = PKTableRenderer()
+    assert renderer.font(fontPath, 30) is renderer.font(fontPath, 30)
+    assert renderer.font(fontPath, 30) is not renderer.font(fontPath, 60)
+
+def test_textSize_matches_getsize_multiline():
+    renderer = PKTableRenderer()
+    unstyled, styled = resultTables(5)
+    for size in [30, 60]:
+        font = renderer.font(fontPath, size)
+        for text in ["", "A", "abc", "| 12.5% |", "+----+", "Hello World ₹ —", "a\nbc\n", unstyled, styled]:
+            assert renderer.textSize(font, text) == font.getsize_multiline(text)
+
+def test_drawText_from_cached_mask_matches_draw_text():
+    renderer = PKTableRenderer()
+    font = renderer.font(fontPath, 60)
+    for bgColor, fill in [("white", "red"), ("black", "lightgreen")]:
+        expected = Image.new("RGB", (900, 200), bgColor)
+        ImageDraw.Draw(expected).text((10, 20), "Bullish, 50MA\nSupport", font=font, fill=fill)
+        actual = Image.new("RGB", (900, 200), bgColor)
+        renderer.drawText(actual, (10, 20), "Bullish, 50MA\nSupport", font, fill)
+        # Again, this time from the cached mask
+        renderer.drawText(actual, (10, 20), "Bullish, 50MA\nSupport", font, fill)
+        ImageDraw.Draw(expected).text((10, 20), "Bullish, 50MA\nSupport", font=font, fill=fill)
+        assert ImageChops.difference(expected, actual).getbbox() is None
+
+def test_tableLayout_is_cached_and_marks_repeated_text_for_reuse():
+    renderer = PKTableRenderer()
+    font = renderer.font(fontPath, 60)
+    unstyled, styled = resultTables(10)
+    ops, height, hasCells = renderer.tableLayout(styled, unstyled, font, "black", "white", tools.getCellColors)
+    assert hasCells
+    assert height == len(styled.splitlines()) * (renderer.lineHeight(font) + 1)
+    assert renderer.tableLayout(styled, unstyled, font, "black", "white", tools.getCellColors)[0] is ops
+    reused = {text for _, _, text, _, reuse in ops if reuse}
+    assert "|" in reused
+    assert "Bullish" in reused
+    assert "STK0001" not in reused
+    # Stock names come from the unstyled table and coloured values without styles
+    texts = [text for _, _, text, _, _ in ops]
+    assert "STK0001" in texts
+    assert not any(colorText.END in text for text in texts)
+    fills = {text: fill for _, _, text, fill, _ in ops}
+    assert fills["Bullish"] == "darkgreen"
+    assert fills[", 50MA-Resist"] == "red"
+
+@pytest.mark.benchmark
+def test_tableToImage_benchmark(capsys):
+    with patch.dict(os.environ, {"PKDevTools_Default_Log_Level": "50"}), \
+         patch("pkscreener.classes.Utility.marketStatus", return_value="Market Closed"), \
+         patch("pkscreener.classes.Utility.tools.setupReportFont", return_value=fontPath):
+        for numRows in [50, 500]:
+            unstyled, styled = resultTables(numRows)
+            fileName = f"test_tableToImage_{numRows}.png"
+            try:
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    tools.tableToImage(unstyled, styled, fileName, "X:12:9:2.5")
+                    timings.append(time.perf_counter() - start)
+                assert os.path.exists(fileName)
+                with capsys.disabled():
+                    print(f"\n[+] tableToImage with {numRows} rows: first {timings[0]:.3f}s, cached {timings[1]:.3f}s")
+            finally:
+                if os.path.exists(fileName):
+                    os.remove(fileName)
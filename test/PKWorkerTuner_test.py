@@ -0,0 +1,176 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pkscreener.classes.PKWorkerTuner import PKWorkerTuner
+from pkscreener.classes.StockScreener import StockScreener
+
+MB = 1024 * 1024
+
+def writeFile(root, relativePath, content):
+    filePath = os.path.join(root, relativePath)
+    os.makedirs(os.path.dirname(filePath), exist_ok=True)
+    with open(filePath, "w") as f:
+        f.write(content)
+
+def writeProcess(procRoot, pid, privateMB, cpuTicks):
+    pageSize = os.sysconf("SC_PAGE_SIZE")
+    writeFile(procRoot, f"{pid}/statm", f"100000 {(privateMB * MB + 10 * MB) // pageSize} {(10 * MB) // pageSize} 10 0 500 0")
+    # utime and stime are the 14th and 15th fields
+    writeFile(procRoot, f"{pid}/stat", f"{pid} (python3 worker) S 1 1 1 0 -1 4194304 100 0 0 0 {cpuTicks} 0 0 0 20 0 1 0")
+
+@pytest.fixture
+def tuner(tmp_path):
+    tuner = PKWorkerTuner()
+    tuner.cgroupRoot = os.path.join(tmp_path, "cgroup")
+    tuner.procRoot = os.path.join(tmp_path, "proc")
+    writeFile(tuner.procRoot, "meminfo", "MemTotal:       16000000 kB\nMemAvailable:    8388608 kB\n")
+    tuner.profile = None
+    tuner.configuration = None
+    tuner.resetScan()
+    yield tuner
+    tuner.cgroupRoot = "/sys/fs/cgroup"
+    tuner.procRoot = "/proc"
+    tuner.profile = None
+    tuner.resetScan()
+
+def test_cpuLimit_honours_cgroup_quotas(tuner):
+    with patch("os.sched_getaffinity", return_value=set(range(8))):
+        assert tuner.cpuLimit() == 8
+        writeFile(tuner.cgroupRoot, "cpu.max", "max 100000")
+        assert tuner.cpuLimit() == 8
+        writeFile(tuner.cgroupRoot, "cpu.max", "150000 100000")
+        assert tuner.cpuLimit() == 2
+        os.remove(os.path.join(tuner.cgroupRoot, "cpu.max"))
+        writeFile(tuner.cgroupRoot, "cpu/cpu.cfs_quota_us", "-1")
+        writeFile(tuner.cgroupRoot, "cpu/cpu.cfs_period_us", "100000")
+        assert tuner.cpuLimit() == 8
+        writeFile(tuner.cgroupRoot, "cpu/cpu.cfs_quota_us", "400000")
+        assert tuner.cpuLimit() == 4
+
+def test_availableMemory_honours_cgroup_limits(tuner):
+    assert tuner.availableMemory() == 8192 * MB
+    writeFile(tuner.cgroupRoot, "memory.max", "max")
+    writeFile(tuner.cgroupRoot, "memory.current", str(1024 * MB))
+    assert tuner.availableMemory() == 8192 * MB
+    writeFile(tuner.cgroupRoot, "memory.max", str(2048 * MB))
+    assert tuner.availableMemory() == 1024 * MB
+
+def test_process_memory_and_cpu_from_proc(tuner):
+    writeProcess(tuner.procRoot, 4321, 150, 250)
+    assert tuner.processMemory(4321) == 150 * MB
+    assert tuner.processCpuSeconds(4321) == 250 / os.sysconf("SC_CLK_TCK")
+    assert tuner.processMemory(1234) is None
+    assert tuner.processCpuSeconds(1234) is None
+
+def test_targetWorkers_for_cpu_bound_io_bound_and_memory_bound_scans(tuner):
+    assert tuner.targetWorkers({"cpuUtilisation": 0.95, "rssPerWorker": 100 * MB}, 4, 8192 * MB) == 4
+    # Mostly waiting for the network
+    assert tuner.targetWorkers({"cpuUtilisation": 0.35, "rssPerWorker": 100 * MB}, 4, 8192 * MB) == 8
+    assert tuner.targetWorkers({"cpuUtilisation": 0.01, "rssPerWorker": 100 * MB}, 4, 8192 * MB) == 16
+    # (800MB available + 2 x 200MB in use) x 0.8 headroom is enough for 4 workers
+    assert tuner.targetWorkers({"cpuUtilisation": 0.95, "rssPerWorker": 200 * MB}, 32, 800 * MB, activeWorkers=2) == 4
+    assert tuner.targetWorkers({"cpuUtilisation": 0.95, "rssPerWorker": 200 * MB}, 32, 0) == 1
+
+def test_initialWorkers_uses_the_profile_of_the_earlier_scan(tuner):
+    with patch("os.sched_getaffinity", return_value=set(range(4))):
+        assert tuner.initialWorkers(2000) == 4
+        assert tuner.initialWorkers(3) == 3
+        assert tuner.initialWorkers(2000, singleThread=True) == 2
+        tuner.profile = {"cpuUtilisation": 0.35, "rssPerWorker": 100 * MB}
+        assert tuner.initialWorkers(2000) == 8
+        assert tuner.configuration == {"workers": 8, "cpus": 4}
+
+def test_observe_retires_workers_when_memory_runs_short(tuner):
+    consumers = [MagicMock(pid=pid) for pid in [101, 102, 103, 104]]
+    for consumer in consumers:
+        writeProcess(tuner.procRoot, consumer.pid, 500, 0)
+    limit = threading.Semaphore(4)
+    # 100MB left, which makes (100MB + 4 x 500MB) x 0.8 enough for 3 workers
+    writeFile(tuner.cgroupRoot, "memory.max", str(3000 * MB))
+    writeFile(tuner.cgroupRoot, "memory.current", str(2900 * MB))
+    with patch("os.sched_getaffinity", return_value=set(range(4))), \
+         patch("pkscreener.classes.PKWorkerTuner.time.time", side_effect=[1000, 1010]):
+        tuner.beginScan(consumers, limit, 1000)
+        for consumer in consumers:
+            writeProcess(tuner.procRoot, consumer.pid, 500, 10 * os.sysconf("SC_CLK_TCK"))
+        assert tuner.observe(consumers, 10) is None
+        # All of them are still screening. The worker retires once it's done.
+        for _ in range(4):
+            limit.acquire()
+        configuration = tuner.observe(consumers, tuner.profileAfter)
+    assert configuration["workers"] == 3
+    assert configuration["rssPerWorker"] == 500 * MB
+    assert configuration["cpuUtilisation"] == 1
+    assert tuner.activeWorkers == 4
+    limit.release()
+    tuner.observe(consumers, tuner.profileAfter + 1)
+    assert tuner.activeWorkers == 3
+    assert not limit.acquire(blocking=False)
+
+def test_observe_adds_workers_for_io_bound_scans(tuner):
+    consumers = [MagicMock(pid=pid) for pid in [201, 202]]
+    for consumer in consumers:
+        writeProcess(tuner.procRoot, consumer.pid, 100, 0)
+    limit = threading.Semaphore(2)
+    spawnWorker = MagicMock(side_effect=lambda: consumers.append(MagicMock(pid=None)))
+    with patch("os.sched_getaffinity", return_value=set(range(2))), \
+         patch("pkscreener.classes.PKWorkerTuner.time.time", side_effect=[1000, 1010]):
+        tuner.beginScan(consumers, limit, 1000)
+        # 1s of CPU over 10s for each of the 2 workers
+        for consumer in consumers:
+            writeProcess(tuner.procRoot, consumer.pid, 100, os.sysconf("SC_CLK_TCK"))
+        configuration = tuner.observe(consumers, tuner.profileAfter, spawnWorker)
+    assert configuration["workers"] == 8
+    assert round(configuration["cpuUtilisation"], 2) == 0.1
+    assert spawnWorker.call_count == 6
+    assert len(consumers) == 8
+    assert tuner.activeWorkers == 8
+    for _ in range(8):
+        assert limit.acquire(blocking=False)
+
+def test_small_scans_are_not_tuned(tuner):
+    consumers = [MagicMock(pid=301), MagicMock(pid=302)]
+    tuner.beginScan(consumers, threading.Semaphore(2), 20)
+    assert tuner.observe(consumers, 20) is None
+    tuner.beginScan(consumers, None, 1000)
+    assert tuner.observe(consumers, 1000) is None
+
+def test_screenStocksWithinLimits_holds_a_permit_while_screening():
+    limit = threading.Semaphore(1)
+    hostRef = MagicMock(activeWorkersLimit=limit)
+    screener = StockScreener()
+    permitsWhileScreening = []
+    def screenStocks(*args, **kwargs):
+        permitsWhileScreening.append(limit.acquire(blocking=False))
+        return "SBIN"
+    with patch.object(screener, "screenStocks", side_effect=screenStocks):
+        assert screener.screenStocksWithinLimits("X", "INDIA", hostRef) == "SBIN"
+        assert screener.screenStocksWithinLimits("X", "INDIA", hostRef=MagicMock(activeWorkersLimit=None)) == "SBIN"
+    assert permitsWhileScreening == [False, True]
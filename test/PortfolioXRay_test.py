@@ -311,80 +311,86 @@ def test_cleanFormattingForStatsData_no_df():
     assert result is None
 
 
+def expectedValues(df, periods, key):
+    # The sums for one strategy, computed the straightforward way
+    sums = {"LTP": df["LTP"].sum()}
+    for period in periods:
+        sums[f"LTP{period}"] = df[f"LTP{period}"].sum()
+        sums[f"Growth{period}"] = df[f"Growth{period}"].sum()
+    return calculatedValuesFromSums(key, sums, periods)
+
+def strategyRows(saveResults, key):
+    if key == "NoFilter":
+        return saveResults
+    return filterPattern(saveResults, key) if key.startswith("[P]") else strategyForKey(key)(saveResults)
+
 def test_getBacktestDataFromCleanedData_no_df(args):
-    saveResults = pd.DataFrame({"LTP": [11, 22, 33], "LTP1": [10, 20, 30], "Growth1": [0.1, 0.2, 0.3], "Pattern": ["A", "B", "C"]})
-    period = 1
+    saveResults = cleanupData(xRayBacktestData())
+    periods = [1, 2]
     
-    with patch('pkscreener.classes.PortfolioXRay.statScanCalculationForRSI') as mock_statScanCalculationForRSI, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForTrend') as mock_statScanCalculationForTrend, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForMA') as mock_statScanCalculationForMA, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForVol') as mock_statScanCalculationForVol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForConsol') as mock_statScanCalculationForConsol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForBO') as mock_statScanCalculationForBO, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationFor52Wk') as mock_statScanCalculationFor52Wk, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForCCI') as mock_statScanCalculationForCCI:
-
-        result = getBacktestDataFromCleanedData(args, saveResults, df=None, period=period)
-        
-        assert isinstance(result, pd.DataFrame)
-        assert len(result) == len(saveResults)+1
-        assert f"LTP{period}" not in result.columns
-        assert f"Growth{period}" not in result.columns
+    result = getBacktestDataFromCleanedData(args, saveResults, df=None, periods=periods)
+    
+    assert isinstance(result, pd.DataFrame)
+    keys = [key for key, _ in xRayFilterStrategies()]
+    assert result["ScanType"].tolist() == keys + ["[P]No Pattern", "[P]Doji", "NoFilter"]
+    for period in periods:
         assert f"{period}Pd-%" in result.columns
         assert f"{period}Pd-10k" in result.columns
-        assert "Pattern" not in result.columns
-        assert "ScanType" in result.columns
-        assert result["ScanType"].tolist() == ["[P]A", "[P]B", "[P]C", "NoFilter"]
+    assert "Pattern" not in result.columns
+    noFilter = result[result["ScanType"] == "NoFilter"].iloc[0].to_dict()
+    assert noFilter == expectedValues(saveResults, periods, "NoFilter")
 
 def test_getBacktestDataFromCleanedData_with_df(args):
-    saveResults = pd.DataFrame({"LTP": [11, 22, 33], "LTP1": [10, 20, 30], "Growth1": [0.1, 0.2, 0.3], "Pattern": ["A", "B", "C"]})
-    period = 1
-    df = pd.DataFrame({"Pattern": ["D", "E", "F"]})
-    with patch('pkscreener.classes.PortfolioXRay.statScanCalculationForRSI') as mock_statScanCalculationForRSI, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForTrend') as mock_statScanCalculationForTrend, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForMA') as mock_statScanCalculationForMA, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForVol') as mock_statScanCalculationForVol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForConsol') as mock_statScanCalculationForConsol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForBO') as mock_statScanCalculationForBO, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationFor52Wk') as mock_statScanCalculationFor52Wk, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForCCI') as mock_statScanCalculationForCCI:
-
-        result = getBacktestDataFromCleanedData(args, saveResults, df=df, period=period)
+    saveResults = cleanupData(xRayBacktestData())
+    periods = [1]
+    numStrategies = len(xRayFilterStrategies()) + 3
+    df = pd.DataFrame({"ScanType": [f"S{i}" for i in range(numStrategies)]})
     
-        assert isinstance(result, pd.DataFrame)
-        assert len(result) == len(saveResults)+1
-        assert f"LTP{period}" not in result.columns
-        assert f"Growth{period}" not in result.columns
-        assert f"{period}Pd-%" in result.columns
-        assert f"{period}Pd-10k" in result.columns
-        assert "Pattern" in result.columns
-        assert "ScanType" not in result.columns
-        assert result["Pattern"].tolist()[:-1] == ["D", "E", "F"]
+    result = getBacktestDataFromCleanedData(args, saveResults, df=df, periods=periods)
+    
+    assert result["ScanType"].tolist() == df["ScanType"].tolist()
+    assert "1Pd-%" in result.columns and "1Pd-10k" in result.columns
+    assert "1Pd-PFV" not in result.columns
 
 def test_getBacktestDataFromCleanedData_no_pattern(args):
-    saveResults = pd.DataFrame({"LTP": [11, 22, 33], "LTP1": [10, 20, 30], "Growth1": [0.1, 0.2, 0.3], "Pattern": [None, "", "C"]})
-    period = 1
+    savedResults = xRayBacktestData()
+    savedResults["Pattern"] = ["", "", "Doji", "", "Doji", ""]
+    saveResults = cleanupData(savedResults)
     
-    with patch('pkscreener.classes.PortfolioXRay.statScanCalculationForRSI') as mock_statScanCalculationForRSI, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForTrend') as mock_statScanCalculationForTrend, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForMA') as mock_statScanCalculationForMA, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForVol') as mock_statScanCalculationForVol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForConsol') as mock_statScanCalculationForConsol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForBO') as mock_statScanCalculationForBO, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationFor52Wk') as mock_statScanCalculationFor52Wk, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForCCI') as mock_statScanCalculationForCCI:
-
-        result = getBacktestDataFromCleanedData(args, saveResults, df=None, period=period)
-        
-        assert isinstance(result, pd.DataFrame)
-        assert len(result) == len(saveResults)
-        assert f"LTP{period}" not in result.columns
-        assert f"Growth{period}" not in result.columns
-        assert f"{period}Pd-%" in result.columns
-        assert f"{period}Pd-10k" in result.columns
-        assert "Pattern" not in result.columns
-        assert "ScanType" in result.columns
-        assert result["ScanType"].tolist() == ["[P]No Pattern", "[P]C", "NoFilter"]
+    result = getBacktestDataFromCleanedData(args, saveResults, df=None, periods=[1])
+    
+    assert result["ScanType"].tolist()[-3:] == ["[P]No Pattern", "[P]Doji", "NoFilter"]
+    noPattern = result[result["ScanType"] == "[P]No Pattern"].iloc[0].to_dict()
+    assert noPattern == expectedValues(saveResults[saveResults["Pattern"] == ""], [1], "[P]No Pattern")
+
+def test_groupedStatScanCalculations_match_each_date(args):
+    saveResults = cleanupData(xRayBacktestData())
+    periods = tools().periodsRange
+    for period in periods:
+        saveResults[f"LTP{period}"] = saveResults[f"LTP{period}"].astype(float)
+        saveResults[f"Growth{period}"] = saveResults[f"Growth{period}"].astype(float)
+    
+    result = groupedStatScanCalculations(args, saveResults, periods)
+    
+    assert sorted(set(scanResult["Date"] for scanResult in result)) == ["2024-01-10", "2024-01-11"]
+    for scanResult in result:
+        onDate = saveResults[saveResults["Date"] == scanResult["Date"]]
+        rows = strategyRows(onDate, scanResult["ScanType"])
+        assert {key: value for key, value in scanResult.items() if key != "Date"} == expectedValues(rows, periods, scanResult["ScanType"])
+
+def test_groupedStatScanCalculations_update_the_portfolios_for_backtests():
+    saveResults = cleanupData(xRayBacktestData())
+    periods = [1]
+    userArgs = argparse.Namespace(options="B:30:12:9")
+    with patch("pkscreener.classes.PortfolioXRay.configManager.enablePortfolioCalculations", True), \
+         patch("pkscreener.classes.PortfolioXRay.updatePortfolioForStrategy") as mockUpdatePortfolio:
+        result = groupedStatScanCalculations(userArgs, saveResults, periods)
+    assert mockUpdatePortfolio.call_count == len(result)
+    for (portfolioRows, key), _ in mockUpdatePortfolio.call_args_list:
+        assert len(portfolioRows["Date"].unique()) <= 1
+        date = portfolioRows["Date"].iloc[0] if len(portfolioRows) > 0 else None
+        if date is not None:
+            assert portfolioRows.index.tolist() == strategyRows(saveResults[saveResults["Date"] == date], key).index.tolist()
 
 @pytest.fixture
 def savedResults():
@@ -451,202 +457,38 @@ def saveResults():
     return None
 
 def test_statScanCalculations(args, saveResults):
-    period = 30
-    scanResults = []
-    
-    with patch('pkscreener.classes.PortfolioXRay.statScanCalculationForRSI') as mock_statScanCalculationForRSI, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForTrend') as mock_statScanCalculationForTrend, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForMA') as mock_statScanCalculationForMA, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForVol') as mock_statScanCalculationForVol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForConsol') as mock_statScanCalculationForConsol, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForBO') as mock_statScanCalculationForBO, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationFor52Wk') as mock_statScanCalculationFor52Wk, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForCCI') as mock_statScanCalculationForCCI, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForPatterns') as mock_statScanCalculationForPatterns, \
-        patch('pkscreener.classes.PortfolioXRay.statScanCalculationForNoFilter') as mock_statScanCalculationForNoFilter:
-        
-        result = statScanCalculations(args, saveResults, period)
-        
-        assert result == scanResults
-        mock_statScanCalculationForRSI.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForTrend.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForMA.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForVol.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForConsol.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForBO.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationFor52Wk.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForCCI.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForPatterns.assert_called_once_with(args, saveResults, period, scanResults)
-        mock_statScanCalculationForNoFilter.assert_called_once_with(args, saveResults, period, scanResults)
-
-
-def test_statScanCalculationForCCI(args, saveResults):
-    period = 30
-    scanResults = []
-    
-    with patch('pkscreener.classes.PortfolioXRay.filterCCIBelowMinus100') as mock_filterCCIBelowMinus100, \
-         patch('pkscreener.classes.PortfolioXRay.filterCCIBelow0') as mock_filterCCIBelow0, \
-         patch('pkscreener.classes.PortfolioXRay.filterCCI0To100') as mock_filterCCI0To100, \
-         patch('pkscreener.classes.PortfolioXRay.filterCCI100To200') as mock_filterCCI100To200, \
-         patch('pkscreener.classes.PortfolioXRay.filterCCIAbove200') as mock_filterCCIAbove200, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForCCI(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterCCIBelowMinus100.assert_called_once_with(saveResults)
-        mock_filterCCIBelow0.assert_called_once_with(saveResults)
-        mock_filterCCI0To100.assert_called_once_with(saveResults)
-        mock_filterCCI100To200.assert_called_once_with(saveResults)
-        mock_filterCCIAbove200.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 5
-
-
-def test_statScanCalculationFor52Wk(args, saveResults):
-    period = 30
-    scanResults = []
+    saveResults = cleanupData(xRayBacktestData())
+    periods = tools().periodsRange
+    for period in periods:
+        saveResults[f"LTP{period}"] = saveResults[f"LTP{period}"].astype(float)
+        saveResults[f"Growth{period}"] = saveResults[f"Growth{period}"].astype(float)
+    _, values = returnsMatrix(saveResults, periods)
     
-    with patch('pkscreener.classes.PortfolioXRay.filterLTPMoreOREqual52WkH') as mock_filterLTPMoreOREqual52WkH, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPWithin90Percent52WkH') as mock_filterLTPWithin90Percent52WkH, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPLess90Percent52WkH') as mock_filterLTPLess90Percent52WkH, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPMore52WkL') as mock_filterLTPMore52WkL, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPWithin90Percent52WkL') as mock_filterLTPWithin90Percent52WkL, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPLess52WkL') as mock_filterLTPLess52WkL, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationFor52Wk(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterLTPMoreOREqual52WkH.assert_called_once_with(saveResults)
-        mock_filterLTPWithin90Percent52WkH.assert_called_once_with(saveResults)
-        mock_filterLTPLess90Percent52WkH.assert_called_once_with(saveResults)
-        mock_filterLTPMore52WkL.assert_called_once_with(saveResults)
-        mock_filterLTPWithin90Percent52WkL.assert_called_once_with(saveResults)
-        mock_filterLTPLess52WkL.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 6
-
-
-def test_statScanCalculationForBO(args, saveResults):
-    period = 30
-    scanResults = []
+    result = statScanCalculations(args, saveResults, periods)
     
-    with patch('pkscreener.classes.PortfolioXRay.filterLTPLessThanBreakout') as mock_filterLTPLessThanBreakout, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPMoreOREqualBreakout') as mock_filterLTPMoreOREqualBreakout, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPLessThanResistance') as mock_filterLTPLessThanResistance, \
-         patch('pkscreener.classes.PortfolioXRay.filterLTPMoreOREqualResistance') as mock_filterLTPMoreOREqualResistance, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForBO(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterLTPLessThanBreakout.assert_called_once_with(saveResults)
-        mock_filterLTPMoreOREqualBreakout.assert_called_once_with(saveResults)
-        mock_filterLTPLessThanResistance.assert_called_once_with(saveResults)
-        mock_filterLTPMoreOREqualResistance.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 4
-
+    keys = [key for key, _ in xRayFilterStrategies()]
+    assert [scanResult["ScanType"] for scanResult in result] == keys + ["[P]No Pattern", "[P]Doji", "NoFilter"]
+    for scanResult in result:
+        assert scanResult == expectedValues(strategyRows(saveResults, scanResult["ScanType"]), periods, scanResult["ScanType"])
 
-def test_statScanCalculationForConsol(args, saveResults):
-    period = 30
-    scanResults = []
+def test_strategyMaskMatrix():
+    saveResults = cleanupData(xRayBacktestData())
     
-    with patch('pkscreener.classes.PortfolioXRay.filterConsolidating10Percent') as mock_filterConsolidating10Percent, \
-         patch('pkscreener.classes.PortfolioXRay.filterConsolidatingMore10Percent') as mock_filterConsolidatingMore10Percent, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForConsol(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterConsolidating10Percent.assert_called_once_with(saveResults)
-        mock_filterConsolidatingMore10Percent.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 2
-
-
-def test_statScanCalculationForVol(args, saveResults):
-    period = 30
-    scanResults = []
-    
-    with patch('pkscreener.classes.PortfolioXRay.filterVolumeLessThan25') as mock_filterVolumeLessThan25, \
-         patch('pkscreener.classes.PortfolioXRay.filterVolumeMoreThan25') as mock_filterVolumeMoreThan25, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForVol(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterVolumeLessThan25.assert_called_once_with(saveResults)
-        mock_filterVolumeMoreThan25.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 2
-
-
-def test_statScanCalculationForMA(args, saveResults):
-    period = 30
-    scanResults = []
+    keys, masks = strategyMaskMatrix(saveResults)
     
-    with patch('pkscreener.classes.PortfolioXRay.filterMASignalBullish') as mock_filterMASignalBullish, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalBearish') as mock_filterMASignalBearish, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalNeutral') as mock_filterMASignalNeutral, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalBullCross') as mock_filterMASignalBullCross, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalBearCross') as mock_filterMASignalBearCross, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalSupport') as mock_filterMASignalSupport, \
-         patch('pkscreener.classes.PortfolioXRay.filterMASignalResist') as mock_filterMASignalResist, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForMA(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterMASignalBullish.assert_called_once_with(saveResults)
-        mock_filterMASignalBearish.assert_called_once_with(saveResults)
-        mock_filterMASignalNeutral.assert_called_once_with(saveResults)
-        mock_filterMASignalBullCross.assert_called_once_with(saveResults)
-        mock_filterMASignalBearCross.assert_called_once_with(saveResults)
-        mock_filterMASignalSupport.assert_called_once_with(saveResults)
-        mock_filterMASignalResist.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 7
-
-
-def test_statScanCalculationForTrend(args, saveResults):
-    period = 30
-    scanResults = []
+    assert masks.shape == (len(keys), len(saveResults))
+    assert masks[keys.index("NoFilter")].all()
+    assert masks[keys.index("[T]StrongUp")].tolist() == [True, False, False, True, False, False]
+    assert masks[keys.index("[P]Doji")].tolist() == [False, True, True, False, True, True]
+    assert masks[keys.index("[MA]BearCross")].tolist() == [False, True, False, False, True, False]
+
+def test_returnsMatrix():
+    saveResults = pd.DataFrame({"LTP": [10.0, 20.0], "LTP1": [11.0, np.nan], "Growth1": [1.0, np.nan]})
     
-    with patch('pkscreener.classes.PortfolioXRay.filterTrendStrongUp') as mock_filterTrendStrongUp, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendWeakUp') as mock_filterTrendWeakUp, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendUp') as mock_filterTrendUp, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendStrongDown') as mock_filterTrendStrongDown, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendWeakDown') as mock_filterTrendWeakDown, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendSideways') as mock_filterTrendSideways, \
-         patch('pkscreener.classes.PortfolioXRay.filterTrendDown') as mock_filterTrendDown, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForTrend(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterTrendStrongUp.assert_called_once_with(saveResults)
-        mock_filterTrendWeakUp.assert_called_once_with(saveResults)
-        mock_filterTrendUp.assert_called_once_with(saveResults)
-        mock_filterTrendStrongDown.assert_called_once_with(saveResults)
-        mock_filterTrendWeakDown.assert_called_once_with(saveResults)
-        mock_filterTrendSideways.assert_called_once_with(saveResults)
-        mock_filterTrendDown.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 7
-
-
-def test_statScanCalculationForRSI(args, saveResults):
-    period = 30
-    scanResults = []
+    columns, values = returnsMatrix(saveResults, [1])
     
-    with patch('pkscreener.classes.PortfolioXRay.filterRSIAbove50') as mock_filterRSIAbove50, \
-         patch('pkscreener.classes.PortfolioXRay.filterRSI50To67') as mock_filterRSI50To67, \
-         patch('pkscreener.classes.PortfolioXRay.filterRSI68OrAbove') as mock_filterRSI68OrAbove, \
-         patch('pkscreener.classes.PortfolioXRay.getCalculatedValues') as mock_getCalculatedValues:
-        
-        result = statScanCalculationForRSI(args, saveResults, period, scanResults)
-        
-        assert result == scanResults
-        mock_filterRSIAbove50.assert_called_once_with(saveResults)
-        mock_filterRSI50To67.assert_called_once_with(saveResults)
-        mock_filterRSI68OrAbove.assert_called_once_with(saveResults)
-        assert mock_getCalculatedValues.call_count == 3
-
+    assert columns == ["LTP", "LTP1", "Growth1"]
+    assert values.tolist() == [[10.0, 11.0, 1.0], [20.0, 0.0, 0.0]]
 
 def test_formatGridOutput():
     df = pd.DataFrame({
@@ -884,3 +726,40 @@ def test_filterLTPMore52WkL(df):
 def df():
     return None
 
+
+def xRayBacktestData():
+    periods = tools().periodsRange
+    rows = []
+    for dateIndex, date in enumerate(["2024-01-10", "2024-01-11"]):
+        for stockIndex, (trend, maSignal, pattern) in enumerate([("Strong Up", "Bullish", ""),
+                                                                 ("Weak Down", "BearCross-200MA", "Doji"),
+                                                                 ("Sideways", "50MA-Support", "Doji")]):
+            ltp = 100.0 + 10 * stockIndex + dateIndex
+            # The backtests keep the plain saved values
+            row = {"Stock": f"S{stockIndex}", "Date": date, "Volume": 1.5 + stockIndex,
+                   "Trend": trend, "MA-Signal": maSignal,
+                   "LTP": ltp, "52Wk-H": str(ltp * 1.05),
+                   "52Wk-L": str(ltp * 0.8), "Consol.": f"Range:{5 + 5 * stockIndex}%",
+                   "Breakout": f"BO: {ltp - 1} R: {ltp + 2}", "RSI": str(45 + 10 * stockIndex),
+                   "Pattern": pattern, "CCI": str(-150 + 100 * stockIndex)}
+            for period in periods:
+                growth = (stockIndex - 1) * period + dateIndex
+                row[f"LTP{period}"] = ltp + growth
+                row[f"Growth{period}"] = growth
+                row[f"{period}-Pd"] = round(float(growth), 2)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def test_performGroupedXRay_no_savedResults():
+    assert performGroupedXRay(None) is None
+    assert performGroupedXRay(pd.DataFrame()) is None
+
+def test_performGroupedXRay_matches_performXRay_for_each_date():
+    backtest_df = xRayBacktestData()
+    expected = None
+    for calcForDate, df_group in backtest_df.groupby("Date"):
+        df = performXRay(df_group, None, calcForDate, "").drop_duplicates()
+        expected = df if expected is None else pd.concat([expected, df], axis=0)
+    result = performGroupedXRay(backtest_df)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+    assert result[result["Date"] == "2024-01-10"]["ScanType"].tolist()[-3:] == ["[P]No Pattern", "[P]Doji", "NoFilter"]
@@ -0,0 +1,86 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+
+import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from PKDevTools.classes.ColorText import colorText
+
+from pkscreener.classes.Portfolio import Portfolio, PortfolioCollection
+
+def nextTradingDate(d1, days=1):
+    return datetime.datetime.strptime(d1, "%Y-%m-%d") + datetime.timedelta(days=days)
+
+@pytest.fixture
+def xray_df():
+    return pd.DataFrame({"Stock": ["TCS", "SBIN", "INFY"],
+                         "Date": ["2024-01-10", "2024-01-10", "2024-01-10"],
+                         "LTP": [100.0, 200.0, 0.0],
+                         "LTP1": [110.0, 190.0, 50.0],
+                         "LTP2": [105.0, 210.0, 55.0]})
+
+def test_updatePortfolioFromXRayDataFrame(xray_df):
+    portfolio = Portfolio("Test")
+    with patch("PKDevTools.classes.PKDateUtilities.PKDateUtilities.nextTradingDate", new=nextTradingDate):
+        portfolio.updatePortfolioFromXRayDataFrame(xray_df, [1, 2])
+    ledger_df = portfolio.ledgerAsDataframe
+    # SBIN is bought and sold in period 1 and bought again in period 2. TCS is bought in period 1 and sold
+    # in period 2. INFY has no LTP. Entries are grouped by the date on which they were first recorded.
+    assert ledger_df["Name"].tolist() == ["SBIN", "TCS", "SBIN", "SBIN", "TCS"]
+    assert ledger_df["Date"].tolist() == ["2024-01-10", "2024-01-10", "2024-01-10", "2024-01-11", "2024-01-12"]
+    assert ledger_df["Quantity"].tolist() == [1, 1, 1, -1, -1]
+    assert ledger_df["Growth"].tolist() == [0.0, 0.0, 0.0, -10.0, -5.0]
+    assert ledger_df["Profits"].tolist() == [0.0, 0.0, 0.0, -10.0, -15.0]
+    assert ledger_df["Drawdown"].tolist() == [0.0, 0.0, 0.0, 10.0, 15.0]
+    assert list(portfolio.securities.keys()) == ["SBIN"]
+    assert portfolio.securities["SBIN"].ltp == 200.0
+
+def test_ledgerAsDataframe_keeps_entries_grouped_by_date():
+    portfolio = Portfolio("Test")
+    portfolio.ledgerColumns = {"Date": ["2024-01-10", "2024-01-11", "2024-01-10"], "Name": ["A", "B", "C"],
+                               "LTP": [10.0, 20.0, 30.0], "Quantity": [1, 0, -1], "Growth": [5.0, -8.0, 1.0]}
+    ledger_df = portfolio.ledgerAsDataframe
+    assert ledger_df["Name"].tolist() == ["A", "C", "B"]
+    assert ledger_df["RunningTotal"].tolist() == [10.0, -20.0, -20.0]
+    assert ledger_df["Drawdown"].tolist() == [0.0, 0.0, 8.0]
+    description_df = portfolio.descriptionAsDataframe
+    assert description_df["Action"].tolist() == [colorText.GREEN + "[Buy]" + colorText.END,
+                                                 colorText.FAIL + "[Sell]" + colorText.END,
+                                                 colorText.WARN + "[Hold]" + colorText.END]
+    assert "Drawdown" not in description_df.columns
+    assert Portfolio("Empty").ledgerAsDataframe is None
+
+def test_PortfolioCollection_exposes_numeric_and_textual_ledgers(xray_df):
+    portfolio = Portfolio("[T]Collection")
+    with patch("PKDevTools.classes.PKDateUtilities.PKDateUtilities.nextTradingDate", new=nextTradingDate):
+        portfolio.updatePortfolioFromXRayDataFrame(xray_df, [1, 2])
+    PortfolioCollection().addPortfolio(portfolio)
+    ledgers_df = PortfolioCollection().ledgersAsDataframe
+    portfolios_df = PortfolioCollection().portfoliosAsDataframe
+    collected = ledgers_df[ledgers_df["ScanType"] == "[T]Collection"]
+    assert collected["Profits"].tolist()[-1] == -15.0
+    assert len(portfolios_df[portfolios_df["ScanType"] == "[T]Collection"]) == len(collected)
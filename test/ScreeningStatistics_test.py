@@ -31,6 +31,7 @@ warnings.simplefilter("ignore", DeprecationWarning)
 warnings.simplefilter("ignore", FutureWarning)
 import pandas as pd
 import pytest
+from conftest import stockCache
 from PKDevTools.classes.log import default_logger as dl
 from PKDevTools.classes.ColorText import colorText
 import pkscreener.classes.ConfigManager as ConfigManager
@@ -3019,4 +3020,60 @@ def test_validateVolumeSpreadAnalysis_spread0_lessthan_spread1(mock_data, mock_s
     mock_data.loc[1, "Volume"] = mock_data["Volume"].iloc[0] -1000
     assert tools_instance.validateVolumeSpreadAnalysis(mock_data, mock_screen_dict, mock_save_dict) == True
     assert mock_screen_dict.get("Pattern") == colorText.GREEN + "Demand Rise" + colorText.END 
-    assert mock_save_dict.get("Pattern") == 'Demand Rise'
\ No newline at end of file
+    assert mock_save_dict.get("Pattern") == 'Demand Rise'
+
+def rollingExtremesCandles(i, df):
+    if i % 4 == 0:
+        df.iloc[-20, df.columns.get_loc("High")] = np.nan
+    return df
+
+def rollingExtremesStocks(numSymbols, seed=0):
+    return stockCache(numSymbols, (150, 400), seed, alter=rollingExtremesCandles, split=False).values()
+
+def test_rollingExtreme_matches_describe(tools_instance):
+    for df in rollingExtremesStocks(20):
+        fullData, processedData = tools_instance.preprocessData(df, daysToLookback=22)
+        assert "MaxHigh21" in fullData.columns and "MinLow251" in fullData.columns
+        candles = fullData.head(231)
+        for window, column, stat in [(processedData[1:], "High", "max"), (processedData[1:], "Close", "max"),
+                                     (processedData, "Close", "min"), (candles.head(201).tail(200), "High", "max"),
+                                     (candles.tail(200), "High", "max"), (candles.head(39).tail(8), "High", "max"),
+                                     (fullData.head(251), "Low", "min"), (fullData.tail(-5).head(250), "High", "max")]:
+            expected = window.fillna(0).describe()[column][stat]
+            assert tools_instance.rollingExtreme(window, column, stat=stat) == pytest.approx(expected)
+            # Without the rolling extremes of preprocessData
+            assert tools_instance.rollingExtreme(window[[column]], column, stat=stat) == pytest.approx(expected)
+    assert np.isnan(tools_instance.rollingExtreme(pd.DataFrame({"High": []}), "High"))
+
+def test_screeners_give_the_same_results_with_the_rolling_extremes(tools_instance):
+    for df in rollingExtremesStocks(30, seed=1):
+        fullData, processedData = tools_instance.preprocessData(df, daysToLookback=22)
+        extremeColumns = [column for column in fullData.columns if column.startswith("Max") or column.startswith("Min")]
+        results = []
+        for full, processed in [(fullData, processedData), (fullData.drop(columns=extremeColumns), processedData.drop(columns=extremeColumns))]:
+            screenDict, saveDict = {}, {}
+            results.append((tools_instance.findBreakoutValue(processed, screenDict, saveDict, daysToLookback=22),
+                            tools_instance.validateConsolidation(processed, screenDict, saveDict, percentage=10),
+                            tools_instance.find52WeekHighLow(full, saveDict, screenDict),
+                            tools_instance.find52WeekHighBreakout(full), tools_instance.find52WeekLowBreakout(full),
+                            tools_instance.findPotentialBreakout(full, screenDict, saveDict, daysToLookback=22),
+                            screenDict, saveDict))
+        assert results[0] == results[1]
+
+@pytest.mark.benchmark
+def test_rollingExtreme_benchmark(tools_instance, capsys):
+    import time
+    frames = [tools_instance.preprocessData(df, daysToLookback=22) for df in rollingExtremesStocks(200, seed=2)]
+    start = time.perf_counter()
+    for fullData, processedData in frames:
+        data = processedData.fillna(0)[1:]
+        data.describe()["High"]["max"], data.describe()["Close"]["max"]
+        processedData.fillna(0).describe()["Close"]["max"], processedData.fillna(0).describe()["Close"]["min"]
+    describeTime = (time.perf_counter() - start) / len(frames)
+    start = time.perf_counter()
+    for fullData, processedData in frames:
+        tools_instance.rollingExtreme(processedData[1:], "High"), tools_instance.rollingExtreme(processedData[1:], "Close")
+        tools_instance.rollingExtreme(processedData, "Close"), tools_instance.rollingExtreme(processedData, "Close", stat="min")
+    extremesTime = (time.perf_counter() - start) / len(frames)
+    with capsys.disabled():
+        print(f"\n[+] Breakout/consolidation extremes per stock: describe() {describeTime*1000:.3f}ms, rolling extremes {extremesTime*1000:.3f}ms")
@@ -36,6 +36,7 @@ from PKDevTools.classes import Archiver
 from PKDevTools.classes.ColorText import colorText
 from PKDevTools.classes.PKDateUtilities import PKDateUtilities
 from pkscreener.classes.Utility import tools
+from pkscreener.classes.PKCompressedCache import PKCompressedCache
 
 
 # Positive test case for clearScreen() function
@@ -270,11 +271,11 @@ def test_saveStockData():
         "pkscreener.classes.Utility.tools.afterMarketStockDataExists"
     ) as mock_data:
         mock_data.return_value = False, "stock_data_1.pkl"
-        mock_pickle = Mock()
-        with patch("pickle.dump", mock_pickle) as mock_dump:
-            tools.saveStockData(stockDict, configManager, loadCount)
-            # Assert that pickle.dump() is called with the correct arguments
-            mock_dump.assert_called_once()
+        tools.saveStockData(stockDict, configManager, loadCount)
+        # Local caches get saved in the compressed format
+        cache_file = os.path.join(Archiver.get_user_outputs_dir(), "stock_data_1.pkl")
+        assert PKCompressedCache.isCompressed(cache_file)
+        assert PKCompressedCache.load(cache_file) == stockDict
     os.remove(os.path.join(Archiver.get_user_outputs_dir(), "stock_data_1.pkl"))
 
 
@@ -368,3 +368,18 @@ def test_backtestSummary_2row_summary():
 
     assert isinstance(result, pd.DataFrame)
     assert len(result) == 2
+
+def test_backtestSummary_counts_the_right_predictions():
+    df = pd.DataFrame({
+        "Stock": ["AAPL", "AAPL", "MSFT"],
+        "Date": ["2024-01-01", "2024-01-02", "2024-01-01"],
+        "1-Pd": [1.5, -0.5, 0.0],
+        "2-Pd": [-2.0, -1.0, ""],
+    })
+    summary = backtestSummary(df.copy())
+    assert summary["1-Pd"].iloc[-1] == f"{Utility.tools.formattedBacktestOutput(200/3)} of (3)"
+    assert summary["2-Pd"].iloc[-1] == f"{Utility.tools.formattedBacktestOutput(0)} of (2)"
+    # Falling prices are the right predictions for the sell signals
+    summary = backtestSummary(df.copy(), sellSignal=True)
+    assert summary["2-Pd"].iloc[-1] == f"{Utility.tools.formattedBacktestOutput(100)} of (2)"
+    assert summary["Overall"].iloc[-1] == f"{Utility.tools.formattedBacktestOutput(60)} of (5)"
@@ -0,0 +1,84 @@
+"""
+    The MIT License (MIT)
+
+    Copyright (c) 2023 pkjmesra
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy
+    of this software and associated documentation files (the "Software"), to deal
+    in the Software without restriction, including without limitation the rights
+    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+    copies of the Software, and to permit persons to whom the Software is
+    furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmarks", action="store_true", default=False, help="Also run the tests marked as benchmark")
+
+def pytest_collection_modifyitems(config, items):
+    # The wall-clock benchmarks only run when asked for
+    if config.getoption("--benchmarks"):
+        return
+    skipBenchmark = pytest.mark.skip(reason="benchmark, run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skipBenchmark)
+
+def candles(numCandles=250, seed=0, rng=None, close=None, drift=0.0, volatility=0.02, gap=0.0, spread=0.01,
+            index=None, start=None, end="2024-06-28", freq="B", tz=None, adjClose=False):
+    """
+    Random walk OHLCV candles for the tests with the oldest candle at the top.
+    volatility and spread may be (low, high) ranges to pick them from. Pass
+    close to use a close series of your own instead of the random walk, and
+    index to use candle times of your own instead of freq from start or up
+    to end.
+    """
+    rng = np.random.default_rng(seed) if rng is None else rng
+    volatility = rng.uniform(*volatility) if isinstance(volatility, tuple) else volatility
+    spread = rng.uniform(*spread) if isinstance(spread, tuple) else spread
+    if close is None:
+        close = 100 * np.exp(np.cumsum(rng.normal(drift, volatility, numCandles)))
+    numCandles = len(close)
+    opens = close * (1 + rng.normal(0, gap, numCandles)) if gap > 0 else close
+    if index is None:
+        index = pd.date_range(start=start, end=None if start is not None else end, periods=numCandles, freq=freq, tz=tz)
+    df = pd.DataFrame({"Open": opens,
+                       "High": np.maximum(opens, close) * (1 + spread),
+                       "Low": np.minimum(opens, close) * (1 - spread),
+                       "Close": close,
+                       "Volume": rng.integers(1000, 1000000, numCandles).astype(float)},
+                      index=index)
+    if adjClose:
+        df.insert(4, "Adj Close", close)
+    return df
+
+def stockCache(numSymbols, numCandles=250, seed=0, alter=None, split=True, **kwargs):
+    """
+    A stock data cache like the one Utility.tools.saveStockData saves, with
+    the stocks named STK0000 onwards. numCandles may be a (low, high) range
+    for stocks with different lengths of history. alter(i, df) may return
+    changed candles for the i-th stock. kwargs go to candles.
+    """
+    rng = np.random.default_rng(seed)
+    stockDict = {}
+    for i in range(numSymbols):
+        count = int(rng.integers(*numCandles)) if isinstance(numCandles, tuple) else numCandles
+        df = candles(count, rng=rng, **kwargs)
+        if alter is not None:
+            df = alter(i, df)
+        stockDict[f"STK{i:04d}"] = df.to_dict("split") if split else df
+    return stockDict